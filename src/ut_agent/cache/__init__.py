@@ -13,6 +13,7 @@ from ut_agent.cache.semantic_cache import (
     SimpleEmbeddingProvider,
     SimilarityConfig,
 )
+from ut_agent.cache.vector_index import VectorIndex, VectorIndexConfig
 
 __all__ = [
     "AdaptiveCache",
@@ -24,4 +25,6 @@ __all__ = [
     "EmbeddingProvider",
     "SimpleEmbeddingProvider",
     "SimilarityConfig",
+    "VectorIndex",
+    "VectorIndexConfig",
 ]
@@ -7,11 +7,14 @@ import asyncio
 import hashlib
 import logging
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple, Set
 import numpy as np
 
+from ut_agent.cache.vector_index import VectorIndex, VectorIndexConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,10 +26,14 @@ class SimilarityConfig:
         threshold: 相似度阈值（0-1）
         top_k: 返回的最大结果数
         use_faiss: 是否使用FAISS加速（如果可用）
+        ann_threshold: 缓存项数达到该值时改用 IVF 近似检索
+        ann_nprobe: IVF 检索时访问的簇数，越大召回率越高、越慢
     """
     threshold: float = 0.85
     top_k: int = 5
     use_faiss: bool = False
+    ann_threshold: int = 10000
+    ann_nprobe: int = 8
 
 
 @dataclass
@@ -121,70 +128,113 @@ class SimpleEmbeddingProvider(EmbeddingProvider):
     
     使用哈希和随机投影生成固定维度的嵌入向量。
     适用于测试和轻量级场景，不保证语义相似性。
+    
+    批量生成时一次性统计所有文本的字符与单词分桶，得到 (N, 768) 的特征
+    矩阵后只做一次矩阵乘法投影。
     """
     
-    def __init__(self, dimension: int = 384, seed: int = 42):
+    FEATURE_DIM = 768
+    CHAR_BUCKETS = 256
+    WORD_BUCKETS = 512
+    
+    def __init__(self, dimension: int = 384, seed: int = 42, cache_size: int = 10000):
         self.dimension = dimension
         self.seed = seed
+        self.cache_size = cache_size
         self._projection_matrix: Optional[np.ndarray] = None
-        self._cache: Dict[str, np.ndarray] = {}
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
         
     def _get_projection_matrix(self) -> np.ndarray:
         """获取投影矩阵（延迟初始化）."""
         if self._projection_matrix is None:
-            np.random.seed(self.seed)
-            self._projection_matrix = np.random.randn(768, self.dimension)
+            # 独立的随机状态，不影响全局随机数生成器
+            rng = np.random.RandomState(self.seed)
+            self._projection_matrix = rng.randn(self.FEATURE_DIM, self.dimension)
         return self._projection_matrix
         
+    def _texts_to_matrix(self, texts: List[str]) -> np.ndarray:
+        """将多个文本转换为 (N, 768) 特征矩阵."""
+        texts = [text.lower().strip() for text in texts]
+        rows = np.arange(len(texts), dtype=np.int64)
+        
+        # 字符级特征：所有文本的码点一次性取出，按 码点 % 256 分桶
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        codepoints = np.frombuffer("".join(texts).encode("utf-32-le"), dtype="<u4")
+        char_index = np.repeat(rows, lengths) * self.FEATURE_DIM + codepoints % self.CHAR_BUCKETS
+        
+        # 词级特征：每个不同的单词只计算一次哈希
+        buckets: Dict[str, int] = {}
+        word_rows: List[int] = []
+        word_buckets: List[int] = []
+        for row, text in enumerate(texts):
+            for word in text.split():
+                bucket = buckets.get(word)
+                if bucket is None:
+                    # 等价于 int(md5.hexdigest(), 16) % 512，只需摘要末两字节
+                    digest = hashlib.md5(word.encode()).digest()
+                    bucket = buckets[word] = int.from_bytes(digest[-2:], "big") % self.WORD_BUCKETS
+                word_rows.append(row)
+                word_buckets.append(bucket)
+        word_index = (
+            np.asarray(word_rows, dtype=np.int64) * self.FEATURE_DIM
+            + self.CHAR_BUCKETS
+            + np.asarray(word_buckets, dtype=np.int64)
+        )
+        
+        counts = np.bincount(
+            np.concatenate([char_index.astype(np.int64), word_index]),
+            minlength=len(texts) * self.FEATURE_DIM,
+        )
+        return counts.reshape(len(texts), self.FEATURE_DIM).astype(np.float64)
+        
     def _text_to_vector(self, text: str) -> np.ndarray:
         """将文本转换为向量."""
-        # 使用字符n-gram特征
-        features = np.zeros(768)
-        text = text.lower().strip()
-        
-        # 字符级特征
-        for i, char in enumerate(text):
-            idx = ord(char) % 256
-            features[idx] += 1
-            
-        # 词级特征
-        words = text.split()
-        for word in words:
-            # 使用单词哈希
-            hash_val = int(hashlib.md5(word.encode()).hexdigest(), 16)
-            idx = (hash_val % 512) + 256
-            features[idx] += 1
-            
-        return features
+        return self._texts_to_matrix([text])[0]
+        
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """批量生成归一化的嵌入矩阵."""
+        embeddings = self._texts_to_matrix(texts) @ self._get_projection_matrix()
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        
+    def _remember(self, cache_key: str, embedding: np.ndarray) -> None:
+        """写入缓存，超过上限时淘汰最久未用的项."""
+        self._cache[cache_key] = embedding
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
         
     async def get_embedding(self, text: str) -> np.ndarray:
         """获取文本的嵌入向量."""
-        # 检查缓存
-        cache_key = hashlib.md5(text.encode()).hexdigest()
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-            
-        # 生成嵌入
-        features = self._text_to_vector(text)
-        projection = self._get_projection_matrix()
-        embedding = np.dot(features, projection)
-        
-        # 归一化
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
-            
-        # 缓存结果
-        self._cache[cache_key] = embedding
-        return embedding
+        return (await self.get_embeddings_batch([text]))[0]
         
     async def get_embeddings_batch(self, texts: List[str]) -> List[np.ndarray]:
         """批量获取嵌入向量."""
-        embeddings = []
-        for text in texts:
-            embedding = await self.get_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+        keys = [hashlib.md5(text.encode()).hexdigest() for text in texts]
+        results: List[Optional[np.ndarray]] = []
+        missing: Dict[str, int] = {}
+        for key, text in zip(keys, texts):
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+            elif key not in missing:
+                missing[key] = len(missing)
+            results.append(embedding)
+            
+        if missing:
+            missing_texts = [""] * len(missing)
+            for key, text in zip(keys, texts):
+                if key in missing:
+                    missing_texts[missing[key]] = text
+            # 每行单独复制，避免缓存的行视图让整批矩阵一直驻留内存
+            computed = [row.copy() for row in self._embed(missing_texts)]
+            for key, position in missing.items():
+                self._remember(key, computed[position])
+            results = [
+                computed[missing[key]] if embedding is None else embedding
+                for key, embedding in zip(keys, results)
+            ]
+        return results
 
 
 class SemanticCache:
@@ -214,6 +264,11 @@ class SemanticCache:
         # 缓存存储
         self._cache: Dict[str, SemanticCacheEntry] = {}
         self._query_to_key: Dict[str, str] = {}  # 查询文本到缓存键的映射
+        # 嵌入向量索引，检索不持有锁，只有增删在锁内进行
+        self._index = VectorIndex(VectorIndexConfig(
+            ann_threshold=self.config.ann_threshold,
+            nprobe=self.config.ann_nprobe,
+        ))
         
         # 统计信息
         self._hit_count = 0
@@ -297,6 +352,7 @@ class SemanticCache:
             
             self._cache[key] = entry
             self._query_to_key[query] = key
+            self._index.add(key, embedding)
             
         logger.debug(f"Stored semantic cache: {query[:50]}...")
         return key
@@ -320,31 +376,27 @@ class SemanticCache:
         # 生成查询嵌入
         query_embedding = await self.embedding_provider.get_embedding(query)
         
-        async with self._lock:
-            best_match = None
-            best_similarity = threshold
-            
-            # 遍历所有缓存项查找最相似的
-            for key, entry in self._cache.items():
-                similarity = entry.calculate_similarity(query_embedding)
+        # 检索期间没有 await，不会与持锁的增删交错执行
+        best_match = None
+        for key, similarity in self._index.search(query_embedding, k=1):
+            entry = self._cache.get(key)
+            if entry is not None and similarity > threshold:
+                best_match = entry
+                best_similarity = similarity
                 
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    best_match = entry
-                    
-            if best_match:
-                best_match.record_access()
-                self._hit_count += 1
-                
-                return {
-                    "query": best_match.query,
-                    "response": best_match.response,
-                    "similarity": best_similarity,
-                    "metadata": best_match.metadata,
-                }
-            else:
-                self._miss_count += 1
-                return None
+        if best_match:
+            best_match.record_access()
+            self._hit_count += 1
+            
+            return {
+                "query": best_match.query,
+                "response": best_match.response,
+                "similarity": best_similarity,
+                "metadata": best_match.metadata,
+            }
+        else:
+            self._miss_count += 1
+            return None
                 
     async def _evict_entry(self) -> None:
         """执行缓存淘汰."""
@@ -374,6 +426,7 @@ class SemanticCache:
                 
         if key_to_evict:
             entry = self._cache.pop(key_to_evict)
+            self._index.remove(key_to_evict)
             if entry.query in self._query_to_key:
                 del self._query_to_key[entry.query]
             self._eviction_count += 1
@@ -393,6 +446,7 @@ class SemanticCache:
             if key and key in self._cache:
                 del self._cache[key]
                 del self._query_to_key[query]
+                self._index.remove(key)
                 logger.debug(f"Deleted semantic cache: {query[:50]}...")
                 return True
             return False
@@ -402,6 +456,7 @@ class SemanticCache:
         async with self._lock:
             self._cache.clear()
             self._query_to_key.clear()
+            self._index.clear()
             
         logger.info("SemanticCache cleared")
         
@@ -443,24 +498,20 @@ class SemanticCache:
         threshold = threshold or self.similarity_threshold
         query_embedding = await self.embedding_provider.get_embedding(query)
         
-        async with self._lock:
-            matches = []
-            
-            for key, entry in self._cache.items():
-                similarity = entry.calculate_similarity(query_embedding)
+        matches = []
+        
+        # 结果已按相似度降序排列
+        for key, similarity in self._index.search(query_embedding, k=top_k):
+            entry = self._cache.get(key)
+            if entry is not None and similarity >= threshold:
+                matches.append({
+                    "query": entry.query,
+                    "response": entry.response,
+                    "similarity": similarity,
+                    "metadata": entry.metadata,
+                })
                 
-                if similarity >= threshold:
-                    matches.append({
-                        "query": entry.query,
-                        "response": entry.response,
-                        "similarity": similarity,
-                        "metadata": entry.metadata,
-                    })
-                    
-            # 按相似度排序
-            matches.sort(key=lambda x: x["similarity"], reverse=True)
-            
-            return matches[:top_k]
+        return matches
             
     async def update_metadata(
         self,
@@ -0,0 +1,261 @@
+"""向量索引.
+
+语义缓存的嵌入向量保存在一个连续的、按行归一化的 NumPy 矩阵中，余弦
+相似度的 top-k 检索是一次矩阵-向量乘法。条目数超过阈值后切换为 IVF
+（倒排文件）近似索引：用球面 k-means 把向量划分到若干簇，检索时只计算
+与查询最接近的几个簇中的向量。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VectorIndexConfig:
+    """向量索引配置.
+
+    Attributes:
+        ann_threshold: 条目数达到该值时切换为 IVF 近似检索
+        nprobe: IVF 检索时访问的簇数
+        train_iterations: k-means 迭代次数
+        seed: k-means 初始化的随机种子
+    """
+    ann_threshold: int = 10000
+    nprobe: int = 8
+    train_iterations: int = 8
+    seed: int = 0
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class VectorIndex:
+    """余弦相似度向量索引.
+
+    删除时把最后一行移到被删除的位置，矩阵始终保持连续，增删都是 O(1)
+    （不计容量翻倍时的复制）。IVF 的簇中心在条目数首次达到阈值时训练，
+    之后条目数每翻一倍重新训练一次；两次训练之间新增的向量直接归入最近的簇。
+
+    Example:
+        index = VectorIndex()
+        index.add("key", embedding)
+        matches = index.search(query_embedding, k=5)
+    """
+
+    def __init__(self, config: Optional[VectorIndexConfig] = None):
+        self.config = config or VectorIndexConfig()
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._keys: List[Hashable] = []
+        self._rows: Dict[Hashable, int] = {}
+
+        # IVF 状态
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._lists: List[Set[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """向量维度（尚无向量时为 None）."""
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def is_approximate(self) -> bool:
+        """是否使用 IVF 近似检索."""
+        return self._centroids is not None
+
+    def add(self, key: Hashable, vector: np.ndarray) -> None:
+        """添加或替换向量.
+
+        Args:
+            key: 条目键
+            vector: 嵌入向量（无需归一化）
+        """
+        vector = _normalize(vector)
+        if self._matrix is None:
+            self._matrix = np.zeros((16, vector.shape[0]), dtype=np.float32)
+        elif vector.shape[0] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {vector.shape[0]} != index dimension {self._matrix.shape[1]}"
+            )
+
+        row = self._rows.get(key)
+        if row is not None:
+            self._matrix[row] = vector
+            if self._centroids is not None:
+                self._unassign(row)
+                self._assign(row)
+            return
+
+        if self._size == self._matrix.shape[0]:
+            self._grow()
+        row = self._size
+        self._matrix[row] = vector
+        self._keys.append(key)
+        self._rows[key] = row
+        self._size += 1
+
+        if self._centroids is not None:
+            self._assign(row)
+            if self._size >= 2 * self._trained_size:
+                self._train()
+        elif self._size >= self.config.ann_threshold:
+            self._train()
+
+    def remove(self, key: Hashable) -> bool:
+        """删除向量.
+
+        Args:
+            key: 条目键
+
+        Returns:
+            bool: 键是否存在
+        """
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if self._centroids is not None:
+            self._unassign(row)
+            if row != last:
+                self._unassign(last)
+        if row != last:
+            last_key = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+            if self._centroids is not None:
+                self._assignments[row] = self._assignments[last]
+                self._lists[self._assignments[row]].add(row)
+                self._list_arrays.pop(int(self._assignments[row]), None)
+        self._keys.pop()
+        self._size -= 1
+        if self._centroids is not None and self._size < self.config.ann_threshold // 2:
+            self._drop_ivf()
+        return True
+
+    def clear(self) -> None:
+        """清空索引."""
+        self.__init__(self.config)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[Hashable, float]]:
+        """检索余弦相似度最高的 k 个向量.
+
+        Args:
+            vector: 查询向量
+            k: 返回数量
+
+        Returns:
+            List[Tuple[Hashable, float]]: (键, 相似度)，按相似度降序
+        """
+        if self._size == 0 or k <= 0:
+            return []
+        query = _normalize(vector)
+        if self._centroids is None:
+            rows = None
+            scores = self._matrix[: self._size] @ query
+        else:
+            rows = self._candidate_rows(query)
+            if rows.size == 0:
+                return []
+            scores = self._matrix[rows] @ query
+
+        k = min(k, scores.shape[0])
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if rows is not None:
+            return [(self._keys[int(rows[i])], float(scores[i])) for i in top]
+        return [(self._keys[int(i)], float(scores[i])) for i in top]
+
+    def _grow(self) -> None:
+        grown = np.zeros((self._matrix.shape[0] * 2, self._matrix.shape[1]), dtype=np.float32)
+        grown[: self._size] = self._matrix[: self._size]
+        self._matrix = grown
+        if self._assignments is not None:
+            assignments = np.zeros(grown.shape[0], dtype=np.int32)
+            assignments[: self._size] = self._assignments[: self._size]
+            self._assignments = assignments
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        nprobe = min(self.config.nprobe, self._centroids.shape[0])
+        centroid_scores = self._centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        arrays = []
+        for probe in probes:
+            probe = int(probe)
+            array = self._list_arrays.get(probe)
+            if array is None:
+                array = self._list_arrays[probe] = np.fromiter(self._lists[probe], dtype=np.int64)
+            arrays.append(array)
+        return np.concatenate(arrays)
+
+    def _assign(self, row: int) -> None:
+        cluster = int(np.argmax(self._centroids @ self._matrix[row]))
+        self._assignments[row] = cluster
+        self._lists[cluster].add(row)
+        self._list_arrays.pop(cluster, None)
+
+    def _unassign(self, row: int) -> None:
+        cluster = int(self._assignments[row])
+        self._lists[cluster].discard(row)
+        self._list_arrays.pop(cluster, None)
+
+    def _train(self) -> None:
+        """训练 IVF 簇中心（球面 k-means），并重新分配全部向量."""
+        vectors = self._matrix[: self._size]
+        nlist = max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(self.config.seed)
+        sample_size = min(self._size, nlist * 64)
+        sample = vectors[rng.choice(self._size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.config.train_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 空簇保留原中心
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        assignments = np.zeros(self._matrix.shape[0], dtype=np.int32)
+        # 分块计算，避免一次性生成 n × nlist 的大矩阵
+        for start in range(0, self._size, 8192):
+            block = vectors[start:start + 8192]
+            assignments[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+
+        lists: List[Set[int]] = [set() for _ in range(nlist)]
+        for row, cluster in enumerate(assignments[: self._size].tolist()):
+            lists[cluster].add(row)
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = assignments
+        self._lists = lists
+        self._list_arrays = {}
+        self._trained_size = self._size
+        logger.info(f"Trained IVF index with {nlist} lists over {self._size} vectors")
+
+    def _drop_ivf(self) -> None:
+        self._centroids = None
+        self._assignments = None
+        self._lists = []
+        self._list_arrays = {}
+        self._trained_size = 0
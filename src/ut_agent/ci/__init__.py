@@ -6,6 +6,13 @@ from ut_agent.ci.base import (
     TestGenerationReport,
     CIReporter,
 )
+from ut_agent.ci.sharding import (
+    TestShard,
+    ShardManifest,
+    ShardPlanner,
+    estimate_durations,
+    collect_selected_tests,
+)
 from ut_agent.ci.github_actions import (
     GitHubActionsWorkflow,
     WorkflowTrigger,
@@ -29,6 +36,11 @@ __all__ = [
     "CIResult",
     "TestGenerationReport",
     "CIReporter",
+    "TestShard",
+    "ShardManifest",
+    "ShardPlanner",
+    "estimate_durations",
+    "collect_selected_tests",
     "GitHubActionsWorkflow",
     "WorkflowTrigger",
     "WorkflowJob",
@@ -8,6 +8,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from ut_agent.ci.sharding import ShardManifest, shard_test_command
+
 logger = logging.getLogger(__name__)
 
 
@@ -434,6 +436,87 @@ class GitHubActionsGenerator:
         workflow.add_job("ut-agent", job)
         return workflow
         
+    def generate_sharded_test_workflow(
+        self,
+        manifest: ShardManifest,
+        test_command: str = "pytest",
+        manifest_path: str = ".ut-agent/shards.json",
+        python_versions: Optional[List[str]] = None,
+        install_command: Optional[str] = "pip install -r requirements.txt",
+        output_format: str = "pytest",
+    ) -> GitHubActionsWorkflow:
+        """根据分片清单生成矩阵测试工作流.
+        
+        每个矩阵任务从清单中读取自己分片的测试并追加到测试命令之后，
+        分片为空时跳过测试命令。
+        
+        Args:
+            manifest: 分片清单
+            test_command: 测试命令
+            manifest_path: 清单在仓库中的路径
+            python_versions: Python 版本列表，多个版本时与分片组成矩阵
+            install_command: 安装项目依赖的命令，为空时不安装
+            output_format: 测试标识格式（pytest 或 raw）
+            
+        Returns:
+            GitHubActionsWorkflow: 工作流对象
+        """
+        python_versions = python_versions or ["3.12"]
+        
+        workflow = GitHubActionsWorkflow(
+            name="Sharded Tests",
+            on_events=["push", "pull_request"],
+        )
+        
+        # 没有分片时保留一个任务，由分片命令输出空列表后跳过
+        matrix: Dict[str, Any] = {
+            "shard": [shard.index for shard in manifest.shards] or [0],
+        }
+        if len(python_versions) > 1:
+            matrix["python-version"] = python_versions
+        
+        job = WorkflowJob(name="test (shard ${{ matrix.shard }})")
+        job.strategy = {"matrix": matrix}
+        
+        job.add_step(WorkflowStep(
+            name="Checkout code",
+            uses="actions/checkout@v4",
+        ))
+        
+        if len(python_versions) > 1:
+            job.add_step(WorkflowStep(
+                name="Setup Python ${{ matrix.python-version }}",
+                uses="actions/setup-python@v5",
+                with_={"python-version": "${{ matrix.python-version }}"},
+            ))
+        else:
+            job.add_step(WorkflowStep(
+                name="Setup Python",
+                uses="actions/setup-python@v5",
+                with_={"python-version": python_versions[0]},
+            ))
+        
+        job.add_step(WorkflowStep(
+            name="Install UT Agent",
+            run="pip install ut-agent",
+        ))
+        
+        if install_command:
+            job.add_step(WorkflowStep(
+                name="Install dependencies",
+                run=install_command,
+            ))
+        
+        job.add_step(WorkflowStep(
+            name="Run shard ${{ matrix.shard }}",
+            run=shard_test_command(
+                test_command, manifest_path, "${{ matrix.shard }}", output_format
+            ),
+        ))
+        
+        workflow.add_job("test", job)
+        return workflow
+        
     def save_workflow(
         self,
         workflow: GitHubActionsWorkflow,
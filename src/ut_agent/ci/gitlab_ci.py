@@ -8,6 +8,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from ut_agent.ci.sharding import ShardManifest, shard_test_command
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +25,7 @@ class GitLabCIJob:
         variables: 变量
         artifacts: 制品
         coverage: 覆盖率正则
+        parallel: 并行实例数（大于 1 时生效）
     """
     name: str
     script: List[str]
@@ -31,6 +34,7 @@ class GitLabCIJob:
     variables: Dict[str, str] = field(default_factory=dict)
     artifacts: Dict[str, Any] = field(default_factory=dict)
     coverage: str = ""
+    parallel: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典."""
@@ -45,6 +49,8 @@ class GitLabCIJob:
             data["artifacts"] = self.artifacts
         if self.coverage:
             data["coverage"] = self.coverage
+        if self.parallel > 1:
+            data["parallel"] = self.parallel
         return data
 
 
@@ -111,6 +117,8 @@ class GitLabCIConfig:
                 lines.append(f"  stage: {job_data['stage']}")
             if "image" in job_data:
                 lines.append(f"  image: {job_data['image']}")
+            if "parallel" in job_data:
+                lines.append(f"  parallel: {job_data['parallel']}")
             if "variables" in job_data:
                 lines.append("  variables:")
                 for key, value in job_data["variables"].items():
@@ -202,6 +210,43 @@ class GitLabCIGenerator:
         
         return config
         
+    def generate_sharded_test_config(
+        self,
+        manifest: ShardManifest,
+        test_command: str = "pytest",
+        manifest_path: str = ".ut-agent/shards.json",
+        image: str = "python:3.12",
+        install_command: Optional[str] = "pip install -r requirements.txt",
+        output_format: str = "pytest",
+    ) -> GitLabCIConfig:
+        """根据分片清单生成并行测试配置.
+        
+        使用 ``parallel`` 启动与分片数相同的实例，每个实例按
+        ``CI_NODE_INDEX``（从 1 开始）读取自己分片的测试，分片为空时
+        跳过测试命令。
+        """
+        config = GitLabCIConfig()
+        config.stages = ["test"]
+        
+        script = ["pip install ut-agent"]
+        if install_command:
+            script.append(install_command)
+        # 不足两个分片时 GitLab 不设置 CI_NODE_INDEX，按第一个分片处理
+        script.append(shard_test_command(
+            test_command, manifest_path, "$((${CI_NODE_INDEX:-1} - 1))", output_format
+        ))
+        
+        job = GitLabCIJob(
+            name="pytest-sharded",
+            stage="test",
+            script=script,
+            image=image,
+            parallel=manifest.shard_count,
+        )
+        config.add_job(job)
+        
+        return config
+        
     def save_config(self, config: GitLabCIConfig, output_path: str) -> bool:
         """保存配置到文件."""
         try:
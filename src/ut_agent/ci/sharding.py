@@ -0,0 +1,354 @@
+"""测试分片规划.
+
+根据选中的测试和历史执行耗时，把测试分配到多台 CI 机器上，使各分片的
+墙钟时间尽量均衡，并输出可供 CI 矩阵使用的 JSON 清单。
+
+分配使用 LPT（最长处理时间优先）：按预计耗时从长到短依次放入当前负载
+最小的分片，最长分片的耗时不超过最优解的 4/3。
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import statistics
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ut_agent.selection.test_selector import SelectionResult, TaskType
+from ut_agent.tools.flaky_detector import TestExecution
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# 没有任何历史数据时假定的单个测试耗时
+DEFAULT_TEST_DURATION_MS = 1000.0
+
+# 估算耗时时使用的最近执行次数
+RECENT_EXECUTIONS = 10
+
+
+@dataclass
+class TestShard:
+    """测试分片.
+
+    Attributes:
+        index: 分片序号（从 0 开始）
+        tests: 测试标识列表（``测试文件`` 或 ``测试文件#测试方法``）
+        estimated_ms: 预计耗时（毫秒）
+    """
+    index: int
+    tests: List[str] = field(default_factory=list)
+    estimated_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典."""
+        return {
+            "index": self.index,
+            "tests": self.tests,
+            "estimated_ms": round(self.estimated_ms, 2),
+        }
+
+
+@dataclass
+class ShardManifest:
+    """分片清单.
+
+    Attributes:
+        shards: 分片列表
+        strategy: 分配策略
+        default_duration_ms: 无历史数据的测试使用的预计耗时
+    """
+    shards: List[TestShard] = field(default_factory=list)
+    strategy: str = "lpt"
+    default_duration_ms: float = DEFAULT_TEST_DURATION_MS
+
+    @property
+    def shard_count(self) -> int:
+        """分片数量."""
+        return len(self.shards)
+
+    @property
+    def total_ms(self) -> float:
+        """全部测试的预计总耗时."""
+        return sum(shard.estimated_ms for shard in self.shards)
+
+    @property
+    def makespan_ms(self) -> float:
+        """最慢分片的预计耗时（决定流水线延迟）."""
+        return max((shard.estimated_ms for shard in self.shards), default=0.0)
+
+    def tests_for(self, index: int) -> List[str]:
+        """获取指定分片的测试."""
+        return self.shards[index].tests
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典."""
+        return {
+            "version": MANIFEST_VERSION,
+            "strategy": self.strategy,
+            "shard_count": self.shard_count,
+            "total_ms": round(self.total_ms, 2),
+            "makespan_ms": round(self.makespan_ms, 2),
+            "default_duration_ms": self.default_duration_ms,
+            "shards": [shard.to_dict() for shard in self.shards],
+        }
+
+    def to_json(self) -> str:
+        """转换为 JSON 字符串."""
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardManifest":
+        """从字典恢复清单."""
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"不支持的分片清单版本: {data.get('version')}")
+        return cls(
+            shards=[
+                TestShard(
+                    index=item["index"],
+                    tests=list(item["tests"]),
+                    estimated_ms=item.get("estimated_ms", 0.0),
+                )
+                for item in data.get("shards", [])
+            ],
+            strategy=data.get("strategy", "lpt"),
+            default_duration_ms=data.get("default_duration_ms", DEFAULT_TEST_DURATION_MS),
+        )
+
+    def save(self, path: str) -> None:
+        """保存清单到文件."""
+        file_path = Path(path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(self.to_json(), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str) -> "ShardManifest":
+        """从文件加载清单."""
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def _simple_name(name: str) -> str:
+    """取测试类或测试文件的简单名称: com.a.FooTest / src/a/FooTest.java -> FooTest."""
+    name = name.replace("\\", "/").rsplit("/", 1)[-1]
+    for suffix in (".java", ".ts", ".tsx", ".js", ".jsx", ".py", ".go"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name.rsplit(".", 1)[-1]
+
+
+def estimate_durations(history: Dict[str, List[TestExecution]]) -> Dict[str, float]:
+    """根据历史执行记录估算测试耗时.
+
+    每个测试方法取最近几次执行耗时的中位数，抗单次抖动。结果同时按
+    ``测试类#测试方法`` 和测试类（各方法耗时之和）两种键登记，测试类
+    使用简单名称，以便与测试文件路径对应。
+
+    Args:
+        history: 测试标识到执行记录的映射（如 FlakyTestDetector.execution_history）
+
+    Returns:
+        Dict[str, float]: 测试键到预计耗时（毫秒）的映射
+    """
+    durations: Dict[str, float] = {}
+    for executions in history.values():
+        if not executions:
+            continue
+        recent = sorted(executions, key=lambda e: e.timestamp)[-RECENT_EXECUTIONS:]
+        duration = statistics.median(e.duration_ms for e in recent)
+        test_class = _simple_name(recent[-1].test_class)
+        method_key = f"{test_class}#{recent[-1].test_method}"
+        if method_key in durations:
+            continue
+        durations[method_key] = duration
+        durations[test_class] = durations.get(test_class, 0.0) + duration
+    return durations
+
+
+def collect_selected_tests(selection: SelectionResult) -> List[str]:
+    """从测试选择结果中提取需要执行的测试.
+
+    同一测试文件的多个任务合并；只要有一个任务要求执行整个文件，
+    该文件就不再按方法拆分。尚无测试文件的生成任务和废弃任务不执行。
+
+    Args:
+        selection: 测试选择结果
+
+    Returns:
+        List[str]: 测试标识列表（``测试文件`` 或 ``测试文件#测试方法``）
+    """
+    methods: Dict[str, Optional[List[str]]] = {}
+    for task in selection.all_tasks:
+        if not task.test_file or task.task_type == TaskType.DEPRECATE:
+            continue
+        if not task.methods:
+            methods[task.test_file] = None
+        elif task.test_file not in methods:
+            methods[task.test_file] = list(task.methods)
+        elif methods[task.test_file] is not None:
+            known = methods[task.test_file]
+            known.extend(m for m in task.methods if m not in known)
+
+    tests: List[str] = []
+    for test_file, file_methods in methods.items():
+        if file_methods is None:
+            tests.append(test_file)
+        else:
+            tests.extend(f"{test_file}#{method}" for method in file_methods)
+    return tests
+
+
+class ShardPlanner:
+    """测试分片规划器.
+
+    Example:
+        planner = ShardPlanner(num_shards=4)
+        durations = estimate_durations(detector.execution_history)
+        manifest = planner.plan_selection(selection, durations)
+        manifest.save(".ut-agent/shards.json")
+    """
+
+    def __init__(self, num_shards: int, default_duration_ms: Optional[float] = None):
+        """初始化规划器.
+
+        Args:
+            num_shards: 分片数量
+            default_duration_ms: 无历史数据的测试的预计耗时，默认取已知耗时的中位数
+        """
+        if num_shards < 1:
+            raise ValueError("分片数量必须大于 0")
+        self.num_shards = num_shards
+        self.default_duration_ms = default_duration_ms
+
+    def plan(
+        self,
+        tests: Sequence[str],
+        durations: Optional[Dict[str, float]] = None,
+    ) -> ShardManifest:
+        """把测试分配到各分片.
+
+        Args:
+            tests: 测试标识列表
+            durations: 测试键到预计耗时的映射（见 estimate_durations）
+
+        Returns:
+            ShardManifest: 分片清单，分片内测试按预计耗时降序排列。测试数少于
+                分片数时减少分片，没有测试时不产生分片，避免空分片在 CI 中
+                退化为执行全部测试
+        """
+        durations = durations or {}
+        default_ms = self._default_duration(tests, durations)
+
+        weighted: List[Tuple[float, str]] = []
+        for test in dict.fromkeys(tests):
+            estimate = self._estimate(test, durations)
+            weighted.append((default_ms if estimate is None else estimate, test))
+        # 耗时相同时按标识排序，保证同样的输入得到同样的清单
+        weighted.sort(key=lambda item: (-item[0], item[1]))
+
+        num_shards = min(self.num_shards, len(weighted))
+        shards = [TestShard(index=i) for i in range(num_shards)]
+        heap = [(0.0, i) for i in range(num_shards)]
+        for duration, test in weighted:
+            load, index = heapq.heappop(heap)
+            shards[index].tests.append(test)
+            shards[index].estimated_ms = load + duration
+            heapq.heappush(heap, (load + duration, index))
+
+        manifest = ShardManifest(shards=shards, default_duration_ms=default_ms)
+        logger.info(
+            f"Planned {len(weighted)} tests into {num_shards} shards, "
+            f"makespan {manifest.makespan_ms:.0f}ms of {manifest.total_ms:.0f}ms"
+        )
+        return manifest
+
+    def plan_selection(
+        self,
+        selection: SelectionResult,
+        durations: Optional[Dict[str, float]] = None,
+    ) -> ShardManifest:
+        """按测试选择结果规划分片."""
+        return self.plan(collect_selected_tests(selection), durations)
+
+    def _default_duration(self, tests: Iterable[str], durations: Dict[str, float]) -> float:
+        if self.default_duration_ms is not None:
+            return self.default_duration_ms
+        known = [d for d in (self._estimate(t, durations) for t in tests) if d is not None]
+        return statistics.median(known) if known else DEFAULT_TEST_DURATION_MS
+
+    @staticmethod
+    def _estimate(test: str, durations: Dict[str, float]) -> Optional[float]:
+        """估算单个测试标识的耗时，未知时返回 None."""
+        if test in durations:
+            return durations[test]
+        test_file, _, method = test.partition("#")
+        name = _simple_name(test_file)
+        key = f"{name}#{method}" if method else name
+        return durations.get(key)
+
+
+def to_pytest_node_id(test: str) -> str:
+    """把测试标识转换为 pytest 节点 ID: tests/test_a.py#test_x -> tests/test_a.py::test_x."""
+    test_file, sep, method = test.partition("#")
+    return f"{test_file}::{method}" if sep else test_file
+
+
+def shard_test_command(
+    test_command: str,
+    manifest_path: str,
+    index_expr: str,
+    output_format: str = "pytest",
+) -> str:
+    """生成执行单个分片的 shell 命令.
+
+    分片为空时跳过测试命令并正常退出，不会退化为执行全部测试。
+
+    Args:
+        test_command: 测试命令，分片中的测试追加在其后
+        manifest_path: 清单路径
+        index_expr: 分片序号的 shell 表达式（如 ``${{ matrix.shard }}``）
+        output_format: 测试标识格式（见 main）
+
+    Returns:
+        str: 单行 shell 命令
+    """
+    return (
+        f"TESTS=$(python -m ut_agent.ci.sharding --format {output_format} "
+        f"{manifest_path} {index_expr}) && "
+        f'if [ -n "$TESTS" ]; then {test_command} $TESTS; '
+        f'else echo "No tests selected for this shard"; fi'
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """输出分片中的测试，供 CI 脚本使用.
+
+    用法: ``python -m ut_agent.ci.sharding [--format pytest|raw] <manifest> <index>``
+
+    默认输出 pytest 节点 ID；``raw`` 输出清单中的原始标识。分片不存在（如
+    没有选中任何测试）时不输出内容，由调用方跳过测试命令。
+    """
+    parser = argparse.ArgumentParser(prog="python -m ut_agent.ci.sharding")
+    parser.add_argument("--format", choices=["pytest", "raw"], default="pytest")
+    parser.add_argument("manifest")
+    parser.add_argument("index", type=int)
+    try:
+        args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    except SystemExit as e:
+        return int(e.code or 0)
+
+    manifest = ShardManifest.load(args.manifest)
+    if not 0 <= args.index < manifest.shard_count:
+        return 0
+    tests = manifest.tests_for(args.index)
+    if args.format == "pytest":
+        tests = [to_pytest_node_id(test) for test in tests]
+    print(" ".join(tests))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
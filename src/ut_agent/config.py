@@ -2,7 +2,7 @@
 
 import os
 import re
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,28 +33,60 @@ class Settings(BaseSettings):
     private_llm_model: str = "default"
 
     default_llm_provider: str = "openai"
+    # 路由提供商（default_llm_provider=router）: 后端列表为空时使用所有可用提供商
+    llm_router_backends: List[str] = []
+    llm_router_hedge: bool = True
+    # 对冲延迟取主后端 p95 延迟，不低于下限；样本不足时使用默认值
+    llm_router_hedge_min_delay: float = 0.5
+    llm_router_hedge_default_delay: float = 10.0
 
     max_iterations: int = 10
     temperature: float = 0.2
 
     default_coverage_target: float = 80.0
+    # 按测试拆分的覆盖率报告目录（相对项目根目录），测试执行后导入 .ut-agent/coverage_map.json
+    per_test_coverage_dir: str = ".ut-agent/per-test-coverage"
 
     # 缓存配置
     llm_cache_max_size: int = 1000
     llm_cache_ttl: int = 3600
+    # LLM 响应持久化到项目的 .ut-agent/llm_cache.db，未变化的项目再次运行时不再调用 LLM
+    llm_cache_persistent: bool = True
+    llm_cache_disk_max_size: int = 256 * 1024 * 1024
+    llm_cache_disk_ttl: int = 7 * 86400
     ast_cache_max_size: int = 100 * 1024 * 1024
     ast_cache_ttl: int = 86400
     ast_cache_max_entries: int = 1000
+    # AST 缓存索引批量提交阈值（待写入条目数），阶段结束时也会提交
+    ast_cache_flush_batch_size: int = 500
+    # 内存中保留语法树的文件数，用于文件变更后的增量重解析
+    ast_cache_max_trees: int = 200
 
     # 重试策略配置
     llm_max_retries: int = 3
     llm_retry_base_delay: float = 1.0
     llm_max_retry_delay: float = 30.0
 
+    # LLM 速率限制（按提供商共享），0 表示不限制；被限流时并发数自动减半、成功后逐步恢复
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    llm_rate_limit_max_concurrency: int = 16
+    # 按提供商覆盖，如 {"openai": {"requests_per_minute": 500, "tokens_per_minute": 200000}}
+    llm_rate_limits: Dict[str, Dict[str, float]] = {}
+
     # 性能配置
     max_concurrent_threads: int = 0
+    # 0 表示自动: 解析阶段取 CPU 核心数，LLM 阶段取 max_workers
+    max_analysis_workers: int = 0
+    max_llm_concurrency: int = 0
+    # 分析后端: thread（默认）或 process（进程池，适合多核 CI 上的大型仓库）
+    analysis_backend: str = "thread"
     batch_processing_size: int = 10
     llm_timeout: int = 60
+    # LLM HTTP 连接池（所有 OpenAI 兼容模型共享）
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive: int = 20
+    llm_http_keepalive_expiry: float = 60.0
 
     # SSL/TLS 配置
     ca_cert_path: Optional[str] = None
@@ -101,7 +133,10 @@ class Settings(BaseSettings):
             raise ValueError("最大迭代次数不能超过 100")
         return v
 
-    @field_validator("llm_cache_max_size", "ast_cache_max_entries")
+    @field_validator(
+        "llm_cache_max_size", "llm_cache_disk_max_size", "ast_cache_max_entries",
+        "ast_cache_flush_batch_size", "ast_cache_max_trees"
+    )
     @classmethod
     def validate_cache_size(cls, v: int) -> int:
         """验证缓存大小."""
@@ -109,7 +144,7 @@ class Settings(BaseSettings):
             raise ValueError("缓存大小必须大于 0")
         return v
 
-    @field_validator("llm_cache_ttl", "ast_cache_ttl", "llm_timeout")
+    @field_validator("llm_cache_ttl", "llm_cache_disk_ttl", "ast_cache_ttl", "llm_timeout")
     @classmethod
     def validate_timeout(cls, v: int) -> int:
         """验证超时时间."""
@@ -117,7 +152,10 @@ class Settings(BaseSettings):
             raise ValueError("超时时间不能为负数")
         return v
 
-    @field_validator("llm_retry_base_delay", "llm_max_retry_delay")
+    @field_validator(
+        "llm_retry_base_delay", "llm_max_retry_delay",
+        "llm_router_hedge_min_delay", "llm_router_hedge_default_delay"
+    )
     @classmethod
     def validate_delay(cls, v: float) -> float:
         """验证延迟时间."""
@@ -125,6 +163,24 @@ class Settings(BaseSettings):
             raise ValueError("延迟时间不能为负数")
         return v
 
+    @field_validator("llm_requests_per_minute", "llm_tokens_per_minute")
+    @classmethod
+    def validate_rate_limit(cls, v: int) -> int:
+        """验证速率限制."""
+        if v < 0:
+            raise ValueError("速率限制不能为负数")
+        return v
+
+    @field_validator(
+        "llm_rate_limit_max_concurrency", "llm_http_max_connections", "llm_http_max_keepalive"
+    )
+    @classmethod
+    def validate_connection_limit(cls, v: int) -> int:
+        """验证并发数与连接数上限."""
+        if v < 1:
+            raise ValueError("并发数与连接数上限必须大于 0")
+        return v
+
     @field_validator("batch_processing_size")
     @classmethod
     def validate_batch_size(cls, v: int) -> int:
@@ -133,6 +189,14 @@ class Settings(BaseSettings):
             raise ValueError("批处理大小必须大于 0")
         return v
 
+    @field_validator("analysis_backend")
+    @classmethod
+    def validate_analysis_backend(cls, v: str) -> str:
+        """验证分析后端."""
+        if v not in ("thread", "process"):
+            raise ValueError(f"分析后端必须是 thread 或 process: {v}")
+        return v
+
     @field_validator("ca_cert_path")
     @classmethod
     def validate_ca_cert_path(cls, v: Optional[str]) -> Optional[str]:
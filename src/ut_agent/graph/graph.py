@@ -8,6 +8,7 @@ from ut_agent.graph.nodes import (
     analyze_code_node,
     generate_tests_node,
     save_tests_node,
+    streaming_pipeline_node,
     execute_tests_node,
     analyze_coverage_node,
     check_coverage_target_node,
@@ -18,9 +19,13 @@ from ut_agent.graph.nodes import (
 )
 
 
-def create_test_generation_graph() -> StateGraph:
+def create_test_generation_graph(streaming: bool = False) -> StateGraph:
     """创建测试生成工作流图.
 
+    Args:
+        streaming: 是否启用流式模式。启用后 分析 → 生成 → 保存 合并为一个
+            流水线节点，每个文件完成上一步后立即进入下一步
+
     Returns:
         StateGraph: 编译后的状态图
     """
@@ -29,8 +34,11 @@ def create_test_generation_graph() -> StateGraph:
     # 添加节点
     workflow.add_node("detect_project", detect_project_node)
     workflow.add_node("detect_changes", detect_changes_node)
-    workflow.add_node("analyze_code", analyze_code_node)
-    workflow.add_node("generate_tests", generate_tests_node)
+    if streaming:
+        workflow.add_node("streaming_pipeline", streaming_pipeline_node)
+    else:
+        workflow.add_node("analyze_code", analyze_code_node)
+        workflow.add_node("generate_tests", generate_tests_node)
     workflow.add_node("save_tests", save_tests_node)
     workflow.add_node("execute_tests", execute_tests_node)
     workflow.add_node("analyze_coverage", analyze_coverage_node)
@@ -45,9 +53,13 @@ def create_test_generation_graph() -> StateGraph:
 
     # 添加边 - 主流程
     workflow.add_edge("detect_project", "detect_changes")
-    workflow.add_edge("detect_changes", "analyze_code")
-    workflow.add_edge("analyze_code", "generate_tests")
-    workflow.add_edge("generate_tests", "save_tests")
+    if streaming:
+        workflow.add_edge("detect_changes", "streaming_pipeline")
+        workflow.add_edge("streaming_pipeline", "execute_tests")
+    else:
+        workflow.add_edge("detect_changes", "analyze_code")
+        workflow.add_edge("analyze_code", "generate_tests")
+        workflow.add_edge("generate_tests", "save_tests")
     workflow.add_edge("save_tests", "execute_tests")
     workflow.add_edge("execute_tests", "analyze_coverage")
     workflow.add_edge("analyze_coverage", "check_coverage_target")
@@ -13,8 +13,15 @@ from ut_agent.graph.state import (
     AgentState, GeneratedTestFile, CoverageGap, CodeChange, ChangeSummary,
     ProgressInfo, StageMetrics,
 )
+from ut_agent.tools.ast_cache import flush_ast_cache
 from ut_agent.tools.project_detector import detect_project_type, find_source_files
-from ut_agent.tools.code_analyzer import analyze_java_file, analyze_ts_file
+from ut_agent.tools.code_analyzer import (
+    analyze_java_file,
+    analyze_ts_file,
+    analyze_java_file_in_worker,
+    analyze_ts_file_in_worker,
+    init_analysis_worker,
+)
 from ut_agent.tools.test_generator import (
     generate_java_test,
     generate_frontend_test,
@@ -30,11 +37,20 @@ from ut_agent.tools.coverage_analyzer import (
 from ut_agent.tools.git_analyzer import GitAnalyzer, filter_source_files
 from ut_agent.tools.change_detector import create_change_detector
 from ut_agent.tools.test_mapper import TestFileMapper
+from ut_agent.tools.test_file_index import TestFileIndex
 from ut_agent.reporting.html_generator import generate_coverage_report
+from ut_agent.selection.coverage_map import CoverageMap
 from ut_agent.models import get_llm
 from ut_agent.utils import get_logger
 from ut_agent.utils.event_bus import event_bus, emit_progress, emit_metric
+from ut_agent.utils.llm_cache import configure_llm_cache
 from ut_agent.utils.events import EventType, Event, ProgressEvent
+from ut_agent.utils.stage_scheduler import (
+    StageScheduler,
+    get_cpu_stage_limit,
+    get_io_stage_limit,
+    get_process_stage_limit,
+)
 
 
 def get_optimal_thread_count() -> int:
@@ -55,12 +71,150 @@ MAX_CONCURRENT_GENERATIONS = get_optimal_thread_count()
 logger = get_logger("nodes")
 
 
+def _create_analysis_scheduler(configurable: Dict[str, Any], max_workers: int) -> StageScheduler:
+    """创建分析阶段调度器.
+
+    analysis_backend 为 process 时使用进程池（每个工作进程常驻解析器），
+    否则使用受 CPU 核心数约束的线程池。
+    """
+    from ut_agent.config import settings
+
+    backend = configurable.get("analysis_backend", settings.analysis_backend)
+    if backend == "process":
+        return StageScheduler(
+            "analyze_code",
+            get_process_stage_limit(),
+            backend="process",
+            initializer=init_analysis_worker,
+        )
+    return StageScheduler("analyze_code", get_cpu_stage_limit(max_workers))
+
+
+async def _analyze_file(
+    scheduler: StageScheduler, project_type: str, file_path: str
+) -> Optional[Dict[str, Any]]:
+    """在阶段调度器中分析单个源文件."""
+    in_process = scheduler.backend == "process"
+    if project_type == "java":
+        analyze = analyze_java_file_in_worker if in_process else analyze_java_file
+        return await scheduler.run(analyze, file_path)
+    elif project_type in ["vue", "react", "typescript"]:
+        analyze = analyze_ts_file_in_worker if in_process else analyze_ts_file
+        return await scheduler.run(analyze, file_path)
+    return None
+
+
+async def _generate_test_for_file(
+    scheduler: StageScheduler,
+    file_analysis: Dict[str, Any],
+    project_type: str,
+    llm: Any,
+    project_path: str,
+    change_dict: Dict[str, ChangeSummary],
+    test_mapper: Optional[TestFileMapper] = None,
+) -> Optional[GeneratedTestFile]:
+    """在阶段调度器中为单个文件生成测试.
+
+    change_dict 中存在的文件走增量生成，其余走全量生成。增量生成时通过
+    test_mapper 查找已有测试，调用方应在整个阶段共用同一个映射器。
+    """
+    file_path = file_analysis.get("file_path", "unknown")
+
+    if file_path in change_dict:
+        change_summary = change_dict[file_path]
+        added_methods = [m.name for m in change_summary.added_methods]
+        modified_methods = [m.name for m, _ in change_summary.modified_methods]
+
+        if test_mapper is None:
+            test_mapper = TestFileMapper(project_path, project_type)
+        existing_test_path = test_mapper.find_test_file(file_path)
+        existing_test_full = (
+            str(Path(project_path) / existing_test_path) if existing_test_path else None
+        )
+
+        if project_type == "java":
+            return await scheduler.run(
+                generate_incremental_java_test,
+                file_analysis,
+                llm,
+                existing_test_full,
+                added_methods,
+                modified_methods,
+            )
+        elif project_type in ["vue", "react", "typescript"]:
+            return await scheduler.run(
+                generate_incremental_frontend_test,
+                file_analysis,
+                project_type,
+                llm,
+                existing_test_full,
+                added_methods,
+                modified_methods,
+            )
+        return None
+
+    if project_type == "java":
+        return await scheduler.run(generate_java_test, file_analysis, llm)
+    elif project_type in ["vue", "react", "typescript"]:
+        return await scheduler.run(generate_frontend_test, file_analysis, project_type, llm)
+    return None
+
+
+def _save_test_file(
+    test_file: GeneratedTestFile,
+    test_mapper: TestFileMapper,
+    change_dict: Dict[str, ChangeSummary],
+    test_index: TestFileIndex,
+) -> List[str]:
+    """保存单个测试文件，增量模式下与已有测试合并.
+
+    写入后登记到测试文件索引，后续查找无需等待下一次刷新。
+
+    Returns:
+        List[str]: 合并过程中产生的警告
+    """
+    warnings: List[str] = []
+
+    test_dir = os.path.dirname(test_file.test_file_path)
+    os.makedirs(test_dir, exist_ok=True)
+
+    final_test_code = test_file.test_code
+
+    source_file = test_file.source_file
+    if source_file in change_dict:
+        change_summary = change_dict[source_file]
+
+        source_content = ""
+        try:
+            with open(source_file, "r", encoding="utf-8") as f:
+                source_content = f.read()
+        except Exception as e:
+            logger.warning(f"读取源文件失败 {source_file}: {e}")
+
+        final_test_code, merge_warnings = test_mapper.update_mapping(
+            source_file=source_file,
+            new_source_content=source_content,
+            new_test_content=test_file.test_code,
+            added_methods=change_summary.added_methods,
+            modified_methods=change_summary.modified_methods,
+            deleted_methods=change_summary.deleted_methods,
+        )
+        warnings.extend(merge_warnings)
+
+    with open(test_file.test_file_path, "w", encoding="utf-8") as f:
+        f.write(final_test_code)
+    test_index.add(test_file.test_file_path)
+
+    return warnings
+
+
 async def detect_project_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """检测项目类型和结构."""
     project_path = state["project_path"]
     incremental = state.get("incremental", False)
 
     project_type, build_tool = detect_project_type(project_path)
+    configure_llm_cache(project_path)
 
     if incremental:
         try:
@@ -150,6 +304,7 @@ async def analyze_code_node(state: AgentState, config: RunnableConfig) -> Dict[s
     }, source="analyze_code_node")
 
     max_workers = config.get("configurable", {}).get("max_workers", MAX_CONCURRENT_GENERATIONS)
+    scheduler = _create_analysis_scheduler(config.get("configurable", {}), max_workers)
     
     completed_count = 0
     lock = asyncio.Lock()
@@ -157,13 +312,7 @@ async def analyze_code_node(state: AgentState, config: RunnableConfig) -> Dict[s
     async def analyze_with_progress(file_path: str) -> Optional[Dict[str, Any]]:
         nonlocal completed_count
         try:
-            loop = asyncio.get_event_loop()
-            if project_type == "java":
-                result = await loop.run_in_executor(None, analyze_java_file, file_path)
-            elif project_type in ["vue", "react", "typescript"]:
-                result = await loop.run_in_executor(None, analyze_ts_file, file_path)
-            else:
-                result = None
+            result = await _analyze_file(scheduler, project_type, file_path)
             
             async with lock:
                 completed_count += 1
@@ -183,10 +332,13 @@ async def analyze_code_node(state: AgentState, config: RunnableConfig) -> Dict[s
                 completed_count += 1
             return None
 
-    tasks = [analyze_with_progress(file_path) for file_path in target_files]
-    results = await asyncio.gather(*tasks)
+    async with scheduler:
+        tasks = [analyze_with_progress(file_path) for file_path in target_files]
+        results = await asyncio.gather(*tasks)
+    flush_ast_cache()
 
     analyzed_files = [r for r in results if r is not None]
+    scheduler_metrics = scheduler.get_metrics()
     
     stage_duration = (datetime.now() - stage_start).total_seconds() * 1000
     event_bus.emit_simple(EventType.FILE_ANALYSIS_COMPLETED, {
@@ -202,6 +354,14 @@ async def analyze_code_node(state: AgentState, config: RunnableConfig) -> Dict[s
         tags={"project_type": project_type},
         source="analyze_code_node",
     )
+    
+    emit_metric(
+        metric_name="analyze_code_queue_wait_ms",
+        value=scheduler_metrics.avg_queue_wait_ms,
+        unit="ms",
+        tags={"project_type": project_type},
+        source="analyze_code_node",
+    )
 
     progress_info = {
         "stage": "analyze_code",
@@ -221,6 +381,9 @@ async def analyze_code_node(state: AgentState, config: RunnableConfig) -> Dict[s
                 "duration_ms": stage_duration,
                 "files_processed": len(analyzed_files),
                 "files_total": total_files,
+                "queue_wait_ms": scheduler_metrics.total_queue_wait_ms,
+                "execution_ms": scheduler_metrics.total_execution_ms,
+                "scheduler": scheduler_metrics.to_dict(),
             }
         },
         "event_log": [{
@@ -243,6 +406,7 @@ async def generate_tests_node(state: AgentState, config: RunnableConfig) -> Dict
 
     llm = get_llm(llm_provider)
     generated_tests = []
+    scheduler = StageScheduler("generate_tests", get_io_stage_limit(max_workers))
     
     stage_start = datetime.now()
     event_bus.emit_simple(EventType.TEST_GENERATION_STARTED, {
@@ -257,52 +421,22 @@ async def generate_tests_node(state: AgentState, config: RunnableConfig) -> Dict
     lock = asyncio.Lock()
 
     change_dict = {s.file_path: s for s in change_summaries}
+    # 整个阶段共用一个映射器，测试文件索引只与文件系统同步一次
+    test_mapper = TestFileMapper(state["project_path"], project_type) if incremental else None
 
     async def generate_with_progress(file_analysis: Dict[str, Any]) -> Optional[GeneratedTestFile]:
         nonlocal completed_count, success_count, error_count
         file_path = file_analysis.get("file_path", "unknown")
         try:
-            loop = asyncio.get_event_loop()
-            
-            if incremental and file_path in change_dict:
-                change_summary = change_dict[file_path]
-                added_methods = [m.name for m in change_summary.added_methods]
-                modified_methods = [m.name for m, _ in change_summary.modified_methods]
-                
-                test_mapper = TestFileMapper(state["project_path"], project_type)
-                existing_test_path = test_mapper.find_test_file(file_path)
-                existing_test_full = str(Path(state["project_path"]) / existing_test_path) if existing_test_path else None
-                
-                if project_type == "java":
-                    result = await loop.run_in_executor(
-                        None,
-                        generate_incremental_java_test,
-                        file_analysis,
-                        llm,
-                        existing_test_full,
-                        added_methods,
-                        modified_methods,
-                    )
-                elif project_type in ["vue", "react", "typescript"]:
-                    result = await loop.run_in_executor(
-                        None,
-                        generate_incremental_frontend_test,
-                        file_analysis,
-                        project_type,
-                        llm,
-                        existing_test_full,
-                        added_methods,
-                        modified_methods,
-                    )
-                else:
-                    result = None
-            else:
-                if project_type == "java":
-                    result = await loop.run_in_executor(None, generate_java_test, file_analysis, llm)
-                elif project_type in ["vue", "react", "typescript"]:
-                    result = await loop.run_in_executor(None, generate_frontend_test, file_analysis, project_type, llm)
-                else:
-                    result = None
+            result = await _generate_test_for_file(
+                scheduler,
+                file_analysis,
+                project_type,
+                llm,
+                state["project_path"],
+                change_dict if incremental else {},
+                test_mapper,
+            )
             
             async with lock:
                 completed_count += 1
@@ -325,10 +459,12 @@ async def generate_tests_node(state: AgentState, config: RunnableConfig) -> Dict
                 error_count += 1
             return None
 
-    tasks = [generate_with_progress(file_analysis) for file_analysis in analyzed_files]
-    results = await asyncio.gather(*tasks)
+    async with scheduler:
+        tasks = [generate_with_progress(file_analysis) for file_analysis in analyzed_files]
+        results = await asyncio.gather(*tasks)
 
     generated_tests = [r for r in results if r is not None]
+    scheduler_metrics = scheduler.get_metrics()
     
     stage_duration = (datetime.now() - stage_start).total_seconds() * 1000
     event_bus.emit_simple(EventType.TEST_GENERATION_COMPLETED, {
@@ -355,6 +491,14 @@ async def generate_tests_node(state: AgentState, config: RunnableConfig) -> Dict
         tags={"project_type": project_type, "incremental": str(incremental)},
         source="generate_tests_node",
     )
+    
+    emit_metric(
+        metric_name="test_generation_queue_wait_ms",
+        value=scheduler_metrics.avg_queue_wait_ms,
+        unit="ms",
+        tags={"project_type": project_type, "llm_provider": llm_provider},
+        source="generate_tests_node",
+    )
 
     mode_str = "增量" if incremental else "全量"
     progress_info = {
@@ -378,6 +522,9 @@ async def generate_tests_node(state: AgentState, config: RunnableConfig) -> Dict
                 "success_count": success_count,
                 "error_count": error_count,
                 "incremental": incremental,
+                "queue_wait_ms": scheduler_metrics.total_queue_wait_ms,
+                "execution_ms": scheduler_metrics.total_execution_ms,
+                "scheduler": scheduler_metrics.to_dict(),
             }
         },
         "event_log": [{
@@ -402,6 +549,7 @@ async def save_tests_node(state: AgentState, config: RunnableConfig) -> Dict[str
     warnings = []
 
     test_mapper = TestFileMapper(project_path, project_type)
+    test_index = TestFileIndex.get_instance(project_path)
 
     change_dict = {s.file_path: s for s in change_summaries}
 
@@ -416,35 +564,11 @@ async def save_tests_node(state: AgentState, config: RunnableConfig) -> Dict[str
                 source="save_tests_node",
             )
             
-            test_dir = os.path.dirname(test_file.test_file_path)
-            os.makedirs(test_dir, exist_ok=True)
-
-            final_test_code = test_file.test_code
-
-            if incremental:
-                source_file = test_file.source_file
-                if source_file in change_dict:
-                    change_summary = change_dict[source_file]
-
-                    source_content = ""
-                    try:
-                        with open(source_file, "r", encoding="utf-8") as f:
-                            source_content = f.read()
-                    except Exception as e:
-                        logger.warning(f"读取源文件失败 {source_file}: {e}")
-
-                    final_test_code, merge_warnings = test_mapper.update_mapping(
-                        source_file=source_file,
-                        new_source_content=source_content,
-                        new_test_content=test_file.test_code,
-                        added_methods=change_summary.added_methods,
-                        modified_methods=change_summary.modified_methods,
-                        deleted_methods=change_summary.deleted_methods,
-                    )
-                    warnings.extend(merge_warnings)
-
-            with open(test_file.test_file_path, "w", encoding="utf-8") as f:
-                f.write(final_test_code)
+            warnings.extend(
+                _save_test_file(
+                    test_file, test_mapper, change_dict if incremental else {}, test_index
+                )
+            )
 
             saved_count += 1
         except Exception as e:
@@ -492,6 +616,257 @@ async def save_tests_node(state: AgentState, config: RunnableConfig) -> Dict[str
     }
 
 
+async def streaming_pipeline_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """流式执行 分析 → 生成 → 保存.
+
+    每个文件在上一步完成后立即进入下一步，阶段之间通过有界队列衔接，
+    不再等待整个阶段全部完成。测试文件生成后立刻落盘，后续失败不会丢失
+    已生成的测试。
+    """
+    project_type = state["project_type"]
+    project_path = state["project_path"]
+    target_files = state["target_files"]
+    total_files = len(target_files)
+    incremental = state.get("incremental", False)
+    change_summaries = state.get("change_summaries", [])
+    configurable = config.get("configurable", {})
+    llm_provider = configurable.get("llm_provider", "openai")
+    max_workers = configurable.get("max_workers", MAX_CONCURRENT_GENERATIONS)
+
+    analyze_scheduler = _create_analysis_scheduler(configurable, max_workers)
+    generate_scheduler = StageScheduler("generate_tests", get_io_stage_limit(max_workers))
+    queue_size = configurable.get("pipeline_queue_size", generate_scheduler.max_concurrency * 2)
+
+    llm = get_llm(llm_provider)
+    test_mapper = TestFileMapper(project_path, project_type)
+    test_index = TestFileIndex.get_instance(project_path)
+    change_dict = {s.file_path: s for s in change_summaries} if incremental else {}
+
+    pending_files: asyncio.Queue = asyncio.Queue()
+    for file_path in target_files:
+        pending_files.put_nowait(file_path)
+    analyzed_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    generated_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    analyzed_files: List[Dict[str, Any]] = []
+    generated_tests: List[GeneratedTestFile] = []
+    warnings: List[str] = []
+    saved_count = 0
+    error_count = 0
+    first_test_ms: Optional[float] = None
+
+    stage_start = datetime.now()
+    event_bus.emit_simple(EventType.FILE_ANALYSIS_STARTED, {
+        "total_files": total_files,
+        "streaming": True,
+    }, source="streaming_pipeline_node")
+
+    async def analyze_worker() -> None:
+        nonlocal error_count
+        while True:
+            try:
+                file_path = pending_files.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await _analyze_file(analyze_scheduler, project_type, file_path)
+            except Exception as e:
+                logger.error(f"分析文件失败 {file_path}: {e}")
+                error_count += 1
+                continue
+            if result is not None:
+                analyzed_files.append(result)
+                emit_progress(
+                    stage="analyze_code",
+                    current=len(analyzed_files),
+                    total=total_files,
+                    message=f"分析文件 [{len(analyzed_files)}/{total_files}]",
+                    current_file=file_path,
+                    source="streaming_pipeline_node",
+                )
+                await analyzed_queue.put(result)
+
+    async def generate_worker() -> None:
+        nonlocal error_count
+        while True:
+            file_analysis = await analyzed_queue.get()
+            if file_analysis is None:
+                return
+            file_path = file_analysis.get("file_path", "unknown")
+            try:
+                result = await _generate_test_for_file(
+                    generate_scheduler,
+                    file_analysis,
+                    project_type,
+                    llm,
+                    project_path,
+                    change_dict,
+                    test_mapper,
+                )
+            except Exception as e:
+                logger.error(f"生成测试失败 {file_path}: {e}")
+                error_count += 1
+                continue
+            if result is not None:
+                generated_tests.append(result)
+                emit_progress(
+                    stage="generate_tests",
+                    current=len(generated_tests),
+                    total=total_files,
+                    message=f"生成测试 [{len(generated_tests)}/{total_files}]",
+                    current_file=file_path,
+                    source="streaming_pipeline_node",
+                )
+                await generated_queue.put(result)
+
+    async def save_worker() -> None:
+        nonlocal saved_count, first_test_ms
+        while True:
+            test_file = await generated_queue.get()
+            if test_file is None:
+                return
+            try:
+                warnings.extend(_save_test_file(test_file, test_mapper, change_dict, test_index))
+                saved_count += 1
+                if first_test_ms is None:
+                    first_test_ms = (datetime.now() - stage_start).total_seconds() * 1000
+                emit_progress(
+                    stage="save_tests",
+                    current=saved_count,
+                    total=total_files,
+                    message=f"保存测试文件 [{saved_count}/{total_files}]",
+                    current_file=test_file.test_file_path,
+                    source="streaming_pipeline_node",
+                )
+            except Exception as e:
+                logger.error(f"保存测试文件失败 {test_file.test_file_path}: {e}")
+                warnings.append(f"保存测试文件失败 {test_file.test_file_path}: {e}")
+
+    async def run_analysis() -> None:
+        await asyncio.gather(*[analyze_worker() for _ in range(analyze_scheduler.max_concurrency)])
+        flush_ast_cache()
+        for _ in range(generate_scheduler.max_concurrency):
+            await analyzed_queue.put(None)
+
+    async def run_generation() -> None:
+        workers = [generate_worker() for _ in range(generate_scheduler.max_concurrency)]
+        await asyncio.gather(*workers)
+        await generated_queue.put(None)
+
+    async with analyze_scheduler, generate_scheduler:
+        await asyncio.gather(run_analysis(), run_generation(), save_worker())
+
+    stage_duration = (datetime.now() - stage_start).total_seconds() * 1000
+    analyze_metrics = analyze_scheduler.get_metrics()
+    generate_metrics = generate_scheduler.get_metrics()
+
+    event_bus.emit_simple(EventType.TEST_GENERATION_COMPLETED, {
+        "generated_count": len(generated_tests),
+        "total_files": total_files,
+        "success_count": saved_count,
+        "error_count": error_count,
+        "duration_ms": stage_duration,
+        "incremental": incremental,
+        "streaming": True,
+    }, source="streaming_pipeline_node")
+
+    emit_metric(
+        metric_name="streaming_pipeline_duration_ms",
+        value=stage_duration,
+        unit="ms",
+        tags={"project_type": project_type, "llm_provider": llm_provider},
+        source="streaming_pipeline_node",
+    )
+
+    if first_test_ms is not None:
+        emit_metric(
+            metric_name="time_to_first_test_ms",
+            value=first_test_ms,
+            unit="ms",
+            tags={"project_type": project_type, "llm_provider": llm_provider},
+            source="streaming_pipeline_node",
+        )
+
+    message = f"流式模式成功生成并保存 {saved_count} 个测试文件"
+    if warnings:
+        message += f"，警告: {len(warnings)} 个"
+
+    progress_info = {
+        "stage": "save_tests",
+        "current": total_files,
+        "total": total_files,
+        "percentage": 100.0,
+        "message": message,
+    }
+
+    return {
+        "analyzed_files": analyzed_files,
+        "generated_tests": generated_tests,
+        "status": "tests_saved",
+        "message": message,
+        "progress": progress_info,
+        "stage_metrics": {
+            "analyze_code": {
+                "duration_ms": stage_duration,
+                "files_processed": len(analyzed_files),
+                "files_total": total_files,
+                "queue_wait_ms": analyze_metrics.total_queue_wait_ms,
+                "execution_ms": analyze_metrics.total_execution_ms,
+                "scheduler": analyze_metrics.to_dict(),
+            },
+            "generate_tests": {
+                "duration_ms": stage_duration,
+                "files_processed": len(generated_tests),
+                "files_total": total_files,
+                "success_count": len(generated_tests),
+                "error_count": error_count,
+                "incremental": incremental,
+                "queue_wait_ms": generate_metrics.total_queue_wait_ms,
+                "execution_ms": generate_metrics.total_execution_ms,
+                "scheduler": generate_metrics.to_dict(),
+            },
+            "save_tests": {
+                "duration_ms": stage_duration,
+                "files_processed": saved_count,
+                "files_total": len(generated_tests),
+            },
+            "streaming_pipeline": {
+                "duration_ms": stage_duration,
+                "time_to_first_test_ms": first_test_ms,
+                "queue_size": queue_size,
+            },
+        },
+        "event_log": [{
+            "event_type": "tests_saved",
+            "timestamp": datetime.now().isoformat(),
+            "data": {"saved_count": saved_count, "streaming": True},
+        }],
+    }
+
+
+def _update_coverage_map(project_path: str) -> int:
+    """导入测试执行产生的按测试覆盖率报告，并持久化覆盖映射.
+
+    Args:
+        project_path: 项目路径
+
+    Returns:
+        int: 导入的报告数，报告目录不存在时为 0
+    """
+    from ut_agent.config import settings
+
+    reports_dir = Path(project_path) / settings.per_test_coverage_dir
+    if not reports_dir.is_dir():
+        return 0
+
+    coverage_map = CoverageMap.load(project_path)
+    count = coverage_map.ingest_reports(str(reports_dir))
+    if count:
+        coverage_map.save()
+        logger.info(f"覆盖映射已更新: {count} 个测试的覆盖率报告")
+    return count
+
+
 async def execute_tests_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """执行测试."""
     project_path = state["project_path"]
@@ -510,6 +885,12 @@ async def execute_tests_node(state: AgentState, config: RunnableConfig) -> Dict[
         success, output, test_progress = await execute_tests_async(
             project_path, project_type, build_tool
         )
+
+        try:
+            coverage_reports = await asyncio.to_thread(_update_coverage_map, project_path)
+        except OSError as e:
+            logger.warning(f"更新覆盖映射失败: {e}")
+            coverage_reports = 0
         
         stage_duration = (datetime.now() - stage_start).total_seconds() * 1000
         
@@ -556,6 +937,7 @@ async def execute_tests_node(state: AgentState, config: RunnableConfig) -> Dict[
                     "tests_failed": test_progress.failed,
                     "tests_skipped": test_progress.skipped,
                     "tests_total": test_progress.total_tests,
+                    "coverage_map_reports": coverage_reports,
                 }
             },
             "event_log": [{
@@ -87,7 +87,7 @@ class StageMetrics:
     files_total: int = 0
     success_count: int = 0
     error_count: int = 0
-    
+
     def start(self) -> None:
         self.start_time = datetime.now()
     
@@ -47,6 +47,7 @@ class TestGenerationContext:
         
         self.llm = get_llm(self.llm_provider)
         self.change_dict = {s.file_path: s for s in self.change_summaries}
+        self._test_mapper: Optional[TestFileMapper] = None
         
         # 统计信息
         self.completed_count = 0
@@ -57,6 +58,13 @@ class TestGenerationContext:
         # 阶段计时
         self.stage_start = datetime.now()
 
+    @property
+    def test_mapper(self) -> TestFileMapper:
+        """本次生成共用的测试文件映射器（测试文件索引只同步一次）."""
+        if self._test_mapper is None:
+            self._test_mapper = TestFileMapper(self.project_path, self.project_type)
+        return self._test_mapper
+
 
 class TestGenerationStrategy:
     """测试生成策略.
@@ -210,8 +218,7 @@ class TestGenerationExecutor:
         modified_methods = [m.name for m, _ in change_summary.modified_methods]
         
         # 查找现有测试文件
-        test_mapper = TestFileMapper(self.context.project_path, self.context.project_type)
-        existing_test_path = test_mapper.find_test_file(file_path)
+        existing_test_path = self.context.test_mapper.find_test_file(file_path)
         existing_test_full = str(Path(self.context.project_path) / existing_test_path) if existing_test_path else None
         
         # 获取增量生成器
@@ -86,6 +86,10 @@ def generate_tests(
         False, "--html-report", "-r",
         help="生成HTML覆盖率报告"
     ),
+    streaming: bool = typer.Option(
+        False, "--streaming",
+        help="流式模式：每个文件分析完立即生成并保存测试"
+    ),
 ) -> None:
     """生成单元测试."""
     console.print(Panel.fit(
@@ -113,6 +117,7 @@ def generate_tests(
         config_table.add_row("基准引用", base_ref or "HEAD~1")
         config_table.add_row("目标引用", head_ref or "HEAD")
     config_table.add_row("HTML报告", "是" if html_report else "否")
+    config_table.add_row("流式模式", "是" if streaming else "否")
     console.print(config_table)
     console.print()
 
@@ -128,6 +133,7 @@ def generate_tests(
         base_ref=base_ref,
         head_ref=head_ref,
         html_report=html_report,
+        streaming=streaming,
     ))
 
 
@@ -837,6 +843,7 @@ async def run_generation_workflow(
     base_ref: Optional[str] = None,
     head_ref: Optional[str] = None,
     html_report: bool = False,
+    streaming: bool = False,
 ) -> None:
     """运行生成工作流."""
     event_bus.reset()
@@ -870,7 +877,7 @@ async def run_generation_workflow(
         "event_log": [],
     }
 
-    graph = create_test_generation_graph()
+    graph = create_test_generation_graph(streaming=streaming)
     
     monitor = create_progress_monitor(console)
     monitor.start()
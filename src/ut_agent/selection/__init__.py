@@ -7,6 +7,14 @@ from ut_agent.selection.change_detector import (
     MethodChange,
     ChangeType,
 )
+from ut_agent.selection.coverage_map import (
+    CoverageMap,
+    CoverageSelection,
+)
+from ut_agent.selection.dependency_graph import (
+    ReverseDependencyGraph,
+    Dependent,
+)
 from ut_agent.selection.impact_analyzer import (
     ImpactAnalyzer,
     ImpactReport,
@@ -32,6 +40,10 @@ __all__ = [
     "FileChange",
     "MethodChange",
     "ChangeType",
+    "CoverageMap",
+    "CoverageSelection",
+    "ReverseDependencyGraph",
+    "Dependent",
     "ImpactAnalyzer",
     "ImpactReport",
     "DirectImpact",
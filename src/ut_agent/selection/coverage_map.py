@@ -0,0 +1,417 @@
+"""按测试记录的行覆盖映射 - 用变更行精确选择测试.
+
+每个测试单独采集一次覆盖率（JaCoCo 按测试导出的会话报告、Istanbul 按测试
+文件运行得到的 ``coverage-final.json`` 或 lcov），记录为
+``文件 -> 行号 -> 覆盖该行的测试`` 的映射。选择测试时把变更块映射到基线
+版本的行号，取与覆盖映射的交集，再用贪心集合覆盖得到能覆盖全部已覆盖
+变更行的最小测试集；没有覆盖数据的行交给启发式规则处理。
+
+测试标识约定为 ``测试文件路径`` 或 ``测试文件路径#测试方法``。
+"""
+
+import json
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from ut_agent.selection.change_detector import ChangeType, FileChange
+from ut_agent.selection.dependency_graph import relative_path
+from ut_agent.utils import get_logger
+
+logger = get_logger("coverage_map")
+
+COVERAGE_MAP_VERSION = 1
+
+
+def _to_ranges(lines: Iterable[int]) -> List[List[int]]:
+    """将行号压缩为闭区间列表."""
+    ranges: List[List[int]] = []
+    for line in sorted(set(lines)):
+        if ranges and ranges[-1][1] == line - 1:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+    return ranges
+
+
+def _from_ranges(ranges: Iterable[List[int]]) -> List[int]:
+    lines: List[int] = []
+    for start, end in ranges:
+        lines.extend(range(start, end + 1))
+    return lines
+
+
+def split_test_id(test_id: str) -> Tuple[str, Optional[str]]:
+    """拆分测试标识为 (测试文件, 测试方法)."""
+    test_file, sep, method = test_id.partition("#")
+    return test_file, (method if sep else None)
+
+
+def changed_base_lines(change: FileChange) -> List[int]:
+    """计算变更涉及的基线版本行号.
+
+    覆盖映射采集自基线版本，因此变更块需要换算为旧文件中的行号：
+    修改和删除的行直接取旧行号，纯插入取插入点前后相邻的两行。
+
+    Args:
+        change: 文件变更
+
+    Returns:
+        List[int]: 排序后的基线行号（从 1 开始）
+    """
+    if change.change_type == ChangeType.ADDED:
+        return []
+
+    old_lines = change.old_content.splitlines()
+    if change.change_type == ChangeType.DELETED:
+        return list(range(1, len(old_lines) + 1))
+
+    lines: Set[int] = set()
+    if change.old_content and change.new_content:
+        matcher = SequenceMatcher(None, old_lines, change.new_content.splitlines(), autojunk=False)
+        for tag, i1, i2, _, _ in matcher.get_opcodes():
+            if tag in ("replace", "delete"):
+                lines.update(range(i1 + 1, i2 + 1))
+            elif tag == "insert":
+                lines.update(n for n in (i1, i1 + 1) if 1 <= n <= len(old_lines))
+        return sorted(lines)
+
+    # 没有文件内容时退回到 diff 中删除的行和变更方法的范围
+    lines.update(change.deleted_lines)
+    for method in change.method_changes:
+        if method.line_start > 0:
+            lines.update(range(method.line_start, max(method.line_start, method.line_end) + 1))
+    return sorted(lines)
+
+
+@dataclass
+class CoverageSelection:
+    """基于覆盖映射的选择结果."""
+    tests: List[str] = field(default_factory=list)
+    covered: Dict[str, Dict[str, List[int]]] = field(default_factory=dict)  # 测试 -> 文件 -> 行
+    uncovered: Dict[str, List[int]] = field(default_factory=dict)  # 文件 -> 无覆盖的变更行
+    changed_files: Set[str] = field(default_factory=set)
+
+    def is_fully_covered(self, file_path: str) -> bool:
+        """文件的变更行是否全部有覆盖数据."""
+        return file_path in self.changed_files and file_path not in self.uncovered
+
+
+class CoverageMap:
+    """按测试的行覆盖映射.
+
+    文件路径均为相对项目根目录的 POSIX 路径，测试在内部以整数编号存储。
+
+    Example:
+        coverage_map = CoverageMap.load(project_path)
+        coverage_map.ingest_reports("build/per-test-coverage")
+        coverage_map.save()
+        selection = coverage_map.select({"src/main/java/com/a/Foo.java": [12, 13]})
+    """
+
+    def __init__(self, project_path: str):
+        """初始化覆盖映射.
+
+        Args:
+            project_path: 项目根目录
+        """
+        self.project_path = Path(project_path)
+        self._root = os.path.abspath(project_path)
+        self.map_file = self.project_path / ".ut-agent" / "coverage_map.json"
+        self._tests: List[Optional[str]] = []
+        self._test_ids: Dict[str, int] = {}
+        self._lines: Dict[str, Dict[int, Set[int]]] = {}
+        self._test_files: Dict[int, Set[str]] = {}
+
+    @classmethod
+    def load(cls, project_path: str) -> "CoverageMap":
+        """加载持久化的覆盖映射，不存在或格式不兼容时返回空映射."""
+        coverage_map = cls(project_path)
+        if not coverage_map.map_file.exists():
+            return coverage_map
+        try:
+            data = json.loads(coverage_map.map_file.read_text(encoding="utf-8"))
+            if data.get("version") != COVERAGE_MAP_VERSION:
+                return coverage_map
+            tests = data.get("tests", [])
+            for file_path, per_test in data.get("files", {}).items():
+                for index, ranges in per_test.items():
+                    coverage_map._add_lines(tests[int(index)], file_path, _from_ranges(ranges))
+        except Exception as e:
+            logger.warning(f"加载覆盖映射失败，将忽略: {e}")
+            return cls(project_path)
+        return coverage_map
+
+    def save(self) -> None:
+        """持久化覆盖映射."""
+        files: Dict[str, Dict[str, List[int]]] = {}
+        compact: Dict[int, int] = {}
+        tests: List[str] = []
+        for file_path, lines in self._lines.items():
+            per_test: Dict[int, List[int]] = {}
+            for line, test_indexes in lines.items():
+                for index in test_indexes:
+                    per_test.setdefault(index, []).append(line)
+            entry = files[file_path] = {}
+            for index, test_lines in per_test.items():
+                if index not in compact:
+                    compact[index] = len(tests)
+                    tests.append(self._tests[index])
+                entry[str(compact[index])] = _to_ranges(test_lines)
+
+        data = {"version": COVERAGE_MAP_VERSION, "tests": tests, "files": files}
+        try:
+            self.map_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.map_file.with_suffix(".tmp")
+            tmp_file.write_text(
+                json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            os.replace(tmp_file, self.map_file)
+        except OSError as e:
+            logger.warning(f"保存覆盖映射失败: {e}")
+
+    @property
+    def tests(self) -> List[str]:
+        """已记录的测试标识."""
+        return sorted(t for t in self._tests if t is not None)
+
+    def __len__(self) -> int:
+        return len(self._test_ids)
+
+    def _relative(self, file_path: str) -> str:
+        return relative_path(os.path.normpath(file_path), self._root)
+
+    def _test_index(self, test_id: str) -> int:
+        index = self._test_ids.get(test_id)
+        if index is None:
+            index = self._test_ids[test_id] = len(self._tests)
+            self._tests.append(test_id)
+        return index
+
+    def _add_lines(self, test_id: str, file_path: str, lines: Iterable[int]) -> None:
+        index = self._test_index(test_id)
+        file_lines = self._lines.setdefault(file_path, {})
+        for line in lines:
+            file_lines.setdefault(line, set()).add(index)
+        self._test_files.setdefault(index, set()).add(file_path)
+
+    def set_test_coverage(self, test_id: str, coverage: Dict[str, Iterable[int]]) -> None:
+        """替换一个测试的覆盖数据.
+
+        Args:
+            test_id: 测试标识
+            coverage: 文件路径到被覆盖行号的映射
+        """
+        self.remove_test(test_id)
+        for file_path, lines in coverage.items():
+            lines = list(lines)
+            if lines:
+                self._add_lines(test_id, self._relative(file_path), lines)
+
+    def remove_test(self, test_id: str) -> None:
+        """移除测试的覆盖数据（测试被删除或重新采集前）."""
+        index = self._test_ids.pop(test_id, None)
+        if index is None:
+            return
+        self._tests[index] = None
+        for file_path in self._test_files.pop(index, ()):
+            file_lines = self._lines.get(file_path, {})
+            for line in [n for n, tests in file_lines.items() if index in tests]:
+                file_lines[line].discard(index)
+                if not file_lines[line]:
+                    del file_lines[line]
+            if not file_lines:
+                self._lines.pop(file_path, None)
+
+    def has_file(self, file_path: str) -> bool:
+        """文件是否有任何覆盖数据."""
+        return self._relative(file_path) in self._lines
+
+    def tests_for_line(self, file_path: str, line: int) -> List[str]:
+        """覆盖指定行的测试."""
+        indexes = self._lines.get(self._relative(file_path), {}).get(line, ())
+        return sorted(self._tests[i] for i in indexes)
+
+    def select(
+        self, changed_lines: Dict[str, Iterable[int]], minimal: bool = True
+    ) -> CoverageSelection:
+        """选择覆盖变更行的测试.
+
+        Args:
+            changed_lines: 文件路径到变更行号（基线版本）的映射
+            minimal: 为 True 时用贪心集合覆盖求最小测试集，
+                否则返回覆盖任一变更行的全部测试
+
+        Returns:
+            CoverageSelection: 选中的测试、各测试覆盖的变更行以及无覆盖的变更行
+        """
+        selection = CoverageSelection()
+        # 测试编号 -> 它覆盖的 (文件, 行)
+        candidates: Dict[int, Set[Tuple[str, int]]] = {}
+        universe: Set[Tuple[str, int]] = set()
+
+        for file_path, lines in changed_lines.items():
+            selection.changed_files.add(file_path)
+            file_lines = self._lines.get(self._relative(file_path), {})
+            uncovered = []
+            for line in sorted(set(lines)):
+                test_indexes = file_lines.get(line)
+                if not test_indexes:
+                    uncovered.append(line)
+                    continue
+                universe.add((file_path, line))
+                for index in test_indexes:
+                    candidates.setdefault(index, set()).add((file_path, line))
+            if uncovered:
+                selection.uncovered[file_path] = uncovered
+
+        if minimal:
+            chosen = self._greedy_cover(universe, candidates)
+        else:
+            chosen = sorted(candidates, key=lambda i: self._tests[i])
+
+        for index in chosen:
+            test_id = self._tests[index]
+            selection.tests.append(test_id)
+            per_file: Dict[str, List[int]] = {}
+            for file_path, line in sorted(candidates[index]):
+                per_file.setdefault(file_path, []).append(line)
+            selection.covered[test_id] = per_file
+        return selection
+
+    def _greedy_cover(
+        self,
+        universe: Set[Tuple[str, int]],
+        candidates: Dict[int, Set[Tuple[str, int]]],
+    ) -> List[int]:
+        """贪心集合覆盖：每轮选择新覆盖变更行最多的测试（相同时按标识排序）."""
+        remaining = set(universe)
+        chosen: List[int] = []
+        pool = dict(candidates)
+        while remaining and pool:
+            best = min(pool, key=lambda i: (-len(pool[i] & remaining), self._tests[i]))
+            gain = pool.pop(best) & remaining
+            if not gain:
+                break
+            chosen.append(best)
+            remaining -= gain
+        return chosen
+
+    # ---- 覆盖率报告导入 ----
+
+    def ingest_reports(self, reports_dir: str, source_root: str = "src/main/java") -> int:
+        """导入按测试拆分的覆盖率报告目录.
+
+        目录中每个报告对应一个测试，文件名（去掉扩展名）是 URL 编码的测试标识，
+        例如 ``src%2Ftest%2FFooTest.java%23testBar.xml``。
+        支持 JaCoCo XML（``.xml``）、Istanbul ``coverage-final.json``（``.json``）
+        与 lcov（``.info``）。
+
+        Args:
+            reports_dir: 报告目录
+            source_root: JaCoCo 报告中包路径对应的源码根目录（相对项目根目录）
+
+        Returns:
+            int: 导入的报告数
+        """
+        count = 0
+        for report in sorted(Path(reports_dir).iterdir()):
+            test_id = unquote(report.stem)
+            try:
+                if report.suffix == ".xml":
+                    coverage = parse_jacoco_lines(str(report), source_root)
+                elif report.suffix == ".json":
+                    coverage = parse_istanbul_lines(str(report))
+                elif report.suffix == ".info":
+                    coverage = parse_lcov_lines(str(report))
+                else:
+                    continue
+            except Exception as e:
+                logger.warning(f"解析覆盖率报告失败 {report.name}: {e}")
+                continue
+            self.set_test_coverage(test_id, coverage)
+            count += 1
+        return count
+
+
+def parse_jacoco_lines(
+    report_path: str, source_root: str = "src/main/java"
+) -> Dict[str, List[int]]:
+    """从 JaCoCo XML 报告中提取被覆盖的行.
+
+    Args:
+        report_path: 报告路径
+        source_root: 包路径对应的源码根目录
+
+    Returns:
+        Dict[str, List[int]]: 源文件路径到被覆盖行号的映射
+    """
+    coverage: Dict[str, List[int]] = {}
+    root = ET.parse(report_path).getroot()
+    for package in root.iter("package"):
+        package_path = package.get("name", "")
+        for source in package.iter("sourcefile"):
+            lines = [
+                int(line.get("nr"))
+                for line in source.iter("line")
+                if int(line.get("ci", 0)) > 0
+            ]
+            if lines:
+                path = "/".join(p for p in (source_root, package_path, source.get("name")) if p)
+                coverage[path] = lines
+    return coverage
+
+
+def parse_istanbul_lines(report_path: str) -> Dict[str, List[int]]:
+    """从 Istanbul ``coverage-final.json`` 中提取被执行语句所在的行.
+
+    Args:
+        report_path: 报告路径
+
+    Returns:
+        Dict[str, List[int]]: 源文件路径到被覆盖行号的映射
+    """
+    with open(report_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    coverage: Dict[str, List[int]] = {}
+    for file_path, file_data in data.items():
+        statements = file_data.get("statementMap", {})
+        lines: Set[int] = set()
+        for statement_id, hits in file_data.get("s", {}).items():
+            location = statements.get(statement_id)
+            if hits and location:
+                lines.update(range(location["start"]["line"], location["end"]["line"] + 1))
+        if lines:
+            coverage[file_data.get("path", file_path)] = sorted(lines)
+    return coverage
+
+
+def parse_lcov_lines(report_path: str) -> Dict[str, List[int]]:
+    """从 lcov 报告中提取被覆盖的行.
+
+    Args:
+        report_path: 报告路径
+
+    Returns:
+        Dict[str, List[int]]: 源文件路径到被覆盖行号的映射
+    """
+    coverage: Dict[str, List[int]] = {}
+    current: Optional[List[int]] = None
+    with open(report_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("SF:"):
+                current = coverage.setdefault(line[3:], [])
+            elif line.startswith("DA:") and current is not None:
+                number, hits = line[3:].split(",")[:2]
+                if int(hits) > 0:
+                    current.append(int(number))
+            elif line == "end_of_record":
+                current = None
+    return {path: lines for path, lines in coverage.items() if lines}
@@ -0,0 +1,203 @@
+"""反向依赖图 - 按文件组织的依赖邻接表与有界传递闭包查询."""
+
+import os
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# 相对导入解析时尝试的后缀
+_MODULE_SUFFIXES = ("", ".ts", ".tsx", ".vue", "/index.ts")
+
+
+class Dependent(NamedTuple):
+    """传递依赖方."""
+    file_path: str
+    depth: int
+    via: str  # 第一层依赖方（depth == 1 时为自身）
+
+
+def relative_path(path: str, root: str) -> str:
+    """将项目内的路径转换为相对项目根目录的 POSIX 路径.
+
+    Args:
+        path: 文件路径，相对路径视为已相对于项目根目录
+        root: 项目根目录（绝对路径）
+
+    Returns:
+        str: 相对路径；不在项目内的绝对路径原样返回
+    """
+    if os.path.isabs(path):
+        relative = os.path.relpath(path, root)
+        if not relative.startswith(".."):
+            path = relative
+    return path.replace(os.sep, "/")
+
+
+class ReverseDependencyGraph:
+    """反向依赖图.
+
+    邻接表以文件为键：``dependents[f]`` 是直接依赖 f 的文件集合。
+    传递闭包按 (文件, 深度上限) 记忆化，图发生变化时清空。
+
+    Example:
+        graph = ReverseDependencyGraph.from_project_index(index)
+        for dep in graph.transitive_dependents("src/Util.java", max_depth=3):
+            print(dep.file_path, dep.depth)
+    """
+
+    def __init__(self, closure_cache_size: int = 256):
+        """初始化反向依赖图.
+
+        Args:
+            closure_cache_size: 记忆化的传递闭包数量上限
+        """
+        self._dependents: Dict[str, Set[str]] = {}
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._closure_cache: "OrderedDict[Tuple[str, int], Tuple[Dependent, ...]]" = OrderedDict()
+        self._closure_cache_size = closure_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def from_project_index(
+        cls, project_index, closure_cache_size: int = 256
+    ) -> "ReverseDependencyGraph":
+        """从项目索引构建依赖图.
+
+        依赖目标按符号名解析到定义文件，TypeScript 相对导入按路径解析，
+        无法解析的目标（外部库等）忽略。文件路径统一为相对项目根目录的路径。
+
+        Args:
+            project_index: ProjectIndex 实例
+            closure_cache_size: 记忆化的传递闭包数量上限
+
+        Returns:
+            ReverseDependencyGraph: 依赖图
+        """
+        graph = cls(closure_cache_size)
+        root = os.path.abspath(project_index.project_path)
+        # 索引中的路径以 project_path 为前缀，相对路径需要先转为绝对路径
+        paths: Dict[str, str] = {}
+
+        def to_relative(file_path: str) -> str:
+            relative = paths.get(file_path)
+            if relative is None:
+                relative = paths[file_path] = relative_path(os.path.abspath(file_path), root)
+            return relative
+
+        known_files = {to_relative(f) for f in project_index.indexed_files()}
+        symbol_files: Dict[str, Optional[str]] = {}
+
+        for dep in project_index.dependencies:
+            source = to_relative(dep.source_file)
+            if dep.target_file in symbol_files:
+                target = symbol_files[dep.target_file]
+            else:
+                symbol = project_index.find_symbol(dep.target_file)
+                target = to_relative(symbol.file_path) if symbol else None
+                symbol_files[dep.target_file] = target
+            if target is None and dep.target_file.startswith("."):
+                target = cls._resolve_module(source, dep.target_file, known_files)
+            if target is not None and target != source:
+                graph.add_edge(source, target)
+
+        return graph
+
+    @staticmethod
+    def _resolve_module(source: str, module: str, known_files: Set[str]) -> Optional[str]:
+        base = os.path.normpath(os.path.join(os.path.dirname(source), module)).replace(os.sep, "/")
+        for suffix in _MODULE_SUFFIXES:
+            candidate = base + suffix
+            if candidate in known_files:
+                return candidate
+        return None
+
+    def add_edge(self, source: str, target: str) -> None:
+        """添加依赖边：source 依赖 target."""
+        self._dependents.setdefault(target, set()).add(source)
+        self._dependencies.setdefault(source, set()).add(target)
+        self._closure_cache.clear()
+
+    def set_dependencies(self, source: str, targets: Iterable[str]) -> None:
+        """替换文件的全部出边（文件修改后增量更新）.
+
+        Args:
+            source: 文件路径
+            targets: 新的依赖文件
+        """
+        self.remove_file(source, keep_dependents=True)
+        for target in targets:
+            if target != source:
+                self.add_edge(source, target)
+        self._closure_cache.clear()
+
+    def remove_file(self, file_path: str, keep_dependents: bool = False) -> None:
+        """移除文件的出边，以及（默认）指向它的入边.
+
+        Args:
+            file_path: 文件路径
+            keep_dependents: 是否保留其他文件对它的依赖
+        """
+        for target in self._dependencies.pop(file_path, set()):
+            sources = self._dependents.get(target)
+            if sources is not None:
+                sources.discard(file_path)
+                if not sources:
+                    del self._dependents[target]
+
+        if not keep_dependents:
+            for source in self._dependents.pop(file_path, set()):
+                targets = self._dependencies.get(source)
+                if targets is not None:
+                    targets.discard(file_path)
+                    if not targets:
+                        del self._dependencies[source]
+
+        self._closure_cache.clear()
+
+    def dependents(self, file_path: str) -> List[str]:
+        """直接依赖该文件的文件."""
+        return sorted(self._dependents.get(file_path, ()))
+
+    def dependencies(self, file_path: str) -> List[str]:
+        """该文件直接依赖的文件."""
+        return sorted(self._dependencies.get(file_path, ()))
+
+    def transitive_dependents(self, file_path: str, max_depth: int = 3) -> List[Dependent]:
+        """有界深度的传递依赖方（广度优先，按层次排序）.
+
+        Args:
+            file_path: 变更文件
+            max_depth: 最大层数，<= 0 表示不限制
+
+        Returns:
+            List[Dependent]: 依赖方列表，不含文件自身
+        """
+        key = (file_path, max_depth)
+        cached = self._closure_cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            self._closure_cache.move_to_end(key)
+            return list(cached)
+
+        self.cache_misses += 1
+        result: List[Dependent] = []
+        visited = {file_path}
+        queue = deque()
+        for dependent in sorted(self._dependents.get(file_path, ())):
+            visited.add(dependent)
+            queue.append(Dependent(dependent, 1, dependent))
+
+        while queue:
+            current = queue.popleft()
+            result.append(current)
+            if 0 < max_depth <= current.depth:
+                continue
+            for dependent in sorted(self._dependents.get(current.file_path, ())):
+                if dependent not in visited:
+                    visited.add(dependent)
+                    queue.append(Dependent(dependent, current.depth + 1, current.via))
+
+        self._closure_cache[key] = tuple(result)
+        if len(self._closure_cache) > self._closure_cache_size:
+            self._closure_cache.popitem(last=False)
+        return result
@@ -1,5 +1,6 @@
 """影响分析器."""
 
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -10,6 +11,10 @@ from ut_agent.selection.change_detector import (
     MethodChange,
     ChangeType,
 )
+from ut_agent.selection.coverage_map import changed_base_lines
+from ut_agent.selection.dependency_graph import ReverseDependencyGraph, relative_path
+from ut_agent.tools.test_analyzer import get_test_method_index
+from ut_agent.tools.test_file_index import TestFileIndex
 
 
 @dataclass
@@ -19,6 +24,7 @@ class DirectImpact:
     change_type: ChangeType
     method_changes: List[MethodChange] = field(default_factory=list)
     test_file: Optional[str] = None
+    changed_lines: List[int] = field(default_factory=list)  # 基线版本中变更的行
 
 
 @dataclass
@@ -28,6 +34,7 @@ class IndirectImpact:
     reason: str
     call_sites: List[str] = field(default_factory=list)
     test_file: Optional[str] = None
+    source_file: Optional[str] = None  # 引起该影响的变更文件
 
 
 @dataclass
@@ -37,6 +44,7 @@ class TestImpact:
     test_method: Optional[str] = None
     reason: str = ""
     priority: int = 0
+    source_file: Optional[str] = None  # 引起该影响的变更文件
 
 
 @dataclass
@@ -88,10 +96,22 @@ class ImpactAnalyzer:
         "python": ["test_", "_test.py"],
     }
     
-    def __init__(self, project_path: str, project_index=None):
+    def __init__(self, project_path: str, project_index=None, max_depth: int = 3):
+        """初始化影响分析器.
+
+        Args:
+            project_path: 项目根目录
+            project_index: 项目索引（ProjectIndex），用于构建反向依赖图
+            max_depth: 间接影响的最大传递层数，<= 0 表示不限制
+        """
         self._project_path = Path(project_path)
         self._project_index = project_index
         self._project_type = self._detect_project_type()
+        self._max_depth = max_depth
+        self._dependency_graph: Optional[ReverseDependencyGraph] = None
+        self._graph_version: Optional[int] = None
+        self._test_index = TestFileIndex.get_instance(project_path)
+        self._test_index_synced = False
     
     def _detect_project_type(self) -> str:
         if (self._project_path / "pom.xml").exists() or \
@@ -106,6 +126,8 @@ class ImpactAnalyzer:
     
     def analyze_impact(self, change_set: ChangeSet) -> ImpactReport:
         report = ImpactReport()
+        # 每次分析开始时同步一次测试文件索引
+        self._test_index_synced = False
         
         for change in change_set.changes:
             direct = self._analyze_direct_impact(change)
@@ -127,6 +149,7 @@ class ImpactAnalyzer:
             change_type=change.change_type,
             method_changes=change.method_changes,
             test_file=test_file,
+            changed_lines=changed_base_lines(change),
         )
     
     def _analyze_indirect_impact(self, change: FileChange) -> List[IndirectImpact]:
@@ -136,19 +159,33 @@ class ImpactAnalyzer:
             return impacts
         
         try:
-            dependents = self._find_dependents(change.path)
+            graph = self._get_dependency_graph()
+            dependents = graph.transitive_dependents(
+                self._relative_path(change.path), self._max_depth
+            )
             
+            # 第一层依赖方需要确实调用了变更的方法，更深层只沿已确认的依赖方传播
+            confirmed = set()
             for dependent in dependents:
-                call_sites = self._find_call_sites(dependent, change)
+                if dependent.depth == 1:
+                    call_sites = self._find_call_sites(dependent.file_path, change)
+                    if not call_sites:
+                        continue
+                    confirmed.add(dependent.file_path)
+                    reason = f"调用了变更的方法: {', '.join(call_sites[:3])}"
+                elif dependent.via in confirmed:
+                    call_sites = []
+                    reason = f"传递依赖变更文件（第 {dependent.depth} 层，经由 {dependent.via}）"
+                else:
+                    continue
                 
-                if call_sites:
-                    test_file = self._find_test_file(dependent)
-                    impacts.append(IndirectImpact(
-                        file_path=dependent,
-                        reason=f"调用了变更的方法: {', '.join(call_sites[:3])}",
-                        call_sites=call_sites,
-                        test_file=test_file,
-                    ))
+                impacts.append(IndirectImpact(
+                    file_path=dependent.file_path,
+                    reason=reason,
+                    call_sites=call_sites,
+                    test_file=self._find_test_file(dependent.file_path),
+                    source_file=change.path,
+                ))
         except Exception:
             pass
         
@@ -178,6 +215,7 @@ class ImpactAnalyzer:
                     test_method=test_method,
                     reason=f"测试方法需要更新: {method_change.name}",
                     priority=priority,
+                    source_file=change.path,
                 ))
         
         return impacts
@@ -189,72 +227,53 @@ class ImpactAnalyzer:
         test_patterns = self.TEST_FILE_PATTERNS.get(self._project_type, [])
         test_dirs = self.TEST_DIR_PATTERNS.get(self._project_type, [])
         
-        for test_dir in test_dirs:
-            test_path = self._project_path / test_dir
-            
-            if not test_path.exists():
-                continue
-            
-            for pattern in test_patterns:
-                if self._project_type == "java":
-                    test_name = f"{file_stem}{pattern}"
-                elif self._project_type == "python":
-                    test_name = f"{pattern}{file_stem}.py"
-                else:
-                    test_name = f"{file_stem}{pattern}"
-                
-                for found in test_path.rglob(test_name):
-                    return str(found)
+        test_names = []
+        for pattern in test_patterns:
+            if self._project_type == "java":
+                test_names.append(f"{file_stem}{pattern}")
+            elif self._project_type == "python":
+                test_names.append(f"{pattern}{file_stem}.py")
+            else:
+                test_names.append(f"{file_stem}{pattern}")
+        
+        if not self._test_index_synced:
+            self._test_index.refresh()
+            self._test_index_synced = True
         
-        return None
+        # 返回相对项目根目录的路径，写入分片清单等产物后在其他机器上仍然有效
+        return self._test_index.find(test_names, roots=test_dirs, source_file=source_file)
     
     def _find_test_method(self, test_file: str, method_name: str) -> Optional[str]:
-        try:
-            content = Path(test_file).read_text(encoding="utf-8")
-        except Exception:
+        # 每个测试文件只解析一次，同一文件的多个变更方法共享解析结果
+        indexed = get_test_method_index().get_file_methods(
+            str(self._project_path / test_file), self._project_type
+        )
+        if indexed is None:
             return None
         
-        import re
-        
-        if self._project_type == "java":
-            patterns = [
-                rf'void\s+test{method_name}\w*\s*\(',
-                rf'void\s+{method_name}\w*Test\s*\(',
-                rf'void\s+\w*_when{method_name}\w*\s*\(',
-                rf'@Test.*\n.*void\s+\w*{method_name}\w*\s*\(',
-            ]
-        else:
-            patterns = [
-                rf'(?:it|test)\s*\([\'"][^\'"]*{method_name}[^\'"]*[\'"]',
-                rf'describe\s*\([\'"][^\'"]*{method_name}[^\'"]*[\'"]',
-            ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
-            if match:
-                if self._project_type == "java":
-                    method_match = re.search(r'void\s+(\w+)\s*\(', match.group(0))
-                    if method_match:
-                        return method_match.group(1)
-                else:
-                    return match.group(0)[:50]
-        
-        return None
+        return indexed.find_test_method(method_name)
+    
+    def _get_dependency_graph(self) -> ReverseDependencyGraph:
+        """获取反向依赖图，项目索引的版本变化后重新构建."""
+        version = self._project_index.version
+        if self._dependency_graph is None or self._graph_version != version:
+            self._dependency_graph = ReverseDependencyGraph.from_project_index(
+                self._project_index
+            )
+            self._graph_version = version
+        return self._dependency_graph
+    
+    def _relative_path(self, file_path: str) -> str:
+        return relative_path(file_path, os.path.abspath(self._project_path))
     
     def _find_dependents(self, file_path: str) -> List[str]:
         if self._project_index is None:
             return []
         
-        dependents = []
-        
         try:
-            for symbol, info in self._project_index.symbols.items():
-                if file_path in str(info.get("dependencies", [])):
-                    dependents.append(info.get("file_path", ""))
+            return self._get_dependency_graph().dependents(self._relative_path(file_path))
         except Exception:
-            pass
-        
-        return list(set(dependents))
+            return []
     
     def _find_call_sites(self, dependent_file: str, change: FileChange) -> List[str]:
         call_sites = []
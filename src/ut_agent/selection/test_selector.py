@@ -2,9 +2,10 @@
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from ut_agent.selection.change_detector import ChangeType
+from ut_agent.selection.coverage_map import CoverageMap, CoverageSelection, split_test_id
 from ut_agent.selection.impact_analyzer import ImpactReport
 
 
@@ -74,13 +75,29 @@ class TestSelector:
         self,
         strategy: SelectionStrategy = SelectionStrategy.SMART,
         priority_calculator=None,
+        coverage_map: Optional[CoverageMap] = None,
     ):
+        """初始化测试选择器.
+
+        Args:
+            strategy: 选择策略
+            priority_calculator: 优先级计算器
+            coverage_map: 按测试的行覆盖映射；提供时按变更行选择最小覆盖测试集，
+                只有无覆盖数据的变更才使用启发式规则
+        """
         self._strategy = strategy
         self._priority_calculator = priority_calculator
+        self._coverage_map = coverage_map
     
     def select_tests(self, impact: ImpactReport) -> SelectionResult:
         result = SelectionResult()
         
+        coverage = self._select_by_coverage(impact, result)
+        # 变更行全部有覆盖数据的文件，不再按启发式规则选择间接影响和测试方法
+        covered_files: Set[str] = set()
+        if coverage is not None:
+            covered_files = {f for f in coverage.changed_files if coverage.is_fully_covered(f)}
+        
         for direct in impact.direct_impacts:
             if direct.change_type == ChangeType.ADDED:
                 task = TestTask(
@@ -120,6 +137,9 @@ class TestSelector:
                     result.add_task(task)
         
         for indirect in impact.indirect_impacts:
+            if indirect.source_file in covered_files:
+                continue
+            
             if self._strategy == SelectionStrategy.CONSERVATIVE:
                 task = TestTask(
                     source_file=indirect.file_path,
@@ -140,6 +160,9 @@ class TestSelector:
                     result.add_task(task)
         
         for test_impact in impact.test_impacts:
+            if test_impact.source_file in covered_files:
+                continue
+            
             existing = next(
                 (t for t in result.to_update if t.test_file == test_impact.test_file),
                 None
@@ -158,6 +181,65 @@ class TestSelector:
         
         return result
     
+    def _select_by_coverage(
+        self,
+        impact: ImpactReport,
+        result: SelectionResult,
+    ) -> Optional[CoverageSelection]:
+        """按覆盖映射选择覆盖变更行的最小测试集，并加入验证任务."""
+        if self._coverage_map is None or not len(self._coverage_map):
+            return None
+        
+        changed: Dict[str, List[int]] = {}
+        for direct in impact.direct_impacts:
+            if direct.change_type == ChangeType.ADDED:
+                continue
+            lines = direct.changed_lines or [
+                line
+                for m in direct.method_changes if m.line_start > 0
+                for line in range(m.line_start, max(m.line_start, m.line_end) + 1)
+            ]
+            if lines and self._coverage_map.has_file(direct.file_path):
+                changed[direct.file_path] = lines
+        
+        if not changed:
+            return None
+        
+        selection = self._coverage_map.select(
+            changed,
+            minimal=self._strategy != SelectionStrategy.CONSERVATIVE,
+        )
+        
+        # 同一测试文件的多个测试方法合并为一个任务
+        tasks: Dict[str, TestTask] = {}
+        for test_id in selection.tests:
+            test_file, method = split_test_id(test_id)
+            task = tasks.get(test_file)
+            if task is None:
+                task = tasks[test_file] = TestTask(
+                    source_file="",
+                    task_type=TaskType.VERIFY,
+                    test_file=test_file,
+                    metadata={"selection": "coverage", "covered_lines": {}},
+                )
+            if method:
+                task.methods.append(method)
+            covered_lines = task.metadata["covered_lines"]
+            for file_path, lines in selection.covered[test_id].items():
+                merged = covered_lines.setdefault(file_path, [])
+                merged.extend(line for line in lines if line not in merged)
+        
+        for task in tasks.values():
+            covered_lines = task.metadata["covered_lines"]
+            task.source_file = next(iter(covered_lines))
+            task.reason = "覆盖变更行: " + ", ".join(
+                f"{file_path}:{','.join(map(str, sorted(lines)))}"
+                for file_path, lines in covered_lines.items()
+            )
+            result.add_task(task)
+        
+        return selection
+    
     def prioritize(
         self,
         selection: SelectionResult,
@@ -1,20 +1,209 @@
 """AST 缓存管理器 - 缓存 tree-sitter 解析结果，支持 LRU 淘汰和过期机制."""
 
+import atexit
 import hashlib
 import json
 import os
 import pickle
+import sqlite3
+import threading
+import time
 from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import tree_sitter_java as ts_java
 import tree_sitter_typescript as ts_typescript
-from tree_sitter import Language, Parser
+from tree_sitter import Language, Parser, Tree
 
 from ut_agent.exceptions import ASTParseError
+from ut_agent.tools.compact_ast import CompactAST, CompactNode
+from ut_agent.tools.tree_edits import apply_tree_edits, compute_tree_edits
+from ut_agent.utils import get_logger
+from ut_agent.utils.file_fingerprint import (
+    FileSignature,
+    fast_hash,
+    is_signature_current,
+    stat_signature,
+)
+
+logger = get_logger("ast_cache")
+
+# 缓存格式版本，AST 存储格式变化时递增，旧版本索引与缓存文件将被忽略
+CACHE_FORMAT_VERSION = "2.1"
+
+
+def create_parser(language: str) -> Parser:
+    """创建指定语言的 tree-sitter 解析器.
+
+    Args:
+        language: 语言类型 (java/typescript/tsx)
+
+    Returns:
+        Parser: 解析器
+    """
+    parser = Parser()
+    if language == "java":
+        parser.language = Language(ts_java.language())
+    elif language in ("typescript", "typescript tsx"):
+        parser.language = Language(ts_typescript.language_typescript())
+    elif language == "tsx":
+        parser.language = Language(ts_typescript.language_tsx())
+    else:
+        raise ValueError(f"不支持的语言: {language}")
+    return parser
+
+
+def serialize_tree(tree, source: bytes) -> CompactAST:
+    """将 AST 树序列化为紧凑的列式节点表.
+
+    Args:
+        tree: tree-sitter 语法树
+        source: 解析时使用的源码字节
+
+    Returns:
+        CompactAST: 节点表，通过 ``.root`` 获取根节点游标
+    """
+    return CompactAST.from_tree(tree, source)
+
+
+def _read_text(file_path: str) -> str:
+    return Path(file_path).read_text(encoding="utf-8")
+
+
+def _load_compact_ast(data: bytes) -> CompactAST:
+    ast_data = pickle.loads(data)
+    if not isinstance(ast_data, CompactAST):
+        raise ValueError("过期的 AST 缓存格式")
+    return ast_data
+
+
+def _load_analysis(data: bytes) -> Dict[str, Any]:
+    result = json.loads(data)
+    if not isinstance(result, dict):
+        raise ValueError("无效的分析结果缓存")
+    return result
+
+
+class ASTCacheIndexStore:
+    """AST 缓存索引存储 - 基于 SQLite 的事务性索引.
+
+    每次提交只写入变更的条目，而不是重写整个索引文件；WAL 模式加忙等待
+    使多个线程、进程可以同时读写同一缓存目录，进程崩溃时未提交的事务
+    自动回滚，不会留下半写的索引。
+    """
+
+    def __init__(self, db_path: Path, version: str = CACHE_FORMAT_VERSION):
+        """初始化索引存储.
+
+        Args:
+            db_path: 索引数据库路径
+            version: 缓存格式版本，与库中记录不一致时清空索引
+        """
+        self._db_path = db_path
+        self._version = version
+        self._init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path), timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._get_connection()
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    )
+                """)
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row["value"] != self._version:
+                    # 格式变化时表结构也可能变化，直接重建
+                    conn.execute("DROP TABLE IF EXISTS entries")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                        (self._version,),
+                    )
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        cache_key TEXT PRIMARY KEY,
+                        file_path TEXT NOT NULL,
+                        content_hash TEXT NOT NULL,
+                        language TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        last_accessed TEXT NOT NULL,
+                        access_count INTEGER NOT NULL DEFAULT 0,
+                        size_bytes INTEGER NOT NULL DEFAULT 0,
+                        inode INTEGER,
+                        file_size INTEGER,
+                        mtime_ns INTEGER,
+                        checked_ns INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+        finally:
+            conn.close()
+
+    def load(self) -> List[sqlite3.Row]:
+        """读取全部索引条目（按最近访问时间升序，便于重建 LRU 顺序）."""
+        conn = self._get_connection()
+        try:
+            return conn.execute("SELECT * FROM entries ORDER BY last_accessed").fetchall()
+        finally:
+            conn.close()
+
+    def apply(self, upserts: List[Tuple[Any, ...]], deletes: List[str]) -> None:
+        """在一个事务中批量写入与删除索引条目.
+
+        Args:
+            upserts: 待写入的条目元组，字段顺序与 entries 表一致
+            deletes: 待删除的缓存键
+        """
+        conn = self._get_connection()
+        try:
+            with conn:
+                if deletes:
+                    conn.executemany(
+                        "DELETE FROM entries WHERE cache_key = ?",
+                        [(cache_key,) for cache_key in deletes],
+                    )
+                if upserts:
+                    conn.executemany("""
+                        INSERT INTO entries
+                        (cache_key, file_path, content_hash, language,
+                         created_at, last_accessed, access_count, size_bytes,
+                         inode, file_size, mtime_ns, checked_ns)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(cache_key) DO UPDATE SET
+                            file_path = excluded.file_path,
+                            content_hash = excluded.content_hash,
+                            language = excluded.language,
+                            created_at = excluded.created_at,
+                            last_accessed = excluded.last_accessed,
+                            access_count = excluded.access_count,
+                            size_bytes = excluded.size_bytes,
+                            inode = excluded.inode,
+                            file_size = excluded.file_size,
+                            mtime_ns = excluded.mtime_ns,
+                            checked_ns = excluded.checked_ns
+                    """, upserts)
+        finally:
+            conn.close()
+
+    def clear(self) -> None:
+        """清空索引条目."""
+        conn = self._get_connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries")
+        finally:
+            conn.close()
 
 
 @dataclass
@@ -29,6 +218,9 @@ class CacheEntry:
     access_count: int = 0
     size_bytes: int = 0
     ttl_seconds: int = 86400
+    # 记录内容哈希时的文件 stat 签名，用于跳过未变化文件的读取与哈希
+    signature: Optional[FileSignature] = None
+    checked_ns: int = 0
 
     def is_expired(self) -> bool:
         """检查缓存是否过期."""
@@ -46,6 +238,7 @@ class CacheStats:
     hit_count: int = 0
     miss_count: int = 0
     eviction_count: int = 0
+    incremental_parse_count: int = 0
 
     @property
     def hit_rate(self) -> float:
@@ -77,9 +270,19 @@ class ASTCacheManager:
         self._max_cache_size = settings.ast_cache_max_size
         self._max_entries = settings.ast_cache_max_entries
         self._default_ttl = settings.ast_cache_ttl
-        self._parsers: Dict[str, Parser] = {}
-
+        self._flush_batch_size = settings.ast_cache_flush_batch_size
+        # 解析器不是线程安全的，每个工作线程持有独立实例
+        self._local = threading.local()
+        # 保护内存索引与待提交变更，解析本身在锁外进行
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Optional[CacheEntry]] = {}
+        # 每个文件最近一次的语法树与源码，内容变化时在旧树上增量重解析
+        self._trees: OrderedDict[str, Tuple[Tree, bytes]] = OrderedDict()
+        self._max_trees = settings.ast_cache_max_trees
+
+        self._index_store = ASTCacheIndexStore(self._cache_dir / "index.db")
         self._load_cache_index()
+        atexit.register(self.flush)
         self._initialized = True
 
     @classmethod
@@ -89,27 +292,23 @@ class ASTCacheManager:
 
     @classmethod
     def reset_instance(cls):
-        """重置单例实例（用于测试）."""
+        """重置单例实例（用于测试），丢弃前先提交待写入的索引变更."""
+        if cls._instance is not None and cls._instance._initialized:
+            cls._instance.flush()
         cls._instance = None
 
     def _get_parser(self, language: str) -> Parser:
-        """获取或创建解析器."""
-        if language not in self._parsers:
-            parser = Parser()
-            if language == "java":
-                parser.language = Language(ts_java.language())
-            elif language in ("typescript", "typescript tsx"):
-                parser.language = Language(ts_typescript.language_typescript())
-            elif language == "tsx":
-                parser.language = Language(ts_typescript.language_tsx())
-            else:
-                raise ValueError(f"不支持的语言: {language}")
-            self._parsers[language] = parser
-        return self._parsers[language]
+        """获取或创建当前线程的解析器."""
+        parsers = getattr(self._local, "parsers", None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        if language not in parsers:
+            parsers[language] = create_parser(language)
+        return parsers[language]
 
     def _compute_hash(self, content: str) -> str:
         """计算内容哈希."""
-        return hashlib.md5(content.encode("utf-8")).hexdigest()
+        return fast_hash(content.encode("utf-8"))
 
     def _get_cache_key(self, file_path: str, language: str) -> str:
         """生成缓存键."""
@@ -122,70 +321,96 @@ class ASTCacheManager:
         return self._cache_dir / f"{safe_key}.ast"
 
     def _load_cache_index(self):
-        """加载缓存索引."""
-        index_file = self._cache_dir / "index.json"
-        if not index_file.exists():
-            return
+        """从索引库加载缓存索引."""
+        legacy_index = self._cache_dir / "index.json"
+        if legacy_index.exists():
+            # 旧版整文件重写的 JSON 索引不再使用
+            legacy_index.unlink(missing_ok=True)
 
         try:
-            with open(index_file, "r", encoding="utf-8") as f:
-                index_data = json.load(f)
-
-            for entry_data in index_data.get("entries", []):
-                cache_key = entry_data.get("cache_key")
-                if not cache_key:
-                    continue
-
-                cache_file = self._get_cache_file_path(cache_key)
-                if not cache_file.exists():
-                    continue
-
-                self._cache[cache_key] = CacheEntry(
-                    file_path=entry_data.get("file_path", ""),
-                    content_hash=entry_data.get("content_hash", ""),
-                    language=entry_data.get("language", ""),
-                    ast_data=None,
-                    created_at=datetime.fromisoformat(entry_data.get("created_at", datetime.now().isoformat())),
-                    last_accessed=datetime.fromisoformat(entry_data.get("last_accessed", datetime.now().isoformat())),
-                    access_count=entry_data.get("access_count", 0),
-                    size_bytes=entry_data.get("size_bytes", 0),
-                )
-
-            self._stats.total_entries = len(self._cache)
-            self._stats.total_size_bytes = sum(e.size_bytes for e in self._cache.values())
-
-        except Exception as e:
-            print(f"加载缓存索引失败: {e}")
-
-    def _save_cache_index(self):
-        """保存缓存索引."""
-        index_file = self._cache_dir / "index.json"
-
-        entries = []
-        for cache_key, entry in self._cache.items():
-            entries.append({
-                "cache_key": cache_key,
-                "file_path": entry.file_path,
-                "content_hash": entry.content_hash,
-                "language": entry.language,
-                "created_at": entry.created_at.isoformat(),
-                "last_accessed": entry.last_accessed.isoformat(),
-                "access_count": entry.access_count,
-                "size_bytes": entry.size_bytes,
-            })
-
-        index_data = {
-            "version": "1.0",
-            "entries": entries,
-            "stats": {
-                "hit_count": self._stats.hit_count,
-                "miss_count": self._stats.miss_count,
-                "eviction_count": self._stats.eviction_count,
-            },
-        }
+            rows = self._index_store.load()
+        except sqlite3.Error as e:
+            logger.warning(f"加载缓存索引失败: {e}")
+            return
+
+        for row in rows:
+            cache_key = row["cache_key"]
+            if not self._get_cache_file_path(cache_key).exists():
+                continue
+
+            self._cache[cache_key] = CacheEntry(
+                file_path=row["file_path"],
+                content_hash=row["content_hash"],
+                language=row["language"],
+                ast_data=None,
+                created_at=datetime.fromisoformat(row["created_at"]),
+                last_accessed=datetime.fromisoformat(row["last_accessed"]),
+                access_count=row["access_count"],
+                size_bytes=row["size_bytes"],
+                ttl_seconds=self._default_ttl,
+                signature=(
+                    FileSignature(row["inode"], row["file_size"], row["mtime_ns"])
+                    if row["inode"] is not None else None
+                ),
+                checked_ns=row["checked_ns"],
+            )
+
+        self._stats.total_entries = len(self._cache)
+        self._stats.total_size_bytes = sum(e.size_bytes for e in self._cache.values())
+
+    def _mark_dirty(self, cache_key: str, entry: Optional[CacheEntry]) -> None:
+        """记录待写入索引的变更，entry 为 None 表示删除.
+
+        调用方需持有 self._lock。
+        """
+        self._pending[cache_key] = entry
+        if len(self._pending) >= self._flush_batch_size:
+            self._flush_locked()
+
+    def flush(self) -> int:
+        """将待写入的索引变更在一个事务中提交.
 
-        with open(index_file, "w", encoding="utf-8") as f:
-            json.dump(index_data, f, indent=2, ensure_ascii=False)
+        Returns:
+            int: 提交的变更条数
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        if not self._pending:
+            return 0
+
+        pending = self._pending
+        self._pending = {}
+        upserts = [
+            (
+                cache_key,
+                entry.file_path,
+                entry.content_hash,
+                entry.language,
+                entry.created_at.isoformat(),
+                entry.last_accessed.isoformat(),
+                entry.access_count,
+                entry.size_bytes,
+                entry.signature.inode if entry.signature else None,
+                entry.signature.size if entry.signature else None,
+                entry.signature.mtime_ns if entry.signature else None,
+                entry.checked_ns,
+            )
+            for cache_key, entry in pending.items()
+            if entry is not None
+        ]
+        deletes = [cache_key for cache_key, entry in pending.items() if entry is None]
+
+        try:
+            self._index_store.apply(upserts, deletes)
+        except sqlite3.Error as e:
+            # 写入失败时保留变更，等待下次提交
+            logger.warning(f"写入缓存索引失败: {e}")
+            pending.update(self._pending)
+            self._pending = pending
+            return 0
+        return len(pending)
 
     def _evict_if_needed(self, required_space: int = 0):
         """在需要时清理缓存 - 使用 LRU 策略."""
@@ -216,21 +441,22 @@ class ASTCacheManager:
         entry = self._cache[cache_key]
         cache_file = self._get_cache_file_path(cache_key)
 
-        if cache_file.exists():
-            cache_file.unlink()
+        # 其他进程可能已删除该文件
+        cache_file.unlink(missing_ok=True)
 
         self._stats.total_size_bytes -= entry.size_bytes
         self._stats.total_entries -= 1
         self._stats.eviction_count += 1
 
         del self._cache[cache_key]
+        self._mark_dirty(cache_key, None)
 
     def get_or_parse(
         self,
         file_path: str,
         language: str,
         content: Optional[str] = None,
-    ) -> Tuple[Any, bool]:
+    ) -> Tuple[CompactNode, bool]:
         """获取或解析 AST.
 
         Args:
@@ -239,139 +465,304 @@ class ASTCacheManager:
             content: 文件内容（可选，不提供则自动读取）
 
         Returns:
-            Tuple[Any, bool]: (AST数据, 是否命中缓存)
+            Tuple[CompactNode, bool]: (AST 根节点游标, 是否命中缓存)
         """
+        cache_key = self._get_cache_key(file_path, language)
+        ast_data, content, content_hash, signature, checked_ns = self._lookup(
+            file_path, cache_key, content, _load_compact_ast, _read_text, "ast"
+        )
+        if ast_data is not None:
+            return ast_data.root, True
+        return self._parse_and_cache(
+            file_path, language, content, content_hash, cache_key, signature, checked_ns
+        ), False
+
+    def get_or_analyze(
+        self,
+        file_path: str,
+        kind: str,
+        analyze: Callable[[str], Dict[str, Any]],
+        read_source: Callable[[str], str] = _read_text,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """获取或计算文件的分析结果.
+
+        分析结果以 JSON 持久化，与 AST 共用索引、淘汰策略与 stat 快速路径：
+        stat 签名未变时无需读取文件，内容哈希未变时无需解析和查询。
+
+        Args:
+            file_path: 文件路径
+            kind: 分析结果类别，应包含结果格式版本（如 ``java-analysis-1``）
+            analyze: 根据源码计算分析结果，结果需可 JSON 序列化
+            read_source: 读取源码的函数
+
+        Returns:
+            Tuple[Dict[str, Any], bool]: (分析结果, 是否命中缓存)，结果与缓存共享，调用方不应修改
+        """
+        cache_key = self._get_cache_key(file_path, kind)
+        result, content, content_hash, signature, checked_ns = self._lookup(
+            file_path, cache_key, None, _load_analysis, read_source, "analysis"
+        )
+        if result is not None:
+            return result, True
+
+        result = analyze(content)
+        serialized = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._store(
+                cache_key, file_path, kind, result, serialized, content_hash, signature, checked_ns
+            )
         from ut_agent.utils.metrics import record_cache_operation
-        path = Path(file_path)
-        if content is None:
-            content = path.read_text(encoding="utf-8")
+        record_cache_operation("analysis", "set", hit=False)
+        return result, False
 
-        content_hash = self._compute_hash(content)
-        cache_key = self._get_cache_key(file_path, language)
+    def _lookup(
+        self,
+        file_path: str,
+        cache_key: str,
+        content: Optional[str],
+        load: Callable[[bytes], Any],
+        read_source: Callable[[str], str],
+        cache_type: str,
+    ) -> Tuple[Any, Optional[str], str, Optional[FileSignature], int]:
+        """查找缓存条目，命中时返回其数据，未命中时返回已读取的源码与哈希.
 
-        if cache_key in self._cache:
-            entry = self._cache[cache_key]
-
-            if entry.is_expired():
-                self._evict_entry(cache_key)
-                record_cache_operation("ast", "evict", hit=False)
-            elif entry.content_hash == content_hash:
-                self._cache.move_to_end(cache_key)
-                entry.last_accessed = datetime.now()
-                entry.access_count += 1
-                self._stats.hit_count += 1
-                record_cache_operation("ast", "get", hit=True)
-
-                cache_file = self._get_cache_file_path(cache_key)
-                if cache_file.exists() and entry.ast_data is None:
-                    try:
-                        with open(cache_file, "rb") as f:
-                            entry.ast_data = pickle.load(f)
-                    except Exception:
-                        self._evict_entry(cache_key)
-                        record_cache_operation("ast", "evict", hit=False)
-                        return self._parse_and_cache(file_path, language, content, content_hash, cache_key), False
-
-                return entry.ast_data, True
-
-        self._stats.miss_count += 1
-        record_cache_operation("ast", "get", hit=False)
-        return self._parse_and_cache(file_path, language, content, content_hash, cache_key), False
+        Returns:
+            Tuple: (缓存数据或 None, 源码, 内容哈希, stat 签名, 签名检查时间)
+        """
+        from ut_agent.utils.metrics import record_cache_operation
 
-    def _parse_and_cache(
+        # 只有自行读取文件时才能用 stat 签名证明内容未变
+        signature: Optional[FileSignature] = None
+        checked_ns = 0
+        content_hash: Optional[str] = None
+        if content is None:
+            signature = stat_signature(file_path)
+            checked_ns = time.time_ns()
+            with self._lock:
+                entry = self._cache.get(cache_key)
+                if entry is not None and is_signature_current(
+                    entry.signature, entry.checked_ns, signature
+                ):
+                    content_hash = entry.content_hash
+
+        if content_hash is None:
+            if content is None:
+                content = read_source(file_path)
+            content_hash = self._compute_hash(content)
+
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                if entry.is_expired():
+                    self._evict_entry(cache_key)
+                    record_cache_operation(cache_type, "evict", hit=False)
+                elif entry.content_hash == content_hash:
+                    if entry.ast_data is None:
+                        try:
+                            entry.ast_data = load(self._get_cache_file_path(cache_key).read_bytes())
+                        except Exception:
+                            self._evict_entry(cache_key)
+                            record_cache_operation(cache_type, "evict", hit=False)
+                            entry = None
+
+                    if entry is not None:
+                        self._cache.move_to_end(cache_key)
+                        entry.last_accessed = datetime.now()
+                        entry.access_count += 1
+                        if content is not None and signature is not None:
+                            # 内容经哈希确认未变，刷新签名以便下次走快速路径
+                            entry.signature = signature
+                            entry.checked_ns = checked_ns
+                        self._stats.hit_count += 1
+                        self._mark_dirty(cache_key, entry)
+                        record_cache_operation(cache_type, "get", hit=True)
+                        return entry.ast_data, content, content_hash, signature, checked_ns
+
+            self._stats.miss_count += 1
+
+        record_cache_operation(cache_type, "get", hit=False)
+        if content is None:
+            content = read_source(file_path)
+            content_hash = self._compute_hash(content)
+        return None, content, content_hash, signature, checked_ns
+
+    def _store(
         self,
+        cache_key: str,
         file_path: str,
         language: str,
-        content: str,
+        data: Any,
+        serialized: bytes,
         content_hash: str,
-        cache_key: str,
-    ) -> Any:
-        """解析并缓存 AST."""
-        from ut_agent.utils.metrics import ast_parse, record_cache_operation
-        # 解析 AST 并记录性能
-        with ast_parse(file_path, language):
-            parser = self._get_parser(language)
-            tree = parser.parse(bytes(content, "utf-8"))
+        signature: Optional[FileSignature],
+        checked_ns: int,
+    ) -> None:
+        """写入缓存文件并登记条目.
 
-            ast_data = self._serialize_tree(tree)
-
-        cache_file = self._get_cache_file_path(cache_key)
-        serialized = pickle.dumps(ast_data)
+        调用方需持有 self._lock。
+        """
         size_bytes = len(serialized)
-
+        # 同一文件可能被并发处理，先移除旧条目以保持统计准确
+        if cache_key in self._cache:
+            self._evict_entry(cache_key)
         self._evict_if_needed(size_bytes)
 
-        with open(cache_file, "wb") as f:
+        # 先写临时文件再原子替换，崩溃时不会留下半写的缓存文件
+        cache_file = self._get_cache_file_path(cache_key)
+        tmp_file = cache_file.with_name(
+            f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_file, "wb") as f:
             f.write(serialized)
+        os.replace(tmp_file, cache_file)
 
         entry = CacheEntry(
             file_path=file_path,
             content_hash=content_hash,
             language=language,
-            ast_data=ast_data,
+            ast_data=data,
             size_bytes=size_bytes,
             ttl_seconds=self._default_ttl,
+            signature=signature,
+            checked_ns=checked_ns,
         )
-
         self._cache[cache_key] = entry
         self._stats.total_entries += 1
         self._stats.total_size_bytes += size_bytes
+        self._mark_dirty(cache_key, entry)
+
+    def _parse_and_cache(
+        self,
+        file_path: str,
+        language: str,
+        content: str,
+        content_hash: str,
+        cache_key: str,
+        signature: Optional[FileSignature] = None,
+        checked_ns: int = 0,
+    ) -> CompactNode:
+        """解析并缓存 AST."""
+        from ut_agent.utils.metrics import ast_parse, record_cache_operation
+        with self._lock:
+            previous = self._trees.pop(cache_key, None)
+
+        # 解析 AST 并记录性能
+        with ast_parse(file_path, language):
+            source = bytes(content, "utf-8")
+            tree = self._parse_source(language, source, previous)
+            ast_data = self._serialize_tree(tree, source)
+
+        serialized = pickle.dumps(ast_data)
+        with self._lock:
+            self._store(
+                cache_key, file_path, language, ast_data, serialized,
+                content_hash, signature, checked_ns,
+            )
+            if previous is not None:
+                self._stats.incremental_parse_count += 1
+            self._remember_tree(cache_key, tree, source)
 
         record_cache_operation("ast", "set", hit=False)
-        self._save_cache_index()
 
-        return ast_data
+        return ast_data.root
+
+    def _parse_source(
+        self, language: str, source: bytes, previous: Optional[Tuple[Tree, bytes]]
+    ) -> Tree:
+        """解析源码，有上一版语法树时在其上登记差异块后增量重解析."""
+        parser = self._get_parser(language)
+        if previous is None:
+            return parser.parse(source)
+        old_tree, old_source = previous
+        # 旧树可能仍被调用方持有，登记编辑前先复制，避免改写其节点位置
+        copy_tree = getattr(old_tree, "copy", None)
+        if copy_tree is not None:
+            old_tree = copy_tree()
+        else:
+            # tree-sitter 0.23 的绑定未提供 Tree.copy，无差异重解析会复用全部子树得到等价副本
+            old_tree = parser.parse(old_source, old_tree)
+        apply_tree_edits(old_tree, compute_tree_edits(old_source, source))
+        return parser.parse(source, old_tree)
 
-    def _serialize_tree(self, tree) -> Dict[str, Any]:
-        """序列化 AST 树."""
-        root = tree.root_node
+    def get_tree(self, file_path: str, language: str, content: Optional[str] = None) -> Tree:
+        """获取文件当前内容对应的 tree-sitter 语法树.
+
+        语法树只保存在内存中：内容未变时直接复用，变化时在旧树上增量重解析。
+        不读写磁盘缓存，适合直接在原生语法树上执行查询的调用方。
+
+        Args:
+            file_path: 文件路径
+            language: 语言类型
+            content: 文件内容（可选，不提供则自动读取）
 
-        def node_to_dict(node) -> Dict[str, Any]:
-            result = {
-                "type": node.type,
-                "start_byte": node.start_byte,
-                "end_byte": node.end_byte,
-                "start_point": {"row": node.start_point.row, "column": node.start_point.column},
-                "end_point": {"row": node.end_point.row, "column": node.end_point.column},
-                "text": node.text.decode("utf-8") if len(node.text) < 10000 else None,
-                "children": [],
-            }
+        Returns:
+            Tree: 语法树（调用方只读使用）
+        """
+        from ut_agent.utils.metrics import ast_parse
 
-            for i in range(node.child_count):
-                child = node.child(i)
-                result["children"].append(node_to_dict(child))
+        if content is None:
+            content = Path(file_path).read_text(encoding="utf-8")
+        source = bytes(content, "utf-8")
+        cache_key = self._get_cache_key(file_path, language)
+
+        with self._lock:
+            previous = self._trees.get(cache_key)
+            if previous is not None and previous[1] == source:
+                self._trees.move_to_end(cache_key)
+                return previous[0]
+            self._trees.pop(cache_key, None)
+
+        with ast_parse(file_path, language):
+            tree = self._parse_source(language, source, previous)
 
-            return result
+        with self._lock:
+            if previous is not None:
+                self._stats.incremental_parse_count += 1
+            self._remember_tree(cache_key, tree, source)
+        return tree
 
-        return node_to_dict(root)
+    def _remember_tree(self, cache_key: str, tree: Tree, source: bytes) -> None:
+        """保留最近的语法树供增量重解析，超过上限时丢弃最久未用的.
+
+        调用方需持有 self._lock。
+        """
+        self._trees[cache_key] = (tree, source)
+        self._trees.move_to_end(cache_key)
+        while len(self._trees) > self._max_trees:
+            self._trees.popitem(last=False)
+
+    def _serialize_tree(self, tree, source: bytes) -> CompactAST:
+        """序列化 AST 树."""
+        return serialize_tree(tree, source)
 
     def invalidate(self, file_path: str, language: Optional[str] = None):
         """使指定文件的缓存失效."""
-        if language:
-            cache_key = self._get_cache_key(file_path, language)
-            if cache_key in self._cache:
-                self._evict_entry(cache_key)
-        else:
-            keys_to_remove = [
-                k for k in self._cache
-                if k.endswith(str(Path(file_path).resolve()))
-            ]
-            for key in keys_to_remove:
-                self._evict_entry(key)
+        with self._lock:
+            if language:
+                cache_key = self._get_cache_key(file_path, language)
+                if cache_key in self._cache:
+                    self._evict_entry(cache_key)
+            else:
+                keys_to_remove = [
+                    k for k in self._cache
+                    if k.endswith(str(Path(file_path).resolve()))
+                ]
+                for key in keys_to_remove:
+                    self._evict_entry(key)
 
-        self._save_cache_index()
+            self._flush_locked()
 
     def clear(self):
         """清空所有缓存."""
-        for cache_file in self._cache_dir.glob("*.ast"):
-            cache_file.unlink()
-
-        self._cache.clear()
-        self._stats = CacheStats()
+        with self._lock:
+            for cache_file in self._cache_dir.glob("*.ast"):
+                cache_file.unlink(missing_ok=True)
 
-        index_file = self._cache_dir / "index.json"
-        if index_file.exists():
-            index_file.unlink()
+            self._cache.clear()
+            self._pending.clear()
+            self._trees.clear()
+            self._stats = CacheStats()
+            self._index_store.clear()
 
     def get_cache_stats(self) -> CacheStats:
         """获取缓存统计信息."""
@@ -405,7 +796,19 @@ class ASTCacheManager:
         }
 
 
-def parse_java_ast(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
+def flush_ast_cache() -> int:
+    """提交 AST 缓存索引的待写入变更（缓存管理器未创建时不做任何事）.
+
+    Returns:
+        int: 提交的变更条数
+    """
+    instance = ASTCacheManager._instance
+    if instance is None or not instance._initialized:
+        return 0
+    return instance.flush()
+
+
+def parse_java_ast(file_path: str, use_cache: bool = True) -> CompactNode:
     """解析 Java 文件 AST.
 
     Args:
@@ -413,7 +816,7 @@ def parse_java_ast(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
         use_cache: 是否使用缓存
 
     Returns:
-        Dict: AST 数据
+        CompactNode: AST 根节点游标
     """
     if use_cache:
         cache_manager = ASTCacheManager.get_instance()
@@ -421,14 +824,11 @@ def parse_java_ast(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
         return ast_data
     else:
         parser = Parser(Language(ts_java.language()))
-        content = Path(file_path).read_text(encoding="utf-8")
-        tree = parser.parse(bytes(content, "utf-8"))
-
-        cache_manager = ASTCacheManager.get_instance()
-        return cache_manager._serialize_tree(tree)
+        source = Path(file_path).read_bytes()
+        return serialize_tree(parser.parse(source), source).root
 
 
-def parse_typescript_ast(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
+def parse_typescript_ast(file_path: str, use_cache: bool = True) -> CompactNode:
     """解析 TypeScript 文件 AST.
 
     Args:
@@ -436,7 +836,7 @@ def parse_typescript_ast(file_path: str, use_cache: bool = True) -> Dict[str, An
         use_cache: 是否使用缓存
 
     Returns:
-        Dict: AST 数据
+        CompactNode: AST 根节点游标
     """
     if use_cache:
         cache_manager = ASTCacheManager.get_instance()
@@ -444,8 +844,5 @@ def parse_typescript_ast(file_path: str, use_cache: bool = True) -> Dict[str, An
         return ast_data
     else:
         parser = Parser(Language(ts_typescript.language_typescript()))
-        content = Path(file_path).read_text(encoding="utf-8")
-        tree = parser.parse(bytes(content, "utf-8"))
-
-        cache_manager = ASTCacheManager.get_instance()
-        return cache_manager._serialize_tree(tree)
+        source = Path(file_path).read_bytes()
+        return serialize_tree(parser.parse(source), source).root
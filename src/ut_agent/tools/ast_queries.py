@@ -0,0 +1,85 @@
+"""基于 tree-sitter 查询的 AST 提取引擎.
+
+每种语言一条预编译的多模式查询，在原生代码中对语法树做一次匹配即可拿到
+包、导入、类、方法、字段等全部关注节点，不再把整棵树序列化后在 Python 中
+逐类型递归查找。
+
+tree-sitter 0.23 的 ``Query`` 自带匹配游标状态，不能跨线程共享，
+因此按线程缓存编译结果。
+"""
+
+import threading
+from typing import Any, Dict, List
+
+from tree_sitter import Language, Query
+
+import tree_sitter_java as ts_java
+import tree_sitter_typescript as ts_typescript
+
+JAVA_QUERY = """
+(package_declaration (scoped_identifier) @package)
+(import_declaration (scoped_identifier) @import)
+(class_declaration name: (identifier) @class.name)
+(method_declaration) @method
+(field_declaration) @field
+"""
+
+TYPESCRIPT_QUERY = """
+(import_statement) @import
+(function_declaration) @function
+(variable_declarator name: (identifier) value: (arrow_function)) @arrow_function
+"""
+
+_QUERY_SOURCES = {
+    "java": JAVA_QUERY,
+    "typescript": TYPESCRIPT_QUERY,
+}
+
+_local = threading.local()
+
+
+def _get_language(language: str) -> Language:
+    if language == "java":
+        return Language(ts_java.language())
+    if language == "typescript":
+        return Language(ts_typescript.language_typescript())
+    raise ValueError(f"不支持的语言: {language}")
+
+
+def get_query(language: str) -> Query:
+    """获取当前线程的预编译查询.
+
+    Args:
+        language: 语言类型 (java/typescript)
+
+    Returns:
+        Query: 编译后的查询
+    """
+    queries = getattr(_local, "queries", None)
+    if queries is None:
+        queries = _local.queries = {}
+    query = queries.get(language)
+    if query is None:
+        query = queries[language] = Query(_get_language(language), _QUERY_SOURCES[language])
+    return query
+
+
+def capture_nodes(tree: Any, language: str) -> Dict[str, List[Any]]:
+    """对语法树执行一次查询，按捕获名返回节点.
+
+    Args:
+        tree: tree-sitter 语法树
+        language: 语言类型 (java/typescript)
+
+    Returns:
+        Dict[str, List[Node]]: 捕获名到节点列表（按源码位置排序）的映射
+    """
+    captures = get_query(language).captures(tree.root_node)
+    for nodes in captures.values():
+        nodes.sort(key=lambda node: node.start_byte)
+    return captures
+
+
+def node_text(node: Any) -> str:
+    """获取节点文本."""
+    return node.text.decode("utf-8", errors="replace")
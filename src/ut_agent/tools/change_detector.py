@@ -1,11 +1,11 @@
 """变更检测模块 - 检测代码变更并分析方法级变更."""
 
-import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from ut_agent.tools.git_analyzer import ChangeType, CodeChange, GitAnalyzer
+from ut_agent.tools.method_outline import MethodOutline, MethodOutlineCache
 
 
 @dataclass
@@ -20,6 +20,7 @@ class MethodInfo:
     modifiers: List[str] = field(default_factory=list)
     return_type: str = ""
     parameters: List[str] = field(default_factory=list)
+    body_hash: str = ""
 
 
 @dataclass
@@ -52,27 +53,6 @@ class ChangeSummary:
 class JavaChangeDetector:
     """Java代码变更检测器."""
 
-    # 方法签名正则
-    METHOD_PATTERN = re.compile(
-        r"^\s*(?:(public|private|protected)\s+)?"  # 访问修饰符
-        r"(?:(static|final|abstract|synchronized)\s+)*"  # 其他修饰符
-        r"(?:<[^>]+>\s+)?"  # 泛型
-        r"([\w<>,\[\]\s]+?)\s+"  # 返回类型
-        r"(\w+)\s*\(\s*([^)]*)\s*\)"  # 方法名和参数
-        r"(?:\s*throws\s+([\w,\s]+))?"  # throws
-        r"\s*\{",
-        re.MULTILINE,
-    )
-
-    # 类定义正则
-    CLASS_PATTERN = re.compile(
-        r"^\s*(?:(public|private|protected)\s+)?"
-        r"(?:(static|final|abstract)\s+)?"
-        r"(class|interface|enum)\s+"
-        r"(\w+)",
-        re.MULTILINE,
-    )
-
     def __init__(self, project_path: str):
         """初始化检测器.
 
@@ -80,6 +60,15 @@ class JavaChangeDetector:
             project_path: 项目路径
         """
         self.project_path = Path(project_path)
+        self._git_analyzer: Optional[GitAnalyzer] = None
+
+    def _get_git_analyzer(self) -> GitAnalyzer:
+        if self._git_analyzer is None:
+            self._git_analyzer = GitAnalyzer(str(self.project_path))
+        return self._git_analyzer
+
+    def _get_outline_cache(self) -> MethodOutlineCache:
+        return MethodOutlineCache.get_instance(str(self.project_path))
 
     def analyze_changes(self, code_changes: List[CodeChange]) -> List[ChangeSummary]:
         """分析代码变更.
@@ -91,15 +80,15 @@ class JavaChangeDetector:
             变更摘要列表
         """
         summaries = []
+        relevant = [c for c in code_changes if c.file_path.endswith(".java")]
+        _prefetch_old_versions(self._get_git_analyzer, relevant)
 
-        for change in code_changes:
-            if not change.file_path.endswith(".java"):
-                continue
-
+        for change in relevant:
             summary = self._analyze_file_change(change)
             if summary:
                 summaries.append(summary)
 
+        self._get_outline_cache().save()
         return summaries
 
     def _analyze_file_change(self, change: CodeChange) -> Optional[ChangeSummary]:
@@ -112,8 +101,7 @@ class JavaChangeDetector:
             变更摘要
         """
         # 获取旧版本内容
-        git_analyzer = GitAnalyzer(str(self.project_path))
-        old_content = git_analyzer.get_file_at_ref(change.file_path, "HEAD~1")
+        old_content = self._get_git_analyzer().get_file_at_ref(change.file_path, "HEAD~1")
 
         # 获取新版本内容
         new_content = None
@@ -128,7 +116,7 @@ class JavaChangeDetector:
         if change.change_type == ChangeType.ADDED:
             # 新增文件
             if new_content:
-                new_classes = self._parse_classes(new_content)
+                new_classes = self._parse_classes(new_content, change.file_path)
                 return ChangeSummary(
                     file_path=change.file_path,
                     change_type=ChangeType.ADDED,
@@ -141,7 +129,7 @@ class JavaChangeDetector:
         elif change.change_type == ChangeType.DELETED:
             # 删除文件
             if old_content:
-                old_classes = self._parse_classes(old_content)
+                old_classes = self._parse_classes(old_content, change.file_path)
                 return ChangeSummary(
                     file_path=change.file_path,
                     change_type=ChangeType.DELETED,
@@ -160,142 +148,36 @@ class JavaChangeDetector:
 
         return None
 
-    def _parse_classes(self, content: str) -> List[ClassInfo]:
-        """解析类定义.
+    def _parse_classes(self, content: str, file_path: str = "Source.java") -> List[ClassInfo]:
+        """解析类定义（含内部类），方法只包含类体中直接声明的方法和构造器.
 
         Args:
             content: 代码内容
+            file_path: 文件路径
 
         Returns:
             类信息列表
         """
-        classes = []
+        outline = self._get_outline_cache().get_outline(content, file_path)
         lines = content.split("\n")
-
-        # 查找包声明
-        package = ""
-        for line in lines:
-            match = re.match(r"^\s*package\s+([\w.]+);", line)
-            if match:
-                package = match.group(1)
-                break
-
-        # 查找所有类定义
-        for match in self.CLASS_PATTERN.finditer(content):
-            class_name = match.group(4)
-            line_start = content[: match.start()].count("\n") + 1
-
-            # 查找类结束位置
-            line_end = self._find_class_end(lines, line_start - 1)
-
-            class_content = "\n".join(lines[line_start - 1 : line_end])
-            methods = self._parse_methods(class_content, line_start)
-
-            class_info = ClassInfo(
-                name=class_name,
-                line_start=line_start,
-                line_end=line_end,
-                methods=methods,
-                package=package,
+        return [
+            ClassInfo(
+                name=cls.name,
+                line_start=cls.line_start,
+                line_end=cls.line_end,
+                methods={m.name: _to_method_info(m, lines) for m in cls.methods},
+                package=outline.package,
             )
-            classes.append(class_info)
-
-        return classes
-
-    def _parse_methods(self, class_content: str, offset: int) -> Dict[str, MethodInfo]:
-        """解析方法定义.
-
-        Args:
-            class_content: 类内容
-            offset: 行号偏移
-
-        Returns:
-            方法字典
-        """
-        methods = {}
-
-        for match in self.METHOD_PATTERN.finditer(class_content):
-            modifiers = []
-            if match.group(1):
-                modifiers.append(match.group(1))
-            if match.group(2):
-                modifiers.extend(match.group(2).split())
-
-            return_type = match.group(3).strip()
-            method_name = match.group(4)
-            parameters = [
-                p.strip() for p in match.group(5).split(",") if p.strip()
-            ]
-
-            line_start = class_content[: match.start()].count("\n") + offset
-
-            # 查找方法结束位置
-            lines = class_content.split("\n")
-            method_start_in_content = class_content[: match.start()].count("\n")
-            line_end = self._find_method_end(
-                lines, method_start_in_content, offset
-            )
-
-            method_content = "\n".join(lines[method_start_in_content:line_end])
-
-            method_info = MethodInfo(
-                name=method_name,
-                signature=match.group(0),
-                line_start=line_start,
-                line_end=line_end,
-                content=method_content,
-                modifiers=modifiers,
-                return_type=return_type,
-                parameters=parameters,
-            )
-            methods[method_name] = method_info
-
-        return methods
-
-    def _find_class_end(self, lines: List[str], start_idx: int) -> int:
-        """查找类结束位置.
-
-        Args:
-            lines: 代码行
-            start_idx: 起始索引
-
-        Returns:
-            结束行号
-        """
-        brace_count = 0
-        for i in range(start_idx, len(lines)):
-            line = lines[i]
-            brace_count += line.count("{") - line.count("}")
-            if brace_count == 0 and "{" in lines[start_idx]:
-                return i + 1
-        return len(lines)
-
-    def _find_method_end(
-        self, lines: List[str], start_idx: int, offset: int
-    ) -> int:
-        """查找方法结束位置.
-
-        Args:
-            lines: 代码行
-            start_idx: 起始索引
-            offset: 偏移量
-
-        Returns:
-            结束行号
-        """
-        brace_count = 0
-        for i in range(start_idx, len(lines)):
-            line = lines[i]
-            brace_count += line.count("{") - line.count("}")
-            if brace_count == 0 and "{" in lines[start_idx]:
-                return i + offset
-        return len(lines) + offset
+            for cls in outline.classes
+        ]
 
     def _compare_versions(
         self, file_path: str, old_content: str, new_content: str
     ) -> ChangeSummary:
         """比较两个版本.
 
+        方法体哈希相同的方法直接跳过，只为有变化的方法截取内容。
+
         Args:
             file_path: 文件路径
             old_content: 旧内容
@@ -304,17 +186,18 @@ class JavaChangeDetector:
         Returns:
             变更摘要
         """
-        old_classes = {c.name: c for c in self._parse_classes(old_content)}
-        new_classes = {c.name: c for c in self._parse_classes(new_content)}
-
-        all_class_names = set(old_classes.keys()) | set(new_classes.keys())
+        cache = self._get_outline_cache()
+        old_classes = {c.name: c for c in cache.get_outline(old_content, file_path).classes}
+        new_classes = {c.name: c for c in cache.get_outline(new_content, file_path).classes}
+        old_lines = old_content.split("\n")
+        new_lines = new_content.split("\n")
 
         added_methods = []
         modified_methods = []
         deleted_methods = []
         affected_classes = []
 
-        for class_name in all_class_names:
+        for class_name in set(old_classes.keys()) | set(new_classes.keys()):
             old_class = old_classes.get(class_name)
             new_class = new_classes.get(class_name)
 
@@ -322,20 +205,24 @@ class JavaChangeDetector:
                 affected_classes.append(class_name)
 
                 # 比较方法
-                old_methods = old_class.methods
-                new_methods = new_class.methods
+                old_methods = {m.name: m for m in old_class.methods}
+                new_methods = {m.name: m for m in new_class.methods}
 
                 # 新增方法
                 for name, method in new_methods.items():
-                    if name not in old_methods:
-                        added_methods.append(method)
-                    elif old_methods[name].content != method.content:
-                        modified_methods.append((old_methods[name], method))
+                    old_method = old_methods.get(name)
+                    if old_method is None:
+                        added_methods.append(_to_method_info(method, new_lines))
+                    elif old_method.body_hash != method.body_hash:
+                        modified_methods.append((
+                            _to_method_info(old_method, old_lines),
+                            _to_method_info(method, new_lines),
+                        ))
 
                 # 删除方法
                 for name, method in old_methods.items():
                     if name not in new_methods:
-                        deleted_methods.append(method)
+                        deleted_methods.append(_to_method_info(method, old_lines))
 
         return ChangeSummary(
             file_path=file_path,
@@ -350,20 +237,6 @@ class JavaChangeDetector:
 class TypeScriptChangeDetector:
     """TypeScript/Vue变更检测器."""
 
-    # 函数/方法正则
-    FUNCTION_PATTERN = re.compile(
-        r"^\s*(?:(export|async)\s+)*"
-        r"(?:function\s+)?(\w+)\s*\([^)]*\)"
-        r"(?:\s*:\s*([\w<>,\s|]+))?"
-        r"\s*(?:=>|\{)",
-        re.MULTILINE,
-    )
-
-    # Vue组件方法正则
-    VUE_METHOD_PATTERN = re.compile(
-        r"^\s*(\w+)\s*\([^)]*\)\s*\{", re.MULTILINE
-    )
-
     def __init__(self, project_path: str):
         """初始化检测器.
 
@@ -371,6 +244,15 @@ class TypeScriptChangeDetector:
             project_path: 项目路径
         """
         self.project_path = Path(project_path)
+        self._git_analyzer: Optional[GitAnalyzer] = None
+
+    def _get_git_analyzer(self) -> GitAnalyzer:
+        if self._git_analyzer is None:
+            self._git_analyzer = GitAnalyzer(str(self.project_path))
+        return self._git_analyzer
+
+    def _get_outline_cache(self) -> MethodOutlineCache:
+        return MethodOutlineCache.get_instance(str(self.project_path))
 
     def analyze_changes(self, code_changes: List[CodeChange]) -> List[ChangeSummary]:
         """分析代码变更.
@@ -382,18 +264,18 @@ class TypeScriptChangeDetector:
             变更摘要列表
         """
         summaries = []
+        relevant = [
+            c for c in code_changes
+            if any(c.file_path.endswith(ext) for ext in [".ts", ".tsx", ".js", ".jsx", ".vue"])
+        ]
+        _prefetch_old_versions(self._get_git_analyzer, relevant)
 
-        for change in code_changes:
-            if not any(
-                change.file_path.endswith(ext)
-                for ext in [".ts", ".tsx", ".js", ".jsx", ".vue"]
-            ):
-                continue
-
+        for change in relevant:
             summary = self._analyze_file_change(change)
             if summary:
                 summaries.append(summary)
 
+        self._get_outline_cache().save()
         return summaries
 
     def _analyze_file_change(self, change: CodeChange) -> Optional[ChangeSummary]:
@@ -405,8 +287,7 @@ class TypeScriptChangeDetector:
         Returns:
             变更摘要
         """
-        git_analyzer = GitAnalyzer(str(self.project_path))
-        old_content = git_analyzer.get_file_at_ref(change.file_path, "HEAD~1")
+        old_content = self._get_git_analyzer().get_file_at_ref(change.file_path, "HEAD~1")
 
         new_content = None
         file_path = self.project_path / change.file_path
@@ -418,37 +299,19 @@ class TypeScriptChangeDetector:
                 pass
 
         if change.change_type == ChangeType.ADDED and new_content:
-            methods = self._parse_functions(new_content)
+            methods = self._parse_functions(new_content, change.file_path)
             return ChangeSummary(
                 file_path=change.file_path,
                 change_type=ChangeType.ADDED,
-                added_methods=[
-                    MethodInfo(
-                        name=name,
-                        signature=info["signature"],
-                        line_start=info["line_start"],
-                        line_end=info["line_end"],
-                        content=info["content"],
-                    )
-                    for name, info in methods.items()
-                ],
+                added_methods=list(methods.values()),
             )
 
         elif change.change_type == ChangeType.DELETED and old_content:
-            methods = self._parse_functions(old_content)
+            methods = self._parse_functions(old_content, change.file_path)
             return ChangeSummary(
                 file_path=change.file_path,
                 change_type=ChangeType.DELETED,
-                deleted_methods=[
-                    MethodInfo(
-                        name=name,
-                        signature=info["signature"],
-                        line_start=info["line_start"],
-                        line_end=info["line_end"],
-                        content=info["content"],
-                    )
-                    for name, info in methods.items()
-                ],
+                deleted_methods=list(methods.values()),
             )
 
         elif change.change_type == ChangeType.MODIFIED:
@@ -459,61 +322,19 @@ class TypeScriptChangeDetector:
 
         return None
 
-    def _parse_functions(self, content: str) -> Dict[str, dict]:
+    def _parse_functions(self, content: str, file_path: str = "source.ts") -> Dict[str, MethodInfo]:
         """解析函数定义.
 
         Args:
             content: 代码内容
+            file_path: 文件路径，决定使用的语法（.vue 只解析 script 块）
 
         Returns:
-            函数字典
+            函数名到方法信息的字典
         """
-        functions = {}
+        outline = self._get_outline_cache().get_outline(content, file_path)
         lines = content.split("\n")
-
-        for match in self.FUNCTION_PATTERN.finditer(content):
-            func_name = match.group(2)
-            line_start = content[: match.start()].count("\n") + 1
-
-            # 查找函数结束
-            line_end = self._find_function_end(lines, line_start - 1)
-
-            functions[func_name] = {
-                "signature": match.group(0),
-                "line_start": line_start,
-                "line_end": line_end,
-                "content": "\n".join(lines[line_start - 1 : line_end]),
-            }
-
-        return functions
-
-    def _find_function_end(self, lines: List[str], start_idx: int) -> int:
-        """查找函数结束位置.
-
-        Args:
-            lines: 代码行
-            start_idx: 起始索引
-
-        Returns:
-            结束行号
-        """
-        brace_count = 0
-        in_function = False
-
-        for i in range(start_idx, len(lines)):
-            line = lines[i]
-
-            if not in_function:
-                if "{" in line or "=>" in line:
-                    in_function = True
-                    if "{" in line:
-                        brace_count += line.count("{") - line.count("}")
-            else:
-                brace_count += line.count("{") - line.count("}")
-                if brace_count == 0:
-                    return i + 1
-
-        return len(lines)
+        return {m.name: _to_method_info(m, lines) for m in outline.functions}
 
     def _compare_versions(
         self, file_path: str, old_content: str, new_content: str
@@ -528,57 +349,31 @@ class TypeScriptChangeDetector:
         Returns:
             变更摘要
         """
-        old_functions = self._parse_functions(old_content)
-        new_functions = self._parse_functions(new_content)
+        cache = self._get_outline_cache()
+        old_functions = {m.name: m for m in cache.get_outline(old_content, file_path).functions}
+        new_functions = {m.name: m for m in cache.get_outline(new_content, file_path).functions}
+        old_lines = old_content.split("\n")
+        new_lines = new_content.split("\n")
 
         added = []
         modified = []
         deleted = []
 
         # 新增和修改
-        for name, info in new_functions.items():
-            if name not in old_functions:
-                added.append(
-                    MethodInfo(
-                        name=name,
-                        signature=info["signature"],
-                        line_start=info["line_start"],
-                        line_end=info["line_end"],
-                        content=info["content"],
-                    )
-                )
-            elif old_functions[name]["content"] != info["content"]:
-                modified.append(
-                    (
-                        MethodInfo(
-                            name=name,
-                            signature=old_functions[name]["signature"],
-                            line_start=old_functions[name]["line_start"],
-                            line_end=old_functions[name]["line_end"],
-                            content=old_functions[name]["content"],
-                        ),
-                        MethodInfo(
-                            name=name,
-                            signature=info["signature"],
-                            line_start=info["line_start"],
-                            line_end=info["line_end"],
-                            content=info["content"],
-                        ),
-                    )
-                )
+        for name, function in new_functions.items():
+            old_function = old_functions.get(name)
+            if old_function is None:
+                added.append(_to_method_info(function, new_lines))
+            elif old_function.body_hash != function.body_hash:
+                modified.append((
+                    _to_method_info(old_function, old_lines),
+                    _to_method_info(function, new_lines),
+                ))
 
         # 删除
-        for name, info in old_functions.items():
+        for name, function in old_functions.items():
             if name not in new_functions:
-                deleted.append(
-                    MethodInfo(
-                        name=name,
-                        signature=info["signature"],
-                        line_start=info["line_start"],
-                        line_end=info["line_end"],
-                        content=info["content"],
-                    )
-                )
+                deleted.append(_to_method_info(function, old_lines))
 
         return ChangeSummary(
             file_path=file_path,
@@ -589,6 +384,28 @@ class TypeScriptChangeDetector:
         )
 
 
+def _to_method_info(method: MethodOutline, lines: List[str]) -> MethodInfo:
+    """由方法大纲和源码行构建方法信息."""
+    return MethodInfo(
+        name=method.name,
+        signature=method.signature,
+        line_start=method.line_start,
+        line_end=method.line_end,
+        content="\n".join(lines[method.line_start - 1 : method.line_end]),
+        modifiers=list(method.modifiers),
+        return_type=method.return_type,
+        parameters=list(method.parameters),
+        body_hash=method.body_hash,
+    )
+
+
+def _prefetch_old_versions(get_git_analyzer, changes: List[CodeChange]) -> None:
+    """一次流水线请求预取全部旧版本，之后逐个文件读取时命中缓存."""
+    paths = [c.file_path for c in changes if c.change_type != ChangeType.ADDED]
+    if paths:
+        get_git_analyzer().get_files_at_ref(paths, "HEAD~1")
+
+
 def create_change_detector(
     project_path: str, project_type: str
 ) -> Union["JavaChangeDetector", "TypeScriptChangeDetector"]:
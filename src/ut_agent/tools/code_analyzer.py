@@ -5,8 +5,15 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 
-from ut_agent.tools.ast_cache import ASTCacheManager, parse_java_ast, parse_typescript_ast
-from ut_agent.exceptions import FileReadError, ASTParseError, CodeAnalysisError
+from tree_sitter import Node, Tree
+
+from ut_agent.tools.ast_cache import ASTCacheManager, create_parser
+from ut_agent.tools.ast_queries import capture_nodes, node_text
+from ut_agent.exceptions import FileReadError, CodeAnalysisError
+
+# 持久化分析结果的类别，分析结果的结构或提取逻辑变化时递增版本号
+JAVA_ANALYSIS_KIND = "java-analysis-1"
+TS_ANALYSIS_KIND = "typescript-analysis-1"
 
 
 @dataclass
@@ -43,14 +50,39 @@ def analyze_java_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
 
     Args:
         file_path: Java 文件路径
-        use_cache: 是否使用 AST 缓存
+        use_cache: 是否使用缓存：文件未变时直接复用磁盘上的分析结果，
+            变化时在进程内缓存的语法树上增量重解析
 
     Returns:
         Dict: 分析结果
     """
-    path = Path(file_path)
+    if not use_cache:
+        return _build_java_analysis(file_path, _read_java_source(file_path), None)
+
+    cache = ASTCacheManager.get_instance()
+
+    def analyze(content: str) -> Dict[str, Any]:
+        tree = _cached_tree(cache, file_path, "java", content)
+        return _build_java_analysis(file_path, content, tree)
+
+    result, _ = cache.get_or_analyze(file_path, JAVA_ANALYSIS_KIND, analyze, _read_java_source)
+    return result
+
+
+def _cached_tree(
+    cache: ASTCacheManager, file_path: str, language: str, content: str
+) -> Optional[Tree]:
+    """获取进程内缓存的语法树，解析失败时返回 None（回退到正则）."""
     try:
-        content = path.read_text(encoding="utf-8")
+        return cache.get_tree(file_path, language, content)
+    except Exception:
+        return None
+
+
+def _read_java_source(file_path: str) -> str:
+    """读取 Java 源文件，将 I/O 错误转换为 FileReadError."""
+    try:
+        return Path(file_path).read_text(encoding="utf-8")
     except UnicodeDecodeError as e:
         raise FileReadError(
             f"Failed to read file with encoding error: {e}",
@@ -69,16 +101,14 @@ def analyze_java_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
             file_path=file_path,
             reason="permission"
         )
-    lines = content.split("\n")
 
-    ast_data = None
-    if use_cache:
-        try:
-            ast_data = parse_java_ast(file_path, use_cache=True)
-        except ASTParseError:
-            pass
-        except Exception:
-            pass
+
+def _build_java_analysis(
+    file_path: str, content: str, tree: Optional[Tree]
+) -> Dict[str, Any]:
+    """根据源码与语法树（可选）构建 Java 分析结果，无语法树时回退到正则."""
+    path = Path(file_path)
+    lines = content.split("\n")
 
     package = ""
     imports = []
@@ -87,10 +117,10 @@ def analyze_java_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
     methods = []
     fields = []
 
-    if ast_data:
-        package, imports, class_name, class_annotations, methods, fields = _extract_java_info_from_ast(
-            ast_data, content
-        )
+    if tree is not None:
+        (
+            package, imports, class_name, class_annotations, methods, fields,
+        ) = _extract_java_info_from_tree(tree, content)
     else:
         package_match = re.search(r"package\s+([\w.]+);", content)
         package = package_match.group(1) if package_match else ""
@@ -140,64 +170,37 @@ def analyze_java_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
     }
 
 
-def _extract_java_info_from_ast(
-    ast_data: Dict[str, Any], content: str
-) -> tuple:
-    """从 AST 提取 Java 信息."""
+def _extract_java_info_from_tree(tree: Tree, content: str) -> tuple:
+    """通过预编译查询一次性从语法树提取 Java 信息."""
+    captures = capture_nodes(tree, "java")
+
     package = ""
-    imports = []
+    package_nodes = captures.get("package", [])
+    if package_nodes:
+        package = node_text(package_nodes[-1])
+
+    imports = [node_text(node) for node in captures.get("import", [])]
+
     class_name = ""
     class_annotations = []
-    methods = []
-    fields = []
-
-    def find_nodes(node: Dict[str, Any], node_type: str) -> List[Dict[str, Any]]:
-        """递归查找指定类型的节点."""
-        result = []
-        if node.get("type") == node_type:
-            result.append(node)
-        for child in node.get("children", []):
-            result.extend(find_nodes(child, node_type))
-        return result
-
-    package_nodes = find_nodes(ast_data, "package_declaration")
-    for pkg_node in package_nodes:
-        scoped_id = find_nodes(pkg_node, "scoped_identifier")
-        if scoped_id:
-            package = scoped_id[0].get("text", "")
-
-    import_nodes = find_nodes(ast_data, "import_declaration")
-    for imp_node in import_nodes:
-        scoped_id = find_nodes(imp_node, "scoped_identifier")
-        if scoped_id:
-            imports.append(scoped_id[0].get("text", ""))
-
-    class_nodes = find_nodes(ast_data, "class_declaration")
-    if class_nodes:
-        class_node = class_nodes[0]
-        for child in class_node.get("children", []):
-            if child.get("type") == "identifier":
-                class_name = child.get("text", "")
-                break
-
-        for sibling in ast_data.get("children", []):
-            if sibling.get("type") == "annotation":
-                ann_name = ""
-                for child in sibling.get("children", []):
-                    if child.get("type") == "identifier":
-                        ann_name = child.get("text", "")
+    class_name_nodes = captures.get("class.name", [])
+    if class_name_nodes:
+        class_name = node_text(class_name_nodes[0])
+        for sibling in tree.root_node.children:
+            if sibling.type == "annotation":
+                for child in sibling.children:
+                    if child.type == "identifier":
+                        class_annotations.append(node_text(child))
                         break
-                if ann_name:
-                    class_annotations.append(ann_name)
 
-    method_nodes = find_nodes(ast_data, "method_declaration")
-    for method_node in method_nodes:
+    methods = []
+    for method_node in captures.get("method", []):
         method_info = _parse_java_method_node(method_node, content)
         if method_info:
             methods.append(method_info)
 
-    field_nodes = find_nodes(ast_data, "field_declaration")
-    for field_node in field_nodes:
+    fields = []
+    for field_node in captures.get("field", []):
         field_info = _parse_java_field_node(field_node)
         if field_info:
             fields.append(field_info)
@@ -205,7 +208,7 @@ def _extract_java_info_from_ast(
     return package, imports, class_name, class_annotations, methods, fields
 
 
-def _parse_java_method_node(method_node: Dict[str, Any], content: str) -> Optional[MethodInfo]:
+def _parse_java_method_node(method_node: Node, content: str) -> Optional[MethodInfo]:
     """解析 Java 方法节点."""
     method_name = ""
     return_type = "void"
@@ -214,30 +217,29 @@ def _parse_java_method_node(method_node: Dict[str, Any], content: str) -> Option
     is_static = False
     annotations = []
 
-    for child in method_node.get("children", []):
-        node_type = child.get("type", "")
+    for child in method_node.children:
+        node_type = child.type
 
         if node_type == "identifier":
-            method_name = child.get("text", "")
+            method_name = node_text(child)
 
         elif node_type == "type_identifier":
-            return_type = child.get("text", "")
+            return_type = node_text(child)
 
         elif node_type == "formal_parameters":
             params = _parse_java_params_node(child)
 
         elif node_type == "modifiers":
-            for modifier in child.get("children", []):
-                mod_type = modifier.get("type", "")
-                if mod_type == "public":
+            for modifier in child.children:
+                if modifier.type == "public":
                     is_public = True
-                elif mod_type == "static":
+                elif modifier.type == "static":
                     is_static = True
 
         elif node_type == "annotation":
-            for ann_child in child.get("children", []):
-                if ann_child.get("type") == "identifier":
-                    annotations.append(ann_child.get("text", ""))
+            for ann_child in child.children:
+                if ann_child.type == "identifier":
+                    annotations.append(node_text(ann_child))
 
     if not method_name:
         return None
@@ -251,28 +253,28 @@ def _parse_java_method_node(method_node: Dict[str, Any], content: str) -> Option
         return_type=return_type,
         parameters=params,
         annotations=annotations,
-        start_line=method_node.get("start_point", {}).get("row", 0) + 1,
-        end_line=method_node.get("end_point", {}).get("row", 0) + 1,
+        start_line=method_node.start_point.row + 1,
+        end_line=method_node.end_point.row + 1,
         is_public=is_public,
         is_static=is_static,
     )
 
 
-def _parse_java_params_node(params_node: Dict[str, Any]) -> List[Dict[str, str]]:
+def _parse_java_params_node(params_node: Node) -> List[Dict[str, str]]:
     """解析 Java 参数节点."""
     params = []
 
-    for child in params_node.get("children", []):
-        if child.get("type") == "formal_parameter":
+    for child in params_node.children:
+        if child.type == "formal_parameter":
             param_type = ""
             param_name = ""
 
-            for param_child in child.get("children", []):
-                pc_type = param_child.get("type", "")
+            for param_child in child.children:
+                pc_type = param_child.type
                 if pc_type in ("type_identifier", "integral_type", "floating_point_type", "boolean_type"):
-                    param_type = param_child.get("text", "")
+                    param_type = node_text(param_child)
                 elif pc_type == "identifier":
-                    param_name = param_child.get("text", "")
+                    param_name = node_text(param_child)
 
             if param_type and param_name:
                 params.append({"type": param_type, "name": param_name})
@@ -280,25 +282,25 @@ def _parse_java_params_node(params_node: Dict[str, Any]) -> List[Dict[str, str]]
     return params
 
 
-def _parse_java_field_node(field_node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _parse_java_field_node(field_node: Node) -> Optional[Dict[str, Any]]:
     """解析 Java 字段节点."""
     field_type = ""
     field_name = ""
     access = "private"
 
-    for child in field_node.get("children", []):
-        node_type = child.get("type", "")
+    for child in field_node.children:
+        node_type = child.type
 
         if node_type == "type_identifier":
-            field_type = child.get("text", "")
+            field_type = node_text(child)
         elif node_type == "variable_declarator":
-            for vc in child.get("children", []):
-                if vc.get("type") == "identifier":
-                    field_name = vc.get("text", "")
+            for vc in child.children:
+                if vc.type == "identifier":
+                    field_name = node_text(vc)
         elif node_type == "modifiers":
-            for modifier in child.get("children", []):
-                if modifier.get("type") in ("public", "private", "protected"):
-                    access = modifier.get("type")
+            for modifier in child.children:
+                if modifier.type in ("public", "private", "protected"):
+                    access = modifier.type
 
     if field_type and field_name:
         return {"access": access, "type": field_type, "name": field_name}
@@ -352,13 +354,31 @@ def analyze_ts_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
 
     Args:
         file_path: 文件路径
-        use_cache: 是否使用 AST 缓存
+        use_cache: 是否使用缓存：文件未变时直接复用磁盘上的分析结果，
+            变化时在进程内缓存的语法树上增量重解析（Vue 文件只用正则提取）
 
     Returns:
         Dict: 分析结果
     """
+    if not use_cache:
+        return _build_ts_analysis(file_path, Path(file_path).read_text(encoding="utf-8"), None)
+
+    cache = ASTCacheManager.get_instance()
+    is_vue = Path(file_path).suffix == ".vue"
+
+    def analyze(content: str) -> Dict[str, Any]:
+        tree = None if is_vue else _cached_tree(cache, file_path, "typescript", content)
+        return _build_ts_analysis(file_path, content, tree)
+
+    result, _ = cache.get_or_analyze(file_path, TS_ANALYSIS_KIND, analyze)
+    return result
+
+
+def _build_ts_analysis(
+    file_path: str, content: str, tree: Optional[Tree]
+) -> Dict[str, Any]:
+    """根据源码与语法树（可选）构建 TypeScript/Vue 分析结果，无语法树时回退到正则."""
     path = Path(file_path)
-    content = path.read_text(encoding="utf-8")
     lines = content.split("\n")
 
     is_vue = path.suffix == ".vue"
@@ -372,19 +392,12 @@ def analyze_ts_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
     else:
         ts_content = content
 
-    ast_data = None
-    if use_cache and not is_vue:
-        try:
-            ast_data = parse_typescript_ast(file_path, use_cache=True)
-        except Exception:
-            pass
-
     imports = []
     functions = []
     component_info = {}
 
-    if ast_data:
-        imports, functions = _extract_ts_info_from_ast(ast_data, ts_content)
+    if tree is not None:
+        imports, functions = _extract_ts_info_from_tree(tree, ts_content)
     else:
         imports = _extract_ts_imports_regex(ts_content)
         functions = _extract_ts_functions_regex(ts_content)
@@ -406,36 +419,21 @@ def analyze_ts_file(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
     }
 
 
-def _extract_ts_info_from_ast(
-    ast_data: Dict[str, Any], content: str
-) -> tuple:
-    """从 AST 提取 TypeScript 信息."""
+def _extract_ts_info_from_tree(tree: Tree, content: str) -> tuple:
+    """通过预编译查询一次性从语法树提取 TypeScript 信息."""
+    captures = capture_nodes(tree, "typescript")
+
     imports = []
-    functions = []
+    for imp_node in captures.get("import", []):
+        imports.extend(_parse_ts_import_node(imp_node))
 
-    def find_nodes(node: Dict[str, Any], node_type: str) -> List[Dict[str, Any]]:
-        """递归查找指定类型的节点."""
-        result = []
-        if node.get("type") == node_type:
-            result.append(node)
-        for child in node.get("children", []):
-            result.extend(find_nodes(child, node_type))
-        return result
-
-    import_nodes = find_nodes(ast_data, "import_statement")
-    for imp_node in import_nodes:
-        import_info = _parse_ts_import_node(imp_node)
-        if import_info:
-            imports.extend(import_info)
-
-    func_nodes = find_nodes(ast_data, "function_declaration")
-    for func_node in func_nodes:
+    functions = []
+    for func_node in captures.get("function", []):
         func_info = _parse_ts_function_node(func_node)
         if func_info:
             functions.append(func_info)
 
-    arrow_nodes = find_nodes(ast_data, "variable_declarator")
-    for arrow_node in arrow_nodes:
+    for arrow_node in captures.get("arrow_function", []):
         func_info = _parse_ts_arrow_function_node(arrow_node)
         if func_info:
             functions.append(func_info)
@@ -443,29 +441,29 @@ def _extract_ts_info_from_ast(
     return imports, functions
 
 
-def _parse_ts_import_node(import_node: Dict[str, Any]) -> List[Dict[str, str]]:
+def _parse_ts_import_node(import_node: Node) -> List[Dict[str, str]]:
     """解析 TypeScript 导入节点."""
     imports = []
     source = ""
     named_imports = []
     default_import = ""
 
-    for child in import_node.get("children", []):
-        node_type = child.get("type", "")
+    for child in import_node.children:
+        node_type = child.type
 
         if node_type == "string":
-            source = child.get("text", "").strip("\"'")
+            source = node_text(child).strip("\"'")
 
         elif node_type == "import_clause":
-            for ic in child.get("children", []):
-                if ic.get("type") == "identifier":
-                    default_import = ic.get("text", "")
-                elif ic.get("type") == "named_imports":
-                    for ni in ic.get("children", []):
-                        if ni.get("type") == "import_specifier":
-                            for nsc in ni.get("children", []):
-                                if nsc.get("type") == "identifier":
-                                    named_imports.append(nsc.get("text", ""))
+            for ic in child.children:
+                if ic.type == "identifier":
+                    default_import = node_text(ic)
+                elif ic.type == "named_imports":
+                    for ni in ic.children:
+                        if ni.type == "import_specifier":
+                            for nsc in ni.children:
+                                if nsc.type == "identifier":
+                                    named_imports.append(node_text(nsc))
 
     if default_import:
         imports.append({
@@ -484,7 +482,7 @@ def _parse_ts_import_node(import_node: Dict[str, Any]) -> List[Dict[str, str]]:
     return imports
 
 
-def _parse_ts_function_node(func_node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _parse_ts_function_node(func_node: Node) -> Optional[Dict[str, Any]]:
     """解析 TypeScript 函数节点."""
     func_name = ""
     params = []
@@ -492,19 +490,19 @@ def _parse_ts_function_node(func_node: Dict[str, Any]) -> Optional[Dict[str, Any
     is_async = False
     is_exported = False
 
-    for child in func_node.get("children", []):
-        node_type = child.get("type", "")
+    for child in func_node.children:
+        node_type = child.type
 
         if node_type == "identifier":
-            func_name = child.get("text", "")
+            func_name = node_text(child)
 
         elif node_type == "formal_parameters":
             params = _parse_ts_params_node(child)
 
         elif node_type == "type_annotation":
-            for tc in child.get("children", []):
-                if tc.get("type") in ("type_identifier", "predefined_type"):
-                    return_type = tc.get("text", "")
+            for tc in child.children:
+                if tc.type in ("type_identifier", "predefined_type"):
+                    return_type = node_text(tc)
 
         elif node_type == "async":
             is_async = True
@@ -522,11 +520,11 @@ def _parse_ts_function_node(func_node: Dict[str, Any]) -> Optional[Dict[str, Any
         "return_type": return_type,
         "is_async": is_async,
         "is_exported": is_exported,
-        "line": func_node.get("start_point", {}).get("row", 0) + 1,
+        "line": func_node.start_point.row + 1,
     }
 
 
-def _parse_ts_arrow_function_node(var_node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _parse_ts_arrow_function_node(var_node: Node) -> Optional[Dict[str, Any]]:
     """解析 TypeScript 箭头函数节点."""
     func_name = ""
     params = []
@@ -534,15 +532,15 @@ def _parse_ts_arrow_function_node(var_node: Dict[str, Any]) -> Optional[Dict[str
     is_async = False
     is_exported = False
 
-    for child in var_node.get("children", []):
-        node_type = child.get("type", "")
+    for child in var_node.children:
+        node_type = child.type
 
         if node_type == "identifier":
-            func_name = child.get("text", "")
+            func_name = node_text(child)
 
         elif node_type == "arrow_function":
-            for afc in child.get("children", []):
-                afc_type = afc.get("type", "")
+            for afc in child.children:
+                afc_type = afc.type
 
                 if afc_type == "formal_parameters":
                     params = _parse_ts_params_node(afc)
@@ -559,28 +557,28 @@ def _parse_ts_arrow_function_node(var_node: Dict[str, Any]) -> Optional[Dict[str
         "return_type": return_type,
         "is_async": is_async,
         "is_exported": is_exported,
-        "line": var_node.get("start_point", {}).get("row", 0) + 1,
+        "line": var_node.start_point.row + 1,
     }
 
 
-def _parse_ts_params_node(params_node: Dict[str, Any]) -> List[Dict[str, str]]:
+def _parse_ts_params_node(params_node: Node) -> List[Dict[str, str]]:
     """解析 TypeScript 参数节点."""
     params = []
 
-    for child in params_node.get("children", []):
-        if child.get("type") == "required_parameter":
+    for child in params_node.children:
+        if child.type == "required_parameter":
             param_name = ""
             param_type = "any"
 
-            for pc in child.get("children", []):
-                pc_type = pc.get("type", "")
+            for pc in child.children:
+                pc_type = pc.type
 
                 if pc_type == "identifier":
-                    param_name = pc.get("text", "")
+                    param_name = node_text(pc)
                 elif pc_type == "type_annotation":
-                    for tc in pc.get("children", []):
-                        if tc.get("type") in ("type_identifier", "predefined_type"):
-                            param_type = tc.get("text", "")
+                    for tc in pc.children:
+                        if tc.type in ("type_identifier", "predefined_type"):
+                            param_type = node_text(tc)
 
             if param_name:
                 params.append({"name": param_name, "type": param_type})
@@ -741,6 +739,60 @@ def parse_ts_params(params_str: str) -> List[Dict[str, str]]:
     return params
 
 
+_worker_parsers: Dict[str, Any] = {}
+
+
+def init_analysis_worker() -> None:
+    """进程池工作进程初始化：预热 tree-sitter 解析器.
+
+    每个工作进程只创建一次解析器，后续文件复用。
+    """
+    for language in ("java", "typescript"):
+        if language not in _worker_parsers:
+            _worker_parsers[language] = create_parser(language)
+
+
+def _parse_in_worker(content: str, language: str) -> Optional[Tree]:
+    """使用工作进程内的常驻解析器解析源码."""
+    try:
+        if language not in _worker_parsers:
+            _worker_parsers[language] = create_parser(language)
+        return _worker_parsers[language].parse(bytes(content, "utf-8"))
+    except Exception:
+        return None
+
+
+def analyze_java_file_in_worker(file_path: str) -> Dict[str, Any]:
+    """在进程池工作进程中分析 Java 文件.
+
+    与 analyze_java_file 结果一致，但不访问共享的磁盘 AST 缓存，
+    只把分析结果（不含 AST）返回给主进程。
+
+    Args:
+        file_path: Java 文件路径
+
+    Returns:
+        Dict: 分析结果
+    """
+    content = _read_java_source(file_path)
+    return _build_java_analysis(file_path, content, _parse_in_worker(content, "java"))
+
+
+def analyze_ts_file_in_worker(file_path: str) -> Dict[str, Any]:
+    """在进程池工作进程中分析 TypeScript/Vue 文件.
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        Dict: 分析结果
+    """
+    path = Path(file_path)
+    content = path.read_text(encoding="utf-8")
+    tree = None if path.suffix == ".vue" else _parse_in_worker(content, "typescript")
+    return _build_ts_analysis(file_path, content, tree)
+
+
 def extract_dependencies(file_analysis: Dict[str, Any]) -> List[str]:
     """提取文件依赖.
 
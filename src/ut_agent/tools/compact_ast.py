@@ -0,0 +1,279 @@
+"""紧凑 AST 表示 - 以列式数组存储 tree-sitter 语法树.
+
+嵌套的 dict-per-node 序列化会为每个节点复制一份源码文本，内存占用随嵌套深度
+近似平方增长。这里改为按先序遍历编号的扁平节点表:
+
+- 每个节点一行，按列存放在并行的 ``array`` 中（类型 id、起止字节、起止行列、
+  父节点、首个子节点、子树结束位置）
+- 节点文本不单独保存，访问时从源码字节按需切片
+- 子树在先序编号中是连续区间 ``[i, subtree_end[i])``，按类型查找只需扫描该区间
+
+``CompactNode`` 是轻量游标，同时兼容旧的字典访问方式
+（``node.get("type")``、``node.get("children", [])`` 等），已有消费者无需修改。
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class CompactAST:
+    """列式存储的 AST 节点表."""
+
+    __slots__ = (
+        "source",
+        "type_names",
+        "type_ids",
+        "start_bytes",
+        "end_bytes",
+        "start_rows",
+        "start_cols",
+        "end_rows",
+        "end_cols",
+        "parents",
+        "first_children",
+        "subtree_ends",
+        "_type_index",
+    )
+
+    def __init__(self, source: bytes):
+        """初始化空节点表.
+
+        Args:
+            source: 源码字节
+        """
+        self.source = source
+        self.type_names: List[str] = []
+        self.type_ids = array("H")
+        self.start_bytes = array("i")
+        self.end_bytes = array("i")
+        self.start_rows = array("i")
+        self.start_cols = array("i")
+        self.end_rows = array("i")
+        self.end_cols = array("i")
+        self.parents = array("i")
+        self.first_children = array("i")
+        self.subtree_ends = array("i")
+        self._type_index: Optional[Dict[str, int]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            slot: getattr(self, slot)
+            for slot in self.__slots__
+            if slot != "_type_index"
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._type_index = None
+
+    @classmethod
+    def from_tree(cls, tree: Any, source: bytes) -> "CompactAST":
+        """从 tree-sitter 语法树构建节点表.
+
+        使用 TreeCursor 迭代先序遍历，不产生递归和中间字典。
+
+        Args:
+            tree: tree-sitter 语法树
+            source: 解析时使用的源码字节
+
+        Returns:
+            CompactAST: 节点表
+        """
+        table = cls(source)
+        type_index: Dict[str, int] = {}
+        cursor = tree.walk()
+        stack: List[int] = []
+
+        while True:
+            node = cursor.node
+            index = len(table.type_ids)
+
+            type_id = type_index.get(node.type)
+            if type_id is None:
+                type_id = len(table.type_names)
+                type_index[node.type] = type_id
+                table.type_names.append(node.type)
+
+            start_point = node.start_point
+            end_point = node.end_point
+            parent = stack[-1] if stack else -1
+
+            table.type_ids.append(type_id)
+            table.start_bytes.append(node.start_byte)
+            table.end_bytes.append(node.end_byte)
+            table.start_rows.append(start_point.row)
+            table.start_cols.append(start_point.column)
+            table.end_rows.append(end_point.row)
+            table.end_cols.append(end_point.column)
+            table.parents.append(parent)
+            table.first_children.append(-1)
+            table.subtree_ends.append(index + 1)
+
+            if parent >= 0 and table.first_children[parent] == -1:
+                table.first_children[parent] = index
+
+            if cursor.goto_first_child():
+                stack.append(index)
+                continue
+
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    table._type_index = type_index
+                    return table
+                finished = stack.pop()
+                table.subtree_ends[finished] = len(table.type_ids)
+
+    def __len__(self) -> int:
+        return len(self.type_ids)
+
+    @property
+    def root(self) -> "CompactNode":
+        """根节点游标."""
+        return CompactNode(self, 0)
+
+    def node(self, index: int) -> "CompactNode":
+        """获取指定编号的节点游标."""
+        return CompactNode(self, index)
+
+    def type_id(self, node_type: str) -> int:
+        """获取类型名对应的 id，不存在时返回 -1."""
+        if self._type_index is None:
+            self._type_index = {name: i for i, name in enumerate(self.type_names)}
+        return self._type_index.get(node_type, -1)
+
+    def text(self, index: int) -> str:
+        """按需从源码切片节点文本."""
+        return self.source[self.start_bytes[index]:self.end_bytes[index]].decode(
+            "utf-8", errors="replace"
+        )
+
+    def find_all(self, node_type: str, index: int = 0) -> List["CompactNode"]:
+        """查找子树中（含自身）所有指定类型的节点，按先序返回."""
+        type_id = self.type_id(node_type)
+        if type_id < 0:
+            return []
+        type_ids = self.type_ids
+        return [
+            CompactNode(self, i)
+            for i in range(index, self.subtree_ends[index])
+            if type_ids[i] == type_id
+        ]
+
+    def children(self, index: int) -> Iterator[int]:
+        """遍历直接子节点编号."""
+        end = self.subtree_ends[index]
+        child = self.first_children[index]
+        while 0 <= child < end:
+            yield child
+            child = self.subtree_ends[child]
+
+
+class CompactNode:
+    """CompactAST 节点游标.
+
+    只保存节点表引用与编号，属性全部按需计算。
+    """
+
+    __slots__ = ("_ast", "index")
+
+    _DICT_KEYS = ("type", "start_byte", "end_byte", "start_point", "end_point", "text", "children")
+
+    def __init__(self, ast: CompactAST, index: int):
+        self._ast = ast
+        self.index = index
+
+    @property
+    def ast(self) -> CompactAST:
+        """所属节点表."""
+        return self._ast
+
+    @property
+    def type(self) -> str:
+        return self._ast.type_names[self._ast.type_ids[self.index]]
+
+    @property
+    def start_byte(self) -> int:
+        return self._ast.start_bytes[self.index]
+
+    @property
+    def end_byte(self) -> int:
+        return self._ast.end_bytes[self.index]
+
+    @property
+    def start_point(self) -> Dict[str, int]:
+        return {"row": self._ast.start_rows[self.index], "column": self._ast.start_cols[self.index]}
+
+    @property
+    def end_point(self) -> Dict[str, int]:
+        return {"row": self._ast.end_rows[self.index], "column": self._ast.end_cols[self.index]}
+
+    @property
+    def text(self) -> str:
+        return self._ast.text(self.index)
+
+    @property
+    def parent(self) -> Optional["CompactNode"]:
+        parent = self._ast.parents[self.index]
+        return CompactNode(self._ast, parent) if parent >= 0 else None
+
+    @property
+    def children(self) -> List["CompactNode"]:
+        return [CompactNode(self._ast, i) for i in self._ast.children(self.index)]
+
+    @property
+    def child_count(self) -> int:
+        return sum(1 for _ in self._ast.children(self.index))
+
+    def iter_children(self) -> Iterator["CompactNode"]:
+        """惰性遍历直接子节点."""
+        for i in self._ast.children(self.index):
+            yield CompactNode(self._ast, i)
+
+    def walk(self) -> Iterator["CompactNode"]:
+        """先序遍历子树（含自身）."""
+        for i in range(self.index, self._ast.subtree_ends[self.index]):
+            yield CompactNode(self._ast, i)
+
+    def find_all(self, node_type: str) -> List["CompactNode"]:
+        """查找子树中所有指定类型的节点."""
+        return self._ast.find_all(node_type, self.index)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """字典式访问，兼容旧的嵌套字典 AST 格式."""
+        if key in self._DICT_KEYS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._DICT_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._DICT_KEYS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """展开为旧的嵌套字典格式（仅用于调试或兼容）."""
+        return {
+            "type": self.type,
+            "start_byte": self.start_byte,
+            "end_byte": self.end_byte,
+            "start_point": self.start_point,
+            "end_point": self.end_point,
+            "text": self.text,
+            "children": [child.to_dict() for child in self.iter_children()],
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, CompactNode)
+            and other._ast is self._ast
+            and other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self._ast), self.index))
+
+    def __repr__(self) -> str:
+        return f"CompactNode(type={self.type!r}, index={self.index})"
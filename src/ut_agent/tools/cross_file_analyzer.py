@@ -7,15 +7,19 @@
 - 类型推断
 """
 
-import os
 import json
+import os
+import sqlite3
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from collections import defaultdict
-import hashlib
 
 from ut_agent.tools.code_analyzer import analyze_java_file, analyze_ts_file
+from ut_agent.utils.file_fingerprint import HASH_ALGORITHM, FileManifest
+
+# 索引记录格式版本（含文件哈希算法），不一致时丢弃已保存的索引
+INDEX_FORMAT_VERSION = f"1-{HASH_ALGORITHM}"
 
 
 @dataclass
@@ -53,85 +57,312 @@ class ClassRelationship:
     dependencies: List[str] = field(default_factory=list)
 
 
+class ProjectIndexStore:
+    """项目索引存储 - 基于 SQLite，每个文件贡献的符号、依赖和类关系保存为一条记录.
+
+    增量更新时只写入变化文件的记录，而不是重写整个索引。
+    """
+
+    def __init__(self, db_path: Path, version: str = INDEX_FORMAT_VERSION):
+        """初始化索引存储.
+
+        Args:
+            db_path: 索引数据库路径
+            version: 索引格式版本，与库中记录不一致时清空索引
+        """
+        self._db_path = db_path
+        self._version = version
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path), timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._get_connection()
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    )
+                """)
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != self._version:
+                    conn.execute("DROP TABLE IF EXISTS files")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                        (self._version,),
+                    )
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS files (
+                        file_path TEXT PRIMARY KEY,
+                        record TEXT NOT NULL
+                    )
+                """)
+        finally:
+            conn.close()
+
+    def load(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """读取全部文件记录（按文件路径排序，使加载结果与写入顺序无关）."""
+        conn = self._get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT file_path, record FROM files ORDER BY file_path"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(file_path, json.loads(record)) for file_path, record in rows]
+
+    def apply(
+        self,
+        upserts: List[Tuple[str, str]],
+        deletes: List[str],
+        replace_all: bool = False,
+    ) -> None:
+        """在一个事务中批量写入与删除文件记录.
+
+        Args:
+            upserts: 待写入的 (文件路径, 记录 JSON)
+            deletes: 待删除的文件路径
+            replace_all: 是否先清空全部记录
+        """
+        conn = self._get_connection()
+        try:
+            with conn:
+                if replace_all:
+                    conn.execute("DELETE FROM files")
+                if deletes:
+                    conn.executemany(
+                        "DELETE FROM files WHERE file_path = ?",
+                        [(file_path,) for file_path in deletes],
+                    )
+                if upserts:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO files (file_path, record) VALUES (?, ?)",
+                        upserts,
+                    )
+        finally:
+            conn.close()
+
+
 class ProjectIndex:
-    """项目索引."""
+    """项目索引.
+
+    依赖按源文件分组保存，类关系另有按文件的映射，移除文件时直接取出其条目。
+    此外维护以下二级索引，使查询开销与结果规模成正比：
+
+    - 简单名 -> 符号键
+    - 文件 -> 符号键
+    - 依赖类型 -> 目标 -> 源文件
+
+    二级索引随索引构建和增量更新同步维护，加载时由按文件保存的记录重建。
+    索引自身的修改都会递增 ``version``；直接修改 ``symbols`` 后需同样递增
+    ``version``，下一次查询会据此重建二级索引。
+    """
 
     def __init__(self, project_path: str):
         self.project_path = Path(project_path)
-        self.index_file = self.project_path / ".ut-agent" / "index.json"
+        self.index_file = self.project_path / ".ut-agent" / "index.db"
+        # 符号表和依赖的修改计数，派生数据据此判断是否过期
+        self.version = 0
         self.symbols: Dict[str, SymbolInfo] = {}
         self.files: Dict[str, Dict[str, Any]] = {}
-        self.dependencies: List[DependencyInfo] = []
         self.relationships: Dict[str, ClassRelationship] = {}
         self._file_hashes: Dict[str, str] = {}
+        # 源文件 -> 依赖，dependencies 由此展开
+        self._deps_by_source: Dict[str, List[DependencyInfo]] = {}
+        # 文件 -> 类关系名
+        self._relationships_by_file: Dict[str, List[str]] = {}
+        # 二级索引
+        self._symbols_by_name: Dict[str, List[str]] = {}
+        self._file_symbols: Dict[str, List[str]] = {}
+        self._sources_by_target: Dict[str, Dict[str, List[str]]] = {}
+        self._indexed_version: Optional[int] = None
+        self._loaded = False
+        # stat 签名清单，未变化的文件无需重新读取和哈希
+        self._manifest = FileManifest()
+        # 自上次保存以来记录有变化的文件，None 表示需要写入全部记录
+        self._dirty_files: Optional[Set[str]] = None
+        self._store: Optional[ProjectIndexStore] = None
+
+    @property
+    def dependencies(self) -> List[DependencyInfo]:
+        """全部依赖（按源文件分组保存，读取时展开）."""
+        return [dep for deps in self._deps_by_source.values() for dep in deps]
+
+    @dependencies.setter
+    def dependencies(self, value: List[DependencyInfo]) -> None:
+        self._deps_by_source = {}
+        for dependency in value:
+            self._deps_by_source.setdefault(dependency.source_file, []).append(dependency)
+        self._dirty_files = None
+        self.version += 1
 
     def build_index(self, force_rebuild: bool = False) -> None:
         """构建项目索引.
 
+        已有索引时增量维护：按文件哈希找出新增、修改和删除的文件，
+        只移除并重建这些文件贡献的符号、依赖和类关系，其余条目保持不变。
+
         Args:
             force_rebuild: 是否强制重建
         """
-        # 检查是否需要重建
-        if not force_rebuild and self._is_index_valid():
-            self._load_index()
+        if force_rebuild or not self._ensure_loaded():
+            self._rebuild()
+            return
+
+        source_files = self._find_source_files()
+        added, changed, removed = self._detect_changes(source_files)
+        if not (added or changed or removed):
             return
 
+        self._remove_files(changed | removed)
+        self._index_files([f for f in source_files if f in added or f in changed])
+        self._save_index()
+
+    def _rebuild(self) -> None:
+        """清空并全量重建索引."""
         self.symbols.clear()
         self.files.clear()
-        self.dependencies.clear()
         self.relationships.clear()
+        self._file_hashes.clear()
+        self._deps_by_source.clear()
+        self._relationships_by_file.clear()
+        self._reset_secondary_indexes()
+        self._dirty_files = None
+        self.version += 1
 
-        # 扫描所有源文件
-        source_files = self._find_source_files()
+        self._index_files(self._find_source_files())
+        self._loaded = True
+
+        # 保存索引
+        self._save_index()
+
+    def _ensure_loaded(self) -> bool:
+        """确保内存中有可增量维护的索引，必要时从索引库加载."""
+        if self._loaded:
+            return True
+        if not self.index_file.exists():
+            return False
+        try:
+            self._load_index()
+            return True
+        except Exception:
+            return False
+
+    def _detect_changes(self, source_files: List[str]) -> Tuple[Set[str], Set[str], Set[str]]:
+        """按文件哈希比较当前源文件与已索引文件.
+
+        Args:
+            source_files: 当前源文件列表
 
+        Returns:
+            Tuple[Set[str], Set[str], Set[str]]: (新增, 修改, 删除) 的文件集合
+        """
+        added: Set[str] = set()
+        changed: Set[str] = set()
         for file_path in source_files:
+            stored_hash = self._file_hashes.get(file_path)
+            if stored_hash is None:
+                added.add(file_path)
+            elif self._manifest.get_hash(file_path) != stored_hash:
+                changed.add(file_path)
+
+        removed = set(self._file_hashes) - set(source_files)
+        return added, changed, removed
+
+    def _remove_files(self, file_paths: Set[str]) -> None:
+        """移除文件贡献的符号、依赖和类关系."""
+        if not file_paths:
+            return
+
+        self._ensure_secondary_indexes()
+
+        for file_path in file_paths:
+            self.files.pop(file_path, None)
+            self._file_hashes.pop(file_path, None)
+            self._manifest.remove(file_path)
+            for key in self._file_symbols.pop(file_path, []):
+                symbol = self.symbols.pop(key, None)
+                if symbol is not None:
+                    self._unindex_symbol(key, symbol)
+            for dep in self._deps_by_source.pop(file_path, []):
+                self._unindex_dependency_target(dep)
+            for name in self._relationships_by_file.pop(file_path, []):
+                relationship = self.relationships.get(name)
+                if relationship is not None and relationship.file_path == file_path:
+                    del self.relationships[name]
+            self._mark_dirty(file_path)
+
+        self.version += 1
+        self._indexed_version = self.version
+
+    def _index_files(self, file_paths: List[str]) -> None:
+        """索引文件并分析其依赖关系."""
+        indexed = []
+        for file_path in file_paths:
             try:
                 self._index_file(file_path)
+                indexed.append(file_path)
             except Exception as e:
                 print(f"索引文件失败 {file_path}: {e}")
 
         # 分析依赖关系
-        self._analyze_dependencies()
-
-        # 保存索引
-        self._save_index()
+        for file_path in indexed:
+            analysis = self.files.get(file_path)
+            if analysis is not None:
+                self._analyze_file_dependencies(file_path, analysis)
 
     def _find_source_files(self) -> List[str]:
         """查找所有源文件."""
-        files = []
-
-        # Java 文件
-        java_files = list(self.project_path.rglob("*.java"))
-        files.extend([str(f) for f in java_files])
-
-        # TypeScript 文件
-        ts_files = list(self.project_path.rglob("*.ts"))
-        files.extend([str(f) for f in ts_files if not f.name.endswith(".d.ts")])
-
-        # Vue 文件
-        vue_files = list(self.project_path.rglob("*.vue"))
-        files.extend([str(f) for f in vue_files])
+        java_files: List[str] = []
+        ts_files: List[str] = []
+        vue_files: List[str] = []
+
+        # 单次遍历，并剪掉被排除的目录（不再进入 node_modules 等目录）
+        for dirpath, dirnames, filenames in os.walk(self.project_path):
+            dirnames[:] = [
+                d for d in dirnames
+                if not self._is_excluded(os.path.join(dirpath, d))
+            ]
+            for name in filenames:
+                if name.endswith(".java"):
+                    java_files.append(os.path.join(dirpath, name))
+                elif name.endswith(".ts") and not name.endswith(".d.ts"):
+                    ts_files.append(os.path.join(dirpath, name))
+                elif name.endswith(".vue"):
+                    vue_files.append(os.path.join(dirpath, name))
+
+        files = java_files + ts_files + vue_files
 
         # 排除测试文件和 node_modules
-        files = [
-            f for f in files
-            if "test" not in f.lower()
-            and "spec" not in f.lower()
-            and "node_modules" not in f
-            and "target" not in f
-            and "build" not in f
-        ]
-
-        return files
+        return [f for f in files if not self._is_excluded(f)]
+
+    @staticmethod
+    def _is_excluded(path: str) -> bool:
+        """判断路径是否属于测试文件或构建产物."""
+        lowered = path.lower()
+        return (
+            "test" in lowered
+            or "spec" in lowered
+            or "node_modules" in path
+            or "target" in path
+            or "build" in path
+        )
 
     def _index_file(self, file_path: str) -> None:
         """索引单个文件."""
-        path = Path(file_path)
-
         # 计算文件哈希
-        content = path.read_text(encoding="utf-8", errors="ignore")
-        file_hash = hashlib.md5(content.encode()).hexdigest()
+        file_hash = self._manifest.get_hash(file_path)
+        if file_hash is None:
+            raise FileNotFoundError(file_path)
         self._file_hashes[file_path] = file_hash
+        self._mark_dirty(file_path)
 
         # 分析文件
         if file_path.endswith(".java"):
@@ -146,6 +377,91 @@ class ProjectIndex:
         # 提取符号
         self._extract_symbols(analysis)
 
+    def _add_symbol(self, key: str, symbol: SymbolInfo) -> None:
+        """登记符号并更新二级索引."""
+        self._ensure_secondary_indexes()
+        previous = self.symbols.get(key)
+        if previous is not None:
+            # 同名符号被其他文件覆盖
+            self._unindex_symbol(key, previous)
+            self._mark_dirty(previous.file_path)
+        self.symbols[key] = symbol
+        self._index_symbol(key, symbol)
+        self._mark_dirty(symbol.file_path)
+        self.version += 1
+        self._indexed_version = self.version
+
+    def _add_dependency(self, dependency: DependencyInfo) -> None:
+        """登记依赖并更新二级索引."""
+        self._ensure_secondary_indexes()
+        self._deps_by_source.setdefault(dependency.source_file, []).append(dependency)
+        self._index_dependency_target(dependency)
+        self._mark_dirty(dependency.source_file)
+        self.version += 1
+        self._indexed_version = self.version
+
+    def _add_relationship(self, relationship: ClassRelationship) -> None:
+        """登记类关系并记录其所属文件."""
+        previous = self.relationships.get(relationship.class_name)
+        if previous is not None:
+            self._mark_dirty(previous.file_path)
+        self.relationships[relationship.class_name] = relationship
+        self._relationships_by_file.setdefault(relationship.file_path, []).append(
+            relationship.class_name
+        )
+        self._mark_dirty(relationship.file_path)
+
+    def _mark_dirty(self, file_path: str) -> None:
+        """记录需要在下次保存时写入的文件."""
+        if self._dirty_files is not None:
+            self._dirty_files.add(file_path)
+
+    def _reset_secondary_indexes(self) -> None:
+        self._symbols_by_name = {}
+        self._file_symbols = {}
+        self._sources_by_target = {}
+        self._indexed_version = None
+
+    def _ensure_secondary_indexes(self) -> None:
+        """二级索引与符号表/依赖不一致时重建."""
+        if self._indexed_version == self.version:
+            return
+        self._reset_secondary_indexes()
+        for key, symbol in self.symbols.items():
+            self._index_symbol(key, symbol)
+        for deps in self._deps_by_source.values():
+            for dependency in deps:
+                self._index_dependency_target(dependency)
+        self._indexed_version = self.version
+
+    def _index_symbol(self, key: str, symbol: SymbolInfo) -> None:
+        self._symbols_by_name.setdefault(symbol.name, []).append(key)
+        self._file_symbols.setdefault(symbol.file_path, []).append(key)
+
+    def _unindex_symbol(self, key: str, symbol: SymbolInfo) -> None:
+        for index, bucket_key in (
+            (self._symbols_by_name, symbol.name),
+            (self._file_symbols, symbol.file_path),
+        ):
+            keys = index.get(bucket_key)
+            if keys and key in keys:
+                keys.remove(key)
+                if not keys:
+                    del index[bucket_key]
+
+    def _index_dependency_target(self, dependency: DependencyInfo) -> None:
+        self._sources_by_target.setdefault(dependency.dependency_type, {}).setdefault(
+            dependency.target_file, []
+        ).append(dependency.source_file)
+
+    def _unindex_dependency_target(self, dependency: DependencyInfo) -> None:
+        targets = self._sources_by_target.get(dependency.dependency_type, {})
+        sources = targets.get(dependency.target_file)
+        if sources and dependency.source_file in sources:
+            sources.remove(dependency.source_file)
+            if not sources:
+                del targets[dependency.target_file]
+
     def _extract_symbols(self, analysis: Dict[str, Any]) -> None:
         """提取符号信息."""
         file_path = analysis["file_path"]
@@ -156,25 +472,25 @@ class ProjectIndex:
             class_name = analysis.get("class_name", "")
             if class_name:
                 full_name = f"{package}.{class_name}" if package else class_name
-                self.symbols[full_name] = SymbolInfo(
+                self._add_symbol(full_name, SymbolInfo(
                     name=class_name,
                     type="class",
                     file_path=file_path,
                     package=package,
-                )
+                ))
 
             # 方法
             for method in analysis.get("methods", []):
                 method_name = method.get("name", "")
                 if method_name:
                     symbol_name = f"{full_name}.{method_name}"
-                    self.symbols[symbol_name] = SymbolInfo(
+                    self._add_symbol(symbol_name, SymbolInfo(
                         name=method_name,
                         type="method",
                         file_path=file_path,
                         package=package,
                         signature=method.get("signature", ""),
-                    )
+                    ))
 
         # TypeScript/Vue
         elif analysis["language"] in ["typescript", "vue"]:
@@ -184,20 +500,19 @@ class ProjectIndex:
                 func_name = func.get("name", "")
                 if func_name:
                     symbol_name = f"{file_name}.{func_name}"
-                    self.symbols[symbol_name] = SymbolInfo(
+                    self._add_symbol(symbol_name, SymbolInfo(
                         name=func_name,
                         type="function",
                         file_path=file_path,
                         signature=f"{func_name}({', '.join(p['name'] for p in func.get('parameters', []))})",
-                    )
+                    ))
 
-    def _analyze_dependencies(self) -> None:
-        """分析依赖关系."""
-        for file_path, analysis in self.files.items():
-            if analysis["language"] == "java":
-                self._analyze_java_dependencies(file_path, analysis)
-            elif analysis["language"] in ["typescript", "vue"]:
-                self._analyze_ts_dependencies(file_path, analysis)
+    def _analyze_file_dependencies(self, file_path: str, analysis: Dict[str, Any]) -> None:
+        """分析单个文件的依赖关系."""
+        if analysis["language"] == "java":
+            self._analyze_java_dependencies(file_path, analysis)
+        elif analysis["language"] in ["typescript", "vue"]:
+            self._analyze_ts_dependencies(file_path, analysis)
 
     def _analyze_java_dependencies(self, file_path: str, analysis: Dict[str, Any]) -> None:
         """分析 Java 依赖."""
@@ -222,7 +537,7 @@ class ProjectIndex:
             if extends_match:
                 superclass = extends_match.group(1)
                 relationship.superclass = superclass
-                self.dependencies.append(DependencyInfo(
+                self._add_dependency(DependencyInfo(
                     source_file=file_path,
                     target_file=superclass,
                     dependency_type="extends",
@@ -238,18 +553,18 @@ class ProjectIndex:
                 interfaces = [i.strip() for i in implements_match.group(1).split(",")]
                 relationship.interfaces = interfaces
                 for interface in interfaces:
-                    self.dependencies.append(DependencyInfo(
+                    self._add_dependency(DependencyInfo(
                         source_file=file_path,
                         target_file=interface,
                         dependency_type="implements",
                         symbol=interface,
                     ))
 
-            self.relationships[class_name] = relationship
+            self._add_relationship(relationship)
 
         # 分析 import
         for import_stmt in analysis.get("imports", []):
-            self.dependencies.append(DependencyInfo(
+            self._add_dependency(DependencyInfo(
                 source_file=file_path,
                 target_file=import_stmt,
                 dependency_type="import",
@@ -261,62 +576,98 @@ class ProjectIndex:
         for imp in analysis.get("imports", []):
             source = imp.get("source", "")
             if source:
-                self.dependencies.append(DependencyInfo(
+                self._add_dependency(DependencyInfo(
                     source_file=file_path,
                     target_file=source,
                     dependency_type="import",
                     symbol=imp.get("name", ""),
                 ))
 
-    def _is_index_valid(self) -> bool:
-        """检查索引是否有效."""
-        if not self.index_file.exists():
-            return False
-
-        try:
-            with open(self.index_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            stored_hashes = data.get("file_hashes", {})
-
-            # 检查文件是否有变化
-            for file_path, stored_hash in stored_hashes.items():
-                if not os.path.exists(file_path):
-                    return False
-
-                current_content = Path(file_path).read_text(encoding="utf-8", errors="ignore")
-                current_hash = hashlib.md5(current_content.encode()).hexdigest()
-
-                if current_hash != stored_hash:
-                    return False
-
-            return True
-        except Exception:
-            return False
+    def _get_store(self) -> ProjectIndexStore:
+        if self._store is None:
+            legacy_index = self.index_file.with_name("index.json")
+            if legacy_index.exists():
+                # 旧版整文件重写的 JSON 索引不再使用
+                legacy_index.unlink(missing_ok=True)
+            self._store = ProjectIndexStore(self.index_file)
+        return self._store
 
     def _save_index(self) -> None:
-        """保存索引到文件."""
-        self.index_file.parent.mkdir(parents=True, exist_ok=True)
-
-        data = {
-            "symbols": {k: asdict(v) for k, v in self.symbols.items()},
-            "dependencies": [asdict(d) for d in self.dependencies],
-            "relationships": {k: asdict(v) for k, v in self.relationships.items()},
-            "file_hashes": self._file_hashes,
-        }
+        """保存索引，只写入自上次保存以来有变化的文件记录."""
+        self._ensure_secondary_indexes()
+        replace_all = self._dirty_files is None
+        if replace_all:
+            file_paths = (
+                set(self._file_hashes) | set(self._file_symbols)
+                | set(self._deps_by_source) | set(self._relationships_by_file)
+            )
+        else:
+            file_paths = self._dirty_files
+
+        upserts = []
+        deletes = []
+        for file_path in file_paths:
+            record = self._file_record(file_path)
+            if record is None:
+                deletes.append(file_path)
+            else:
+                # json.dumps 走 C 编码器，紧凑分隔符减小记录体积
+                upserts.append(
+                    (file_path, json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                )
 
-        with open(self.index_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._get_store().apply(upserts, deletes, replace_all=replace_all)
+        self._dirty_files = set()
+
+    def _file_record(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """文件贡献的索引条目，文件已不在索引中时返回 None."""
+        # 数据类字段都是 JSON 原生类型，直接用 vars() 避免 asdict 的递归深拷贝
+        symbols = {key: vars(self.symbols[key]) for key in self._file_symbols.get(file_path, [])}
+        dependencies = [vars(d) for d in self._deps_by_source.get(file_path, [])]
+        relationships = {}
+        for name in self._relationships_by_file.get(file_path, []):
+            relationship = self.relationships.get(name)
+            if relationship is not None and relationship.file_path == file_path:
+                relationships[name] = vars(relationship)
+
+        file_hash = self._file_hashes.get(file_path)
+        if file_hash is None and not (symbols or dependencies or relationships):
+            return None
+        return {
+            "hash": file_hash,
+            "manifest": self._manifest.entry_to_dict(file_path),
+            "symbols": symbols,
+            "dependencies": dependencies,
+            "relationships": relationships,
+        }
 
     def _load_index(self) -> None:
-        """从文件加载索引."""
-        with open(self.index_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        self.symbols = {k: SymbolInfo(**v) for k, v in data.get("symbols", {}).items()}
-        self.dependencies = [DependencyInfo(**d) for d in data.get("dependencies", [])]
-        self.relationships = {k: ClassRelationship(**v) for k, v in data.get("relationships", {}).items()}
-        self._file_hashes = data.get("file_hashes", {})
+        """从索引库加载索引."""
+        rows = self._get_store().load()
+
+        self.symbols = {}
+        self.relationships = {}
+        self._file_hashes = {}
+        self._deps_by_source = {}
+        self._relationships_by_file = {}
+        self._manifest = FileManifest()
+        for file_path, record in rows:
+            if record.get("hash") is not None:
+                self._file_hashes[file_path] = record["hash"]
+            self._manifest.restore_entry(file_path, record.get("manifest"))
+            for key, item in record.get("symbols", {}).items():
+                self.symbols[key] = SymbolInfo(**item)
+            deps = [DependencyInfo(**item) for item in record.get("dependencies", [])]
+            if deps:
+                self._deps_by_source[file_path] = deps
+            for name, item in record.get("relationships", {}).items():
+                self.relationships[name] = ClassRelationship(**item)
+                self._relationships_by_file.setdefault(file_path, []).append(name)
+
+        self.version += 1
+        self._ensure_secondary_indexes()
+        self._dirty_files = set()
+        self._loaded = True
 
     def find_symbol(self, name: str) -> Optional[SymbolInfo]:
         """查找符号."""
@@ -324,63 +675,59 @@ class ProjectIndex:
         if name in self.symbols:
             return self.symbols[name]
 
-        # 部分匹配
-        for full_name, symbol in self.symbols.items():
-            if symbol.name == name:
-                return symbol
+        # 按简单名匹配
+        self._ensure_secondary_indexes()
+        keys = self._symbols_by_name.get(name)
+        if keys:
+            return self.symbols[keys[0]]
 
         return None
 
-    def find_implementations(self, interface_name: str) -> List[str]:
-        """查找接口实现类."""
-        implementations = []
+    def get_file_symbols(self, file_path: str) -> List[SymbolInfo]:
+        """获取文件定义的符号."""
+        self._ensure_secondary_indexes()
+        return [self.symbols[key] for key in self._file_symbols.get(file_path, [])]
 
-        for dep in self.dependencies:
-            if dep.dependency_type == "implements" and dep.target_file == interface_name:
-                implementations.append(dep.source_file)
+    def indexed_files(self) -> List[str]:
+        """已索引的源文件."""
+        return list(self._file_hashes)
 
-        return implementations
+    def find_implementations(self, interface_name: str) -> List[str]:
+        """查找接口实现类."""
+        self._ensure_secondary_indexes()
+        return list(self._sources_by_target.get("implements", {}).get(interface_name, []))
 
     def find_subclasses(self, class_name: str) -> List[str]:
         """查找子类."""
-        subclasses = []
-
-        for dep in self.dependencies:
-            if dep.dependency_type == "extends" and dep.target_file == class_name:
-                subclasses.append(dep.source_file)
-
-        return subclasses
+        self._ensure_secondary_indexes()
+        return list(self._sources_by_target.get("extends", {}).get(class_name, []))
 
     def get_file_dependencies(self, file_path: str) -> List[str]:
         """获取文件依赖."""
+        self._ensure_secondary_indexes()
         deps = []
 
-        for dep in self.dependencies:
-            if dep.source_file == file_path:
-                # 查找目标文件路径
-                target_symbol = self.find_symbol(dep.target_file)
-                if target_symbol:
-                    deps.append(target_symbol.file_path)
-                else:
-                    deps.append(dep.target_file)
+        for dep in self._deps_by_source.get(file_path, []):
+            # 查找目标文件路径
+            target_symbol = self.find_symbol(dep.target_file)
+            if target_symbol:
+                deps.append(target_symbol.file_path)
+            else:
+                deps.append(dep.target_file)
 
         return list(set(deps))
 
     def get_dependent_files(self, file_path: str) -> List[str]:
         """获取依赖该文件的文件."""
-        dependents = []
-        file_symbol = None
-
         # 找到文件对应的符号名
-        for name, symbol in self.symbols.items():
-            if symbol.file_path == file_path:
-                file_symbol = symbol.name
-                break
+        file_symbols = self.get_file_symbols(file_path)
+        if not file_symbols:
+            return []
 
-        if file_symbol:
-            for dep in self.dependencies:
-                if dep.target_file == file_symbol:
-                    dependents.append(dep.source_file)
+        file_symbol = file_symbols[0].name
+        dependents = []
+        for targets in self._sources_by_target.values():
+            dependents.extend(targets.get(file_symbol, []))
 
         return dependents
 
@@ -433,11 +780,8 @@ class CrossFileAnalyzer:
         # 获取文件依赖
         deps = self.index.get_file_dependencies(file_path)
         for dep_path in deps:
-            dep_symbol = None
-            for name, symbol in self.index.symbols.items():
-                if symbol.file_path == dep_path:
-                    dep_symbol = symbol
-                    break
+            dep_symbols = self.index.get_file_symbols(dep_path)
+            dep_symbol = dep_symbols[0] if dep_symbols else None
 
             if dep_symbol:
                 context["dependencies"].append({
@@ -2,10 +2,12 @@
 
 import re
 import subprocess
+from itertools import zip_longest
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
 
 from ut_agent.models.common import ChangeType, CodeChange, MethodChange
+from ut_agent.tools.git_blob_reader import GitBlobReader
 
 
 class GitAnalyzer:
@@ -49,6 +51,34 @@ class GitAnalyzer:
         except FileNotFoundError:
             raise RuntimeError("未找到Git命令，请确保Git已安装")
 
+    def _stream_git_command(self, args: List[str]) -> Iterator[str]:
+        """执行Git命令并逐行读取输出.
+
+        Args:
+            args: Git命令参数
+
+        Yields:
+            输出行（保留换行符）
+        """
+        try:
+            process = subprocess.Popen(
+                ["git"] + args,
+                cwd=self.project_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except FileNotFoundError:
+            raise RuntimeError("未找到Git命令，请确保Git已安装")
+
+        with process:
+            yield from process.stdout
+            stderr = process.stderr.read()
+        if process.returncode != 0:
+            raise RuntimeError(f"Git命令失败: {stderr}")
+
     def get_changed_files(
         self,
         base_ref: Optional[str] = None,
@@ -65,24 +95,12 @@ class GitAnalyzer:
         Returns:
             变更列表
         """
-        changes = []
-
         if base_ref or head_ref:
             base = base_ref or "HEAD~1"
             head = head_ref or "HEAD"
-            diff_stat = self._run_git_command(["diff", "--stat", f"{base}...{head}"])
+            changes = self._collect_changes([f"{base}...{head}"])
         else:
-            diff_stat = self._run_git_command(["diff", "--stat", "HEAD"])
-
-        for line in diff_stat.strip().split("\n"):
-            if "|" in line:
-                parts = line.split("|")
-                if len(parts) >= 2:
-                    file_path = parts[0].strip()
-                    if file_path:
-                        change = self._get_file_diff(file_path, base_ref, head_ref)
-                        if change:
-                            changes.append(change)
+            changes = self._collect_changes(["HEAD"])
 
         if include_untracked:
             untracked = self._get_untracked_files()
@@ -90,38 +108,53 @@ class GitAnalyzer:
 
         return changes
 
-    def _get_file_diff(
-        self,
-        file_path: str,
-        base_ref: Optional[str] = None,
-        head_ref: Optional[str] = None,
-    ) -> Optional[CodeChange]:
-        """获取单个文件的diff.
+    def _collect_changes(self, diff_args: List[str]) -> List[CodeChange]:
+        """用两次Git调用收集全部文件的变更.
+
+        ``git diff -z --numstat`` 给出文件列表（路径不转义、不截断），
+        统一格式的diff按 ``diff --git`` 分块后与其一一对应：两条命令使用
+        相同的参数，输出顺序一致。
 
         Args:
-            file_path: 文件路径
-            base_ref: 基准引用
-            head_ref: 目标引用
+            diff_args: 传给 ``git diff`` 的比较范围参数
+
+        Returns:
+            变更列表
+        """
+        common = ["diff", "-M", "--no-color", "--no-ext-diff"] + diff_args
+        entries = _parse_numstat_z(self._run_git_command(common + ["-z", "--numstat"]))
+        if not entries:
+            return []
+
+        changes = []
+        blocks = _split_diff_blocks(self._stream_git_command(common + ["-u"]))
+        for entry, block in zip_longest(entries, blocks):
+            if entry is None:
+                break
+            changes.append(self._parse_diff_block(entry, block or ""))
+
+        return changes
+
+    def _parse_diff_block(self, entry: "NumstatEntry", block: str) -> CodeChange:
+        """解析单个文件的diff块.
+
+        Args:
+            entry: numstat 条目
+            block: 该文件的diff内容
 
         Returns:
             变更信息
         """
-        try:
-            if base_ref or head_ref:
-                base = base_ref or "HEAD~1"
-                head = head_ref or "HEAD"
-                diff_output = self._run_git_command(
-                    ["diff", "-u", f"{base}...{head}", "--", file_path]
-                )
-            else:
-                diff_output = self._run_git_command(["diff", "-u", "HEAD", "--", file_path])
-
-            if not diff_output:
-                return None
-
-            return self._parse_diff(file_path, diff_output)
-        except RuntimeError:
-            return None
+        change = self._parse_diff(entry.path, block)
+        header = block.split("\n@@", 1)[0]
+        if entry.old_path:
+            change.change_type = ChangeType.RENAMED
+            change.old_path = entry.old_path
+        elif "\nnew file mode " in header:
+            change.change_type = ChangeType.ADDED
+        elif "\ndeleted file mode " in header:
+            change.change_type = ChangeType.DELETED
+        return change
 
     def _parse_diff(self, file_path: str, diff_content: str) -> CodeChange:
         """解析diff内容.
@@ -136,17 +169,24 @@ class GitAnalyzer:
         added_lines = []
         deleted_lines = []
         current_line = 0
+        in_hunk = False
 
         for line in diff_content.split("\n"):
             if line.startswith("@@"):
                 match = re.match(r"@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@", line)
                 if match:
                     current_line = int(match.group(2))
-            elif line.startswith("+") and not line.startswith("+++"):
+                    in_hunk = True
+            elif not in_hunk:
+                # 文件头（diff --git、index、---/+++ 等）
+                continue
+            elif line.startswith("+"):
                 added_lines.append(current_line)
                 current_line += 1
-            elif line.startswith("-") and not line.startswith("---"):
+            elif line.startswith("-"):
                 deleted_lines.append(current_line)
+            elif line.startswith("diff --git "):
+                in_hunk = False
             elif not line.startswith("\\"):
                 current_line += 1
 
@@ -215,16 +255,7 @@ class GitAnalyzer:
         Returns:
             变更列表
         """
-        output = self._run_git_command(["diff", "--cached", "--name-only"])
-        changes = []
-
-        for line in output.strip().split("\n"):
-            if line:
-                diff_output = self._run_git_command(["diff", "--cached", "-u", "--", line])
-                if diff_output:
-                    changes.append(self._parse_diff(line, diff_output))
-
-        return changes
+        return self._collect_changes(["--cached"])
 
     def get_file_at_ref(self, file_path: str, ref: str = "HEAD") -> Optional[str]:
         """获取指定引用处的文件内容.
@@ -237,10 +268,32 @@ class GitAnalyzer:
             文件内容
         """
         try:
-            return self._run_git_command(["show", f"{ref}:{file_path}"])
+            return GitBlobReader.get_instance(str(self.project_path)).read(ref, file_path)
         except RuntimeError:
             return None
 
+    def get_files_at_ref(
+        self,
+        file_paths: List[str],
+        ref: str = "HEAD",
+    ) -> Dict[str, Optional[str]]:
+        """批量获取指定引用处的文件内容（一次流水线请求）.
+
+        Args:
+            file_paths: 文件路径列表
+            ref: Git引用
+
+        Returns:
+            文件路径到内容的映射，不存在的文件为 None
+        """
+        try:
+            contents = GitBlobReader.get_instance(str(self.project_path)).read_many(
+                [(ref, file_path) for file_path in file_paths]
+            )
+        except RuntimeError:
+            return {file_path: None for file_path in file_paths}
+        return dict(zip(file_paths, contents))
+
     def get_last_commit_hash(self) -> str:
         """获取最后一次提交的哈希.
 
@@ -261,6 +314,69 @@ class GitAnalyzer:
         return self._run_git_command(["log", "-1", "--pretty=%B", ref]).strip()
 
 
+class NumstatEntry(NamedTuple):
+    """``git diff --numstat`` 条目（二进制文件的行数为 None）."""
+    path: str
+    added: Optional[int]
+    deleted: Optional[int]
+    old_path: Optional[str] = None
+
+
+def _parse_numstat_z(output: str) -> List[NumstatEntry]:
+    """解析 ``git diff -z --numstat`` 的输出.
+
+    普通条目为 ``added\\tdeleted\\tpath\\0``；重命名条目的路径字段为空，
+    随后依次是旧路径和新路径，各以 NUL 结尾。二进制文件的行数为 ``-``。
+
+    Args:
+        output: 命令输出
+
+    Returns:
+        numstat 条目列表
+    """
+    entries = []
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields):
+        stat = fields[i]
+        i += 1
+        if not stat:
+            continue
+        added, deleted, path = stat.split("\t", 2)
+        old_path = None
+        if not path:
+            old_path, path = fields[i], fields[i + 1]
+            i += 2
+        entries.append(NumstatEntry(
+            path=path,
+            added=None if added == "-" else int(added),
+            deleted=None if deleted == "-" else int(deleted),
+            old_path=old_path,
+        ))
+    return entries
+
+
+def _split_diff_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """把统一格式的diff输出按文件分块.
+
+    内容行都带有 `` ``/``+``/``-`` 前缀，只有文件头以 ``diff --git `` 开头。
+
+    Args:
+        lines: diff输出行
+
+    Yields:
+        每个文件的diff内容
+    """
+    block: List[str] = []
+    for line in lines:
+        if line.startswith("diff --git ") and block:
+            yield "".join(block)
+            block = []
+        block.append(line)
+    if block:
+        yield "".join(block)
+
+
 def filter_source_files(
     changes: List[CodeChange],
     project_type: str,
@@ -304,9 +420,10 @@ def get_changed_methods(
         方法变更列表
     """
     method_changes = []
+    old_contents = git_analyzer.get_files_at_ref([c.file_path for c in changes], "HEAD~1")
 
     for change in changes:
-        old_content = git_analyzer.get_file_at_ref(change.file_path, "HEAD~1")
+        old_content = old_contents.get(change.file_path)
         new_content = None
 
         file_path = Path(git_analyzer.project_path) / change.file_path
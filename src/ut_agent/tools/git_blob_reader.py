@@ -0,0 +1,262 @@
+"""Git 对象读取 - 常驻的 ``git cat-file --batch`` 进程.
+
+读取历史版本的文件内容时，不再为每个文件启动一次 ``git show``，而是由
+整个运行期间共享的 ``git cat-file --batch-check`` 与 ``git cat-file --batch``
+进程响应请求。同一批请求一次性写入（流水线），再按顺序读取响应。
+
+引用先解析为提交 ID，``(提交, 路径) -> 对象 ID`` 的映射不可变，可以
+长期缓存；文件内容按对象 ID 缓存在 LRU 中，只有缓存中没有的对象才读取
+内容，不同提交中相同的文件只读取一次。
+"""
+
+import atexit
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ut_agent.utils import get_logger
+
+logger = get_logger("git_blob_reader")
+
+# 内容缓存的总字节数上限
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class GitBlobReader:
+    """基于 ``git cat-file --batch`` 的对象读取器.
+
+    Example:
+        reader = GitBlobReader.get_instance(project_path)
+        contents = reader.read_many([("HEAD~1", "src/A.java"), ("HEAD~1", "src/B.java")])
+    """
+
+    _instances: Dict[str, "GitBlobReader"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, repo_path: str, max_cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """初始化读取器.
+
+        Args:
+            repo_path: 仓库路径
+            max_cache_bytes: 内容缓存的总字节数上限
+        """
+        self.repo_path = Path(repo_path)
+        self._max_cache_bytes = max_cache_bytes
+        self._lock = threading.Lock()
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self._paths: Dict[Tuple[str, str], Optional[str]] = {}
+        self.cache_hits = 0
+        self.objects_read = 0
+
+    @classmethod
+    def get_instance(cls, repo_path: str) -> "GitBlobReader":
+        """获取仓库共享的读取器实例."""
+        key = os.path.abspath(repo_path)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls(key)
+            return instance
+
+    @classmethod
+    def close_all(cls) -> None:
+        """关闭全部共享实例的进程."""
+        with cls._instances_lock:
+            instances = list(cls._instances.values())
+            cls._instances.clear()
+        for instance in instances:
+            instance.close()
+
+    def close(self) -> None:
+        """结束 ``git cat-file`` 进程."""
+        with self._lock:
+            self._stop_processes()
+
+    def _stop_processes(self) -> None:
+        processes, self._processes = self._processes, {}
+        for process in processes.values():
+            try:
+                process.stdin.close()
+                process.wait(timeout=5)
+            except Exception:
+                process.kill()
+            finally:
+                process.stdout.close()
+
+    def _ensure_process(self, mode: str) -> subprocess.Popen:
+        process = self._processes.get(mode)
+        if process is not None and process.poll() is None:
+            return process
+        try:
+            process = self._processes[mode] = subprocess.Popen(
+                ["git", "cat-file", mode],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise RuntimeError("未找到Git命令，请确保Git已安装")
+        return process
+
+    def read(self, ref: str, file_path: str) -> Optional[str]:
+        """读取指定引用处的文件内容.
+
+        Args:
+            ref: Git引用
+            file_path: 相对仓库根目录的文件路径
+
+        Returns:
+            文件内容，文件不存在时返回 None
+        """
+        return self.read_many([(ref, file_path)])[0]
+
+    def read_many(self, requests: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        """批量读取文件内容.
+
+        Args:
+            requests: (引用, 文件路径) 列表
+
+        Returns:
+            与请求顺序一致的文件内容列表，不存在的文件为 None
+        """
+        with self._lock:
+            try:
+                return self._read_many(requests)
+            except (OSError, ValueError) as e:
+                # 进程异常退出后丢弃，下一次请求时重新启动
+                self._stop_processes()
+                raise RuntimeError(f"读取Git对象失败: {e}")
+
+    def _read_many(self, requests: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        # 每批请求开始时把引用解析为提交 ID，之后的 (提交, 路径) 映射不会变化
+        refs = list(dict.fromkeys(ref for ref, _ in requests))
+        commits = dict(zip(refs, self._check([f"{ref}^{{commit}}" for ref in refs])))
+
+        keys: List[Optional[Tuple[str, str]]] = []
+        for ref, file_path in requests:
+            commit = commits[ref]
+            path = file_path.replace(os.sep, "/").lstrip("/")
+            keys.append((commit[0], path) if commit and "\n" not in path else None)
+
+        unresolved = list(dict.fromkeys(k for k in keys if k is not None and k not in self._paths))
+        for key, header in zip(unresolved, self._check([f"{c}:{p}" for c, p in unresolved])):
+            self._paths[key] = header[0] if header and header[1] == "blob" else None
+
+        oids = [self._paths[k] if k is not None else None for k in keys]
+        blobs: Dict[str, bytes] = {}
+        missing = []
+        for oid in dict.fromkeys(o for o in oids if o is not None):
+            blob = self._get_cached(oid)
+            if blob is None:
+                missing.append(oid)
+            else:
+                self.cache_hits += 1
+                blobs[oid] = blob
+        for oid, content in zip(missing, self._fetch(missing)):
+            if content is not None:
+                self._put_cached(oid, content)
+                blobs[oid] = content
+
+        return [
+            blobs[oid].decode("utf-8", errors="replace") if oid in blobs else None
+            for oid in oids
+        ]
+
+    def _check(self, specs: List[str]) -> List[Optional[Tuple[str, str]]]:
+        """解析对象名，返回 (对象 ID, 类型)，不存在时为 None."""
+        return [header for header, _ in self._batch("--batch-check", specs)]
+
+    def _fetch(self, oids: List[str]) -> List[Optional[bytes]]:
+        """读取对象内容."""
+        contents = [content for _, content in self._batch("--batch", oids)]
+        self.objects_read += sum(1 for c in contents if c is not None)
+        return contents
+
+    def _batch(
+        self,
+        mode: str,
+        specs: List[str],
+    ) -> List[Tuple[Optional[Tuple[str, str]], Optional[bytes]]]:
+        """流水线执行一批请求.
+
+        请求由单独的线程写入：进程在读完输入前就会输出，全部写完再读取
+        可能因管道缓冲区写满而互相等待。
+
+        Args:
+            mode: ``--batch-check``（只返回对象信息）或 ``--batch``（附带内容）
+            specs: 对象名列表
+
+        Returns:
+            每个请求的 ((对象 ID, 类型) 或 None, 内容或 None)
+        """
+        if not specs:
+            return []
+        process = self._ensure_process(mode)
+        payload = "".join(f"{spec}\n" for spec in specs).encode("utf-8")
+        write_errors: List[BaseException] = []
+
+        def write() -> None:
+            try:
+                process.stdin.write(payload)
+                process.stdin.flush()
+            except BaseException as e:  # 进程已退出
+                write_errors.append(e)
+
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+
+        responses: List[Tuple[Optional[Tuple[str, str]], Optional[bytes]]] = []
+        for _ in specs:
+            line = process.stdout.readline()
+            if not line:
+                writer.join()
+                raise OSError(f"git cat-file 意外退出: {write_errors or process.poll()}")
+            parts = line.decode("utf-8", errors="replace").rstrip("\n").rsplit(" ", 2)
+            if len(parts) != 3 or not parts[2].isdigit():
+                # "<spec> missing" / "<spec> ambiguous"
+                responses.append((None, None))
+                continue
+            content = None
+            if mode == "--batch":
+                size = int(parts[2])
+                content = self._read_exact(process, size + 1)[:size]
+            responses.append(((parts[0], parts[1]), content))
+
+        writer.join()
+        return responses
+
+    @staticmethod
+    def _read_exact(process: subprocess.Popen, size: int) -> bytes:
+        chunks = []
+        remaining = size
+        while remaining:
+            chunk = process.stdout.read(remaining)
+            if not chunk:
+                raise OSError("git cat-file 输出被截断")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def _get_cached(self, oid: str) -> Optional[bytes]:
+        blob = self._blobs.get(oid)
+        if blob is not None:
+            self._blobs.move_to_end(oid)
+        return blob
+
+    def _put_cached(self, oid: str, content: bytes) -> None:
+        if oid in self._blobs or len(content) > self._max_cache_bytes:
+            return
+        self._blobs[oid] = content
+        self._cache_bytes += len(content)
+        while self._cache_bytes > self._max_cache_bytes:
+            _, evicted = self._blobs.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+
+atexit.register(GitBlobReader.close_all)
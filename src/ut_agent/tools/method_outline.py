@@ -0,0 +1,408 @@
+"""方法大纲 - 基于 tree-sitter 语法树提取类与方法，按 blob ID 缓存.
+
+变更检测需要比较同一文件新旧两个版本中的每个方法。这里从 AST 中提取
+类和方法的位置以及方法体哈希（字符串和注释中的花括号不会干扰定位），
+比较时哈希相同的方法直接跳过。
+
+大纲按内容的 git blob ID 缓存并持久化到 ``.ut-agent/method_outlines.json``：
+本次提交中解析过的新版本，在下一次分析时就是旧版本，无需再次解析。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tree_sitter import Node
+
+from ut_agent.tools.ast_cache import ASTCacheManager
+from ut_agent.utils import get_logger
+from ut_agent.utils.file_fingerprint import fast_hash
+
+logger = get_logger("method_outline")
+
+OUTLINE_FORMAT_VERSION = 1
+
+# 持久化的大纲数量上限
+DEFAULT_MAX_ENTRIES = 4096
+
+_JAVA_CLASS_TYPES = {
+    "class_declaration",
+    "interface_declaration",
+    "enum_declaration",
+    "record_declaration",
+    "annotation_type_declaration",
+}
+_JAVA_METHOD_TYPES = {"method_declaration", "constructor_declaration"}
+
+_TS_FUNCTION_TYPES = {
+    "function_declaration",
+    "generator_function_declaration",
+    "method_definition",
+}
+_TS_FUNCTION_VALUES = {"arrow_function", "function_expression", "function", "generator_function"}
+
+_VUE_SCRIPT_PATTERN = re.compile(r"<script[^>]*>(.*?)</script>", re.DOTALL)
+
+
+def git_blob_id(content: str) -> str:
+    """计算内容的 git blob ID（与 ``git hash-object`` 一致）.
+
+    Args:
+        content: 文件内容
+
+    Returns:
+        str: 十六进制对象 ID
+    """
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+@dataclass
+class MethodOutline:
+    """方法大纲."""
+
+    name: str
+    signature: str
+    line_start: int
+    line_end: int
+    body_hash: str
+    modifiers: List[str] = field(default_factory=list)
+    return_type: str = ""
+    parameters: List[str] = field(default_factory=list)
+
+    def to_list(self) -> List[Any]:
+        """转换为紧凑列表."""
+        return [
+            self.name, self.signature, self.line_start, self.line_end,
+            self.body_hash, self.modifiers, self.return_type, self.parameters,
+        ]
+
+    @classmethod
+    def from_list(cls, data: List[Any]) -> "MethodOutline":
+        """从紧凑列表恢复."""
+        return cls(*data)
+
+
+@dataclass
+class ClassOutline:
+    """类大纲."""
+
+    name: str
+    line_start: int
+    line_end: int
+    methods: List[MethodOutline] = field(default_factory=list)
+
+
+@dataclass
+class FileOutline:
+    """文件大纲.
+
+    Java 文件的方法挂在所属类下；TypeScript 文件的函数与方法平铺在
+    ``functions`` 中。
+    """
+
+    package: str = ""
+    classes: List[ClassOutline] = field(default_factory=list)
+    functions: List[MethodOutline] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典."""
+        return {
+            "package": self.package,
+            "classes": [
+                [c.name, c.line_start, c.line_end, [m.to_list() for m in c.methods]]
+                for c in self.classes
+            ],
+            "functions": [m.to_list() for m in self.functions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FileOutline":
+        """从字典恢复."""
+        return cls(
+            package=data.get("package", ""),
+            classes=[
+                ClassOutline(name, start, end, [MethodOutline.from_list(m) for m in methods])
+                for name, start, end, methods in data.get("classes", [])
+            ],
+            functions=[MethodOutline.from_list(m) for m in data.get("functions", [])],
+        )
+
+
+def _text(source: bytes, node: Optional[Node]) -> str:
+    if node is None:
+        return ""
+    return source[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
+
+
+def _signature(source: bytes, node: Node, body: Optional[Node]) -> str:
+    """声明开头到方法体之前的文本，空白折叠为单个空格."""
+    end = body.start_byte if body is not None else node.end_byte
+    return " ".join(source[node.start_byte:end].decode("utf-8", errors="replace").split())
+
+
+def _body_hash(source: bytes, node: Node) -> str:
+    return fast_hash(source[node.start_byte:node.end_byte])
+
+
+def extract_java_outline(root: Node, source: bytes, line_offset: int = 0) -> FileOutline:
+    """从 Java 语法树提取大纲.
+
+    Args:
+        root: 语法树根节点
+        source: 解析时使用的源码字节
+        line_offset: 行号偏移
+
+    Returns:
+        FileOutline: 文件大纲，类按源码顺序排列（含内部类）
+    """
+    outline = FileOutline()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.type == "package_declaration":
+            for child in node.named_children:
+                if child.type in ("scoped_identifier", "identifier"):
+                    outline.package = _text(source, child)
+        elif node.type in _JAVA_CLASS_TYPES:
+            outline.classes.append(_java_class(node, source, line_offset))
+        stack.extend(reversed(node.named_children))
+    return outline
+
+
+def _java_class(node: Node, source: bytes, line_offset: int) -> ClassOutline:
+    body = node.child_by_field_name("body")
+    members: List[Node] = []
+    if body is not None:
+        for child in body.named_children:
+            if child.type == "enum_body_declarations":
+                members.extend(child.named_children)
+            else:
+                members.append(child)
+
+    methods = []
+    for member in members:
+        if member.type not in _JAVA_METHOD_TYPES:
+            continue
+        modifiers: List[str] = []
+        parameters: List[str] = []
+        for child in member.children:
+            if child.type == "modifiers":
+                modifiers = [
+                    _text(source, m) for m in child.children
+                    if m.type not in ("marker_annotation", "annotation")
+                ]
+            elif child.type == "formal_parameters":
+                parameters = [
+                    " ".join(_text(source, p).split()) for p in child.named_children
+                    if p.type in ("formal_parameter", "spread_parameter")
+                ]
+        methods.append(MethodOutline(
+            name=_text(source, member.child_by_field_name("name")),
+            signature=_signature(source, member, member.child_by_field_name("body")),
+            line_start=member.start_point[0] + 1 + line_offset,
+            line_end=member.end_point[0] + 1 + line_offset,
+            body_hash=_body_hash(source, member),
+            modifiers=modifiers,
+            return_type=_text(source, member.child_by_field_name("type")),
+            parameters=parameters,
+        ))
+
+    return ClassOutline(
+        name=_text(source, node.child_by_field_name("name")),
+        line_start=node.start_point[0] + 1 + line_offset,
+        line_end=node.end_point[0] + 1 + line_offset,
+        methods=methods,
+    )
+
+
+def extract_ts_outline(root: Node, source: bytes, line_offset: int = 0) -> FileOutline:
+    """从 TypeScript 语法树提取函数与方法.
+
+    识别函数声明、类方法，以及值为箭头函数或函数表达式的变量和类字段。
+
+    Args:
+        root: 语法树根节点
+        source: 解析时使用的源码字节
+        line_offset: 行号偏移
+
+    Returns:
+        FileOutline: 文件大纲，函数按源码顺序排列
+    """
+    outline = FileOutline()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        function = None
+        if node.type in _TS_FUNCTION_TYPES:
+            function = node
+        elif node.type in ("variable_declarator", "public_field_definition"):
+            value = node.child_by_field_name("value")
+            if value is not None and value.type in _TS_FUNCTION_VALUES:
+                function = value
+
+        name_node = node.child_by_field_name("name") if function is not None else None
+        if name_node is not None:
+            # 声明语句（含 export/const）作为方法的范围
+            declaration = node
+            if declaration.type == "variable_declarator":
+                declaration = declaration.parent
+            if declaration.parent is not None and declaration.parent.type == "export_statement":
+                declaration = declaration.parent
+            outline.functions.append(MethodOutline(
+                name=_text(source, name_node),
+                signature=_signature(source, declaration, function.child_by_field_name("body")),
+                line_start=declaration.start_point[0] + 1 + line_offset,
+                line_end=declaration.end_point[0] + 1 + line_offset,
+                body_hash=_body_hash(source, declaration),
+            ))
+        stack.extend(reversed(node.named_children))
+    return outline
+
+
+def outline_language(file_path: str) -> str:
+    """根据文件扩展名确定大纲使用的语言."""
+    suffix = Path(file_path).suffix
+    if suffix == ".java":
+        return "java"
+    if suffix in (".tsx", ".jsx", ".js"):
+        return "tsx"
+    if suffix == ".vue":
+        return "vue"
+    return "typescript"
+
+
+class MethodOutlineCache:
+    """方法大纲缓存 - 按 (语言, blob ID) 缓存并持久化.
+
+    Example:
+        cache = MethodOutlineCache.get_instance(project_path)
+        outline = cache.get_outline(content, "src/Foo.java")
+        cache.save()
+    """
+
+    _instances: Dict[str, "MethodOutlineCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, project_path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """初始化缓存.
+
+        Args:
+            project_path: 项目路径
+            max_entries: 缓存的大纲数量上限
+        """
+        self.project_path = Path(project_path)
+        self.cache_file = self.project_path / ".ut-agent" / "method_outlines.json"
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, FileOutline]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.parse_count = 0
+        self._load()
+
+    @classmethod
+    def get_instance(cls, project_path: str) -> "MethodOutlineCache":
+        """获取项目共享的缓存实例."""
+        key = os.path.abspath(project_path)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls(key)
+            return instance
+
+    @classmethod
+    def reset_instances(cls) -> None:
+        """丢弃全部共享实例（用于测试）."""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    def get_outline(self, content: str, file_path: str) -> FileOutline:
+        """获取文件内容的大纲.
+
+        Args:
+            content: 文件内容（任意版本）
+            file_path: 文件路径，决定语言；同一路径的新旧版本共享语法树，
+                后解析的版本在前一版本的语法树上增量重解析
+
+        Returns:
+            FileOutline: 文件大纲（调用方只读使用）
+        """
+        language = outline_language(file_path)
+        key = f"{language}:{git_blob_id(content)}"
+        with self._lock:
+            outline = self._entries.get(key)
+            if outline is not None:
+                self._entries.move_to_end(key)
+                return outline
+
+        outline = self._parse(content, file_path, language)
+        with self._lock:
+            self.parse_count += 1
+            self._entries[key] = outline
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return outline
+
+    def _parse(self, content: str, file_path: str, language: str) -> FileOutline:
+        path = str(self.project_path / file_path)
+        line_offset = 0
+        if language == "vue":
+            match = _VUE_SCRIPT_PATTERN.search(content)
+            if match is None:
+                return FileOutline()
+            line_offset = content[: match.start(1)].count("\n")
+            content = match.group(1)
+            language = "typescript"
+
+        tree = ASTCacheManager.get_instance().get_tree(path, language, content)
+        source = content.encode("utf-8")
+        if language == "java":
+            return extract_java_outline(tree.root_node, source, line_offset)
+        return extract_ts_outline(tree.root_node, source, line_offset)
+
+    def _load(self) -> None:
+        if not self.cache_file.exists():
+            return
+        try:
+            data = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            if data.get("version") != OUTLINE_FORMAT_VERSION:
+                return
+            for key, item in data.get("entries", {}).items():
+                self._entries[key] = FileOutline.from_dict(item)
+        except Exception as e:
+            logger.warning(f"加载方法大纲缓存失败，将重新解析: {e}")
+            self._entries.clear()
+
+    def save(self) -> None:
+        """保存缓存（没有新解析的大纲时不写文件）."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": OUTLINE_FORMAT_VERSION,
+                "entries": {key: outline.to_dict() for key, outline in self._entries.items()},
+            }
+            self._dirty = False
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(
+                f"{self.cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_file.write_text(
+                json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"保存方法大纲缓存失败: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
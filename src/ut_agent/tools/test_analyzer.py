@@ -1,10 +1,13 @@
 """测试分析模块 - 分析已有测试覆盖情况."""
 
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, Any
 
+from ut_agent.utils.file_fingerprint import FileManifest, fast_hash
+
 
 @dataclass
 class TestMethodInfo:
@@ -75,7 +78,7 @@ class TestAnalyzer:
 
     JAVA_TEST_PATTERN = re.compile(
         r"@(Test|ParameterizedTest|RepeatedTest|TestFactory)\s+"
-        r"(?:@[\w]+\s+)*"
+        r"(?:@\w+(?:\s*\([^)]*\))?\s+)*"
         r"(?:public\s+)?void\s+(\w+)\s*\([^)]*\)",
         re.MULTILINE,
     )
@@ -123,25 +126,15 @@ class TestAnalyzer:
         Returns:
             测试覆盖信息
         """
-        path = Path(test_file_path)
-        if not path.exists():
+        indexed = get_test_method_index().get_file_methods(test_file_path, self.project_type)
+        if indexed is None:
             return TestCoverageInfo(
                 test_file=test_file_path,
                 source_file="",
                 untested_methods=source_methods,
             )
 
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-        except Exception:
-            return TestCoverageInfo(
-                test_file=test_file_path,
-                source_file="",
-                untested_methods=source_methods,
-            )
-
-        test_methods = self._extract_test_methods(content)
+        test_methods = list(indexed.methods)
         
         tested_methods: Dict[str, List[str]] = {}
         test_scenarios: Dict[str, List[str]] = {}
@@ -239,7 +232,7 @@ class TestAnalyzer:
         return patterns
 
     def _extract_test_methods(self, content: str) -> List[TestMethodInfo]:
-        """提取测试方法.
+        """提取测试方法（按内容哈希缓存于测试方法索引）.
 
         Args:
             content: 测试文件内容
@@ -247,10 +240,16 @@ class TestAnalyzer:
         Returns:
             测试方法列表
         """
+        return list(get_test_method_index().get_methods(content, self.project_type).methods)
+
+    def _parse_test_file(self, content: str) -> "TestFileMethods":
+        """解析测试文件中的测试方法和 describe 块."""
         if self.project_type == "java":
-            return self._extract_java_test_methods(content)
-        else:
-            return self._extract_typescript_test_methods(content)
+            return TestFileMethods(methods=self._extract_java_test_methods(content))
+        return TestFileMethods(
+            methods=self._extract_typescript_test_methods(content),
+            describes=[m.group(1) for m in self.TYPESCRIPT_DESCRIBE_PATTERN.finditer(content)],
+        )
 
     def _extract_java_test_methods(self, content: str) -> List[TestMethodInfo]:
         """提取 Java 测试方法."""
@@ -786,6 +785,154 @@ class TestAnalyzer:
         return suggestions[:3]
 
 
+@dataclass
+class TestFileMethods:
+    """单个测试文件的方法索引."""
+
+    methods: List[TestMethodInfo] = field(default_factory=list)
+    describes: List[str] = field(default_factory=list)
+
+    def find_test_method(self, source_method: str) -> Optional[str]:
+        """查找覆盖指定源方法的测试.
+
+        依次匹配：测试中直接调用了该方法、``test<方法>`` 前缀、``<方法>...Test``
+        后缀、``..._when<方法>`` 以及名称中包含方法名（均不区分大小写），
+        TypeScript 测试最后回退到 describe 块。
+
+        Args:
+            source_method: 源方法名
+
+        Returns:
+            Optional[str]: 测试方法名（TypeScript 为测试描述）
+        """
+        if not source_method:
+            return None
+
+        target = source_method.lower()
+        rules = [
+            lambda name, test: source_method in test.tested_methods,
+            lambda name, test: name.startswith(f"test{target}"),
+            lambda name, test: name.startswith(target) and name.endswith("test"),
+            lambda name, test: f"_when{target}" in name,
+            lambda name, test: target in name,
+        ]
+        lowered = [(test.name.lower(), test) for test in self.methods]
+        for rule in rules:
+            for name, test in lowered:
+                if rule(name, test):
+                    return test.name
+
+        for describe in self.describes:
+            if target in describe.lower():
+                return describe
+        return None
+
+
+class TestMethodIndex:
+    """测试方法索引 - 按内容哈希缓存测试文件的解析结果.
+
+    同一测试文件在一次变更分析中可能被多次查询（每个变更方法一次），
+    这里保证每个文件内容只解析一次；按路径查询时先比较 stat 签名，
+    文件未变化时连读取都可以省掉。缓存的结果在调用方之间共享，不应修改。
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """初始化索引.
+
+        Args:
+            max_entries: 缓存的测试文件数量上限
+        """
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], TestFileMethods]" = OrderedDict()
+        self._manifest = FileManifest()
+        self._lock = threading.RLock()
+        self.parse_count = 0
+
+    def get_methods(self, content: str, project_type: str) -> TestFileMethods:
+        """获取测试内容的方法索引.
+
+        Args:
+            content: 测试文件内容
+            project_type: 项目类型
+
+        Returns:
+            TestFileMethods: 方法索引
+        """
+        return self._get_or_parse(content, project_type, fast_hash(content.encode("utf-8")))
+
+    def get_file_methods(self, test_file: str, project_type: str) -> Optional[TestFileMethods]:
+        """获取测试文件的方法索引，文件不存在或无法读取时返回 None.
+
+        Args:
+            test_file: 测试文件路径
+            project_type: 项目类型
+
+        Returns:
+            Optional[TestFileMethods]: 方法索引
+        """
+        with self._lock:
+            file_hash = self._manifest.get_hash(test_file)
+            if file_hash is None:
+                return None
+            entry = self._entries.get((project_type, file_hash))
+            if entry is not None:
+                self._entries.move_to_end((project_type, file_hash))
+                return entry
+
+        try:
+            with open(test_file, "r", encoding="utf-8") as f:
+                content = f.read()
+        except Exception:
+            return None
+
+        entry = self.get_methods(content, project_type)
+        with self._lock:
+            # 换行符转换后内容哈希可能与文件哈希不同，按文件哈希再登记一次
+            self._store((project_type, file_hash), entry)
+        return entry
+
+    def _get_or_parse(self, content: str, project_type: str, content_hash: str) -> TestFileMethods:
+        key = (project_type, content_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = TestAnalyzer(project_type)._parse_test_file(content)
+        with self._lock:
+            self.parse_count += 1
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key: Tuple[str, str], entry: TestFileMethods) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存."""
+        with self._lock:
+            self._entries.clear()
+            self._manifest = FileManifest()
+            self.parse_count = 0
+
+
+_test_method_index: Optional[TestMethodIndex] = None
+_test_method_index_lock = threading.Lock()
+
+
+def get_test_method_index() -> TestMethodIndex:
+    """获取全局测试方法索引."""
+    global _test_method_index
+    if _test_method_index is None:
+        with _test_method_index_lock:
+            if _test_method_index is None:
+                _test_method_index = TestMethodIndex()
+    return _test_method_index
+
+
 def format_existing_tests_for_prompt(
     coverage_info: TestCoverageInfo,
     max_tests: int = 5,
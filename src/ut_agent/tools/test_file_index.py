@@ -0,0 +1,340 @@
+"""测试文件索引 - 按文件名索引项目中的测试文件.
+
+查找源文件对应的测试时，不再对每个测试目录和命名模式执行 ``rglob``，
+而是先遍历一次项目，把符合测试命名模式的文件按文件名登记到字典中，
+之后每次查找都是一次字典访问。
+
+索引随目录的 stat 签名持久化到 ``.ut-agent/test_index.json``。刷新时只需
+stat 已知目录：目录中新增、删除或重命名文件都会改变目录的修改时间，
+只有这些目录需要重新列出；新出现的子目录递归扫描，消失的目录整体移除。
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+from ut_agent.utils import get_logger
+from ut_agent.utils.file_fingerprint import FileSignature, is_signature_current
+
+logger = get_logger("test_file_index")
+
+INDEX_FORMAT_VERSION = 1
+
+# 不会包含测试源码的目录
+_PRUNED_DIRS = {"node_modules", "target", "build", "dist", "__pycache__", "venv"}
+
+_TEST_SUFFIXES = (
+    "Test.java", "Tests.java",
+    ".test.ts", ".spec.ts", ".test.tsx", ".spec.tsx",
+    ".test.js", ".spec.js", ".test.jsx", ".spec.jsx",
+    "_test.py", "_test.go",
+)
+
+
+def is_test_file_name(name: str) -> bool:
+    """判断文件名是否符合常见的测试命名模式."""
+    if name.endswith(_TEST_SUFFIXES):
+        return True
+    if name.startswith("Test") and name.endswith(".java"):
+        return True
+    return name.startswith("test_") and name.endswith(".py")
+
+
+def _is_pruned(name: str) -> bool:
+    return name.startswith(".") or name in _PRUNED_DIRS
+
+
+class _DirState:
+    """已扫描目录的状态."""
+
+    __slots__ = ("signature", "checked_ns", "tests", "subdirs")
+
+    def __init__(
+        self,
+        signature: FileSignature,
+        checked_ns: int,
+        tests: List[str],
+        subdirs: List[str],
+    ):
+        self.signature = signature
+        self.checked_ns = checked_ns
+        self.tests = tests
+        self.subdirs = subdirs
+
+
+class TestFileIndex:
+    """测试文件索引.
+
+    路径均为相对项目根目录的 POSIX 路径（根目录为 ``""``）。
+
+    Example:
+        index = TestFileIndex.get_instance(project_path)
+        index.refresh()
+        test_file = index.find(["UserServiceTest.java"], roots=["src/test/java"])
+    """
+
+    _instances: Dict[str, "TestFileIndex"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, project_path: str):
+        """初始化索引.
+
+        Args:
+            project_path: 项目根目录
+        """
+        self.project_path = Path(project_path)
+        self._root = os.path.abspath(project_path)
+        self.index_file = self.project_path / ".ut-agent" / "test_index.json"
+        self._lock = threading.RLock()
+        self._dirs: Dict[str, _DirState] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        self._loaded = False
+
+    @classmethod
+    def get_instance(cls, project_path: str) -> "TestFileIndex":
+        """获取项目共享的索引实例."""
+        key = os.path.abspath(project_path)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls(project_path)
+            return instance
+
+    @classmethod
+    def reset_instances(cls) -> None:
+        """清空共享实例（用于测试）."""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    def _abs(self, rel_dir: str) -> str:
+        return os.path.join(self._root, rel_dir) if rel_dir else self._root
+
+    def relative(self, path: str) -> str:
+        """将路径转换为相对项目根目录的 POSIX 路径."""
+        if os.path.isabs(path):
+            relative = os.path.relpath(path, self._root)
+            if not relative.startswith(".."):
+                path = relative
+        path = os.path.normpath(path).replace(os.sep, "/")
+        return "" if path == "." else path
+
+    def refresh(self) -> int:
+        """使索引与文件系统同步.
+
+        Returns:
+            int: 重新列出的目录数
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+            if "" not in self._dirs:
+                rescanned = self._scan_tree("")
+            else:
+                rescanned = 0
+                for rel_dir in list(self._dirs):
+                    state = self._dirs.get(rel_dir)
+                    if state is None:
+                        continue  # 已随父目录移除
+                    try:
+                        current = FileSignature.from_stat(os.stat(self._abs(rel_dir)))
+                    except OSError:
+                        self._remove_tree(rel_dir)
+                        rescanned += 1
+                        continue
+                    if not is_signature_current(state.signature, state.checked_ns, current):
+                        rescanned += self._rescan_dir(rel_dir)
+
+            if rescanned:
+                self._save()
+            return rescanned
+
+    def _scan_tree(self, rel_dir: str) -> int:
+        """递归扫描目录树."""
+        count = 0
+        pending = [rel_dir]
+        while pending:
+            current = pending.pop()
+            subdirs = self._list_dir(current)
+            if subdirs is None:
+                continue
+            count += 1
+            pending.extend(subdirs)
+        return count
+
+    def _rescan_dir(self, rel_dir: str) -> int:
+        """重新列出目录，扫描新出现的子目录并移除消失的子目录."""
+        old_subdirs = set(self._dirs[rel_dir].subdirs)
+        subdirs = self._list_dir(rel_dir)
+        if subdirs is None:
+            self._remove_tree(rel_dir)
+            return 1
+
+        count = 1
+        for subdir in old_subdirs - set(subdirs):
+            self._remove_tree(subdir)
+        for subdir in subdirs:
+            if subdir not in self._dirs:
+                count += self._scan_tree(subdir)
+        return count
+
+    def _list_dir(self, rel_dir: str) -> Optional[List[str]]:
+        """列出目录并登记其中的测试文件，返回子目录列表."""
+        path = self._abs(rel_dir)
+        checked_ns = time.time_ns()
+        try:
+            signature = FileSignature.from_stat(os.stat(path))
+            entries = list(os.scandir(path))
+        except OSError:
+            return None
+
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        tests: List[str] = []
+        subdirs: List[str] = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not _is_pruned(entry.name):
+                        subdirs.append(prefix + entry.name)
+                elif is_test_file_name(entry.name):
+                    tests.append(entry.name)
+            except OSError:
+                continue
+
+        previous = self._dirs.get(rel_dir)
+        if previous is not None:
+            self._unregister(rel_dir, previous.tests)
+        self._dirs[rel_dir] = _DirState(signature, checked_ns, tests, subdirs)
+        self._register(rel_dir, tests)
+        return subdirs
+
+    def _remove_tree(self, rel_dir: str) -> None:
+        state = self._dirs.pop(rel_dir, None)
+        if state is None:
+            return
+        self._unregister(rel_dir, state.tests)
+        for subdir in state.subdirs:
+            self._remove_tree(subdir)
+
+    def _register(self, rel_dir: str, names: List[str]) -> None:
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for name in names:
+            self._by_name.setdefault(name, set()).add(prefix + name)
+
+    def _unregister(self, rel_dir: str, names: List[str]) -> None:
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for name in names:
+            paths = self._by_name.get(name)
+            if paths is not None:
+                paths.discard(prefix + name)
+                if not paths:
+                    del self._by_name[name]
+
+    def add(self, test_file: str) -> None:
+        """登记新写入的测试文件（无需等待下一次刷新）."""
+        rel_path = self.relative(test_file)
+        rel_dir, _, name = rel_path.rpartition("/")
+        if not is_test_file_name(name):
+            return
+        with self._lock:
+            state = self._dirs.get(rel_dir)
+            if state is not None and name not in state.tests:
+                state.tests.append(name)
+            self._by_name.setdefault(name, set()).add(rel_path)
+
+    def contains(self, test_file: str) -> bool:
+        """判断测试文件是否存在于索引中."""
+        rel_path = self.relative(test_file)
+        return rel_path in self._by_name.get(rel_path.rsplit("/", 1)[-1], ())
+
+    def paths_named(self, name: str) -> List[str]:
+        """获取指定文件名的全部测试文件."""
+        return sorted(self._by_name.get(name, ()))
+
+    def find(
+        self,
+        test_names: Sequence[str],
+        roots: Sequence[str] = ("",),
+        source_file: Optional[str] = None,
+    ) -> Optional[str]:
+        """按测试根目录和命名模式的优先级查找测试文件.
+
+        等价于依次在每个根目录下对每个文件名执行 ``rglob``，但只做字典查找。
+        同一根目录下有多个同名测试时，优先选择与源文件包路径匹配最长的。
+
+        Args:
+            test_names: 按优先级排列的测试文件名
+            roots: 按优先级排列的测试根目录（相对项目根目录，"" 表示整个项目）
+            source_file: 源文件路径，用于在同名测试间按包路径选择
+
+        Returns:
+            Optional[str]: 相对项目根目录的测试文件路径
+        """
+        source_parts = self.relative(source_file).split("/")[:-1] if source_file else []
+        for root in roots:
+            root = self.relative(root)
+            prefix = f"{root}/" if root else ""
+            for name in test_names:
+                candidates = [p for p in self._by_name.get(name, ()) if p.startswith(prefix)]
+                if candidates:
+                    return min(
+                        candidates,
+                        key=lambda p: (-self._common_suffix(p.split("/")[:-1], source_parts), p),
+                    )
+        return None
+
+    @staticmethod
+    def _common_suffix(left: List[str], right: List[str]) -> int:
+        count = 0
+        while count < len(left) and count < len(right) and left[-1 - count] == right[-1 - count]:
+            count += 1
+        return count
+
+    def _load(self) -> None:
+        if not self.index_file.exists():
+            return
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if data.get("version") != INDEX_FORMAT_VERSION:
+                return
+            for rel_dir, item in data.get("dirs", {}).items():
+                state = _DirState(
+                    signature=FileSignature.from_list(item["stat"]),
+                    checked_ns=item["checked_ns"],
+                    tests=item["tests"],
+                    subdirs=item["subdirs"],
+                )
+                self._dirs[rel_dir] = state
+                self._register(rel_dir, state.tests)
+        except Exception as e:
+            logger.warning(f"加载测试文件索引失败，将重新扫描: {e}")
+            self._dirs.clear()
+            self._by_name.clear()
+
+    def _save(self) -> None:
+        data = {
+            "version": INDEX_FORMAT_VERSION,
+            "dirs": {
+                rel_dir: {
+                    "stat": state.signature.to_list(),
+                    "checked_ns": state.checked_ns,
+                    "tests": state.tests,
+                    "subdirs": state.subdirs,
+                }
+                for rel_dir, state in self._dirs.items()
+            },
+        }
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_suffix(".tmp")
+            tmp_file.write_text(
+                json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            logger.warning(f"保存测试文件索引失败: {e}")
@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
 from ut_agent.tools.change_detector import MethodInfo
+from ut_agent.tools.test_file_index import TestFileIndex
 
 
 @dataclass
@@ -55,6 +56,8 @@ class TestFileMapper:
         self.project_type = project_type
         self.mappings: Dict[str, TestMapping] = {}
         self.mapping_file = self.project_path / ".ut-agent" / "mappings.json"
+        self._test_index = TestFileIndex.get_instance(project_path)
+        self._test_index_synced = False
         self._load_mappings()
 
     def _load_mappings(self) -> None:
@@ -149,14 +152,19 @@ class TestFileMapper:
         source_path = Path(source_file)
         file_name = source_path.stem
         parent = source_path.parent
+        test_index = self._get_test_index()
 
         if self.project_type == "java":
-            # Maven/Gradle 标准结构
-            # 提取包路径（去掉 src/main/java 前缀）
-            parent_str = str(parent)
-            # 直接使用空字符串作为父路径，因为测试文件直接在 src/test/java 下
-            parent_str = ""
-            
+            # Maven/Gradle 标准结构，测试文件可能位于任意包目录下，
+            # 同名测试按包路径与源文件的匹配程度选择
+            found = test_index.find(
+                [f"{file_name}Test.java", f"Test{file_name}.java", f"{file_name}Tests.java"],
+                roots=["src/test/java"],
+                source_file=source_file,
+            )
+            if found:
+                return found
+
             test_paths = [
                 f"src/test/java/{file_name}Test.java",
                 f"src/test/java/Test{file_name}.java",
@@ -174,12 +182,19 @@ class TestFileMapper:
             return None
 
         for test_path in test_paths:
-            if (self.project_path / test_path).exists():
+            if test_index.contains(test_path):
                 return test_path
 
         # 返回默认路径
         return test_paths[0] if test_paths else None
 
+    def _get_test_index(self) -> TestFileIndex:
+        """获取测试文件索引，每个映射器实例首次使用时与文件系统同步."""
+        if not self._test_index_synced:
+            self._test_index.refresh()
+            self._test_index_synced = True
+        return self._test_index
+
     def create_mapping(
         self, source_file: str, test_file: str, source_content: str, test_content: str
     ) -> TestMapping:
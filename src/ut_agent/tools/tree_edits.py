@@ -0,0 +1,121 @@
+"""语法树增量编辑 - 将源码差异转换为 tree-sitter 编辑操作.
+
+tree-sitter 支持在旧语法树上登记编辑后重新解析，只重建受影响的区间。
+这里按行比较新旧源码得到与 ``git diff`` 相同粒度的差异块（hunk），
+并换算为 ``Tree.edit`` 所需的字节偏移与行列坐标。
+"""
+
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, List, Tuple
+
+Point = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class TreeEdit:
+    """一次语法树编辑（坐标均为字节偏移 / (行, 字节列)）."""
+
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: Point
+    old_end_point: Point
+    new_end_point: Point
+
+    @property
+    def size(self) -> int:
+        """编辑涉及的字节数（删除与插入取较大者）."""
+        return max(self.old_end_byte, self.new_end_byte) - self.start_byte
+
+
+def _line_starts(lines: List[bytes]) -> List[int]:
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    return starts
+
+
+def _advance(point: Point, text: bytes) -> Point:
+    """计算从 point 开始写入 text 后的结束坐标."""
+    newlines = text.count(b"\n")
+    if newlines == 0:
+        return point[0], point[1] + len(text)
+    return point[0] + newlines, len(text) - text.rfind(b"\n") - 1
+
+
+def compute_tree_edits(old_source: bytes, new_source: bytes) -> List[TreeEdit]:
+    """计算将旧源码变为新源码所需的编辑序列.
+
+    先裁掉首尾相同的行，只对中间区域做行级比较，因此开销与变更规模
+    而不是文件大小相关。返回的编辑按顺序依次应用，每个编辑的坐标
+    都基于前一个编辑应用后的文本。
+
+    Args:
+        old_source: 旧源码字节
+        new_source: 新源码字节
+
+    Returns:
+        List[TreeEdit]: 编辑序列，源码相同时为空
+    """
+    if old_source == new_source:
+        return []
+
+    old_lines = old_source.splitlines(keepends=True)
+    new_lines = new_source.splitlines(keepends=True)
+
+    prefix = 0
+    limit = min(len(old_lines), len(new_lines))
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+
+    old_starts = _line_starts(old_lines)
+    new_starts = _line_starts(new_lines)
+
+    opcodes = SequenceMatcher(None, old_middle, new_middle, autojunk=False).get_opcodes()
+
+    edits: List[TreeEdit] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        old_begin = old_starts[prefix + i1]
+        old_end = old_starts[prefix + i2]
+        new_begin = new_starts[prefix + j1]
+        new_end = new_starts[prefix + j2]
+
+        # 之前的编辑已应用，起点之前的内容与新源码一致；差异块总是从行首开始
+        start_point = (prefix + j1, 0)
+        edits.append(TreeEdit(
+            start_byte=new_begin,
+            old_end_byte=new_begin + (old_end - old_begin),
+            new_end_byte=new_end,
+            start_point=start_point,
+            old_end_point=_advance(start_point, old_source[old_begin:old_end]),
+            new_end_point=_advance(start_point, new_source[new_begin:new_end]),
+        ))
+    return edits
+
+
+def apply_tree_edits(tree: Any, edits: List[TreeEdit]) -> None:
+    """在语法树上登记编辑序列.
+
+    Args:
+        tree: tree-sitter 语法树（原地修改）
+        edits: compute_tree_edits 返回的编辑序列
+    """
+    for edit in edits:
+        tree.edit(
+            start_byte=edit.start_byte,
+            old_end_byte=edit.old_end_byte,
+            new_end_byte=edit.new_end_byte,
+            start_point=edit.start_point,
+            old_end_point=edit.old_end_point,
+            new_end_point=edit.new_end_point,
+        )
@@ -1,7 +1,9 @@
 """异步 LLM 调用器模块 - 统一管理 LLM 异步调用."""
 
 import asyncio
-from dataclasses import dataclass, field
+import json
+import math
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union, Callable, AsyncGenerator
@@ -13,9 +15,22 @@ from ut_agent.exceptions import LLMError, LLMRateLimitError, LLMResponseError
 from ut_agent.utils import get_logger
 from ut_agent.utils.event_bus import event_bus, emit_metric
 from ut_agent.utils.events import EventType, LLMStreamingEvent
+from ut_agent.utils.rate_limiter import (
+    DEFAULT_PROVIDER,
+    AdaptiveRateLimiter,
+    RatePermit,
+    estimate_tokens,
+    get_rate_limiter,
+    is_rate_limit_error,
+    retry_after_from_error,
+)
+from ut_agent.utils.single_flight import AsyncSingleFlight
 
 logger = get_logger("async_llm")
 
+# 所有调用器共享，使不同模块对同一模型发出的相同请求也能合并
+_call_flight = AsyncSingleFlight()
+
 
 class LLMCallStatus(Enum):
     """LLM 调用状态枚举."""
@@ -106,7 +121,7 @@ class AsyncLLMCaller:
     - 异步调用 LLM
     - 超时控制
     - 重试机制（指数退避）
-    - 速率限制处理
+    - 速率限制处理（按提供商共享的自适应限流器）
     - 批量调用
     - 调用历史记录
     - 统计信息
@@ -116,17 +131,35 @@ class AsyncLLMCaller:
         self,
         llm: BaseChatModel,
         config: Optional[LLMCallConfig] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
     ):
         """初始化调用器.
 
         Args:
             llm: LangChain Chat Model 实例
             config: 调用配置
+            rate_limiter: 速率限制器，默认使用该模型提供商共享的限流器
         """
         self._llm = llm
         self._config = config or LLMCallConfig()
         self._call_history: List[LLMCallResult] = []
         self._semaphore = asyncio.Semaphore(self._config.max_concurrent_calls)
+        self._rate_limiter = rate_limiter or self._default_rate_limiter()
+
+    def _default_rate_limiter(self) -> AdaptiveRateLimiter:
+        """包装的 CachedLLM 自带限流器时复用同一实例，嵌套调用只占用一次配额."""
+        inner = getattr(self._llm, "_rate_limiter", None)
+        if isinstance(inner, AdaptiveRateLimiter):
+            return inner
+        return get_rate_limiter(self._provider_name())
+
+    def _provider_name(self) -> str:
+        """限流器所属的提供商名称."""
+        for attr in ("_provider", "_llm_type"):
+            name = getattr(self._llm, attr, None)
+            if isinstance(name, str):
+                return name
+        return DEFAULT_PROVIDER
 
     async def call(
         self,
@@ -153,7 +186,45 @@ class AsyncLLMCaller:
 
         messages.append(HumanMessage(content=prompt))
 
-        return await self._call_with_retry(messages, temperature, **kwargs)
+        key = self._flight_key(prompt, system_prompt, temperature, kwargs)
+        if key is None:
+            return await self._call_with_retry(messages, temperature, **kwargs)
+
+        result, shared = await _call_flight.do(
+            key, lambda: self._call_with_retry(messages, temperature, **kwargs)
+        )
+        if not shared:
+            return result
+
+        # 复用其他调用的结果，不重复计入 token 消耗
+        shared_result = replace(
+            result,
+            prompt_tokens=0,
+            completion_tokens=0,
+            warnings=result.warnings + ["shared result of an identical in-flight call"],
+        )
+        self._record_call(shared_result)
+        return shared_result
+
+    def _flight_key(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Optional[tuple]:
+        """请求合并的键，参数无法序列化时返回 None（不合并）."""
+        model = getattr(self._llm, "model_name", None)
+        # 无法识别模型时只合并同一个模型实例上的调用
+        if isinstance(model, str):
+            model_key: Any = (getattr(self._llm, "_provider", None), model)
+        else:
+            model_key = id(self._llm)
+        try:
+            extra = json.dumps(kwargs, sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+        return (model_key, system_prompt, prompt, temperature, extra)
 
     async def call_with_messages(
         self,
@@ -195,10 +266,17 @@ class AsyncLLMCaller:
         for attempt in range(self._config.max_retries + 1):
             try:
                 async with self._semaphore:
-                    result = await asyncio.wait_for(
-                        self._invoke_llm(messages, temperature, **kwargs),
-                        timeout=self._config.timeout,
+                    permit = await self._rate_limiter.acquire_async(
+                        estimate_tokens(self._llm, messages, kwargs.get("max_tokens"))
                     )
+                    result = None
+                    try:
+                        result = await asyncio.wait_for(
+                            self._invoke_llm(messages, temperature, **kwargs),
+                            timeout=self._config.timeout,
+                        )
+                    finally:
+                        self._release_permit(permit, result)
 
                     duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
                     result.duration_ms = duration_ms
@@ -225,7 +303,7 @@ class AsyncLLMCaller:
 
             except LLMRateLimitError as e:
                 duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-                retry_after = e.details.get("retry_after", 60)
+                retry_after = e.details.get("retry_after")
                 last_result = LLMCallResult(
                     status=LLMCallStatus.RATE_LIMITED,
                     errors=[str(e)],
@@ -233,17 +311,17 @@ class AsyncLLMCaller:
                     duration_ms=duration_ms,
                     attempt=attempt + 1,
                 )
-                logger.warning(f"LLM rate limited, retry after {retry_after}s")
+                logger.warning(f"LLM rate limited, retry after {retry_after or 'cooldown'}s")
 
             except Exception as e:
                 duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
                 error_msg = str(e)
 
-                if "rate limit" in error_msg.lower():
+                if is_rate_limit_error(e):
                     last_result = LLMCallResult(
                         status=LLMCallStatus.RATE_LIMITED,
                         errors=[error_msg],
-                        retry_after=60,
+                        retry_after=self._retry_after(e),
                         duration_ms=duration_ms,
                         attempt=attempt + 1,
                     )
@@ -259,7 +337,8 @@ class AsyncLLMCaller:
             if attempt < self._config.max_retries:
                 delay = self._calculate_retry_delay(attempt)
                 if last_result and last_result.status == LLMCallStatus.RATE_LIMITED:
-                    delay = max(delay, last_result.retry_after or 60)
+                    # 服务端未给出 retry-after 时由限流器的冷却控制等待时间
+                    delay = max(delay, last_result.retry_after or 0)
                 await asyncio.sleep(delay)
 
         if last_result:
@@ -317,17 +396,37 @@ class AsyncLLMCaller:
 
         except Exception as e:
             error_msg = str(e)
-            if "rate limit" in error_msg.lower():
+            if is_rate_limit_error(e):
                 return LLMCallResult(
                     status=LLMCallStatus.RATE_LIMITED,
                     errors=[error_msg],
-                    retry_after=60,
+                    retry_after=self._retry_after(e),
                 )
             return LLMCallResult(
                 status=LLMCallStatus.FAILED,
                 errors=[error_msg],
             )
 
+    def _release_permit(self, permit: RatePermit, result: Optional[LLMCallResult]) -> None:
+        """按调用结果归还限流许可."""
+        if result is None:
+            # 超时或被取消
+            self._rate_limiter.release(permit, success=False)
+            return
+        self._rate_limiter.release(
+            permit,
+            tokens_used=result.total_tokens or None,
+            rate_limited=result.status == LLMCallStatus.RATE_LIMITED,
+            retry_after=result.retry_after,
+            success=result.success,
+        )
+
+    @staticmethod
+    def _retry_after(error: BaseException) -> Optional[int]:
+        """服务端要求的等待秒数（向上取整）."""
+        retry_after = retry_after_from_error(error)
+        return math.ceil(retry_after) if retry_after is not None else None
+
     def _calculate_retry_delay(self, attempt: int) -> float:
         """计算重试延迟.
 
@@ -487,7 +586,9 @@ class AsyncLLMCaller:
         }, source="AsyncLLMCaller")
         
         try:
-            async with self._semaphore:
+            async with self._semaphore, self._rate_limiter.limit_async(
+                estimate_tokens(self._llm, messages, invoke_kwargs.get("max_tokens"))
+            ):
                 async for chunk in self._llm.astream(messages, **invoke_kwargs):
                     chunk_content = ""
                     if hasattr(chunk, "content"):
@@ -620,7 +721,9 @@ class AsyncLLMCaller:
         }, source="AsyncLLMCaller")
         
         try:
-            async with self._semaphore:
+            async with self._semaphore, self._rate_limiter.limit_async(
+                estimate_tokens(self._llm, messages, invoke_kwargs.get("max_tokens"))
+            ):
                 async for chunk in self._llm.astream(messages, **invoke_kwargs):
                     chunk_content = ""
                     if hasattr(chunk, "content"):
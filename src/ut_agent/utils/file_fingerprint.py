@@ -0,0 +1,197 @@
+"""文件指纹模块 - 基于 stat 的快速变更检测与非加密哈希.
+
+判断文件是否变化时先比较 (inode, size, mtime_ns)，只有 stat 变化的文件
+才需要读取内容并计算哈希。与 git 的索引一样，修改时间距离记录时间过近的
+条目视为"可疑干净"（同一时间粒度内可能再次被修改），仍然回退到哈希比较。
+"""
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# 文件系统时间戳粒度的保守估计（FAT 为 2 秒）
+RACY_WINDOW_NS = 2_000_000_000
+
+HASH_ALGORITHM = "xxh3_128" if XXHASH_AVAILABLE else "blake2b_128"
+
+
+def fast_hash(data: bytes) -> str:
+    """计算内容的快速非加密哈希（xxh3，不可用时使用 BLAKE2b）.
+
+    Args:
+        data: 内容字节
+
+    Returns:
+        str: 十六进制摘要
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class FileSignature:
+    """文件 stat 签名."""
+
+    inode: int
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def from_stat(cls, st: os.stat_result) -> "FileSignature":
+        return cls(inode=st.st_ino, size=st.st_size, mtime_ns=st.st_mtime_ns)
+
+    def to_list(self) -> list:
+        return [self.inode, self.size, self.mtime_ns]
+
+    @classmethod
+    def from_list(cls, values: list) -> "FileSignature":
+        inode, size, mtime_ns = values
+        return cls(inode=inode, size=size, mtime_ns=mtime_ns)
+
+
+def stat_signature(path: Union[str, Path]) -> Optional[FileSignature]:
+    """获取文件 stat 签名，文件不存在时返回 None."""
+    try:
+        return FileSignature.from_stat(os.stat(path))
+    except OSError:
+        return None
+
+
+def is_signature_current(
+    stored: Optional[FileSignature],
+    checked_ns: int,
+    current: Optional[FileSignature],
+) -> bool:
+    """判断记录的签名能否证明文件未变化.
+
+    Args:
+        stored: 记录时的签名
+        checked_ns: 记录签名的时间（time.time_ns）
+        current: 当前签名
+
+    Returns:
+        bool: 签名一致且不处于可疑时间窗口内时返回 True
+    """
+    if stored is None or current is None or stored != current:
+        return False
+    return stored.mtime_ns < checked_ns - RACY_WINDOW_NS
+
+
+@dataclass
+class ManifestEntry:
+    """清单条目."""
+
+    signature: FileSignature
+    content_hash: str
+    checked_ns: int
+
+
+class FileManifest:
+    """文件清单 - 记录每个文件的 stat 签名与内容哈希.
+
+    Example:
+        manifest = FileManifest.from_dict(stored)
+        if manifest.get_hash(path) != previous_hash:
+            ...  # 文件内容已变化
+        stored = manifest.to_dict()
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, ManifestEntry] = {}
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def paths(self) -> list:
+        """已记录的文件路径."""
+        return list(self._entries)
+
+    def stored_hash(self, file_path: str) -> Optional[str]:
+        """获取记录的内容哈希（不访问文件系统）."""
+        entry = self._entries.get(file_path)
+        return entry.content_hash if entry else None
+
+    def get_hash(self, file_path: str) -> Optional[str]:
+        """获取文件当前内容哈希，stat 未变时直接返回记录值.
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            Optional[str]: 内容哈希，文件不存在时返回 None
+        """
+        current = stat_signature(file_path)
+        if current is None:
+            self._entries.pop(file_path, None)
+            return None
+
+        entry = self._entries.get(file_path)
+        if entry and is_signature_current(entry.signature, entry.checked_ns, current):
+            return entry.content_hash
+
+        checked_ns = time.time_ns()
+        try:
+            content_hash = fast_hash(Path(file_path).read_bytes())
+        except OSError:
+            self._entries.pop(file_path, None)
+            return None
+        self._entries[file_path] = ManifestEntry(current, content_hash, checked_ns)
+        return content_hash
+
+    def remove(self, file_path: str) -> None:
+        """移除文件记录."""
+        self._entries.pop(file_path, None)
+
+    def entry_to_dict(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """序列化单个文件的记录，未记录时返回 None（不含哈希算法，由调用方保证一致）."""
+        entry = self._entries.get(file_path)
+        if entry is None:
+            return None
+        return {
+            "stat": entry.signature.to_list(),
+            "hash": entry.content_hash,
+            "checked_ns": entry.checked_ns,
+        }
+
+    def restore_entry(self, file_path: str, item: Optional[Dict[str, Any]]) -> None:
+        """恢复单个文件的记录，记录缺失或格式无效时忽略."""
+        if not item:
+            return
+        try:
+            self._entries[file_path] = ManifestEntry(
+                signature=FileSignature.from_list(item["stat"]),
+                content_hash=item["hash"],
+                checked_ns=item["checked_ns"],
+            )
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可 JSON 存储的字典."""
+        return {
+            "algorithm": HASH_ALGORITHM,
+            "files": {path: self.entry_to_dict(path) for path in self._entries},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "FileManifest":
+        """从字典恢复清单，哈希算法不一致时返回空清单."""
+        manifest = cls()
+        if not data or data.get("algorithm") != HASH_ALGORITHM:
+            return manifest
+        for path, item in data.get("files", {}).items():
+            manifest.restore_entry(path, item)
+        return manifest
@@ -1,19 +1,39 @@
 """LLM 模型管理模块 - 支持插件式提供商注册."""
 
+import asyncio
 import httpx
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Type, Callable, Any
+from collections import deque
+from typing import Optional, Dict, Type, Callable, Any, Tuple, List, Deque, Set
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
 from ut_agent.config import settings
 from ut_agent.exceptions import ConfigurationError, LLMError
+from ut_agent.utils import get_logger
+from ut_agent.utils.rate_limiter import estimate_tokens, get_rate_limiter, usage_tokens
+from ut_agent.utils.recovery import CircuitBreaker
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = get_logger("llm")
 
 __all__ = [
     "get_llm",
     "list_available_providers",
     "register_provider",
+    "clear_llm_instances",
+    "get_llm_pool_stats",
     "LLMProvider",
+    "LLMModelRegistry",
+    "LLMRouter",
+    "RouterProvider",
     "OpenAIProvider",
     "DeepSeekProvider",
     "OllamaProvider",
@@ -21,19 +41,139 @@ __all__ = [
 ]
 
 
-def _create_http_client(config: Any) -> Optional[httpx.Client]:
-    """创建带有 CA 证书的 HTTP 客户端.
+# 按 CA 证书路径与连接池参数共享的 (同步, 异步) HTTP 客户端
+_http_clients: Dict[Tuple[Any, ...], Tuple[httpx.Client, "_LoopLocalAsyncClient"]] = {}
+_http_clients_lock = threading.Lock()
+# 事件循环中调度的异步客户端关闭任务（保持引用直到完成）
+_closing_tasks: Set[asyncio.Task] = set()
+_pool_stats: Dict[str, Dict[str, int]] = {
+    "http_client": {"hits": 0, "misses": 0},
+    "llm_model": {"hits": 0, "misses": 0},
+}
+
+
+def _record_pool(pool: str, hit: bool) -> None:
+    from ut_agent.utils.metrics import record_pool_operation
+
+    _pool_stats[pool]["hits" if hit else "misses"] += 1
+    record_pool_operation(pool, hit)
+
+
+def _config_number(config: Any, name: str) -> float:
+    """读取数值配置项，缺失或类型不符时使用全局配置."""
+    value = getattr(config, name, None)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return getattr(settings, name)
+
+
+class _LoopLocalAsyncClient(httpx.AsyncClient):
+    """按事件循环分配连接池的异步 HTTP 客户端.
+
+    异步连接绑定创建它的事件循环，而模型实例在进程内复用，可能先后在多次
+    asyncio.run 中使用（如界面每次点击运行一次图）。本客户端只负责构建请求，
+    发送时交给当前事件循环专属的客户端，首次使用时创建；事件循环关闭后，
+    其客户端在下次分配时丢弃。
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._client_kwargs = kwargs
+        self._loop_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._loop_clients_lock = threading.Lock()
+
+    def _client_for_running_loop(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._loop_clients_lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                for closed_loop in [lp for lp in self._loop_clients if lp.is_closed()]:
+                    del self._loop_clients[closed_loop]
+                client = self._loop_clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+            return client
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        if self.is_closed:
+            raise RuntimeError("Cannot send a request, as the client has been closed.")
+        return await self._client_for_running_loop().send(request, **kwargs)
+
+    async def aclose(self) -> None:
+        """关闭各事件循环的客户端：当前事件循环的直接关闭，其他仍在运行的调度到其循环中关闭."""
+        with self._loop_clients_lock:
+            clients = list(self._loop_clients.items())
+            self._loop_clients.clear()
+        current = asyncio.get_running_loop()
+        for loop, client in clients:
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        await super().aclose()
+
+
+def _get_http_clients(config: Any) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """获取进程内共享的 HTTP 客户端.
+
+    所有 OpenAI 兼容模型共用同一组连接池（保持长连接与 TLS 会话复用），
+    可用时启用 HTTP/2。CA 证书或连接池参数不同的配置使用单独的一组客户端。
+    同步客户端在进程内共享；异步客户端的连接池按事件循环分配（见
+    _LoopLocalAsyncClient），复用的模型实例可以在多个事件循环中使用。
 
     Args:
         config: 配置对象
 
     Returns:
-        配置了 CA 证书的 httpx.Client，如果未配置 CA 证书则返回 None
+        Tuple[httpx.Client, httpx.AsyncClient]: 同步与异步客户端
     """
     ca_cert_path = getattr(config, "ca_cert_path", None)
-    if not ca_cert_path:
-        return None
-    return httpx.Client(verify=ca_cert_path)
+    if not isinstance(ca_cert_path, str) or not ca_cert_path:
+        ca_cert_path = None
+
+    max_connections = int(_config_number(config, "llm_http_max_connections"))
+    max_keepalive = int(_config_number(config, "llm_http_max_keepalive"))
+    keepalive_expiry = _config_number(config, "llm_http_keepalive_expiry")
+    timeout = _config_number(config, "llm_timeout")
+    key = (ca_cert_path, max_connections, max_keepalive, keepalive_expiry, timeout)
+
+    with _http_clients_lock:
+        clients = _http_clients.get(key)
+        _record_pool("http_client", clients is not None)
+        if clients is None:
+            kwargs: Dict[str, Any] = {
+                "limits": httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                "timeout": httpx.Timeout(timeout, connect=10.0),
+                "http2": HTTP2_AVAILABLE,
+            }
+            if ca_cert_path:
+                kwargs["verify"] = ca_cert_path
+            clients = _http_clients[key] = (
+                httpx.Client(**kwargs), _LoopLocalAsyncClient(**kwargs)
+            )
+        return clients
+
+
+def _close_async_client(client: httpx.AsyncClient) -> None:
+    """关闭异步客户端：在运行中的事件循环里调度关闭，否则直接运行关闭协程."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None:
+        task = loop.create_task(client.aclose())
+        _closing_tasks.add(task)
+        task.add_done_callback(_closing_tasks.discard)
+        return
+
+    try:
+        asyncio.run(client.aclose())
+    except Exception as e:
+        # 连接属于已关闭的事件循环时关闭传输层会失败，客户端本身已标记为关闭
+        logger.debug(f"关闭异步 HTTP 客户端失败: {e}")
 
 
 class LLMProvider(ABC):
@@ -41,6 +181,8 @@ class LLMProvider(ABC):
 
     name: str = ""
     requires_api_key: bool = True
+    # 是否由 get_llm 套用该提供商的限流器（路由提供商自行按后端限流）
+    rate_limited: bool = True
     api_key_setting: str = ""
     model_setting: str = ""
     base_url_setting: str = ""
@@ -55,6 +197,10 @@ class LLMProvider(ABC):
         """检查提供商是否可用."""
         pass
 
+    def instance_key(self, config: Any) -> Tuple[Any, ...]:
+        """模型实例复用键中提供商特有的部分，这部分配置变化后会创建新实例."""
+        return ()
+
     def get_config(self, config: Any) -> Dict[str, Any]:
         """获取提供商配置."""
         return {
@@ -80,13 +226,14 @@ class OpenAIProvider(LLMProvider):
                 "OpenAI API Key 未配置",
                 config_key="openai_api_key"
             )
-        http_client = _create_http_client(config)
+        http_client, http_async_client = _get_http_clients(config)
         return ChatOpenAI(
             model=model,
             api_key=api_key,
             base_url=base_url,
             temperature=config.temperature,
             http_client=http_client,
+            http_async_client=http_async_client,
         )
 
     def is_available(self, config: Any) -> bool:
@@ -109,13 +256,14 @@ class DeepSeekProvider(LLMProvider):
                 "DeepSeek API Key 未配置",
                 config_key="deepseek_api_key"
             )
-        http_client = _create_http_client(config)
+        http_client, http_async_client = _get_http_clients(config)
         return ChatOpenAI(
             model=model,
             api_key=api_key,
             base_url=base_url,
             temperature=config.temperature,
             http_client=http_client,
+            http_async_client=http_async_client,
         )
 
     def is_available(self, config: Any) -> bool:
@@ -163,7 +311,7 @@ class PrivateLLMProvider(LLMProvider):
                 "私有 LLM Base URL 未配置",
                 config_key="private_llm_base_url"
             )
-        http_client = _create_http_client(config)
+        http_client, http_async_client = _get_http_clients(config)
         effective_api_key = api_key if api_key else "no-key-required"
         return ChatOpenAI(
             model=model,
@@ -171,6 +319,7 @@ class PrivateLLMProvider(LLMProvider):
             base_url=base_url,
             temperature=config.temperature,
             http_client=http_client,
+            http_async_client=http_async_client,
         )
 
     def is_available(self, config: Any) -> bool:
@@ -206,6 +355,424 @@ class LLMProviderRegistry:
         return list(cls._providers.keys())
 
 
+class LLMModelRegistry:
+    """LLM 模型实例注册表.
+
+    进程内按 (提供商, 模型, 温度) 复用模型实例，各图节点重复调用 get_llm
+    时不再重新创建模型与客户端。键中同时包含 base_url、API Key、CA 证书与
+    提供商特有的配置（见 LLMProvider.instance_key），配置变化后会创建新实例。
+    """
+
+    _models: Dict[Tuple[Any, ...], BaseChatModel] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _key(cls, provider: LLMProvider, config: Any) -> Tuple[Any, ...]:
+        provider_config = provider.get_config(config)
+        return (
+            provider.name,
+            provider_config.get("model"),
+            getattr(config, "temperature", None),
+            provider_config.get("base_url"),
+            provider_config.get("api_key"),
+            getattr(config, "ca_cert_path", None),
+            provider.instance_key(config),
+        )
+
+    @classmethod
+    def get_or_create(cls, provider: LLMProvider, config: Any) -> BaseChatModel:
+        """获取已有模型实例，不存在时创建."""
+        key = cls._key(provider, config)
+        with cls._lock:
+            model = cls._models.get(key)
+            _record_pool("llm_model", model is not None)
+        if model is not None:
+            return model
+        # 在锁外创建：路由提供商创建时会再次获取各后端的模型实例
+        created = provider.create_model(config)
+        with cls._lock:
+            return cls._models.setdefault(key, created)
+
+    @classmethod
+    def clear(cls) -> None:
+        """清除所有模型实例."""
+        with cls._lock:
+            cls._models.clear()
+
+    @classmethod
+    def size(cls) -> int:
+        """已缓存的模型实例数."""
+        return len(cls._models)
+
+
+class BackendStats:
+    """路由后端的实时统计（最近 window 次请求）."""
+
+    def __init__(self, window: int = 100):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self.wins = 0
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        """记录一次请求结果."""
+        self._outcomes.append(success)
+        if success and latency is not None:
+            self._latencies.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """延迟分位数（秒），尚无成功请求时返回 None."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def samples(self) -> int:
+        """成功请求的延迟样本数."""
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        """错误率."""
+        if not self._outcomes:
+            return 0.0
+        return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    @property
+    def requests(self) -> int:
+        """窗口内的请求数."""
+        return len(self._outcomes)
+
+
+class RouterBackend:
+    """路由后端: 模型实例 + 统计 + 熔断器 + 在途请求数."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        breaker: Optional[CircuitBreaker] = None,
+        window: int = 100,
+    ):
+        self.name = name
+        self.model = model
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = BackendStats(window)
+        self.in_flight = 0
+
+
+class LLMRouter:
+    """多提供商 LLM 路由器.
+
+    每个请求发往得分最好的后端（p50 延迟按错误率放大，尚无数据的后端优先
+    试探，得分相同时选在途请求最少的）；若主请求在该后端 p95 延迟内未返回，向次优后端发出对冲请求，
+    先完成者胜出，另一个被取消。后端失败时依次故障转移到其他后端，熔断器
+    打开的后端暂不参与路由。对冲只用于异步调用: 同步调用在调用方线程中执行，
+    正在运行的请求无法中断，对冲会让落败的请求跑完、重复消耗 token 与限流许可，
+    因此同步调用只做故障转移。
+    """
+
+    def __init__(
+        self,
+        backends: List[RouterBackend],
+        hedge: bool = True,
+        hedge_min_delay: float = 0.5,
+        hedge_default_delay: float = 10.0,
+        min_samples: int = 5,
+    ):
+        """初始化路由器.
+
+        Args:
+            backends: 后端列表（按优先级排列，无统计数据时按此顺序）
+            hedge: 是否启用对冲请求
+            hedge_min_delay: 对冲延迟下限（秒）
+            hedge_default_delay: 样本不足时的对冲延迟（秒）
+            min_samples: 使用 p95 作为对冲延迟所需的最少样本数
+        """
+        if not backends:
+            raise ConfigurationError("LLM 路由器至少需要一个后端", config_key="llm_router_backends")
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self.model_name = "router:" + ",".join(b.name for b in backends)
+        self._provider = "router"
+        self._lock = threading.Lock()
+        self.hedge_count = 0
+        self.failover_count = 0
+
+    def _score(self, backend: RouterBackend) -> float:
+        stats = backend.stats
+        p50 = stats.percentile(0.5)
+        if p50 is None:
+            # 未试探过的后端优先；只有失败记录的后端排在最后
+            p50 = 0.0 if stats.requests == 0 else self.hedge_default_delay
+        return p50 / (1 - min(stats.error_rate, 0.9))
+
+    def _route(self) -> List[RouterBackend]:
+        """按得分排序的可用后端（熔断器打开的后端除外）.
+
+        在同一临界区内为首选后端登记在途请求，并发请求不会同时涌向同一个
+        尚未试探的后端。调用方负责在首选后端的请求结束后调用 _release。
+        """
+        with self._lock:
+            available = [b for b in self.backends if b.breaker.is_available()]
+            ranked = sorted(available, key=lambda b: (self._score(b), b.in_flight))
+            if ranked:
+                ranked[0].in_flight += 1
+            return ranked
+
+    def _release(self, backend: RouterBackend) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+
+    def _spawn(self, backend: RouterBackend, messages: Any, kwargs: Dict[str, Any]) -> asyncio.Task:
+        """创建调用已登记在途请求的后端的任务（任务开始前被取消也会释放）."""
+        task = asyncio.ensure_future(self._acall_backend(backend, messages, kwargs))
+        task.add_done_callback(lambda _: self._release(backend))
+        return task
+
+    def _hedge_delay(self, backend: RouterBackend) -> Optional[float]:
+        if not self.hedge:
+            return None
+        with self._lock:
+            enough = backend.stats.samples >= self.min_samples
+            p95 = backend.stats.percentile(0.95) if enough else None
+        return max(self.hedge_min_delay, self.hedge_default_delay if p95 is None else p95)
+
+    def _record(
+        self, backend: RouterBackend, success: bool, latency: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            backend.stats.record(success, latency)
+            if success:
+                backend.breaker.record_success()
+            else:
+                backend.breaker.record_failure()
+                if not backend.breaker.is_available():
+                    logger.warning(f"LLM backend '{backend.name}' circuit opened, failing over")
+
+    def _call_backend(self, backend: RouterBackend, messages: Any, kwargs: Dict[str, Any]) -> Any:
+        start = time.monotonic()
+        try:
+            limiter = get_rate_limiter(backend.name)
+            with limiter.limit(
+                estimate_tokens(backend.model, messages, kwargs.get("max_tokens"))
+            ) as permit:
+                result = backend.model.invoke(messages, **kwargs)
+                permit.tokens_used = usage_tokens(result)
+        except Exception:
+            self._record(backend, False)
+            raise
+        self._record(backend, True, time.monotonic() - start)
+        return result
+
+    async def _acall_backend(
+        self, backend: RouterBackend, messages: Any, kwargs: Dict[str, Any]
+    ) -> Any:
+        start = time.monotonic()
+        try:
+            limiter = get_rate_limiter(backend.name)
+            async with limiter.limit_async(
+                estimate_tokens(backend.model, messages, kwargs.get("max_tokens"))
+            ) as permit:
+                result = await backend.model.ainvoke(messages, **kwargs)
+                permit.tokens_used = usage_tokens(result)
+        except asyncio.CancelledError:
+            # 对冲落败被取消，不计入失败
+            raise
+        except Exception:
+            self._record(backend, False)
+            raise
+        self._record(backend, True, time.monotonic() - start)
+        return result
+
+    def _next_backend(self, queue: List[RouterBackend], hedged: bool) -> RouterBackend:
+        backend = queue.pop(0)
+        with self._lock:
+            if hedged:
+                self.hedge_count += 1
+            else:
+                self.failover_count += 1
+            backend.in_flight += 1
+        return backend
+
+    def _win(self, backend: RouterBackend) -> None:
+        with self._lock:
+            backend.stats.wins += 1
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        """同步调用（路由 + 故障转移，不对冲）.
+
+        Args:
+            messages: 消息列表或提示文本
+            **kwargs: 传给后端模型的参数
+
+        Returns:
+            Any: 第一个成功的后端响应
+
+        Raises:
+            LLMError: 没有可用后端，或所有后端都失败
+        """
+        queue = self._route()
+        if not queue:
+            raise LLMError("所有 LLM 后端的熔断器均已打开", provider="router")
+        backend = queue.pop(0)
+        last_error: Optional[BaseException] = None
+
+        while True:
+            try:
+                result = self._call_backend(backend, messages, kwargs)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"LLM backend '{backend.name}' failed: {e}")
+            else:
+                self._win(backend)
+                return result
+            finally:
+                self._release(backend)
+            if not queue:
+                break
+            backend = self._next_backend(queue, hedged=False)
+
+        raise LLMError(f"所有 LLM 后端调用失败: {last_error}", provider="router") from last_error
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        """异步调用（路由 + 对冲 + 故障转移），落败的请求被取消.
+
+        Args:
+            messages: 消息列表或提示文本
+            **kwargs: 传给后端模型的参数
+
+        Returns:
+            Any: 最先成功的后端响应
+
+        Raises:
+            LLMError: 没有可用后端，或所有后端都失败
+        """
+        queue = self._route()
+        if not queue:
+            raise LLMError("所有 LLM 后端的熔断器均已打开", provider="router")
+        primary = queue.pop(0)
+        pending: Dict[asyncio.Task, RouterBackend] = {
+            self._spawn(primary, messages, kwargs): primary
+        }
+        hedge_delay = self._hedge_delay(primary)
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                can_hedge = hedge_delay is not None and queue and len(pending) == 1
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    backend = self._next_backend(queue, hedged=True)
+                    pending[self._spawn(backend, messages, kwargs)] = backend
+                    hedge_delay = None
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self._win(backend)
+                        return task.result()
+                    last_error = error
+                    logger.warning(f"LLM backend '{backend.name}' failed: {error}")
+                if not pending and queue:
+                    backend = self._next_backend(queue, hedged=False)
+                    pending[self._spawn(backend, messages, kwargs)] = backend
+        finally:
+            # 取消落败或未完成的请求；与胜者同时完成的失败请求取出异常，避免未获取警告
+            for task in pending:
+                if task.done():
+                    if not task.cancelled():
+                        task.exception()
+                else:
+                    task.cancel()
+
+        raise LLMError(f"所有 LLM 后端调用失败: {last_error}", provider="router") from last_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取路由统计.
+
+        Returns:
+            Dict[str, Any]: 各后端的延迟分位数、错误率、熔断状态与胜出次数
+        """
+        with self._lock:
+            backends = {
+                b.name: {
+                    "p50": b.stats.percentile(0.5),
+                    "p95": b.stats.percentile(0.95),
+                    "error_rate": round(b.stats.error_rate, 4),
+                    "requests": b.stats.requests,
+                    "in_flight": b.in_flight,
+                    "wins": b.stats.wins,
+                    "circuit": b.breaker.state,
+                }
+                for b in self.backends
+            }
+            return {
+                "backends": backends,
+                "hedge_count": self.hedge_count,
+                "failover_count": self.failover_count,
+            }
+
+
+class RouterProvider(LLMProvider):
+    """路由提供商 - 在多个已配置的提供商之间路由、对冲与故障转移.
+
+    后端由 llm_router_backends 指定，为空时使用所有可用的提供商。
+    """
+
+    name = "router"
+    requires_api_key = False
+    rate_limited = False
+
+    def _backend_names(self, config: Any) -> List[str]:
+        names = getattr(config, "llm_router_backends", None)
+        if not isinstance(names, (list, tuple)) or not names:
+            names = LLMProviderRegistry.list_all()
+        return [name for name in names if name != self.name]
+
+    def _available_backends(self, config: Any) -> List[Tuple[str, LLMProvider]]:
+        backends = []
+        for name in self._backend_names(config):
+            provider = LLMProviderRegistry.get(name)
+            if provider is not None and provider.is_available(config):
+                backends.append((name, provider))
+        return backends
+
+    def instance_key(self, config: Any) -> Tuple[Any, ...]:
+        # 后端列表、可用性、各后端配置与路由参数任一变化都创建新路由器
+        return (
+            tuple(
+                LLMModelRegistry._key(provider, config)
+                for _, provider in self._available_backends(config)
+            ),
+            config.llm_router_hedge,
+            config.llm_router_hedge_min_delay,
+            config.llm_router_hedge_default_delay,
+        )
+
+    def create_model(self, config: Any) -> LLMRouter:
+        backends = [
+            RouterBackend(name, LLMModelRegistry.get_or_create(provider, config))
+            for name, provider in self._available_backends(config)
+        ]
+        return LLMRouter(
+            backends,
+            hedge=config.llm_router_hedge,
+            hedge_min_delay=config.llm_router_hedge_min_delay,
+            hedge_default_delay=config.llm_router_hedge_default_delay,
+        )
+
+    def is_available(self, config: Any) -> bool:
+        return bool(self._available_backends(config))
+
+
 def register_provider(provider: LLMProvider) -> None:
     """注册自定义 LLM 提供商.
 
@@ -266,8 +833,28 @@ def get_llm(provider: Optional[str] = None) -> Any:
             config_key=provider_instance.api_key_setting
         )
 
-    base_llm = provider_instance.create_model(settings)
-    return get_cached_llm(base_llm)
+    base_llm = LLMModelRegistry.get_or_create(provider_instance, settings)
+    return get_cached_llm(base_llm, provider_name if provider_instance.rate_limited else None)
+
+
+def clear_llm_instances() -> None:
+    """清除共享的模型实例与 HTTP 客户端（配置变更后或测试中使用）."""
+    LLMModelRegistry.clear()
+    with _http_clients_lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+    for client, async_client in clients:
+        client.close()
+        _close_async_client(async_client)
+
+
+def get_llm_pool_stats() -> Dict[str, Dict[str, int]]:
+    """获取模型实例与 HTTP 客户端的复用统计.
+
+    Returns:
+        Dict[str, Dict[str, int]]: 各池的 hits/misses
+    """
+    return {pool: dict(counts) for pool, counts in _pool_stats.items()}
 
 
 def list_available_providers() -> list[str]:
@@ -283,3 +870,4 @@ LLMProviderRegistry.register(OpenAIProvider())
 LLMProviderRegistry.register(DeepSeekProvider())
 LLMProviderRegistry.register(OllamaProvider())
 LLMProviderRegistry.register(PrivateLLMProvider())
+LLMProviderRegistry.register(RouterProvider())
@@ -1,36 +1,351 @@
-"""LLM 调用缓存和重试机制."""
+"""LLM 调用缓存和重试机制.
+
+缓存分两级：进程内的 LRU 字典，以及持久化到项目 ``.ut-agent/llm_cache.db`` 的
+SQLite 存储（见 configure_llm_cache）。对未变化的项目再次运行时，响应直接从磁盘读取，不再调用 LLM。
+"""
 
 import hashlib
 import json
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Dict, Optional, Callable, TypeVar, cast
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union, cast
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
 from ut_agent.exceptions import LLMError, LLMRateLimitError, RetryableError
 from ut_agent.utils import get_logger
+from ut_agent.utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    estimate_tokens,
+    get_rate_limiter,
+    usage_tokens,
+)
+from ut_agent.utils.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = get_logger("llm_cache")
 
 
 T = TypeVar('T')
 
+# 持久化存储格式版本，格式变化时旧数据被丢弃
+LLM_CACHE_STORE_VERSION = "2"
+
+# 每次淘汰时从 LRU 端取出的条目数
+_EVICTION_BATCH = 64
+
+
+def _dump_result(result: Any) -> Optional[bytes]:
+    """将 LLM 结果序列化为 JSON，不支持的类型返回 None.
+
+    只保存消息数据（内容、用量等），读取时按消息类型重建，
+    不会根据缓存内容导入或调用任意对象。
+    """
+    if isinstance(result, BaseMessage):
+        data: Dict[str, Any] = {"kind": "message", "message": message_to_dict(result)}
+    elif isinstance(result, ChatResult):
+        data = {
+            "kind": "chat_result",
+            "generations": [
+                {
+                    "message": message_to_dict(generation.message),
+                    "generation_info": generation.generation_info,
+                }
+                for generation in result.generations
+            ],
+            "llm_output": result.llm_output,
+        }
+    else:
+        return None
+    try:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_result(data: bytes) -> Union[BaseMessage, ChatResult]:
+    """从 JSON 重建 LLM 结果.
+
+    Raises:
+        ValueError: 数据格式无效
+    """
+    payload = json.loads(data.decode("utf-8"))
+    kind = payload.get("kind")
+    if kind == "message":
+        return messages_from_dict([payload["message"]])[0]
+    if kind == "chat_result":
+        generations = [
+            ChatGeneration(
+                message=messages_from_dict([item["message"]])[0],
+                generation_info=item.get("generation_info"),
+            )
+            for item in payload["generations"]
+        ]
+        return ChatResult(generations=generations, llm_output=payload.get("llm_output"))
+    raise ValueError(f"未知的缓存结果类型: {kind}")
+
+
+class LLMCacheStore:
+    """LLM 响应的持久化存储 - 基于 SQLite.
+
+    WAL 模式加忙等待使多个线程、进程可以同时读写同一个缓存文件。条目数
+    与总字节数由触发器维护在 stats 表中，淘汰时沿 last_accessed 索引从最久
+    未用的一端删除，不需要扫描全表。数据库在第一次读写时才创建。
+
+    数据库位于项目目录中，内容不可信：结果以消息 JSON 保存并按消息类型重建，
+    不使用 pickle。
+    """
+
+    def __init__(self, db_path: Path, max_size_bytes: int, ttl_seconds: int):
+        """初始化存储.
+
+        Args:
+            db_path: 数据库路径
+            max_size_bytes: 缓存内容的总字节数上限
+            ttl_seconds: 条目过期时间（秒）
+        """
+        self._db_path = db_path
+        self._max_size_bytes = max_size_bytes
+        self._ttl_seconds = ttl_seconds
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @property
+    def db_path(self) -> Path:
+        """数据库路径."""
+        return self._db_path
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._init_db()
+                    self._initialized = True
+        return self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path), timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self) -> None:
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != LLM_CACHE_STORE_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS entries")
+                    conn.execute("DROP TABLE IF EXISTS stats")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                        (LLM_CACHE_STORE_VERSION,),
+                    )
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        cache_key TEXT PRIMARY KEY,
+                        result BLOB NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_accessed REAL NOT NULL
+                    )
+                """)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_entries_last_accessed "
+                    "ON entries (last_accessed)"
+                )
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS stats (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        entry_count INTEGER NOT NULL,
+                        total_bytes INTEGER NOT NULL
+                    )
+                """)
+                conn.execute(
+                    "INSERT OR IGNORE INTO stats (id, entry_count, total_bytes) VALUES (1, 0, 0)"
+                )
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+                        UPDATE stats SET entry_count = entry_count + 1,
+                                         total_bytes = total_bytes + NEW.size_bytes WHERE id = 1;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+                        UPDATE stats SET entry_count = entry_count - 1,
+                                         total_bytes = total_bytes - OLD.size_bytes WHERE id = 1;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS entries_resize
+                    AFTER UPDATE OF size_bytes ON entries BEGIN
+                        UPDATE stats SET total_bytes = total_bytes - OLD.size_bytes + NEW.size_bytes
+                        WHERE id = 1;
+                    END
+                """)
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取未过期的条目并刷新其访问时间.
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Any]: 缓存的结果，不存在、已过期或无法反序列化时返回 None
+        """
+        try:
+            conn = self._get_connection()
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT result, created_at FROM entries WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    now = time.time()
+                    if now - row[1] > self._ttl_seconds:
+                        conn.execute("DELETE FROM entries WHERE cache_key = ?", (key,))
+                        return None
+                    try:
+                        result = _load_result(row[0])
+                    except Exception:
+                        conn.execute("DELETE FROM entries WHERE cache_key = ?", (key,))
+                        return None
+                    conn.execute(
+                        "UPDATE entries SET last_accessed = ? WHERE cache_key = ?", (now, key)
+                    )
+                    return result
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Failed to read persistent LLM cache: {e}")
+            return None
+
+    def set(self, key: str, result: Any) -> None:
+        """写入条目，超过容量上限时淘汰最久未用的条目.
+
+        Args:
+            key: 缓存键
+            result: 结果（消息或 ChatResult，无法序列化时不写入）
+        """
+        data = _dump_result(result)
+        if data is None:
+            logger.debug(f"LLM result is not serializable, skip persistent cache: {type(result)}")
+            return
+        if len(data) > self._max_size_bytes:
+            return
+
+        now = time.time()
+        try:
+            conn = self._get_connection()
+            try:
+                with conn:
+                    conn.execute("""
+                        INSERT INTO entries
+                            (cache_key, result, size_bytes, created_at, last_accessed)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(cache_key) DO UPDATE SET
+                            result = excluded.result,
+                            size_bytes = excluded.size_bytes,
+                            created_at = excluded.created_at,
+                            last_accessed = excluded.last_accessed
+                    """, (key, data, len(data), now, now))
+                    self._evict(conn)
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Failed to write persistent LLM cache: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """在当前事务中淘汰条目直到总字节数不超过上限."""
+        while True:
+            total_bytes = conn.execute("SELECT total_bytes FROM stats WHERE id = 1").fetchone()[0]
+            if total_bytes <= self._max_size_bytes:
+                return
+            rows = conn.execute(
+                "SELECT cache_key, size_bytes FROM entries ORDER BY last_accessed LIMIT ?",
+                (_EVICTION_BATCH,),
+            ).fetchall()
+            victims = []
+            for cache_key, size_bytes in rows:
+                victims.append((cache_key,))
+                total_bytes -= size_bytes
+                if total_bytes <= self._max_size_bytes:
+                    break
+            conn.executemany("DELETE FROM entries WHERE cache_key = ?", victims)
+
+    def clear(self) -> None:
+        """清空全部条目."""
+        try:
+            conn = self._get_connection()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM entries")
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Failed to clear persistent LLM cache: {e}")
+
+    def size(self) -> int:
+        """获取条目数."""
+        try:
+            conn = self._get_connection()
+            try:
+                return conn.execute("SELECT entry_count FROM stats WHERE id = 1").fetchone()[0]
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError):
+            return 0
+
+    def size_bytes(self) -> int:
+        """获取缓存内容的总字节数."""
+        try:
+            conn = self._get_connection()
+            try:
+                return conn.execute("SELECT total_bytes FROM stats WHERE id = 1").fetchone()[0]
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError):
+            return 0
+
 
 class LLMCache:
-    """LLM 调用缓存."""
+    """LLM 调用缓存.
 
-    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[int] = None):
+    内存层是按访问顺序排列的 OrderedDict，命中时移到末尾，超过容量时从
+    头部淘汰，均为 O(1)。配置了持久化存储时，内存未命中会再查磁盘，
+    命中后回填内存。
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        store: Optional[LLMCacheStore] = None,
+    ):
         """初始化 LLM 缓存.
 
         Args:
             max_size: 最大缓存条目数
             ttl_seconds: 缓存过期时间（秒）
+            store: 持久化存储（可选）
         """
         from ut_agent.config import settings
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self._max_size = max_size or settings.llm_cache_max_size
         self._ttl_seconds = ttl_seconds or settings.llm_cache_ttl
+        self._store = store
+        self._lock = threading.Lock()
+        # 共享同一缓存的 CachedLLM 实例之间合并并发的相同请求
+        self.flight = SingleFlight()
+        self.async_flight = AsyncSingleFlight()
 
     def _compute_cache_key(
         self, prompt: str, provider: str, model: str, temperature: float
@@ -70,16 +385,24 @@ class LLMCache:
             Optional[ChatResult]: 缓存的聊天结果
         """
         key = self._compute_cache_key(prompt, provider, model, temperature)
-        if key not in self._cache:
-            return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if time.time() - entry["timestamp"] > self._ttl_seconds:
+                    del self._cache[key]
+                else:
+                    self._cache.move_to_end(key)
+                    logger.debug(f"LLM cache hit for prompt: {prompt[:50]}...")
+                    return cast(ChatResult, entry["result"])
 
-        entry = self._cache[key]
-        if time.time() - entry["timestamp"] > self._ttl_seconds:
-            del self._cache[key]
+        if self._store is None:
             return None
-
-        logger.debug(f"LLM cache hit for prompt: {prompt[:50]}...")
-        return cast(ChatResult, entry["result"])
+        result = self._store.get(key)
+        if result is None:
+            return None
+        logger.debug(f"LLM persistent cache hit for prompt: {prompt[:50]}...")
+        self._remember(key, result)
+        return cast(ChatResult, result)
 
     def set(
         self, 
@@ -98,33 +421,47 @@ class LLMCache:
             temperature: 温度参数
             result: 聊天结果
         """
-        if len(self._cache) >= self._max_size:
-            # 清理最旧的缓存
-            oldest_key = min(
-                self._cache.keys(),
-                key=lambda k: self._cache[k]["timestamp"]
-            )
-            del self._cache[oldest_key]
-
         key = self._compute_cache_key(prompt, provider, model, temperature)
-        self._cache[key] = {
-            "result": result,
-            "timestamp": time.time(),
-        }
+        self._remember(key, result)
+        if self._store is not None:
+            self._store.set(key, result)
         logger.debug(f"LLM cache set for prompt: {prompt[:50]}...")
 
+    def _remember(self, key: str, result: Any) -> None:
+        """写入内存层，超过容量时淘汰最久未用的条目."""
+        with self._lock:
+            self._cache[key] = {
+                "result": result,
+                "timestamp": time.time(),
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
     def clear(self) -> None:
-        """清空缓存."""
-        self._cache.clear()
+        """清空缓存（包括持久化存储）."""
+        with self._lock:
+            self._cache.clear()
+        if self._store is not None:
+            self._store.clear()
 
     def size(self) -> int:
-        """获取缓存大小.
+        """获取内存层的缓存大小.
 
         Returns:
             int: 缓存条目数
         """
         return len(self._cache)
 
+    @property
+    def store(self) -> Optional[LLMCacheStore]:
+        """持久化存储."""
+        return self._store
+
+    def set_store(self, store: Optional[LLMCacheStore]) -> None:
+        """替换持久化存储，None 表示只使用内存层."""
+        self._store = store
+
 
 class LLMRetryHandler:
     """LLM 调用重试处理器."""
@@ -198,52 +535,44 @@ class LLMRetryHandler:
 class CachedLLM:
     """带缓存和重试的 LLM 包装器."""
 
-    def __init__(self, llm: BaseChatModel, cache: Optional[LLMCache] = None):
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        cache: Optional[LLMCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        provider: Optional[str] = None,
+    ):
         """初始化缓存 LLM.
 
         Args:
             llm: 原始 LLM 实例
             cache: LLM 缓存实例
+            rate_limiter: 速率限制器，None 表示不限流（缓存命中不占用配额）
+            provider: 提供商名称，默认取原始 LLM 的 _provider；外层调用方
+                （如 AsyncLLMCaller）据此使用同一个共享限流器
         """
         self._llm = llm
         self._cache = cache or LLMCache()
         self._retry_handler = LLMRetryHandler()
+        self._rate_limiter = rate_limiter
+        self._provider = provider or getattr(llm, "_provider", None)
 
     def invoke(
         self, 
-        messages: list[BaseMessage], 
+        messages: Union[str, list[BaseMessage]], 
         **kwargs: Any
     ) -> ChatResult:
         """调用 LLM 并缓存结果.
 
         Args:
-            messages: 消息列表
+            messages: 消息列表或提示文本
             **kwargs: 其他参数
 
         Returns:
             ChatResult: 聊天结果
         """
         from ut_agent.utils.metrics import llm_call, record_cache_operation
-        # 构建提示文本
-        prompt_parts = []
-        for msg in messages:
-            if hasattr(msg, "content"):
-                content = msg.content
-                if isinstance(content, str):
-                    prompt_parts.append(content)
-                elif isinstance(content, (list, dict)):
-                    # 处理复杂类型的content
-                    try:
-                        import json
-                        prompt_parts.append(json.dumps(content, ensure_ascii=False))
-                    except:
-                        prompt_parts.append(str(content))
-                else:
-                    prompt_parts.append(str(content))
-        prompt = "\n".join(prompt_parts)
-        provider = getattr(self._llm, "_provider", "unknown")
-        model = getattr(self._llm, "model_name", "unknown")
-        temperature = kwargs.get("temperature", 0.7)
+        prompt, provider, model, temperature = self._cache_params(messages, kwargs)
 
         # 检查缓存
         cached_result = self._cache.get(prompt, provider, model, temperature)
@@ -257,16 +586,103 @@ class CachedLLM:
         @self._retry_handler.retry_with_backoff
         def call_llm() -> ChatResult:
             with llm_call(provider, model):
-                return cast(ChatResult, self._llm.invoke(messages, **kwargs))
+                if self._rate_limiter is None:
+                    return cast(ChatResult, self._llm.invoke(messages, **kwargs))
+                with self._rate_limiter.limit(self._estimate_tokens(prompt, kwargs)) as permit:
+                    result = self._llm.invoke(messages, **kwargs)
+                    permit.tokens_used = usage_tokens(result)
+                return cast(ChatResult, result)
+
+        def call_and_cache() -> ChatResult:
+            # 检查缓存与登记请求之间，相同的请求可能刚刚完成
+            cached = self._cache.get(prompt, provider, model, temperature)
+            if cached:
+                return cached
+            result = call_llm()
+            # 缓存结果
+            self._cache.set(prompt, provider, model, temperature, result)
+            record_cache_operation("llm", "set")
+            return result
+
+        # 并发的相同请求只调用一次 LLM，其余调用者等待同一结果
+        key = self._cache._compute_cache_key(prompt, provider, model, temperature)
+        result, _ = self._cache.flight.do(key, call_and_cache)
+        return result
+
+    async def ainvoke(
+        self,
+        messages: Union[str, list[BaseMessage]],
+        **kwargs: Any
+    ) -> ChatResult:
+        """异步调用 LLM 并缓存结果（与 invoke 共享缓存）.
+
+        Args:
+            messages: 消息列表或提示文本
+            **kwargs: 其他参数
 
-        result = call_llm()
+        Returns:
+            ChatResult: 聊天结果
+        """
+        from ut_agent.utils.metrics import llm_call, record_cache_operation
+        prompt, provider, model, temperature = self._cache_params(messages, kwargs)
 
-        # 缓存结果
-        self._cache.set(prompt, provider, model, temperature, result)
-        record_cache_operation("llm", "set")
+        cached_result = self._cache.get(prompt, provider, model, temperature)
+        if cached_result:
+            record_cache_operation("llm", "get", hit=True)
+            return cached_result
+        record_cache_operation("llm", "get", hit=False)
 
+        async def call_and_cache() -> ChatResult:
+            cached = self._cache.get(prompt, provider, model, temperature)
+            if cached:
+                return cached
+            with llm_call(provider, model):
+                if self._rate_limiter is None:
+                    result = cast(ChatResult, await self._llm.ainvoke(messages, **kwargs))
+                else:
+                    tokens = self._estimate_tokens(prompt, kwargs)
+                    async with self._rate_limiter.limit_async(tokens) as permit:
+                        result = cast(ChatResult, await self._llm.ainvoke(messages, **kwargs))
+                        permit.tokens_used = usage_tokens(result)
+            self._cache.set(prompt, provider, model, temperature, result)
+            record_cache_operation("llm", "set")
+            return result
+
+        key = self._cache._compute_cache_key(prompt, provider, model, temperature)
+        result, _ = await self._cache.async_flight.do(key, call_and_cache)
         return result
 
+    def _estimate_tokens(self, prompt: str, kwargs: Dict[str, Any]) -> int:
+        """预计消耗的 token 数（提示 + 最大生成长度）."""
+        return estimate_tokens(self._llm, prompt, kwargs.get("max_tokens"))
+
+    def _cache_params(
+        self, messages: Union[str, list[BaseMessage]], kwargs: Dict[str, Any]
+    ) -> Tuple[str, str, str, float]:
+        """计算缓存键的组成部分: (提示文本, 提供商, 模型, 温度)."""
+        if isinstance(messages, str):
+            prompt = messages
+        else:
+            # 构建提示文本
+            prompt_parts = []
+            for msg in messages:
+                content = msg.content if hasattr(msg, "content") else msg
+                if isinstance(content, str):
+                    prompt_parts.append(content)
+                elif isinstance(content, (list, dict)):
+                    # 处理复杂类型的content
+                    try:
+                        prompt_parts.append(json.dumps(content, ensure_ascii=False))
+                    except (TypeError, ValueError):
+                        prompt_parts.append(str(content))
+                else:
+                    prompt_parts.append(str(content))
+            prompt = "\n".join(prompt_parts)
+        provider = getattr(self._llm, "_provider", "unknown")
+        model = getattr(self._llm, "model_name", "unknown")
+        temperature = kwargs.get("temperature", 0.7)
+        return prompt, provider, model, temperature
+
     def get_cache(self) -> LLMCache:
         """获取缓存实例.
 
@@ -276,20 +692,45 @@ class CachedLLM:
         return self._cache
 
 
-# 全局 LLM 缓存实例
+# 全局 LLM 缓存实例，持久化存储在确定项目路径后由 configure_llm_cache 附加
 _llm_cache = LLMCache()
 
 
-def get_cached_llm(llm: BaseChatModel) -> CachedLLM:
+def configure_llm_cache(project_path: str) -> None:
+    """把全局缓存的持久化存储放在项目的 ``.ut-agent/llm_cache.db``.
+
+    llm_cache_persistent 关闭时只使用内存层。数据库在第一次读写时才创建。
+
+    Args:
+        project_path: 项目根目录
+    """
+    from ut_agent.config import settings
+    if not settings.llm_cache_persistent:
+        _llm_cache.set_store(None)
+        return
+    db_path = Path(project_path).resolve() / ".ut-agent" / "llm_cache.db"
+    current = _llm_cache.store
+    if current is not None and current.db_path == db_path:
+        return
+    _llm_cache.set_store(LLMCacheStore(
+        db_path,
+        max_size_bytes=settings.llm_cache_disk_max_size,
+        ttl_seconds=settings.llm_cache_disk_ttl,
+    ))
+
+
+def get_cached_llm(llm: BaseChatModel, provider: Optional[str] = None) -> CachedLLM:
     """获取带缓存的 LLM 实例.
 
     Args:
         llm: 原始 LLM 实例
+        provider: 提供商名称，指定时调用受该提供商共享的限流器约束
 
     Returns:
         CachedLLM: 带缓存的 LLM 实例
     """
-    return CachedLLM(llm, _llm_cache)
+    rate_limiter = get_rate_limiter(provider) if provider else None
+    return CachedLLM(llm, _llm_cache, rate_limiter, provider)
 
 
 def clear_llm_cache() -> None:
@@ -253,6 +253,14 @@ def record_cache_operation(cache_type: str, operation: str, hit: bool = False) -
     )
 
 
+def record_pool_operation(pool: str, hit: bool) -> None:
+    """记录实例池/连接池复用指标."""
+    collector = get_metrics_collector()
+    tags = {"pool": pool}
+
+    collector.counter("pool.hits" if hit else "pool.misses", tags=tags).increment()
+
+
 def record_ast_parse(file_path: str, language: str, parse_time: float) -> None:
     """记录 AST 解析指标."""
     collector = get_metrics_collector()
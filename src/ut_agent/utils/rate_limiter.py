@@ -0,0 +1,532 @@
+"""LLM 速率限制 - 按提供商的请求/token 配额与自适应并发.
+
+每个提供商一个限流器，同时约束:
+- 每分钟请求数与每分钟 token 数（连续补充的令牌桶，token 按 count_tokens
+  估算，请求完成后按实际用量校正）
+- 并发请求数（AIMD：成功时加性增长，被限流时乘性减小）
+
+被限流时优先遵循服务端的 retry-after，没有时按连续限流次数指数冷却，
+冷却期间所有调用者暂停，而不是每个调用者各自等待固定的 60 秒。
+"""
+
+import asyncio
+import contextvars
+import email.utils
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from ut_agent.exceptions import LLMRateLimitError
+from ut_agent.utils import get_logger
+
+logger = get_logger("rate_limiter")
+
+DEFAULT_PROVIDER = "default"
+
+# 当前上下文已持有许可的限流器，嵌套调用（如 AsyncLLMCaller 包装 CachedLLM）不重复占用配额
+_held: contextvars.ContextVar[Tuple[int, ...]] = contextvars.ContextVar(
+    "rate_limiter_held", default=()
+)
+
+
+@dataclass
+class RateLimitConfig:
+    """速率限制配置.
+
+    Attributes:
+        requests_per_minute: 每分钟请求数上限，0 表示不限制
+        tokens_per_minute: 每分钟 token 数上限，0 表示不限制
+        max_concurrency: 并发请求数上限
+        min_concurrency: 并发请求数下限
+        additive_increase: 每一轮（并发上限个）成功请求后并发上限的增量
+        decrease_factor: 被限流时并发上限的缩减系数
+        base_cooldown: 服务端未给出 retry-after 时的首次冷却秒数，连续限流时翻倍
+        max_cooldown: 冷却秒数上限
+    """
+
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    max_concurrency: int = 16
+    min_concurrency: int = 1
+    additive_increase: float = 1.0
+    decrease_factor: float = 0.5
+    base_cooldown: float = 1.0
+    max_cooldown: float = 60.0
+
+
+@dataclass
+class RatePermit:
+    """一次请求的执行许可.
+
+    Attributes:
+        tokens: 预扣的 token 数
+        acquired_at: 获取时间（monotonic）
+        tokens_used: 实际消耗的 token 数，由调用方在请求完成后填写
+        reentrant: 是否为嵌套调用的空许可
+    """
+
+    tokens: int
+    acquired_at: float
+    tokens_used: Optional[int] = None
+    reentrant: bool = False
+    context_token: Any = None
+
+
+class AdaptiveRateLimiter:
+    """自适应速率限制器（线程与协程均可使用）."""
+
+    def __init__(self, name: str, config: Optional[RateLimitConfig] = None):
+        """初始化限流器.
+
+        Args:
+            name: 提供商名称
+            config: 速率限制配置
+        """
+        self.name = name
+        self.config = config or RateLimitConfig()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._waiters: List[asyncio.Future] = []
+
+        self._request_budget = float(self.config.requests_per_minute)
+        self._token_budget = float(self.config.tokens_per_minute)
+        self._refilled_at = time.monotonic()
+
+        self._limit = float(self.config.max_concurrency)
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        # 在最近一次缩减之前获取的许可再被限流，不重复缩减
+        self._last_decrease = 0.0
+        self._consecutive_limits = 0
+
+        self.rate_limited_count = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        """当前并发上限."""
+        return max(self.config.min_concurrency, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """进行中的请求数."""
+        return self._in_flight
+
+    def acquire(self, tokens: int = 0) -> RatePermit:
+        """阻塞直到获得执行许可.
+
+        Args:
+            tokens: 预计消耗的 token 数
+
+        Returns:
+            RatePermit: 执行许可，请求结束后必须调用 release
+        """
+        permit = self._reentrant_permit()
+        if permit:
+            return permit
+        tokens = self._clamp_tokens(tokens)
+        with self._condition:
+            while True:
+                permit, wait = self._try_acquire(tokens)
+                if permit:
+                    break
+                self._condition.wait(wait)
+        return self._enter(permit)
+
+    async def acquire_async(self, tokens: int = 0) -> RatePermit:
+        """异步等待直到获得执行许可.
+
+        Args:
+            tokens: 预计消耗的 token 数
+
+        Returns:
+            RatePermit: 执行许可，请求结束后必须调用 release
+        """
+        permit = self._reentrant_permit()
+        if permit:
+            return permit
+        tokens = self._clamp_tokens(tokens)
+        loop = asyncio.get_running_loop()
+        while True:
+            future = None
+            with self._lock:
+                permit, wait = self._try_acquire(tokens)
+                if permit is None and wait is None:
+                    future = loop.create_future()
+                    self._waiters.append(future)
+            if permit:
+                return self._enter(permit)
+            if future is None:
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await future
+            finally:
+                with self._lock:
+                    if future in self._waiters:
+                        self._waiters.remove(future)
+
+    def release(
+        self,
+        permit: RatePermit,
+        tokens_used: Optional[int] = None,
+        rate_limited: bool = False,
+        retry_after: Optional[float] = None,
+        success: bool = True,
+    ) -> None:
+        """归还执行许可并根据结果调整并发上限.
+
+        Args:
+            permit: acquire 返回的许可
+            tokens_used: 实际消耗的 token 数（用于校正 token 预算）
+            rate_limited: 请求是否被服务端限流
+            retry_after: 服务端要求的等待秒数
+            success: 请求是否成功
+        """
+        if permit.reentrant:
+            return
+        try:
+            _held.reset(permit.context_token)
+        except ValueError:
+            # 在其他上下文中归还（如回调线程），无需恢复
+            pass
+
+        with self._lock:
+            now = time.monotonic()
+            self._in_flight -= 1
+            if tokens_used is not None and self.config.tokens_per_minute:
+                self._refill(now)
+                self._token_budget = max(
+                    -float(self.config.tokens_per_minute),
+                    self._token_budget - (tokens_used - permit.tokens),
+                )
+            if rate_limited:
+                self._on_rate_limited(permit, now, retry_after)
+            elif success:
+                self._consecutive_limits = 0
+                self._limit = min(
+                    float(self.config.max_concurrency),
+                    self._limit + self.config.additive_increase / max(self._limit, 1.0),
+                )
+            self._wake()
+
+    def release_error(self, permit: RatePermit, error: BaseException) -> None:
+        """请求抛出异常时归还许可.
+
+        Args:
+            permit: acquire 返回的许可
+            error: 请求抛出的异常
+        """
+        self.release(
+            permit,
+            rate_limited=is_rate_limit_error(error),
+            retry_after=retry_after_from_error(error),
+            success=False,
+        )
+
+    @contextmanager
+    def limit(self, tokens: int = 0) -> Iterator[RatePermit]:
+        """在许可范围内执行同步请求，可在块内设置 permit.tokens_used."""
+        permit = self.acquire(tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self.release_error(permit, e)
+            raise
+        self.release(permit, tokens_used=permit.tokens_used)
+
+    @asynccontextmanager
+    async def limit_async(self, tokens: int = 0) -> AsyncIterator[RatePermit]:
+        """在许可范围内执行异步请求，可在块内设置 permit.tokens_used."""
+        permit = await self.acquire_async(tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self.release_error(permit, e)
+            raise
+        self.release(permit, tokens_used=permit.tokens_used)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息.
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            rpm = self.config.requests_per_minute
+            tpm = self.config.tokens_per_minute
+            return {
+                "provider": self.name,
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self._in_flight,
+                "rate_limited_count": self.rate_limited_count,
+                "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+                "request_budget": round(self._request_budget, 2) if rpm else None,
+                "token_budget": round(self._token_budget, 2) if tpm else None,
+            }
+
+    def _reentrant_permit(self) -> Optional[RatePermit]:
+        if id(self) in _held.get():
+            return RatePermit(tokens=0, acquired_at=time.monotonic(), reentrant=True)
+        return None
+
+    def _clamp_tokens(self, tokens: int) -> int:
+        tokens = max(0, int(tokens))
+        if self.config.tokens_per_minute:
+            # 超过整个预算的请求也必须能执行
+            tokens = min(tokens, self.config.tokens_per_minute)
+        return tokens
+
+    def _enter(self, permit: RatePermit) -> RatePermit:
+        permit.context_token = _held.set(_held.get() + (id(self),))
+        return permit
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if elapsed <= 0:
+            return
+        rpm = self.config.requests_per_minute
+        tpm = self.config.tokens_per_minute
+        if rpm:
+            self._request_budget = min(float(rpm), self._request_budget + elapsed * rpm / 60)
+        if tpm:
+            self._token_budget = min(float(tpm), self._token_budget + elapsed * tpm / 60)
+
+    def _try_acquire(self, tokens: int) -> Tuple[Optional[RatePermit], Optional[float]]:
+        """尝试获取许可（调用方持有锁）.
+
+        Returns:
+            Tuple: (许可, None)；(None, 等待秒数)；(None, None) 表示等待其他请求结束
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._blocked_until:
+            return None, self._blocked_until - now
+        if self._in_flight >= self.concurrency_limit:
+            return None, None
+
+        wait = 0.0
+        rpm = self.config.requests_per_minute
+        tpm = self.config.tokens_per_minute
+        if rpm and self._request_budget < 1:
+            wait = (1 - self._request_budget) * 60 / rpm
+        if tpm and tokens and self._token_budget < tokens:
+            wait = max(wait, (tokens - self._token_budget) * 60 / tpm)
+        if wait > 0:
+            return None, wait
+
+        if rpm:
+            self._request_budget -= 1
+        if tpm:
+            self._token_budget -= tokens
+        self._in_flight += 1
+        return RatePermit(tokens=tokens, acquired_at=now), None
+
+    def _on_rate_limited(
+        self, permit: RatePermit, now: float, retry_after: Optional[float]
+    ) -> None:
+        self.rate_limited_count += 1
+        if permit.acquired_at >= self._last_decrease:
+            self._limit = max(
+                float(self.config.min_concurrency), self._limit * self.config.decrease_factor
+            )
+            self._last_decrease = now
+            self._consecutive_limits += 1
+            logger.warning(
+                f"Provider '{self.name}' rate limited, "
+                f"concurrency limit reduced to {self.concurrency_limit}"
+            )
+
+        if retry_after is None:
+            cooldown = self.config.base_cooldown * (2 ** max(0, self._consecutive_limits - 1))
+        else:
+            cooldown = retry_after
+        cooldown = min(cooldown, self.config.max_cooldown)
+        self._blocked_until = max(self._blocked_until, now + cooldown)
+        # 服务端配额已耗尽，冷却结束后按补充速率平滑恢复，避免集中突发
+        if self.config.requests_per_minute:
+            self._request_budget = min(self._request_budget, 0.0)
+        if self.config.tokens_per_minute:
+            self._token_budget = min(self._token_budget, 0.0)
+
+    def _wake(self) -> None:
+        """唤醒所有等待者重新检查（调用方持有锁）."""
+        self._condition.notify_all()
+        for future in self._waiters:
+            try:
+                future.get_loop().call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        self._waiters.clear()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """判断异常是否表示被服务端限流.
+
+    Args:
+        error: 异常
+
+    Returns:
+        bool: 是否为限流错误（LLMRateLimitError、HTTP 429 或错误信息包含 rate limit）
+    """
+    if isinstance(error, LLMRateLimitError):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    return "rate limit" in str(error).lower()
+
+
+def retry_after_from_error(error: BaseException) -> Optional[float]:
+    """从异常中提取服务端要求的等待秒数.
+
+    支持 LLMRateLimitError.details["retry_after"] 以及 HTTP 响应头
+    retry-after-ms、retry-after（秒数或 HTTP 日期）。
+
+    Args:
+        error: 异常
+
+    Returns:
+        Optional[float]: 等待秒数，无法确定时返回 None
+    """
+    details = getattr(error, "details", None)
+    if isinstance(details, dict) and details.get("retry_after"):
+        return float(details["retry_after"])
+
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return max(0.0, float(retry_after_ms) / 1000)
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(llm: Any, prompt: Any, max_tokens: Optional[int] = None) -> int:
+    """估算一次请求消耗的 token 数.
+
+    Args:
+        llm: LLM 实例，提供 count_tokens 时使用其估算
+        prompt: 提示文本或消息列表
+        max_tokens: 请求的最大生成 token 数
+
+    Returns:
+        int: 预计 token 数（提示 + 最大生成长度）
+    """
+    if isinstance(prompt, str):
+        text = prompt
+    else:
+        text = "\n".join(str(getattr(message, "content", message)) for message in prompt)
+
+    count = None
+    counter = getattr(llm, "count_tokens", None)
+    if callable(counter):
+        try:
+            count = counter(text)
+        except Exception:
+            count = None
+    if not isinstance(count, int):
+        # 平均每 4 个字符一个 token
+        count = len(text) // 4 + 1
+    return count + (max_tokens if isinstance(max_tokens, int) else 0)
+
+
+def usage_tokens(response: Any) -> Optional[int]:
+    """从 LLM 响应中读取实际 token 用量.
+
+    Args:
+        response: AIMessage 或 ChatResult
+
+    Returns:
+        Optional[int]: 总 token 数，响应未包含用量时返回 None
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        generations = getattr(response, "generations", None)
+        if generations:
+            usage = getattr(getattr(generations[0], "message", None), "usage_metadata", None)
+    if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    return None
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _config_from_settings(provider: str) -> RateLimitConfig:
+    from ut_agent.config import settings
+
+    config = RateLimitConfig(
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        max_concurrency=settings.llm_rate_limit_max_concurrency,
+    )
+    overrides = settings.llm_rate_limits.get(provider, {})
+    known = {f.name for f in fields(RateLimitConfig)}
+    for key, value in overrides.items():
+        if key in known:
+            setattr(config, key, value)
+        else:
+            logger.warning(f"Unknown rate limit option '{key}' for provider '{provider}'")
+    return config
+
+
+def get_rate_limiter(provider: Optional[str] = None) -> AdaptiveRateLimiter:
+    """获取提供商共享的限流器.
+
+    Args:
+        provider: 提供商名称
+
+    Returns:
+        AdaptiveRateLimiter: 限流器（配置来自 settings）
+    """
+    name = provider or DEFAULT_PROVIDER
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = AdaptiveRateLimiter(name, _config_from_settings(name))
+        return limiter
+
+
+def configure_rate_limiter(provider: str, config: RateLimitConfig) -> AdaptiveRateLimiter:
+    """替换提供商的限流器配置.
+
+    Args:
+        provider: 提供商名称
+        config: 速率限制配置
+
+    Returns:
+        AdaptiveRateLimiter: 新的限流器
+    """
+    with _limiters_lock:
+        limiter = _limiters[provider] = AdaptiveRateLimiter(provider, config)
+        return limiter
+
+
+def reset_rate_limiters() -> None:
+    """清除所有限流器（主要用于测试）."""
+    with _limiters_lock:
+        _limiters.clear()
@@ -0,0 +1,106 @@
+"""请求合并 - 相同键的并发调用只执行一次.
+
+多个工作线程（或协程）同时发出相同的 LLM 请求时，第一个调用者真正执行
+请求，其余调用者等待同一个结果，而不是各自重复调用。请求结束后键即被
+移除，之后的调用重新执行（通常会先命中缓存）。
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """线程间的请求合并."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.shared_count = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """执行 fn，同一键已有进行中的调用时等待其结果.
+
+        Args:
+            key: 请求键
+            fn: 实际执行的函数
+
+        Returns:
+            Tuple[T, bool]: (结果, 是否复用了其他调用的结果)；执行失败时
+                所有等待者都收到同一个异常
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared_count += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        """进行中的调用数."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """协程间的请求合并.
+
+    请求在独立的任务中执行，每个调用者通过 ``asyncio.shield`` 等待，取消
+    某个调用者不会取消其他调用者共享的请求。不同事件循环中的调用互不合并。
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Tuple[int, Hashable], "asyncio.Task"] = {}
+        self.shared_count = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """执行 fn，同一键已有进行中的调用时等待其结果.
+
+        Args:
+            key: 请求键
+            fn: 返回协程的函数
+
+        Returns:
+            Tuple[T, bool]: (结果, 是否复用了其他调用的结果)
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._calls.get(flight_key)
+        shared = task is not None
+        if task is None:
+            task = loop.create_task(fn())
+            self._calls[flight_key] = task
+            task.add_done_callback(lambda t: self._finish(flight_key, t))
+        else:
+            self.shared_count += 1
+        return await asyncio.shield(task), shared
+
+    def _finish(self, flight_key: Tuple[int, Hashable], task: "asyncio.Task") -> None:
+        if self._calls.get(flight_key) is task:
+            del self._calls[flight_key]
+        if not task.cancelled():
+            # 所有调用者都已取消时，避免"异常未被获取"的警告
+            task.exception()
+
+    def in_flight(self) -> int:
+        """进行中的调用数."""
+        return len(self._calls)
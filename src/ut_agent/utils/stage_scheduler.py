@@ -0,0 +1,289 @@
+"""阶段调度器模块 - 为单个工作流阶段提供有界并发执行."""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from ut_agent.utils import get_logger
+
+logger = get_logger("stage_scheduler")
+
+R = TypeVar("R")
+
+STAGE_BACKENDS = ("thread", "process")
+
+
+def _timed_call(fn: Callable[..., R], *args: Any) -> Tuple[R, float, float]:
+    """执行函数并返回 (结果, 开始时间, 结束时间).
+
+    定义在模块级以便进程池可以 pickle；perf_counter 在同一台机器上
+    跨进程单调可比。
+    """
+    started_at = time.perf_counter()
+    result = fn(*args)
+    return result, started_at, time.perf_counter()
+
+
+@dataclass
+class StageSchedulerMetrics:
+    """阶段调度统计信息.
+
+    排队等待时间与实际执行时间分开统计:
+    - queue_wait: 从提交到真正开始执行（含信号量准入与线程池排队）
+    - execution: 在工作线程中实际运行的时间
+    """
+
+    stage_name: str
+    max_workers: int
+    max_concurrency: int
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    peak_in_flight: int = 0
+    total_queue_wait_ms: float = 0.0
+    max_queue_wait_ms: float = 0.0
+    total_execution_ms: float = 0.0
+    max_execution_ms: float = 0.0
+
+    @property
+    def avg_queue_wait_ms(self) -> float:
+        """平均排队等待时间."""
+        finished = self.completed + self.failed
+        return self.total_queue_wait_ms / finished if finished > 0 else 0.0
+
+    @property
+    def avg_execution_ms(self) -> float:
+        """平均执行时间."""
+        finished = self.completed + self.failed
+        return self.total_execution_ms / finished if finished > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典."""
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "peak_in_flight": self.peak_in_flight,
+            "queue_wait_ms": round(self.total_queue_wait_ms, 2),
+            "avg_queue_wait_ms": round(self.avg_queue_wait_ms, 2),
+            "max_queue_wait_ms": round(self.max_queue_wait_ms, 2),
+            "execution_ms": round(self.total_execution_ms, 2),
+            "avg_execution_ms": round(self.avg_execution_ms, 2),
+            "max_execution_ms": round(self.max_execution_ms, 2),
+        }
+
+
+class StageScheduler:
+    """阶段调度器.
+
+    每个阶段拥有独立大小的线程池，并通过信号量限制同时进入线程池的任务数，
+    避免大量文件同时涌入默认执行器或 LLM 端点。
+
+    backend="process" 时使用进程池执行 CPU 密集型任务以绕开 GIL，
+    此时 fn 及其参数、返回值都必须可 pickle。
+
+    Example:
+        async with StageScheduler("analyze_code", max_workers=8) as scheduler:
+            results = await asyncio.gather(
+                *[scheduler.run(analyze_java_file, f) for f in files]
+            )
+            print(scheduler.get_metrics().to_dict())
+    """
+
+    def __init__(
+        self,
+        stage_name: str,
+        max_workers: int,
+        max_concurrency: Optional[int] = None,
+        backend: str = "thread",
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        """初始化调度器.
+
+        Args:
+            stage_name: 阶段名称
+            max_workers: 线程池/进程池大小
+            max_concurrency: 同时准入的最大任务数（默认等于 max_workers）
+            backend: 执行后端 (thread/process)
+            initializer: 工作线程/进程启动时调用的初始化函数
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if backend not in STAGE_BACKENDS:
+            raise ValueError(f"backend must be one of {STAGE_BACKENDS}")
+
+        self.stage_name = stage_name
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.backend = backend
+        self._initializer = initializer
+
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._metrics = StageSchedulerMetrics(
+            stage_name=stage_name,
+            max_workers=max_workers,
+            max_concurrency=self.max_concurrency,
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.backend == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self._initializer,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"ut-agent-{self.stage_name}",
+                    initializer=self._initializer,
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., R], *args: Any) -> R:
+        """在阶段执行器中执行函数.
+
+        Args:
+            fn: 同步函数
+            *args: 函数参数
+
+        Returns:
+            R: 函数返回值
+        """
+        submitted_at = time.perf_counter()
+        with self._stats_lock:
+            self._metrics.submitted += 1
+
+        async with self._get_semaphore():
+            with self._stats_lock:
+                self._in_flight += 1
+                self._metrics.peak_in_flight = max(self._metrics.peak_in_flight, self._in_flight)
+
+            loop = asyncio.get_running_loop()
+            started_at: Optional[float] = None
+            finished_at: Optional[float] = None
+            success = False
+            try:
+                result, started_at, finished_at = await loop.run_in_executor(
+                    self._get_executor(), _timed_call, fn, *args
+                )
+                success = True
+                return result
+            finally:
+                self._record(submitted_at, started_at, finished_at, success)
+
+    def _record(
+        self,
+        submitted_at: float,
+        started_at: Optional[float],
+        finished_at: Optional[float],
+        success: bool,
+    ) -> None:
+        """记录单个任务的排队与执行耗时.
+
+        失败任务拿不到工作端时间戳，其耗时全部计入执行时间。
+        """
+        now = time.perf_counter()
+        started_at = started_at if started_at is not None else submitted_at
+        finished_at = finished_at if finished_at is not None else now
+        queue_wait_ms = (started_at - submitted_at) * 1000
+        execution_ms = (finished_at - started_at) * 1000
+
+        with self._stats_lock:
+            self._in_flight -= 1
+            if success:
+                self._metrics.completed += 1
+            else:
+                self._metrics.failed += 1
+            self._metrics.total_queue_wait_ms += queue_wait_ms
+            self._metrics.max_queue_wait_ms = max(self._metrics.max_queue_wait_ms, queue_wait_ms)
+            self._metrics.total_execution_ms += execution_ms
+            self._metrics.max_execution_ms = max(self._metrics.max_execution_ms, execution_ms)
+
+    def get_metrics(self) -> StageSchedulerMetrics:
+        """获取调度统计信息."""
+        return self._metrics
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池.
+
+        Args:
+            wait: 是否等待正在执行的任务完成
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            logger.debug(
+                f"Stage scheduler '{self.stage_name}' shut down: {self._metrics.to_dict()}"
+            )
+
+    async def __aenter__(self) -> "StageScheduler":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown(wait=exc_type is None)
+
+
+def get_cpu_stage_limit(max_workers: int) -> int:
+    """计算 CPU 密集型阶段（解析、AST 提取）的并发上限.
+
+    Args:
+        max_workers: 用户配置的最大工作线程数
+
+    Returns:
+        int: 并发上限，不超过 CPU 核心数
+    """
+    from ut_agent.config import settings
+
+    if settings.max_analysis_workers > 0:
+        return max(1, min(settings.max_analysis_workers, max_workers))
+    return max(1, min(multiprocessing.cpu_count(), max_workers))
+
+
+def get_io_stage_limit(max_workers: int) -> int:
+    """计算 I/O 密集型阶段（LLM 调用）的并发上限.
+
+    Args:
+        max_workers: 用户配置的最大工作线程数
+
+    Returns:
+        int: 并发上限
+    """
+    from ut_agent.config import settings
+
+    if settings.max_llm_concurrency > 0:
+        return max(1, min(settings.max_llm_concurrency, max_workers))
+    return max(1, max_workers)
+
+
+def get_process_stage_limit() -> int:
+    """计算进程池分析后端的工作进程数.
+
+    进程池绕开了 GIL，因此不受 max_workers（主要面向 LLM 调用）约束，
+    默认与 CPU 核心数一致。
+
+    Returns:
+        int: 工作进程数
+    """
+    from ut_agent.config import settings
+
+    if settings.max_analysis_workers > 0:
+        return settings.max_analysis_workers
+    return max(1, multiprocessing.cpu_count())
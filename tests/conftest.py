@@ -0,0 +1,14 @@
+"""测试公共配置."""
+
+import pytest
+
+from ut_agent.config import settings
+
+
+@pytest.fixture(autouse=True, scope="session")
+def disable_persistent_llm_cache():
+    """测试中 LLM 缓存只使用内存层，不在项目目录留下 llm_cache.db."""
+    original = settings.llm_cache_persistent
+    settings.llm_cache_persistent = False
+    yield
+    settings.llm_cache_persistent = original
@@ -10,7 +10,9 @@ import pytest
 from ut_agent.tools.ast_cache import (
     CacheEntry,
     CacheStats,
+    ASTCacheIndexStore,
     ASTCacheManager,
+    flush_ast_cache,
     parse_java_ast,
     parse_typescript_ast,
 )
@@ -278,6 +280,233 @@ export function add(a: number, b: number): number {
         new_stats = self.cache_manager.get_cache_stats()
         assert new_stats.hit_count >= initial_hit + 1
 
+    def test_cache_hit_loads_compact_ast_from_disk(self):
+        """测试重新加载后从磁盘读取紧凑 AST."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test { void run() {} }")
+
+        self.cache_manager.get_or_parse(str(java_file), "java")
+
+        ASTCacheManager.reset_instance()
+        reloaded = ASTCacheManager(self.cache_dir)
+        ast_data, cache_hit = reloaded.get_or_parse(str(java_file), "java")
+
+        assert cache_hit is True
+        assert len(ast_data.find_all("method_declaration")) == 1
+
+    def test_get_or_analyze_persists_result(self):
+        """测试分析结果持久化，文件未变时不再重新分析."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test {}")
+        calls = []
+
+        def analyze(content):
+            calls.append(content)
+            return {"length": len(content)}
+
+        result, cache_hit = self.cache_manager.get_or_analyze(str(java_file), "test-1", analyze)
+        assert cache_hit is False
+        assert result == {"length": 20}
+
+        ASTCacheManager.reset_instance()
+        reloaded = ASTCacheManager(self.cache_dir)
+        result, cache_hit = reloaded.get_or_analyze(str(java_file), "test-1", analyze)
+        assert cache_hit is True
+        assert result == {"length": 20}
+        assert len(calls) == 1
+
+        java_file.write_text("public class Changed {}")
+        result, cache_hit = reloaded.get_or_analyze(str(java_file), "test-1", analyze)
+        assert cache_hit is False
+        assert result == {"length": 23}
+
+    def test_get_or_analyze_kinds_are_separate(self):
+        """测试不同类别的分析结果互不覆盖."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test {}")
+
+        self.cache_manager.get_or_analyze(str(java_file), "a-1", lambda content: {"kind": "a"})
+        result, cache_hit = self.cache_manager.get_or_analyze(
+            str(java_file), "b-1", lambda content: {"kind": "b"}
+        )
+
+        assert cache_hit is False
+        assert result == {"kind": "b"}
+
+    def test_legacy_index_version_is_ignored(self):
+        """测试旧版本索引不会被加载."""
+        import json
+
+        cache_key = "java:/legacy/File.java"
+        self.cache_manager._get_cache_file_path(cache_key).write_bytes(b"legacy")
+        (self.cache_dir / "index.json").write_text(json.dumps({
+            "version": "1.0",
+            "entries": [{"cache_key": cache_key, "file_path": "/legacy/File.java"}],
+        }))
+
+        ASTCacheManager.reset_instance()
+        reloaded = ASTCacheManager(self.cache_dir)
+
+        assert reloaded.get_cached_files() == []
+
+    def test_legacy_json_index_is_removed(self):
+        """测试旧版 JSON 索引文件被清理."""
+        (self.cache_dir / "index.json").write_text("{}")
+
+        ASTCacheManager.reset_instance()
+        ASTCacheManager(self.cache_dir)
+
+        assert not (self.cache_dir / "index.json").exists()
+
+    def test_index_writes_are_batched_until_flush(self):
+        """测试索引变更在提交前只保存在内存中."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test { }")
+        store = ASTCacheIndexStore(self.cache_dir / "index.db")
+
+        self.cache_manager.get_or_parse(str(java_file), "java")
+        assert store.load() == []
+
+        assert flush_ast_cache() == 1
+        rows = store.load()
+        assert len(rows) == 1
+        assert rows[0]["file_path"] == str(java_file)
+        assert self.cache_manager.flush() == 0
+
+    def test_flush_batch_size_triggers_commit(self):
+        """测试待写入条目达到阈值时自动提交."""
+        self.cache_manager._flush_batch_size = 2
+        store = ASTCacheIndexStore(self.cache_dir / "index.db")
+
+        for i in range(2):
+            java_file = self.test_dir / f"Test{i}.java"
+            java_file.write_text(f"public class Test{i} {{ }}")
+            self.cache_manager.get_or_parse(str(java_file), "java")
+
+        assert len(store.load()) == 2
+
+    def test_invalidate_removes_index_entry(self):
+        """测试失效操作同步删除索引条目."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test { }")
+        store = ASTCacheIndexStore(self.cache_dir / "index.db")
+
+        self.cache_manager.get_or_parse(str(java_file), "java")
+        self.cache_manager.flush()
+        self.cache_manager.invalidate(str(java_file), "java")
+
+        assert store.load() == []
+
+    def test_concurrent_parse_from_threads(self):
+        """测试多线程并发解析后索引完整."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        files = []
+        for i in range(20):
+            java_file = self.test_dir / f"Test{i}.java"
+            java_file.write_text(f"public class Test{i} {{ void run{i}() {{}} }}")
+            files.append(str(java_file))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda f: self.cache_manager.get_or_parse(f, "java"), files
+            ))
+
+        assert all(len(ast.find_all("method_declaration")) == 1 for ast, _ in results)
+        assert self.cache_manager.get_cache_stats().total_entries == 20
+
+        ASTCacheManager.reset_instance()
+        reloaded = ASTCacheManager(self.cache_dir)
+        assert sorted(reloaded.get_cached_files()) == sorted(files)
+
+    def test_modified_file_is_reparsed_incrementally(self):
+        """测试文件修改后在旧语法树上增量重解析."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test {\n    void a() {}\n}\n")
+        self.cache_manager.get_or_parse(str(java_file), "java")
+
+        java_file.write_text("public class Test {\n    void a() {}\n    void b() {}\n}\n")
+        ast_data, cache_hit = self.cache_manager.get_or_parse(str(java_file), "java")
+
+        assert cache_hit is False
+        assert self.cache_manager.get_cache_stats().incremental_parse_count == 1
+        assert self.cache_manager.get_cache_stats().total_entries == 1
+        assert len(ast_data.find_all("method_declaration")) == 2
+
+    def test_get_tree_reuses_tree_for_same_content(self):
+        """测试内容未变时复用内存中的语法树."""
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test { }")
+
+        first = self.cache_manager.get_tree(str(java_file), "java")
+        second = self.cache_manager.get_tree(str(java_file), "java")
+
+        assert first is second
+        assert first.root_node.type == "program"
+
+    def test_get_tree_reparses_incrementally(self):
+        """测试内容变化时增量重解析语法树."""
+        java_file = self.test_dir / "Test.java"
+        content = "public class Test {\n    void a() {}\n}\n"
+        self.cache_manager.get_tree(str(java_file), "java", content)
+
+        tree = self.cache_manager.get_tree(
+            str(java_file), "java", content.replace("void a", "int a")
+        )
+
+        assert self.cache_manager.get_cache_stats().incremental_parse_count == 1
+        assert b"int a" in tree.root_node.text
+
+    def test_incremental_reparse_keeps_previous_tree_intact(self):
+        """测试增量重解析不改写调用方持有的旧语法树."""
+        java_file = self.test_dir / "Test.java"
+        content = "public class Test {\n    void a() {}\n}\n"
+        old_tree = self.cache_manager.get_tree(str(java_file), "java", content)
+        old_method = old_tree.root_node.children[0].child_by_field_name("body").named_children[0]
+        old_span = (old_method.start_byte, old_method.end_byte)
+
+        self.cache_manager.get_tree(
+            str(java_file), "java", "// header comment\n" + content
+        )
+
+        assert not old_tree.root_node.has_changes
+        method = old_tree.root_node.children[0].child_by_field_name("body").named_children[0]
+        assert (method.start_byte, method.end_byte) == old_span
+        assert content.encode()[slice(*old_span)] == b"void a() {}"
+
+    def test_unchanged_file_skips_read_and_hash(self):
+        """测试 stat 未变时命中缓存无需读取文件."""
+        from unittest.mock import patch
+
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test { }")
+        old = datetime.now().timestamp() - 60
+        os.utime(java_file, (old, old))
+
+        self.cache_manager.get_or_parse(str(java_file), "java")
+        with patch.object(Path, "read_text", side_effect=AssertionError("should not read")):
+            ast_data, cache_hit = self.cache_manager.get_or_parse(str(java_file), "java")
+
+        assert cache_hit is True
+        assert ast_data.type == "program"
+
+    def test_stat_signature_survives_reload(self):
+        """测试 stat 签名随索引持久化."""
+        from unittest.mock import patch
+
+        java_file = self.test_dir / "Test.java"
+        java_file.write_text("public class Test { }")
+        old = datetime.now().timestamp() - 60
+        os.utime(java_file, (old, old))
+        self.cache_manager.get_or_parse(str(java_file), "java")
+
+        ASTCacheManager.reset_instance()
+        reloaded = ASTCacheManager(self.cache_dir)
+        with patch.object(Path, "read_text", side_effect=AssertionError("should not read")):
+            _, cache_hit = reloaded.get_or_parse(str(java_file), "java")
+
+        assert cache_hit is True
+
     def test_file_modification_invalidates_cache(self):
         """测试文件修改使缓存失效."""
         java_file = self.test_dir / "Test.java"
@@ -407,3 +636,49 @@ class TestCacheEviction:
 
         stats = self.cache_manager.get_cache_stats()
         assert stats.total_entries == 0
+
+
+class TestASTCacheIndexStore:
+    """ASTCacheIndexStore 测试."""
+
+    @staticmethod
+    def _row(cache_key: str, access_count: int = 0):
+        now = datetime.now().isoformat()
+        return (cache_key, f"/src/{cache_key}", "hash", "java", now, now, access_count, 10, 1, 20, 30, 40)
+
+    def test_apply_upsert_and_delete(self, tmp_path):
+        """测试批量写入、更新与删除."""
+        store = ASTCacheIndexStore(tmp_path / "index.db")
+        store.apply([self._row("a"), self._row("b")], [])
+        store.apply([self._row("a", access_count=3)], ["b"])
+
+        rows = store.load()
+        assert [row["cache_key"] for row in rows] == ["a"]
+        assert rows[0]["access_count"] == 3
+
+    def test_version_mismatch_clears_entries(self, tmp_path):
+        """测试格式版本变化时清空索引."""
+        store = ASTCacheIndexStore(tmp_path / "index.db", version="1")
+        store.apply([self._row("a")], [])
+
+        assert ASTCacheIndexStore(tmp_path / "index.db", version="2").load() == []
+
+    def test_concurrent_writers(self, tmp_path):
+        """测试多个存储实例并发写入同一索引库."""
+        import threading
+
+        db_path = tmp_path / "index.db"
+        ASTCacheIndexStore(db_path)
+
+        def writer(worker_id: int) -> None:
+            store = ASTCacheIndexStore(db_path)
+            for i in range(20):
+                store.apply([self._row(f"{worker_id}-{i}")], [])
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(ASTCacheIndexStore(db_path).load()) == 80
@@ -0,0 +1,88 @@
+"""AST 查询提取引擎测试."""
+
+import threading
+
+from ut_agent.tools.ast_cache import create_parser
+from ut_agent.tools.ast_queries import capture_nodes, get_query, node_text
+
+
+JAVA_SOURCE = b"""
+package com.example;
+
+import java.util.List;
+import static org.junit.Assert.*;
+
+public class UserService {
+    private String name;
+
+    public String getName() {
+        Runnable r = new Runnable() {
+            public void run() {}
+        };
+        return name;
+    }
+}
+"""
+
+TS_SOURCE = b"""
+import Vue, { ref } from 'vue'
+
+export function add(a: number, b: number): number {
+  return a + b
+}
+
+const count = 1
+const double = (x: number) => x * 2
+"""
+
+
+class TestCaptureNodes:
+    """capture_nodes 测试."""
+
+    def test_java_captures(self):
+        """测试 Java 一次查询捕获所有关注节点."""
+        tree = create_parser("java").parse(JAVA_SOURCE)
+        captures = capture_nodes(tree, "java")
+
+        assert [node_text(n) for n in captures["package"]] == ["com.example"]
+        assert [node_text(n) for n in captures["import"]] == ["java.util.List", "org.junit.Assert"]
+        assert [node_text(n) for n in captures["class.name"]] == ["UserService"]
+        assert len(captures["field"]) == 1
+
+        methods = captures["method"]
+        assert [m.child_by_field_name("name").text for m in methods] == [b"getName", b"run"]
+
+    def test_typescript_captures(self):
+        """测试 TypeScript 只捕获箭头函数形式的变量声明."""
+        tree = create_parser("typescript").parse(TS_SOURCE)
+        captures = capture_nodes(tree, "typescript")
+
+        assert len(captures["import"]) == 1
+        assert len(captures["function"]) == 1
+        assert [n.child_by_field_name("name").text for n in captures["arrow_function"]] == [b"double"]
+
+    def test_no_matches(self):
+        """测试无匹配时返回空映射."""
+        tree = create_parser("java").parse(b"")
+        assert capture_nodes(tree, "java").get("method", []) == []
+
+
+class TestGetQuery:
+    """get_query 测试."""
+
+    def test_query_is_cached_per_thread(self):
+        """测试查询按线程编译并缓存."""
+        results = {}
+
+        def compile_query(name: str) -> None:
+            results[name] = (get_query("java"), get_query("java"))
+
+        threads = [threading.Thread(target=compile_query, args=(str(i),)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        first, second = results["0"], results["1"]
+        assert first[0] is first[1]
+        assert first[0] is not second[0]
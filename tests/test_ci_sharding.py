@@ -0,0 +1,270 @@
+"""测试分片规划测试."""
+
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from ut_agent.ci.github_actions import GitHubActionsGenerator
+from ut_agent.ci.gitlab_ci import GitLabCIGenerator
+from ut_agent.ci.sharding import (
+    ShardManifest,
+    ShardPlanner,
+    estimate_durations,
+    main,
+    collect_selected_tests,
+    shard_test_command,
+)
+from ut_agent.selection.test_selector import SelectionResult, TaskType, TestTask
+from ut_agent.tools.flaky_detector import TestExecution, TestStatus
+
+
+def _execution(test_class, method, duration_ms, minutes_ago=0):
+    return TestExecution(
+        test_id=f"{test_class}#{method}",
+        test_class=test_class,
+        test_method=method,
+        status=TestStatus.PASSED,
+        duration_ms=duration_ms,
+        timestamp=datetime(2026, 1, 1) - timedelta(minutes=minutes_ago),
+    )
+
+
+@pytest.fixture
+def manifest():
+    """两个分片的清单."""
+    durations = {"a": 7.0, "b": 5.0, "c": 4.0, "d": 3.0, "e": 1.0}
+    return ShardPlanner(num_shards=2).plan(list(durations), durations)
+
+
+class TestEstimateDurations:
+    """历史耗时估算测试."""
+
+    def test_median_of_recent_executions(self):
+        """测试取最近执行耗时的中位数，并按测试类汇总."""
+        history = {
+            "com.a.FooTest#testA": [
+                _execution("com.a.FooTest", "testA", d, minutes_ago=i)
+                for i, d in enumerate([100, 120, 5000, 110, 90])
+            ],
+            "com.a.FooTest#testB": [_execution("com.a.FooTest", "testB", 50)],
+            "empty": [],
+        }
+
+        durations = estimate_durations(history)
+
+        assert durations["FooTest#testA"] == 110
+        assert durations["FooTest#testB"] == 50
+        assert durations["FooTest"] == 160
+
+    def test_only_recent_executions_used(self):
+        """测试只使用最近的执行记录."""
+        executions = [_execution("FooTest", "testA", 10_000, minutes_ago=100 + i) for i in range(20)]
+        executions += [_execution("FooTest", "testA", 10, minutes_ago=i) for i in range(10)]
+
+        assert estimate_durations({"FooTest#testA": executions})["FooTest#testA"] == 10
+
+
+class TestShardPlanner:
+    """分片规划器测试."""
+
+    def test_lpt_balances_shards(self, manifest):
+        """测试按最长处理时间优先分配."""
+        assert [shard.tests for shard in manifest.shards] == [["a", "d"], ["b", "c", "e"]]
+        assert manifest.makespan_ms == 10.0
+        assert manifest.total_ms == 20.0
+
+    def test_file_and_method_durations(self):
+        """测试按测试文件和测试方法查找历史耗时."""
+        durations = {"FooTest": 300.0, "BarTest#testX": 40.0}
+        planner = ShardPlanner(num_shards=2)
+
+        assert planner._estimate("src/test/java/com/a/FooTest.java", durations) == 300.0
+        assert planner._estimate("src/test/java/BarTest.java#testX", durations) == 40.0
+        assert planner._estimate("src/test/java/BarTest.java", durations) is None
+
+    def test_unknown_tests_use_median(self):
+        """测试无历史数据的测试使用已知耗时的中位数."""
+        manifest = ShardPlanner(num_shards=3).plan(["a", "b", "c", "x"], {"a": 10, "b": 20, "c": 60})
+
+        assert manifest.default_duration_ms == 20
+        assert sum(shard.estimated_ms for shard in manifest.shards) == 110
+
+    def test_fewer_tests_than_shards(self):
+        """测试测试数少于分片数时不产生空分片."""
+        assert ShardPlanner(num_shards=8).plan(["a", "b"]).shard_count == 2
+
+    def test_no_tests_no_shards(self):
+        """测试没有选中测试时不产生分片."""
+        manifest = ShardPlanner(num_shards=4).plan([])
+
+        assert manifest.shard_count == 0
+        assert manifest.makespan_ms == 0.0
+
+    def test_invalid_shard_count(self):
+        """测试分片数必须为正数."""
+        with pytest.raises(ValueError):
+            ShardPlanner(num_shards=0)
+
+    def test_plan_selection(self):
+        """测试从选择结果提取测试并合并同一文件的任务."""
+        selection = SelectionResult()
+        selection.add_task(TestTask("Foo.java", TaskType.VERIFY, test_file="FooTest.java", methods=["testA"]))
+        selection.add_task(TestTask("Foo.java", TaskType.UPDATE_EXISTING, test_file="FooTest.java", methods=["testB", "testA"]))
+        selection.add_task(TestTask("Bar.java", TaskType.VERIFY, test_file="BarTest.java", methods=["testC"]))
+        selection.add_task(TestTask("Bar.java", TaskType.UPDATE_EXISTING, test_file="BarTest.java"))
+        selection.add_task(TestTask("New.java", TaskType.GENERATE_NEW))
+        selection.add_task(TestTask("Old.java", TaskType.DEPRECATE, test_file="OldTest.java"))
+
+        assert collect_selected_tests(selection) == [
+            "FooTest.java#testB", "FooTest.java#testA", "BarTest.java",
+        ]
+        assert ShardPlanner(num_shards=1).plan_selection(selection).tests_for(0) == [
+            "BarTest.java", "FooTest.java#testA", "FooTest.java#testB",
+        ]
+
+
+class TestShardManifest:
+    """分片清单测试."""
+
+    def test_save_and_load(self, manifest, tmp_path):
+        """测试清单持久化."""
+        path = tmp_path / "shards.json"
+        manifest.save(str(path))
+
+        loaded = ShardManifest.load(str(path))
+
+        assert loaded.to_dict() == manifest.to_dict()
+
+    def test_unsupported_version(self):
+        """测试不支持的清单版本."""
+        with pytest.raises(ValueError):
+            ShardManifest.from_dict({"version": 99, "shards": []})
+
+    def test_main_prints_shard_tests(self, manifest, tmp_path, capsys):
+        """测试命令行输出分片中的测试."""
+        path = tmp_path / "shards.json"
+        manifest.save(str(path))
+
+        assert main([str(path), "1"]) == 0
+        assert capsys.readouterr().out.strip() == "b c e"
+        assert main([]) == 2
+
+    def test_main_prints_pytest_node_ids(self, tmp_path, capsys):
+        """测试方法级测试输出为 pytest 节点 ID，raw 格式保留原始标识."""
+        path = tmp_path / "shards.json"
+        ShardPlanner(num_shards=1).plan(["tests/test_a.py#test_x", "tests/test_b.py"]).save(str(path))
+        capsys.readouterr()
+
+        assert main([str(path), "0"]) == 0
+        assert capsys.readouterr().out.split() == ["tests/test_a.py::test_x", "tests/test_b.py"]
+        assert main(["--format", "raw", str(path), "0"]) == 0
+        assert capsys.readouterr().out.split() == ["tests/test_a.py#test_x", "tests/test_b.py"]
+
+    def test_main_missing_shard_prints_nothing(self, tmp_path, capsys):
+        """测试分片不存在时不输出测试."""
+        path = tmp_path / "shards.json"
+        ShardPlanner(num_shards=2).plan([]).save(str(path))
+        capsys.readouterr()
+
+        assert main([str(path), "0"]) == 0
+        assert main([str(path), "-1"]) == 0
+        assert capsys.readouterr().out == ""
+
+
+class TestShardedCIConfig:
+    """分片 CI 配置生成测试."""
+
+    def test_github_actions_matrix(self, manifest):
+        """测试 GitHub Actions 分片矩阵."""
+        workflow = GitHubActionsGenerator().generate_sharded_test_workflow(manifest)
+
+        job = workflow.jobs["test"]
+        assert job.strategy["matrix"]["shard"] == [0, 1]
+        yaml_content = workflow.to_yaml()
+        assert "shard: [0, 1]" in yaml_content
+        assert (
+            "python -m ut_agent.ci.sharding --format pytest .ut-agent/shards.json "
+            "${{ matrix.shard }}"
+        ) in yaml_content
+        assert "pip install -r requirements.txt" in yaml_content
+        assert "requirements-dev.txt" not in yaml_content
+
+    def test_github_actions_options(self, manifest):
+        """测试 Python 版本和安装命令来自生成参数."""
+        workflow = GitHubActionsGenerator().generate_sharded_test_workflow(
+            manifest,
+            python_versions=["3.11", "3.12"],
+            install_command="pip install -e .[dev]",
+        )
+
+        job = workflow.jobs["test"]
+        assert job.strategy["matrix"]["python-version"] == ["3.11", "3.12"]
+        runs = [step.run for step in job.steps]
+        assert "pip install -e .[dev]" in runs
+        assert "pip install -r requirements.txt" not in runs
+
+    def test_github_actions_empty_manifest(self):
+        """测试没有分片时仍生成一个会跳过测试的任务."""
+        manifest = ShardPlanner(num_shards=2).plan([])
+
+        workflow = GitHubActionsGenerator().generate_sharded_test_workflow(manifest)
+
+        assert workflow.jobs["test"].strategy["matrix"]["shard"] == [0]
+
+    def test_gitlab_parallel(self, manifest):
+        """测试 GitLab CI 并行实例."""
+        config = GitLabCIGenerator().generate_sharded_test_config(manifest, test_command="mvn test -Dtest=")
+
+        job = config.jobs["pytest-sharded"]
+        assert job["parallel"] == 2
+        yaml_content = config.to_yaml()
+        assert "parallel: 2" in yaml_content
+        assert "$((${CI_NODE_INDEX:-1} - 1))" in yaml_content
+
+
+class TestShardCommand:
+    """分片 shell 命令测试."""
+
+    @staticmethod
+    def _run(command, cwd):
+        return subprocess.run(
+            ["bash", "-c", command],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+
+    def test_pytest_collects_shard(self, tmp_path):
+        """测试生成的命令行能被 pytest 收集."""
+        tests_dir = tmp_path / "tests"
+        tests_dir.mkdir()
+        (tests_dir / "test_a.py").write_text("def test_x():\n    pass\n\ndef test_y():\n    pass\n")
+        (tests_dir / "test_b.py").write_text("def test_z():\n    pass\n")
+        ShardPlanner(num_shards=1).plan(
+            ["tests/test_a.py#test_x", "tests/test_b.py"]
+        ).save(str(tmp_path / "shards.json"))
+
+        command = shard_test_command(
+            f"{sys.executable} -m pytest --collect-only -q -p no:cacheprovider",
+            "shards.json",
+            "0",
+        )
+        result = self._run(command, tmp_path)
+
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "tests/test_a.py::test_x" in result.stdout
+        assert "tests/test_b.py::test_z" in result.stdout
+        assert "test_y" not in result.stdout
+
+    def test_empty_shard_skips_test_command(self, tmp_path):
+        """测试空分片不执行测试命令."""
+        ShardPlanner(num_shards=2).plan([]).save(str(tmp_path / "shards.json"))
+
+        result = self._run(shard_test_command("false", "shards.json", "0"), tmp_path)
+
+        assert result.returncode == 0
+        assert "No tests selected" in result.stdout
@@ -5,12 +5,17 @@ from pathlib import Path
 
 import pytest
 
+from ut_agent.tools import code_analyzer
+from ut_agent.tools.ast_cache import ASTCacheManager
 from ut_agent.tools.code_analyzer import (
     ClassInfo,
     MethodInfo,
     analyze_java_file,
+    analyze_java_file_in_worker,
     analyze_ts_file,
+    analyze_ts_file_in_worker,
     extract_dependencies,
+    init_analysis_worker,
     find_testable_methods,
     parse_ts_params,
 )
@@ -163,6 +168,37 @@ public class UserService {
         with pytest.raises(FileReadError):
             analyze_java_file("/nonexistent/path/File.java")
 
+    def test_worker_analysis_matches_thread_analysis(self, java_file):
+        """测试进程池工作函数与常规分析结果一致."""
+        init_analysis_worker()
+        assert analyze_java_file_in_worker(java_file) == analyze_java_file(java_file)
+
+    def test_worker_analysis_nonexistent_file(self):
+        """测试工作函数分析不存在的文件."""
+        from ut_agent.exceptions import FileReadError
+        with pytest.raises(FileReadError):
+            analyze_java_file_in_worker("/nonexistent/path/File.java")
+
+    def test_warm_run_reuses_persisted_analysis(self, java_file, tmp_path, monkeypatch):
+        """测试文件未变时新进程直接复用磁盘上的分析结果，不再解析和查询."""
+        cache_dir = tmp_path / "ast_cache"
+        ASTCacheManager.reset_instance()
+        ASTCacheManager(cache_dir)
+        try:
+            cold = analyze_java_file(java_file)
+
+            ASTCacheManager.reset_instance()
+            ASTCacheManager(cache_dir)
+
+            def fail(*args, **kwargs):
+                raise AssertionError("文件未变时不应重新分析")
+
+            monkeypatch.setattr(ASTCacheManager, "get_tree", fail)
+            monkeypatch.setattr(code_analyzer, "_build_java_analysis", fail)
+            assert analyze_java_file(java_file) == cold
+        finally:
+            ASTCacheManager.reset_instance()
+
 
 class TestAnalyzeTsFile:
     """TypeScript 文件分析测试."""
@@ -253,6 +289,17 @@ async function fetchUsers() {
         assert "formatDate" in func_names
         assert "fetchUsers" in func_names
 
+    def test_non_arrow_declarators_are_not_functions(self, ts_file):
+        """测试普通变量声明不会被识别为箭头函数."""
+        result = analyze_ts_file(ts_file)
+
+        func_names = [f["name"] for f in result["functions"]]
+        assert "users" not in func_names
+        assert "userCount" not in func_names
+        arrow = next(f for f in result["functions"] if f["name"] == "formatDate")
+        assert arrow["type"] == "arrow_function"
+        assert arrow["parameters"] == [{"name": "date", "type": "Date"}]
+
     def test_analyze_vue_file(self, vue_file):
         """测试 Vue 文件分析."""
         result = analyze_ts_file(vue_file)
@@ -261,6 +308,12 @@ async function fetchUsers() {
         assert result["is_vue"] is True
         assert "has_setup" in result["component_info"]
 
+    def test_worker_analysis_matches_thread_analysis(self, ts_file, vue_file):
+        """测试进程池工作函数与常规分析结果一致."""
+        init_analysis_worker()
+        assert analyze_ts_file_in_worker(ts_file) == analyze_ts_file(ts_file)
+        assert analyze_ts_file_in_worker(vue_file) == analyze_ts_file(vue_file)
+
     def test_analyze_nonexistent_ts_file(self):
         """测试分析不存在的 TypeScript 文件."""
         with pytest.raises(FileNotFoundError):
@@ -0,0 +1,126 @@
+"""紧凑 AST 表示测试."""
+
+import pickle
+
+import pytest
+
+from ut_agent.tools.ast_cache import create_parser, serialize_tree
+from ut_agent.tools.compact_ast import CompactAST, CompactNode
+
+
+JAVA_SOURCE = """
+package com.example;
+
+import java.util.List;
+
+public class UserService {
+    private String name;
+
+    public String getName(int id) {
+        return "}" + name;
+    }
+
+    public void setName(String name) {
+        this.name = name;
+    }
+}
+"""
+
+
+def _reference_dict(node):
+    """旧的嵌套字典序列化（用于对比）."""
+    return {
+        "type": node.type,
+        "start_byte": node.start_byte,
+        "end_byte": node.end_byte,
+        "start_point": {"row": node.start_point.row, "column": node.start_point.column},
+        "end_point": {"row": node.end_point.row, "column": node.end_point.column},
+        "text": node.text.decode("utf-8"),
+        "children": [_reference_dict(node.child(i)) for i in range(node.child_count)],
+    }
+
+
+@pytest.fixture
+def java_tree():
+    source = JAVA_SOURCE.encode("utf-8")
+    tree = create_parser("java").parse(source)
+    return tree, serialize_tree(tree, source)
+
+
+class TestCompactAST:
+    """CompactAST 测试."""
+
+    def test_node_count_matches_tree(self, java_tree):
+        """测试节点数与语法树一致."""
+        tree, compact = java_tree
+        assert len(compact) == len(list(compact.root.walk()))
+        assert compact.root.type == tree.root_node.type
+
+    def test_round_trip_matches_nested_dict(self, java_tree):
+        """测试展开结果与旧的嵌套字典格式一致."""
+        tree, compact = java_tree
+        assert compact.root.to_dict() == _reference_dict(tree.root_node)
+
+    def test_parent_and_children_links(self, java_tree):
+        """测试父子关系."""
+        _, compact = java_tree
+        root = compact.root
+        assert root.parent is None
+        for child in root.children:
+            assert child.parent == root
+
+    def test_find_all(self, java_tree):
+        """测试按类型查找节点."""
+        _, compact = java_tree
+        methods = compact.root.find_all("method_declaration")
+        assert len(methods) == 2
+        names = [
+            next(c.text for c in m.children if c.type == "identifier")
+            for m in methods
+        ]
+        assert names == ["getName", "setName"]
+        assert compact.root.find_all("no_such_type") == []
+
+    def test_text_is_sliced_from_source(self, java_tree):
+        """测试节点文本按需从源码切片."""
+        _, compact = java_tree
+        package = compact.root.find_all("package_declaration")[0]
+        assert package.text == "package com.example;"
+
+    def test_pickle_round_trip(self, java_tree):
+        """测试序列化后可恢复."""
+        _, compact = java_tree
+        restored = pickle.loads(pickle.dumps(compact))
+        assert isinstance(restored, CompactAST)
+        assert restored.root.to_dict() == compact.root.to_dict()
+        assert len(restored.root.find_all("method_declaration")) == 2
+
+    def test_empty_source(self):
+        """测试空源码."""
+        tree = create_parser("java").parse(b"")
+        compact = serialize_tree(tree, b"")
+        assert len(compact) == 1
+        assert compact.root.children == []
+
+
+class TestCompactNodeDictAccess:
+    """CompactNode 字典兼容访问测试."""
+
+    def test_get_known_keys(self, java_tree):
+        """测试字典式读取."""
+        _, compact = java_tree
+        root = compact.root
+        assert root.get("type") == "program"
+        assert root["end_byte"] == root.end_byte
+        assert root.get("start_point", {}).get("row", 0) == root.start_point["row"]
+        assert isinstance(root.get("children"), list)
+        assert all(isinstance(c, CompactNode) for c in root.get("children", []))
+
+    def test_get_unknown_key(self, java_tree):
+        """测试未知键返回默认值."""
+        _, compact = java_tree
+        assert compact.root.get("unknown", "default") == "default"
+        assert "type" in compact.root
+        assert "unknown" not in compact.root
+        with pytest.raises(KeyError):
+            compact.root["unknown"]
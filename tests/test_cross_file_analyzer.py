@@ -13,6 +13,7 @@ from ut_agent.tools.cross_file_analyzer import (
     CrossFileAnalyzer,
     DependencyInfo,
     ProjectIndex,
+    ProjectIndexStore,
     SymbolInfo,
 )
 
@@ -230,49 +231,22 @@ class TestProjectIndex:
             assert "com.example.UserService" in index.symbols
             assert "com.example.UserService.getUser" in index.symbols
 
-    def test_is_index_valid_no_index_file(self):
-        """测试索引文件不存在."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            index = ProjectIndex(tmpdir)
-            assert index._is_index_valid() is False
+    def test_build_index_skips_unchanged_files(self):
+        """测试 stat 未变的文件无需重新读取即可确认索引有效."""
+        import time
 
-    def test_is_index_valid_with_valid_index(self):
-        """测试有效的索引文件."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            index = ProjectIndex(tmpdir)
-
-            # 创建一个 Java 文件
-            java_file = Path(tmpdir) / "Test.java"
-            java_file.write_text("public class Test {}")
-
-            # 手动设置文件哈希
-            import hashlib
-
-            content = java_file.read_text()
-            file_hash = hashlib.md5(content.encode()).hexdigest()
-            index._file_hashes[str(java_file)] = file_hash
-
-            # 保存索引
-            index._save_index()
-
-            # 检查索引是否有效
-            assert index._is_index_valid() is True
-
-    def test_is_index_valid_file_changed(self):
-        """测试文件变更后的索引无效."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            index = ProjectIndex(tmpdir)
-
-            # 创建索引文件
-            index.index_file.parent.mkdir(parents=True, exist_ok=True)
-            index._file_hashes[str(Path(tmpdir) / "Test.java")] = "old_hash"
-            index._save_index()
+            java_file = Path(tmpdir) / "Main.java"
+            java_file.write_text("public class Main {}")
+            old = time.time() - 60
+            os.utime(java_file, (old, old))
 
-            # 创建新文件（不同内容）
-            java_file = Path(tmpdir) / "Test.java"
-            java_file.write_text("public class Test {}")
+            ProjectIndex(tmpdir).build_index()
 
-            assert index._is_index_valid() is False
+            reloaded = ProjectIndex(tmpdir)
+            with patch.object(Path, "read_bytes", side_effect=AssertionError("should not read")):
+                reloaded.build_index()
+            assert str(java_file) in reloaded.indexed_files()
 
     def test_save_and_load_index(self):
         """测试保存和加载索引."""
@@ -281,7 +255,7 @@ class TestProjectIndex:
 
             # 添加一些数据
             index.symbols["Test"] = SymbolInfo(name="Test", type="class", file_path="/Test.java")
-            index.dependencies.append(
+            index._add_dependency(
                 DependencyInfo(
                     source_file="/A.java",
                     target_file="/B.java",
@@ -423,6 +397,301 @@ class TestProjectIndex:
             assert "/UserController.java" in dependents
 
 
+class TestIncrementalBuildIndex:
+    """ProjectIndex 增量构建测试."""
+
+    @staticmethod
+    def _write_project(root: Path) -> Path:
+        src = root / "src"
+        src.mkdir()
+        (src / "Repository.java").write_text(
+            "package com.example;\n"
+            "public abstract class Repository {}\n"
+        )
+        (src / "UserService.java").write_text(
+            "package com.example;\n"
+            "import java.util.List;\n"
+            "public class UserService implements Repository {\n"
+            "    public void getUser() {}\n"
+            "}\n"
+        )
+        return src
+
+    def test_unchanged_project_is_not_reanalyzed(self):
+        """测试文件未变化时不重新分析."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_project(Path(tmpdir))
+            ProjectIndex(tmpdir).build_index()
+
+            index = ProjectIndex(tmpdir)
+            with patch("ut_agent.tools.cross_file_analyzer.analyze_java_file") as mock_analyze:
+                index.build_index()
+
+            mock_analyze.assert_not_called()
+            assert "com.example.UserService.getUser" in index.symbols
+            assert index.find_implementations("Repository")
+
+    def test_only_changed_file_is_reindexed(self):
+        """测试只重新索引修改的文件."""
+        from ut_agent.tools import cross_file_analyzer
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = self._write_project(Path(tmpdir))
+            index = ProjectIndex(tmpdir)
+            index.build_index()
+
+            service = src / "UserService.java"
+            service.write_text(
+                "package com.example;\n"
+                "public class UserService {\n"
+                "    public void findUser() {}\n"
+                "}\n"
+            )
+
+            with patch.object(
+                cross_file_analyzer, "analyze_java_file",
+                wraps=cross_file_analyzer.analyze_java_file,
+            ) as mock_analyze:
+                index.build_index()
+
+            mock_analyze.assert_called_once_with(str(service))
+            assert "com.example.UserService.getUser" not in index.symbols
+            assert "com.example.UserService.findUser" in index.symbols
+            assert "com.example.Repository" in index.symbols
+            assert index.find_implementations("Repository") == []
+            assert index.relationships["UserService"].interfaces == []
+            assert not [d for d in index.dependencies if d.target_file == "java.util.List"]
+
+    def test_added_and_deleted_files(self):
+        """测试新增和删除文件."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = self._write_project(Path(tmpdir))
+            ProjectIndex(tmpdir).build_index()
+
+            (src / "Repository.java").unlink()
+            (src / "OrderService.java").write_text(
+                "package com.example;\n"
+                "public class OrderService extends UserService {}\n"
+            )
+
+            index = ProjectIndex(tmpdir)
+            index.build_index()
+
+            assert "com.example.Repository" not in index.symbols
+            assert "Repository" not in index.relationships
+            assert str(src / "Repository.java") not in index._file_hashes
+            assert index.find_subclasses("UserService") == [str(src / "OrderService.java")]
+            assert "com.example.UserService" in index.symbols
+
+            # 变更已持久化
+            reloaded = ProjectIndex(tmpdir)
+            reloaded._load_index()
+            assert "com.example.OrderService" in reloaded.symbols
+            assert "com.example.Repository" not in reloaded.symbols
+
+    def test_force_rebuild_reindexes_all_files(self):
+        """测试强制重建会重新索引全部文件."""
+        from ut_agent.tools import cross_file_analyzer
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_project(Path(tmpdir))
+            index = ProjectIndex(tmpdir)
+            index.build_index()
+
+            with patch.object(
+                cross_file_analyzer, "analyze_java_file",
+                wraps=cross_file_analyzer.analyze_java_file,
+            ) as mock_analyze:
+                index.build_index(force_rebuild=True)
+
+            assert mock_analyze.call_count == 2
+            assert len(index.find_implementations("Repository")) == 1
+
+    def test_find_source_files_prunes_excluded_directories(self):
+        """测试不进入被排除的目录."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = self._write_project(Path(tmpdir))
+            (Path(tmpdir) / "build" / "gen").mkdir(parents=True)
+            (Path(tmpdir) / "build" / "gen" / "Gen.java").write_text("class Gen {}")
+
+            index = ProjectIndex(tmpdir)
+            walked = []
+            real_walk = os.walk
+
+            def recording_walk(top):
+                for entry in real_walk(top):
+                    walked.append(entry[0])
+                    yield entry
+
+            with patch("ut_agent.tools.cross_file_analyzer.os.walk", side_effect=recording_walk):
+                files = index._find_source_files()
+
+            assert sorted(files) == sorted(str(p) for p in src.glob("*.java"))
+            assert not any("build" in path for path in walked)
+
+
+class TestSecondaryIndexes:
+    """ProjectIndex 二级索引测试."""
+
+    @staticmethod
+    def _populate(index: ProjectIndex) -> None:
+        index._add_symbol("com.a.Service", SymbolInfo(name="Service", type="class", file_path="/a/Service.java"))
+        index._add_symbol("com.a.Service.run", SymbolInfo(name="run", type="method", file_path="/a/Service.java"))
+        index._add_symbol("com.b.Repo", SymbolInfo(name="Repo", type="class", file_path="/b/Repo.java"))
+        index._add_dependency(DependencyInfo("/a/Service.java", "Repo", "import"))
+        index._add_dependency(DependencyInfo("/a/Service.java", "Base", "extends"))
+        index._add_dependency(DependencyInfo("/a/Service.java", "Api", "implements"))
+        index._add_dependency(DependencyInfo("/c/Other.java", "Api", "implements"))
+
+    def test_queries_use_indexes(self):
+        """测试查询结果."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+
+            assert index.find_symbol("Repo").file_path == "/b/Repo.java"
+            assert [s.name for s in index.get_file_symbols("/a/Service.java")] == ["Service", "run"]
+            assert index.find_implementations("Api") == ["/a/Service.java", "/c/Other.java"]
+            assert index.find_subclasses("Base") == ["/a/Service.java"]
+            assert sorted(index.get_file_dependencies("/a/Service.java")) == ["/b/Repo.java", "Api", "Base"]
+            assert index.get_dependent_files("/b/Repo.java") == ["/a/Service.java"]
+
+    def test_remove_files_updates_indexes(self):
+        """测试移除文件后二级索引同步更新."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+
+            index._remove_files({"/a/Service.java", "/b/Repo.java"})
+
+            assert index.find_symbol("Repo") is None
+            assert index.get_file_symbols("/a/Service.java") == []
+            assert index.find_implementations("Api") == ["/c/Other.java"]
+            assert index.find_subclasses("Base") == []
+            assert index.get_file_dependencies("/a/Service.java") == []
+            assert len(index.dependencies) == 1
+
+    def test_overwritten_symbol_moves_to_new_file(self):
+        """测试同名符号被覆盖时索引指向新文件."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            index._add_symbol("Dup", SymbolInfo(name="Dup", type="class", file_path="/old/Dup.java"))
+            index._add_symbol("Dup", SymbolInfo(name="Dup", type="class", file_path="/new/Dup.java"))
+
+            assert index.get_file_symbols("/old/Dup.java") == []
+            index._remove_files({"/old/Dup.java"})
+            assert index.find_symbol("Dup").file_path == "/new/Dup.java"
+
+    def test_direct_mutation_rebuilds_indexes(self):
+        """测试直接修改符号表和依赖列表并递增版本后查询仍然正确."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+
+            index.symbols["com.c.Late"] = SymbolInfo(
+                name="Late", type="class", file_path="/c/Late.java"
+            )
+            index.dependencies = [DependencyInfo("/d/D.java", "Late", "extends")]
+            index.version += 1
+
+            assert index.find_symbol("Late").file_path == "/c/Late.java"
+            assert index.find_subclasses("Late") == ["/d/D.java"]
+            assert index.find_implementations("Api") == []
+
+    def test_index_updates_bump_version(self):
+        """测试索引自身的增删都会递增版本，且二级索引保持同步."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+            index.find_symbol("Repo")
+
+            version = index.version
+            index._add_symbol(
+                "com.b.Repo", SymbolInfo(name="Store", type="class", file_path="/b/Repo.java")
+            )
+            assert index.version > version
+            assert index.find_symbol("Store").file_path == "/b/Repo.java"
+
+            version = index.version
+            index._add_dependency(DependencyInfo("/d/D.java", "Late", "extends"))
+            assert index.version > version
+            assert index.find_subclasses("Late") == ["/d/D.java"]
+
+            version = index.version
+            index._remove_files({"/d/D.java"})
+            assert index.version > version
+            assert index.find_subclasses("Late") == []
+
+    def test_load_restores_indexes(self):
+        """测试加载后二级索引由按文件保存的记录重建."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+            index._save_index()
+
+            reloaded = ProjectIndex(tmpdir)
+            reloaded._load_index()
+
+            assert reloaded.find_symbol("run").name == "run"
+            assert reloaded.find_implementations("Api") == ["/a/Service.java", "/c/Other.java"]
+            assert reloaded.get_file_dependencies("/c/Other.java") == ["Api"]
+            assert [s.name for s in reloaded.get_file_symbols("/a/Service.java")] == [
+                "Service", "run",
+            ]
+
+    def test_save_writes_only_changed_files(self):
+        """测试增量更新后只写入变化文件的记录."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+            index._save_index()
+
+            index._remove_files({"/c/Other.java"})
+            index._add_dependency(DependencyInfo("/b/Repo.java", "Base", "extends"))
+            with patch.object(
+                ProjectIndexStore, "apply", wraps=index._get_store().apply
+            ) as mock_apply:
+                index._save_index()
+
+            upserts, deletes = mock_apply.call_args.args[:2]
+            assert [file_path for file_path, _ in upserts] == ["/b/Repo.java"]
+            assert deletes == ["/c/Other.java"]
+            assert mock_apply.call_args.kwargs["replace_all"] is False
+
+            reloaded = ProjectIndex(tmpdir)
+            reloaded._load_index()
+            assert reloaded.find_implementations("Api") == ["/a/Service.java"]
+            assert sorted(reloaded.find_subclasses("Base")) == ["/a/Service.java", "/b/Repo.java"]
+
+    def test_remove_files_uses_per_file_maps(self):
+        """测试移除文件只删除该文件的依赖和类关系."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+            for name, file_path in (("Service", "/a/Service.java"), ("Other", "/c/Other.java")):
+                index._add_relationship(ClassRelationship(class_name=name, file_path=file_path))
+
+            index._remove_files({"/a/Service.java"})
+
+            assert [d.source_file for d in index.dependencies] == ["/c/Other.java"]
+            assert list(index.relationships) == ["Other"]
+            assert "/a/Service.java" not in index._relationships_by_file
+
+    def test_legacy_json_index_is_removed(self):
+        """测试旧版 JSON 索引不再使用并被删除."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            legacy = Path(tmpdir) / ".ut-agent" / "index.json"
+            legacy.parent.mkdir()
+            legacy.write_text(json.dumps({"symbols": {}}), encoding="utf-8")
+
+            index = ProjectIndex(tmpdir)
+            self._populate(index)
+            index._save_index()
+
+            assert not legacy.exists()
+            assert index.index_file.exists()
+
+
 class TestCrossFileAnalyzer:
     """CrossFileAnalyzer 测试."""
 
@@ -0,0 +1,121 @@
+"""文件指纹模块测试."""
+
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ut_agent.utils import file_fingerprint
+from ut_agent.utils.file_fingerprint import (
+    RACY_WINDOW_NS,
+    FileManifest,
+    FileSignature,
+    fast_hash,
+    is_signature_current,
+    stat_signature,
+)
+
+
+def _age(path: Path, seconds: int = 60) -> None:
+    """把文件修改时间调到过去，使其离开可疑时间窗口."""
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+class TestFastHash:
+    """fast_hash 测试."""
+
+    def test_deterministic(self):
+        """测试相同内容哈希一致."""
+        assert fast_hash(b"abc") == fast_hash(b"abc")
+        assert fast_hash(b"abc") != fast_hash(b"abd")
+
+    def test_blake2b_fallback(self):
+        """测试 xxhash 不可用时回退到 BLAKE2b."""
+        with patch.object(file_fingerprint, "XXHASH_AVAILABLE", False):
+            digest = fast_hash(b"abc")
+        assert len(digest) == 32
+        assert digest == fast_hash.__globals__["hashlib"].blake2b(b"abc", digest_size=16).hexdigest()
+
+
+class TestSignature:
+    """stat 签名测试."""
+
+    def test_stat_signature_missing_file(self, tmp_path):
+        """测试不存在的文件."""
+        assert stat_signature(tmp_path / "missing") is None
+
+    def test_racy_signature_is_not_trusted(self, tmp_path):
+        """测试修改时间过近的签名不可信."""
+        path = tmp_path / "a.txt"
+        path.write_text("a")
+        signature = stat_signature(path)
+
+        assert is_signature_current(signature, time.time_ns(), signature) is False
+        assert is_signature_current(signature, signature.mtime_ns + RACY_WINDOW_NS + 1, signature) is True
+
+    def test_changed_signature(self):
+        """测试签名变化."""
+        old = FileSignature(1, 10, 100)
+        assert is_signature_current(old, 10**20, FileSignature(1, 11, 100)) is False
+        assert is_signature_current(old, 10**20, None) is False
+
+
+class TestFileManifest:
+    """FileManifest 测试."""
+
+    def test_unchanged_file_is_not_read(self, tmp_path):
+        """测试 stat 未变的文件不会被重新读取."""
+        path = tmp_path / "A.java"
+        path.write_text("class A {}")
+        _age(path)
+        manifest = FileManifest()
+        first = manifest.get_hash(str(path))
+
+        with patch.object(Path, "read_bytes", side_effect=AssertionError("should not read")):
+            assert manifest.get_hash(str(path)) == first
+
+    def test_modified_file_is_rehashed(self, tmp_path):
+        """测试修改过的文件重新计算哈希."""
+        path = tmp_path / "A.java"
+        path.write_text("class A {}")
+        _age(path, 120)
+        manifest = FileManifest()
+        first = manifest.get_hash(str(path))
+
+        path.write_text("class A { int x; }")
+        _age(path, 60)
+
+        assert manifest.get_hash(str(path)) != first
+
+    def test_deleted_file(self, tmp_path):
+        """测试文件删除后返回 None 并移除记录."""
+        path = tmp_path / "A.java"
+        path.write_text("class A {}")
+        manifest = FileManifest()
+        manifest.get_hash(str(path))
+        path.unlink()
+
+        assert manifest.get_hash(str(path)) is None
+        assert str(path) not in manifest
+
+    def test_round_trip(self, tmp_path):
+        """测试序列化与恢复."""
+        path = tmp_path / "A.java"
+        path.write_text("class A {}")
+        _age(path)
+        manifest = FileManifest()
+        content_hash = manifest.get_hash(str(path))
+
+        restored = FileManifest.from_dict(manifest.to_dict())
+
+        assert restored.stored_hash(str(path)) == content_hash
+        with patch.object(Path, "read_bytes", side_effect=AssertionError("should not read")):
+            assert restored.get_hash(str(path)) == content_hash
+
+    @pytest.mark.parametrize("data", [None, {}, {"algorithm": "md5", "files": {"a": {}}}])
+    def test_incompatible_data_yields_empty_manifest(self, data):
+        """测试缺失或算法不一致的数据得到空清单."""
+        assert len(FileManifest.from_dict(data)) == 0
@@ -1,16 +1,21 @@
 """Git分析器测试."""
 
+import subprocess
+
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 
 from ut_agent.tools.git_analyzer import (
     GitAnalyzer,
+    NumstatEntry,
     CodeChange,
     MethodChange,
     ChangeType,
     filter_source_files,
     get_changed_methods,
+    _parse_numstat_z,
+    _split_diff_blocks,
 )
 
 
@@ -116,6 +121,115 @@ index 1234567..abcdefg 100644
             assert len(change.deleted_lines) == 1
 
 
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """包含修改、新增、删除、重命名和二进制文件变更的仓库."""
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "dev@example.com")
+    _git(tmp_path, "config", "user.name", "dev")
+    long_dir = tmp_path / "src" / ("very_long_directory_name_" * 4) / "nested"
+    long_dir.mkdir(parents=True)
+    (long_dir / "Service.java").write_text("class Service {\n    int a;\n}\n")
+    (tmp_path / "Old Name.java").write_text("".join(f"line {i}\n" for i in range(20)))
+    (tmp_path / "Removed.java").write_text("class Removed {}\n")
+    (tmp_path / "logo.bin").write_bytes(b"\x00\x01\x02")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+
+    (long_dir / "Service.java").write_text("class Service {\n    int b;\n}\n")
+    _git(tmp_path, "mv", "Old Name.java", "New Name.java")
+    (tmp_path / "Removed.java").unlink()
+    (tmp_path / "Added.java").write_text("class Added {}\n")
+    (tmp_path / "logo.bin").write_bytes(b"\x00\x03")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "change")
+    return tmp_path
+
+
+class TestCollectChanges:
+    """单次调用收集变更测试."""
+
+    def test_parse_numstat_z(self):
+        """测试解析 -z 格式的 numstat（重命名与二进制文件）."""
+        output = "1\t2\ta b.java\0-\t-\tlogo.bin\0" "0\t0\t\0old.java\0new.java\0"
+
+        assert _parse_numstat_z(output) == [
+            NumstatEntry("a b.java", 1, 2),
+            NumstatEntry("logo.bin", None, None),
+            NumstatEntry("new.java", 0, 0, "old.java"),
+        ]
+
+    def test_split_diff_blocks(self):
+        """测试按文件分块且不受内容行影响."""
+        lines = [
+            "diff --git a/x b/x\n", "@@ -1 +1 @@\n", "-diff --git a/y b/y\n", "+z\n",
+            "diff --git a/y b/y\n", "Binary files a/y and b/y differ\n",
+        ]
+
+        blocks = list(_split_diff_blocks(lines))
+
+        assert len(blocks) == 2
+        assert blocks[1].startswith("diff --git a/y b/y")
+
+    def test_get_changed_files(self, git_repo):
+        """测试重命名、二进制、长路径与含空格路径."""
+        analyzer = GitAnalyzer(str(git_repo))
+
+        changes = {c.file_path: c for c in analyzer.get_changed_files("HEAD~1", "HEAD")}
+
+        long_path = next(p for p in changes if p.endswith("Service.java"))
+        assert "..." not in long_path
+        assert changes[long_path].change_type == ChangeType.MODIFIED
+        assert changes[long_path].added_lines == [2]
+        assert changes["New Name.java"].change_type == ChangeType.RENAMED
+        assert changes["New Name.java"].old_path == "Old Name.java"
+        assert changes["Removed.java"].change_type == ChangeType.DELETED
+        assert changes["Added.java"].change_type == ChangeType.ADDED
+        assert changes["logo.bin"].change_type == ChangeType.MODIFIED
+        assert changes["logo.bin"].added_lines == []
+        assert "Binary files" in changes["logo.bin"].diff_content
+        assert "New Name.java" not in changes[long_path].diff_content
+
+    def test_subprocess_count_is_constant(self, git_repo):
+        """测试Git调用次数与变更文件数无关."""
+        analyzer = GitAnalyzer(str(git_repo))
+        real_popen = subprocess.Popen
+        calls = []
+
+        # subprocess.run 内部同样通过 Popen 启动进程
+        def counting_popen(*args, **kwargs):
+            calls.append(args[0])
+            return real_popen(*args, **kwargs)
+
+        with patch("subprocess.Popen", counting_popen):
+            changes = analyzer.get_changed_files("HEAD~1", "HEAD")
+
+        assert len(changes) == 5
+        assert len(calls) == 2
+
+    def test_staged_changes(self, git_repo):
+        """测试暂存区变更."""
+        (git_repo / "Added.java").write_text("class Added { int x; }\n")
+        _git(git_repo, "add", "Added.java")
+
+        changes = GitAnalyzer(str(git_repo)).get_staged_changes()
+
+        assert [c.file_path for c in changes] == ["Added.java"]
+        assert changes[0].added_lines == [1]
+
+    def test_no_changes(self, git_repo):
+        """测试没有变更时只执行一次Git调用."""
+        analyzer = GitAnalyzer(str(git_repo))
+
+        with patch.object(analyzer, "_stream_git_command") as stream:
+            assert analyzer.get_changed_files() == []
+        stream.assert_not_called()
+
+
 class TestFilterSourceFiles:
     """过滤源文件测试类."""
 
@@ -0,0 +1,145 @@
+"""Git 对象读取器测试."""
+
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from ut_agent.tools.git_analyzer import GitAnalyzer
+from ut_agent.tools.git_blob_reader import GitBlobReader
+
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """两次提交的仓库：A.java 被修改，Same.java 未变."""
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "dev@example.com")
+    _git(tmp_path, "config", "user.name", "dev")
+    (tmp_path / "A.java").write_text("class A { int v1; }\n")
+    (tmp_path / "Same.java").write_text("class Same {}\n")
+    (tmp_path / "dir with space").mkdir()
+    (tmp_path / "dir with space" / "B.java").write_text("class B {}\n")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "one")
+    (tmp_path / "A.java").write_text("class A { int v2; }\n")
+    _git(tmp_path, "commit", "-q", "-am", "two")
+    return tmp_path
+
+
+@pytest.fixture
+def reader(repo):
+    """独立的读取器实例."""
+    blob_reader = GitBlobReader(str(repo))
+    yield blob_reader
+    blob_reader.close()
+
+
+class TestGitBlobReader:
+    """GitBlobReader 测试."""
+
+    def test_read_many_in_request_order(self, reader):
+        """测试批量读取按请求顺序返回，缺失文件为 None."""
+        contents = reader.read_many([
+            ("HEAD", "A.java"),
+            ("HEAD~1", "A.java"),
+            ("HEAD", "Missing.java"),
+            ("HEAD", "dir with space/B.java"),
+            ("no-such-ref", "A.java"),
+            ("HEAD", "A.java"),
+        ])
+
+        assert contents == [
+            "class A { int v2; }\n",
+            "class A { int v1; }\n",
+            None,
+            "class B {}\n",
+            None,
+            "class A { int v2; }\n",
+        ]
+
+    def test_blobs_are_cached_by_object_id(self, reader):
+        """测试相同内容在不同提交间只读取一次."""
+        reader.read("HEAD~1", "Same.java")
+        objects_read = reader.objects_read
+
+        assert reader.read("HEAD", "Same.java") == "class Same {}\n"
+        assert reader.objects_read == objects_read
+        assert reader.cache_hits == 1
+
+    def test_single_process_for_many_reads(self, reader):
+        """测试多次读取共享常驻进程."""
+        real_popen = subprocess.Popen
+        spawned = []
+
+        def counting_popen(*args, **kwargs):
+            spawned.append(args[0])
+            return real_popen(*args, **kwargs)
+
+        with patch("subprocess.Popen", counting_popen):
+            for _ in range(20):
+                reader.read("HEAD", "A.java")
+                reader.read("HEAD~1", "A.java")
+
+        assert sorted(spawned) == [["git", "cat-file", "--batch"], ["git", "cat-file", "--batch-check"]]
+        assert reader.objects_read == 2
+
+    def test_large_batch_does_not_block(self, repo, reader):
+        """测试输出超过管道缓冲区的大批量请求."""
+        for i in range(60):
+            (repo / f"Big{i}.java").write_text(f"// {i}\n" + "x" * 20000)
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", "big")
+
+        contents = reader.read_many([("HEAD", f"Big{i}.java") for i in range(60)])
+
+        assert all(c.startswith(f"// {i}\n") for i, c in enumerate(contents))
+
+    def test_cache_size_limit(self, repo):
+        """测试内容缓存按字节数淘汰."""
+        reader = GitBlobReader(str(repo), max_cache_bytes=30)
+        try:
+            reader.read("HEAD", "A.java")
+            reader.read("HEAD", "Same.java")
+
+            assert reader._cache_bytes <= 30
+            assert reader.read("HEAD", "A.java") == "class A { int v2; }\n"
+        finally:
+            reader.close()
+
+    def test_restarts_after_close(self, reader):
+        """测试关闭后再次读取会重新启动进程."""
+        reader.read("HEAD", "A.java")
+        reader.close()
+
+        assert reader.read("HEAD~1", "A.java") == "class A { int v1; }\n"
+
+    def test_shared_instance(self, repo):
+        """测试同一仓库共享实例."""
+        try:
+            assert GitBlobReader.get_instance(str(repo)) is GitBlobReader.get_instance(str(repo / "."))
+        finally:
+            GitBlobReader.close_all()
+
+
+class TestGitAnalyzerBlobs:
+    """GitAnalyzer 读取历史版本测试."""
+
+    def test_get_file_at_ref(self, repo):
+        """测试读取单个文件."""
+        analyzer = GitAnalyzer(str(repo))
+
+        assert analyzer.get_file_at_ref("A.java", "HEAD~1") == "class A { int v1; }\n"
+        assert analyzer.get_file_at_ref("Missing.java") is None
+
+    def test_get_files_at_ref(self, repo):
+        """测试批量读取多个文件."""
+        analyzer = GitAnalyzer(str(repo))
+
+        assert analyzer.get_files_at_ref(["A.java", "Missing.java"], "HEAD~1") == {
+            "A.java": "class A { int v1; }\n",
+            "Missing.java": None,
+        }
@@ -67,6 +67,15 @@ class TestGraphCreation:
         except Exception as e:
             pytest.fail(f"创建工作流图失败: {e}")
 
+    def test_graph_structure_streaming_workflow(self):
+        """测试流式工作流的结构."""
+        graph = create_test_generation_graph(streaming=True)
+        node_names = set(graph.get_graph().nodes.keys())
+        assert "streaming_pipeline" in node_names
+        assert "analyze_code" not in node_names
+        assert "generate_tests" not in node_names
+        assert "save_tests" in node_names
+
     def test_graph_structure_interrupt_workflow(self):
         """测试带中断的工作流结构."""
         try:
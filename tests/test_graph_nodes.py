@@ -16,6 +16,7 @@ from ut_agent.graph.nodes import (
     execute_tests_node,
     generate_tests_node,
     save_tests_node,
+    streaming_pipeline_node,
 )
 from ut_agent.graph.state import AgentState, CoverageReport, GeneratedTestFile
 
@@ -263,6 +264,50 @@ class TestAnalyzeCodeNode:
         assert result["status"] == "code_analyzed"
 
 
+    @pytest.mark.asyncio
+    async def test_analyze_code_process_backend(self):
+        """测试使用进程池后端分析 Java 代码."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target_files = []
+            for name in ("Alpha", "Beta"):
+                file_path = Path(tmpdir) / f"{name}.java"
+                file_path.write_text(
+                    f"package com.example;\n\npublic class {name} {{\n"
+                    f"    public int run(int x) {{ return x; }}\n}}\n",
+                    encoding="utf-8",
+                )
+                target_files.append(str(file_path))
+
+            state: AgentState = {
+                "project_path": tmpdir,
+                "project_type": "java",
+                "build_tool": "maven",
+                "target_files": target_files,
+                "coverage_target": 80.0,
+                "max_iterations": 10,
+                "iteration_count": 0,
+                "status": "project_detected",
+                "message": "",
+                "analyzed_files": [],
+                "generated_tests": [],
+                "coverage_report": None,
+                "current_coverage": 0.0,
+                "coverage_gaps": [],
+                "improvement_plan": None,
+                "output_path": None,
+                "summary": None,
+            }
+
+            config = {"configurable": {"analysis_backend": "process"}}
+
+            result = await analyze_code_node(state, config)
+
+            assert result["status"] == "code_analyzed"
+            class_names = sorted(f["class_name"] for f in result["analyzed_files"])
+            assert class_names == ["Alpha", "Beta"]
+            assert result["analyzed_files"][0]["package"] == "com.example"
+
+
 class TestGenerateTestsNode:
     """generate_tests_node 测试."""
 
@@ -309,6 +354,40 @@ class TestGenerateTestsNode:
         assert result["status"] == "tests_generated"
         assert len(result["generated_tests"]) == 1
 
+    @pytest.mark.asyncio
+    @patch("ut_agent.graph.nodes.TestFileMapper")
+    @patch("ut_agent.graph.nodes.get_llm")
+    @patch("ut_agent.graph.nodes.generate_incremental_java_test")
+    async def test_incremental_generation_shares_test_mapper(
+        self, mock_generate, mock_get_llm, mock_mapper_cls
+    ):
+        """测试增量生成在整个阶段只创建一个测试文件映射器."""
+        mock_get_llm.return_value = Mock()
+        mock_mapper_cls.return_value.find_test_file.return_value = None
+        mock_generate.side_effect = lambda analysis, *args: GeneratedTestFile(
+            source_file=analysis["file_path"],
+            test_file_path=analysis["file_path"].replace(".java", "Test.java"),
+            test_code="class T {}",
+            language="java",
+        )
+        files = [f"/src/C{i}.java" for i in range(3)]
+
+        state = {
+            "project_path": "/project",
+            "project_type": "java",
+            "incremental": True,
+            "change_summaries": [
+                Mock(file_path=f, added_methods=[], modified_methods=[]) for f in files
+            ],
+            "analyzed_files": [{"file_path": f} for f in files],
+        }
+
+        result = await generate_tests_node(state, {"configurable": {}})
+
+        assert len(result["generated_tests"]) == 3
+        mock_mapper_cls.assert_called_once_with("/project", "java")
+        assert mock_mapper_cls.return_value.find_test_file.call_count == 3
+
 
 class TestSaveTestsNode:
     """save_tests_node 测试."""
@@ -351,6 +430,141 @@ class TestSaveTestsNode:
             assert result["status"] == "tests_saved"
             assert Path(f"{tmpdir}/test/MainTest.java").exists()
 
+    @pytest.mark.asyncio
+    async def test_saved_tests_are_registered_in_index(self):
+        """测试保存的测试文件无需刷新即可在测试文件索引中找到."""
+        from ut_agent.tools.test_file_index import TestFileIndex
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Path(tmpdir, "test").mkdir()
+            TestFileIndex.reset_instances()
+            index = TestFileIndex.get_instance(tmpdir)
+            index.refresh()
+
+            test_file = GeneratedTestFile(
+                source_file=f"{tmpdir}/Main.java",
+                test_file_path=f"{tmpdir}/test/MainTest.java",
+                test_code="public class MainTest {}",
+                language="java",
+            )
+            state = {
+                "project_path": tmpdir,
+                "project_type": "java",
+                "generated_tests": [test_file],
+            }
+
+            with patch.object(TestFileIndex, "refresh", side_effect=AssertionError("refreshed")):
+                await save_tests_node(state, {"configurable": {}})
+                assert index.find(["MainTest.java"]) == "test/MainTest.java"
+            TestFileIndex.reset_instances()
+
+
+class TestStreamingPipelineNode:
+    """streaming_pipeline_node 测试."""
+
+    @pytest.mark.asyncio
+    @patch("ut_agent.graph.nodes.get_llm")
+    @patch("ut_agent.graph.nodes.generate_java_test")
+    @patch("ut_agent.graph.nodes.analyze_java_file")
+    async def test_streaming_pipeline_java(self, mock_analyze, mock_generate, mock_get_llm):
+        """测试流式分析、生成并保存 Java 测试."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_get_llm.return_value = Mock()
+            mock_analyze.side_effect = lambda path: {
+                "file_path": path,
+                "class_name": Path(path).stem,
+            }
+            mock_generate.side_effect = lambda analysis, llm: GeneratedTestFile(
+                source_file=analysis["file_path"],
+                test_file_path=f"{tmpdir}/test/{analysis['class_name']}Test.java",
+                test_code=f"public class {analysis['class_name']}Test {{}}",
+                language="java",
+            )
+
+            state: AgentState = {
+                "project_path": tmpdir,
+                "project_type": "java",
+                "build_tool": "maven",
+                "target_files": [f"{tmpdir}/A.java", f"{tmpdir}/B.java", f"{tmpdir}/C.java"],
+                "coverage_target": 80.0,
+                "max_iterations": 10,
+                "iteration_count": 0,
+                "status": "changes_detected",
+                "message": "",
+                "analyzed_files": [],
+                "generated_tests": [],
+                "coverage_report": None,
+                "current_coverage": 0.0,
+                "coverage_gaps": [],
+                "improvement_plan": None,
+                "output_path": None,
+                "summary": None,
+            }
+
+            config = {"configurable": {"max_workers": 2, "pipeline_queue_size": 1}}
+
+            result = await streaming_pipeline_node(state, config)
+
+            assert result["status"] == "tests_saved"
+            assert len(result["analyzed_files"]) == 3
+            assert len(result["generated_tests"]) == 3
+            for name in ("A", "B", "C"):
+                assert Path(f"{tmpdir}/test/{name}Test.java").exists()
+            assert result["stage_metrics"]["streaming_pipeline"]["time_to_first_test_ms"] is not None
+
+    @pytest.mark.asyncio
+    @patch("ut_agent.graph.nodes.get_llm")
+    @patch("ut_agent.graph.nodes.generate_java_test")
+    @patch("ut_agent.graph.nodes.analyze_java_file")
+    async def test_streaming_pipeline_keeps_saved_tests_on_failure(
+        self, mock_analyze, mock_generate, mock_get_llm
+    ):
+        """测试单个文件生成失败不影响已生成测试的保存."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_get_llm.return_value = Mock()
+            mock_analyze.side_effect = lambda path: {
+                "file_path": path,
+                "class_name": Path(path).stem,
+            }
+
+            def generate(analysis, llm):
+                if analysis["class_name"] == "Bad":
+                    raise RuntimeError("LLM error")
+                return GeneratedTestFile(
+                    source_file=analysis["file_path"],
+                    test_file_path=f"{tmpdir}/test/{analysis['class_name']}Test.java",
+                    test_code="class T {}",
+                    language="java",
+                )
+
+            mock_generate.side_effect = generate
+
+            state: AgentState = {
+                "project_path": tmpdir,
+                "project_type": "java",
+                "build_tool": "maven",
+                "target_files": [f"{tmpdir}/Good.java", f"{tmpdir}/Bad.java"],
+                "coverage_target": 80.0,
+                "max_iterations": 10,
+                "iteration_count": 0,
+                "status": "changes_detected",
+                "message": "",
+                "analyzed_files": [],
+                "generated_tests": [],
+                "coverage_report": None,
+                "current_coverage": 0.0,
+                "coverage_gaps": [],
+                "improvement_plan": None,
+                "output_path": None,
+                "summary": None,
+            }
+
+            result = await streaming_pipeline_node(state, {"configurable": {}})
+
+            assert len(result["generated_tests"]) == 1
+            assert result["stage_metrics"]["generate_tests"]["error_count"] == 1
+            assert Path(f"{tmpdir}/test/GoodTest.java").exists()
+
 
 class TestExecuteTestsNode:
     """execute_tests_node 测试."""
@@ -419,6 +633,33 @@ class TestExecuteTestsNode:
 
         assert result["status"] == "tests_failed"
 
+    @pytest.mark.asyncio
+    @patch("ut_agent.tools.test_executor.execute_tests_async", new_callable=AsyncMock)
+    async def test_execute_tests_updates_coverage_map(self, mock_execute, tmp_path):
+        """测试执行后导入按测试覆盖率报告并持久化覆盖映射."""
+        from ut_agent.selection.coverage_map import CoverageMap
+        from ut_agent.tools.test_executor import TestProgress
+
+        mock_execute.return_value = (True, "Tests passed", TestProgress(total_tests=1, passed=1))
+        reports_dir = tmp_path / ".ut-agent" / "per-test-coverage"
+        reports_dir.mkdir(parents=True)
+        (reports_dir / "src%2Ffoo.spec.ts%23adds.info").write_text(
+            "SF:src/foo.ts\nDA:3,1\nDA:4,0\nend_of_record\n"
+        )
+
+        state = {
+            "project_path": str(tmp_path),
+            "project_type": "typescript",
+            "build_tool": "npm",
+        }
+
+        result = await execute_tests_node(state, {"configurable": {}})
+
+        assert result["status"] == "tests_executed"
+        assert result["stage_metrics"]["execute_tests"]["coverage_map_reports"] == 1
+        coverage_map = CoverageMap.load(str(tmp_path))
+        assert coverage_map.tests_for_line("src/foo.ts", 3) == ["src/foo.spec.ts#adds"]
+
 
 class TestAnalyzeCoverageNode:
     """analyze_coverage_node 测试."""
@@ -0,0 +1,141 @@
+"""方法大纲测试."""
+
+import json
+import subprocess
+
+import pytest
+
+from ut_agent.tools.change_detector import JavaChangeDetector
+from ut_agent.tools.method_outline import (
+    OUTLINE_FORMAT_VERSION,
+    MethodOutlineCache,
+    git_blob_id,
+    outline_language,
+)
+
+
+OLD = """package com.example;
+
+public class Calculator {
+    public int add(int a, int b) {
+        return a + b;
+    }
+
+    public int sub(int a, int b) {
+        return a - b;
+    }
+}
+"""
+
+NEW = """package com.example;
+
+public class Calculator {
+    // 新增注释使后续方法整体下移
+    public int add(int a, int b) {
+        return a + b;
+    }
+
+    public int sub(int a, int b) {
+        return b - a;
+    }
+}
+"""
+
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    """每个测试使用独立的共享实例."""
+    MethodOutlineCache.reset_instances()
+    yield
+    MethodOutlineCache.reset_instances()
+
+
+class TestMethodOutlineCache:
+    """MethodOutlineCache 测试."""
+
+    def test_git_blob_id(self, tmp_path):
+        """测试 blob ID 与 git hash-object 一致."""
+        source = tmp_path / "A.java"
+        source.write_text(OLD, encoding="utf-8")
+        expected = subprocess.run(
+            ["git", "hash-object", str(source)], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+        assert git_blob_id(OLD) == expected
+
+    def test_outline_language(self):
+        """测试按扩展名选择语法."""
+        assert outline_language("src/A.java") == "java"
+        assert outline_language("src/a.ts") == "typescript"
+        assert outline_language("src/a.tsx") == "tsx"
+        assert outline_language("src/a.js") == "tsx"
+        assert outline_language("src/A.vue") == "vue"
+
+    def test_same_content_parsed_once(self, tmp_path):
+        """测试相同内容只解析一次."""
+        cache = MethodOutlineCache(str(tmp_path))
+
+        first = cache.get_outline(OLD, "src/A.java")
+        second = cache.get_outline(OLD, "src/B.java")
+
+        assert first is second
+        assert cache.parse_count == 1
+        assert [m.name for m in first.classes[0].methods] == ["add", "sub"]
+
+    def test_persisted_across_instances(self, tmp_path):
+        """测试大纲持久化后按 blob ID 复用."""
+        cache = MethodOutlineCache(str(tmp_path))
+        cache.get_outline(OLD, "src/A.java")
+        cache.save()
+
+        reloaded = MethodOutlineCache(str(tmp_path))
+        outline = reloaded.get_outline(OLD, "src/A.java")
+
+        assert reloaded.parse_count == 0
+        assert outline.package == "com.example"
+        assert outline.classes[0].methods[0].parameters == ["int a", "int b"]
+
+    def test_incompatible_version_ignored(self, tmp_path):
+        """测试版本不一致的缓存文件被忽略."""
+        cache_file = tmp_path / ".ut-agent" / "method_outlines.json"
+        cache_file.parent.mkdir()
+        cache_file.write_text(json.dumps({"version": OUTLINE_FORMAT_VERSION + 1, "entries": {"x": {}}}))
+
+        assert len(MethodOutlineCache(str(tmp_path))) == 0
+
+    def test_max_entries(self, tmp_path):
+        """测试超过上限时淘汰最久未用的大纲."""
+        cache = MethodOutlineCache(str(tmp_path), max_entries=1)
+        cache.get_outline(OLD, "src/A.java")
+        cache.get_outline(NEW, "src/A.java")
+
+        assert len(cache) == 1
+        cache.get_outline(OLD, "src/A.java")
+        assert cache.parse_count == 3
+
+
+class TestHashComparison:
+    """按方法体哈希比较测试."""
+
+    def test_moved_method_not_modified(self, tmp_path):
+        """测试只移动位置的方法不算修改."""
+        detector = JavaChangeDetector(str(tmp_path))
+
+        summary = detector._compare_versions("src/Calculator.java", OLD, NEW)
+
+        assert [old.name for old, _ in summary.modified_methods] == ["sub"]
+        old, new = summary.modified_methods[0]
+        assert "a - b" in old.content
+        assert "b - a" in new.content
+        assert old.body_hash != new.body_hash
+
+    def test_old_version_reused_across_runs(self, tmp_path):
+        """测试上一次分析的新版本在下一次作为旧版本时无需重新解析."""
+        JavaChangeDetector(str(tmp_path))._compare_versions("src/Calculator.java", OLD, NEW)
+        MethodOutlineCache.get_instance(str(tmp_path)).save()
+        MethodOutlineCache.reset_instances()
+
+        newer = NEW.replace("b - a", "a * b")
+        JavaChangeDetector(str(tmp_path))._compare_versions("src/Calculator.java", NEW, newer)
+
+        assert MethodOutlineCache.get_instance(str(tmp_path)).parse_count == 1
@@ -0,0 +1,290 @@
+"""自适应速率限制测试."""
+
+import asyncio
+import contextvars
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from ut_agent.exceptions import LLMRateLimitError
+from ut_agent.utils.async_llm import AsyncLLMCaller, LLMCallConfig, LLMCallStatus
+from ut_agent.utils.llm_cache import CachedLLM, LLMCache, clear_llm_cache
+from ut_agent.utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    RateLimitConfig,
+    estimate_tokens,
+    get_rate_limiter,
+    is_rate_limit_error,
+    reset_rate_limiters,
+    retry_after_from_error,
+    usage_tokens,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_limiters():
+    """每个测试使用独立的共享限流器."""
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
+
+
+class HTTPError(Exception):
+    """带响应的模拟 HTTP 错误."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = mock.Mock(status_code=status_code, headers=headers or {})
+
+
+def _acquire(limiter, tokens=0):
+    """在独立上下文中获取许可，模拟不同的调用者."""
+    return contextvars.copy_context().run(limiter.acquire, tokens)
+
+
+class TestAdaptiveRateLimiter:
+    """AdaptiveRateLimiter 测试."""
+
+    def test_multiplicative_decrease_once_per_burst(self):
+        """测试同一批并发请求被限流时只缩减一次."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(max_concurrency=8, base_cooldown=0))
+        permits = [_acquire(limiter) for _ in range(4)]
+
+        for permit in permits:
+            limiter.release(permit, rate_limited=True)
+
+        assert limiter.concurrency_limit == 4
+        assert limiter.rate_limited_count == 4
+
+        # 缩减之后获取的许可再被限流会继续缩减
+        limiter.release(limiter.acquire(), rate_limited=True)
+        assert limiter.concurrency_limit == 2
+
+    def test_additive_increase(self):
+        """测试成功请求逐步恢复并发上限."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(max_concurrency=4, base_cooldown=0))
+        limiter.release(limiter.acquire(), rate_limited=True)
+        assert limiter.concurrency_limit == 2
+
+        # 每轮约 concurrency_limit 个成功请求增加 1
+        for _ in range(3):
+            limiter.release(limiter.acquire())
+        assert limiter.concurrency_limit == 3
+
+        for _ in range(20):
+            limiter.release(limiter.acquire())
+        assert limiter.concurrency_limit == 4
+
+    def test_retry_after_blocks_all_callers(self):
+        """测试 retry-after 期间暂停获取许可."""
+        limiter = AdaptiveRateLimiter("p")
+        limiter.release(limiter.acquire(), rate_limited=True, retry_after=0.2)
+
+        start = time.monotonic()
+        limiter.release(limiter.acquire())
+
+        assert time.monotonic() - start >= 0.19
+
+    def test_requests_per_minute(self):
+        """测试请求预算耗尽后按补充速率放行."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(requests_per_minute=120))
+        for _ in range(120):
+            limiter.release(limiter.acquire())
+
+        start = time.monotonic()
+        limiter.release(limiter.acquire())
+
+        assert 0.4 <= time.monotonic() - start < 2
+
+    def test_tokens_per_minute_with_reconciliation(self):
+        """测试 token 预算按实际用量校正."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(tokens_per_minute=60000))
+        permit = limiter.acquire(tokens=60000)
+        # 实际只用了一半，多扣的预算返还
+        limiter.release(permit, tokens_used=30000)
+
+        start = time.monotonic()
+        limiter.release(limiter.acquire(tokens=20000))
+        assert time.monotonic() - start < 0.1
+
+        # 预算不足时等待补充（每秒 1000 个）
+        start = time.monotonic()
+        limiter.release(limiter.acquire(tokens=10100))
+        assert time.monotonic() - start >= 0.05
+
+    def test_concurrency_limit_threads(self):
+        """测试多线程下并发数不超过上限."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(max_concurrency=2))
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with limiter.limit():
+                with lock:
+                    peak.append(limiter.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) == 2
+        assert limiter.in_flight == 0
+
+    async def test_concurrency_limit_async(self):
+        """测试协程等待其他请求结束后获得许可."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(max_concurrency=1))
+        # 在独立任务中获取，避免等待者继承持有许可的上下文
+        first = await asyncio.ensure_future(limiter.acquire_async())
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.02)
+        assert not waiter.done()
+
+        limiter.release(first)
+        second = await asyncio.wait_for(waiter, 1)
+        limiter.release(second)
+        assert limiter.in_flight == 0
+
+    async def test_nested_acquire_is_reentrant(self):
+        """测试同一上下文嵌套获取许可不重复占用."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(max_concurrency=1))
+
+        async with limiter.limit_async():
+            async with limiter.limit_async() as inner:
+                assert inner.reentrant
+                assert limiter.in_flight == 1
+
+        assert limiter.in_flight == 0
+
+    def test_limit_releases_on_rate_limit_error(self):
+        """测试上下文管理器在限流异常时缩减并发并冷却."""
+        limiter = AdaptiveRateLimiter("p", RateLimitConfig(max_concurrency=4))
+
+        with pytest.raises(HTTPError):
+            with limiter.limit():
+                raise HTTPError(429, {"retry-after-ms": "50"})
+
+        assert limiter.in_flight == 0
+        assert limiter.concurrency_limit == 2
+        assert 0 < limiter.get_stats()["blocked_for"] <= 0.05
+
+    def test_shared_per_provider(self):
+        """测试同一提供商共享限流器."""
+        assert get_rate_limiter("openai") is get_rate_limiter("openai")
+        assert get_rate_limiter("openai") is not get_rate_limiter("deepseek")
+
+
+class TestRateLimitHelpers:
+    """辅助函数测试."""
+
+    def test_retry_after_from_headers(self):
+        """测试解析 retry-after 响应头."""
+        assert retry_after_from_error(HTTPError(429, {"retry-after-ms": "1500"})) == 1.5
+        assert retry_after_from_error(HTTPError(429, {"retry-after": "7"})) == 7.0
+        future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        assert 25 < retry_after_from_error(HTTPError(429, {"retry-after": future})) <= 30
+        assert retry_after_from_error(HTTPError(429)) is None
+        assert retry_after_from_error(LLMRateLimitError(retry_after=12)) == 12.0
+        assert retry_after_from_error(ValueError("x")) is None
+
+    def test_is_rate_limit_error(self):
+        """测试识别限流错误."""
+        assert is_rate_limit_error(LLMRateLimitError())
+        assert is_rate_limit_error(HTTPError(429))
+        assert is_rate_limit_error(Exception("Rate limit exceeded"))
+        assert not is_rate_limit_error(HTTPError(500))
+
+    def test_estimate_and_usage_tokens(self):
+        """测试 token 估算与实际用量读取."""
+        llm = mock.Mock(spec=["count_tokens"])
+        llm.count_tokens.return_value = 42
+
+        assert estimate_tokens(llm, "hello", max_tokens=100) == 142
+        assert estimate_tokens(object(), "a" * 40) == 11
+        assert usage_tokens(AIMessage(
+            content="x", usage_metadata={"input_tokens": 3, "output_tokens": 4, "total_tokens": 7}
+        )) == 7
+        assert usage_tokens(AIMessage(content="x")) is None
+
+
+class TestCallerIntegration:
+    """调用方集成测试."""
+
+    async def test_async_caller_honors_retry_after(self):
+        """测试 AsyncLLMCaller 按服务端 retry-after 等待而不是固定 60 秒."""
+        llm = mock.MagicMock()
+        llm.model_name = "gpt-4"
+        llm._provider = "openai"
+        llm.ainvoke = mock.AsyncMock(side_effect=[
+            HTTPError(429, {"retry-after-ms": "100"}),
+            AIMessage(content="ok"),
+        ])
+        limiter = AdaptiveRateLimiter("openai", RateLimitConfig(max_concurrency=4))
+        caller = AsyncLLMCaller(llm, LLMCallConfig(max_retries=1, retry_delay=0.01), rate_limiter=limiter)
+
+        start = time.monotonic()
+        result = await caller.call("prompt")
+
+        assert result.status == LLMCallStatus.SUCCESS
+        assert 0.09 <= time.monotonic() - start < 5
+        assert limiter.rate_limited_count == 1
+        assert limiter.concurrency_limit == 2
+
+    async def test_async_caller_uses_provider_limiter(self):
+        """测试默认使用提供商共享的限流器."""
+        llm = mock.MagicMock()
+        llm._provider = "deepseek"
+
+        assert AsyncLLMCaller(llm)._rate_limiter is get_rate_limiter("deepseek")
+
+    async def test_async_caller_shares_limiter_with_get_llm_result(self):
+        """测试包装 get_llm() 结果时内外两层使用同一个限流器，只占用一次许可."""
+        from ut_agent.utils.llm import get_llm
+
+        llm = get_llm("ollama")
+        caller = AsyncLLMCaller(llm, LLMCallConfig(max_retries=0))
+        limiter = get_rate_limiter("ollama")
+        assert llm._provider == "ollama"
+        assert caller._rate_limiter is limiter
+        assert llm._rate_limiter is limiter
+
+        in_flight = []
+
+        async def fake_ainvoke(self, messages, **kwargs):
+            in_flight.append(limiter.get_stats()["in_flight"])
+            return AIMessage(content="ok")
+
+        try:
+            with mock.patch.object(type(llm._llm), "ainvoke", fake_ainvoke):
+                result = await caller.call(f"prompt {time.monotonic_ns()}")
+        finally:
+            clear_llm_cache()
+
+        assert result.status == LLMCallStatus.SUCCESS
+        assert in_flight == [1]
+        assert limiter.get_stats()["in_flight"] == 0
+
+    def test_cached_llm_reconciles_usage(self):
+        """测试 CachedLLM 调用经过限流器并按实际用量校正."""
+        llm = mock.MagicMock(spec=["invoke", "model_name"])
+        llm.model_name = "gpt-4"
+        llm.invoke.return_value = AIMessage(
+            content="ok", usage_metadata={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30}
+        )
+        limiter = AdaptiveRateLimiter("openai", RateLimitConfig(tokens_per_minute=1000))
+        cached_llm = CachedLLM(llm, LLMCache(), rate_limiter=limiter)
+
+        cached_llm.invoke("a" * 400)
+        cached_llm.invoke("a" * 400)
+
+        assert llm.invoke.call_count == 1
+        # 预扣 101，实际 30
+        assert limiter.get_stats()["token_budget"] == pytest.approx(970, abs=1)
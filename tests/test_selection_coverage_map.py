@@ -0,0 +1,183 @@
+"""按测试的行覆盖映射单元测试."""
+
+import json
+import os
+
+import pytest
+
+from ut_agent.selection.change_detector import ChangeType, FileChange, MethodChange
+from ut_agent.selection.coverage_map import (
+    CoverageMap,
+    changed_base_lines,
+    parse_istanbul_lines,
+    parse_jacoco_lines,
+    parse_lcov_lines,
+    split_test_id,
+)
+
+
+FOO = "src/main/java/com/a/Foo.java"
+
+
+@pytest.fixture
+def coverage_map(tmp_path):
+    """三个测试覆盖 Foo.java 的不同区间."""
+    cmap = CoverageMap(str(tmp_path))
+    cmap.set_test_coverage("FooTest.java#testAll", {FOO: range(1, 21)})
+    cmap.set_test_coverage("FooTest.java#testHead", {FOO: range(1, 6)})
+    cmap.set_test_coverage("BarTest.java#testTail", {FOO: range(15, 31)})
+    return cmap
+
+
+class TestChangedBaseLines:
+    """changed_base_lines 测试."""
+
+    def test_modified_and_inserted_lines(self):
+        """测试修改行取旧行号，插入取相邻旧行."""
+        old = "a\nb\nc\nd\ne\n"
+        new = "a\nB\nc\nd\nx\ne\n"
+        change = FileChange(path=FOO, change_type=ChangeType.MODIFIED, old_content=old, new_content=new)
+
+        assert changed_base_lines(change) == [2, 4, 5]
+
+    def test_added_and_deleted_files(self):
+        """测试新增文件没有基线行，删除文件取全部旧行."""
+        added = FileChange(path=FOO, change_type=ChangeType.ADDED, new_content="a\n")
+        deleted = FileChange(path=FOO, change_type=ChangeType.DELETED, old_content="a\nb\n")
+
+        assert changed_base_lines(added) == []
+        assert changed_base_lines(deleted) == [1, 2]
+
+    def test_fallback_to_method_ranges(self):
+        """测试没有文件内容时使用删除行与方法范围."""
+        change = FileChange(
+            path=FOO,
+            change_type=ChangeType.MODIFIED,
+            deleted_lines=[40],
+            method_changes=[MethodChange("run", "void run()", ChangeType.MODIFIED, 10, 12)],
+        )
+
+        assert changed_base_lines(change) == [10, 11, 12, 40]
+
+
+class TestCoverageMap:
+    """CoverageMap 测试."""
+
+    def test_split_test_id(self):
+        """测试拆分测试标识."""
+        assert split_test_id("FooTest.java#testA") == ("FooTest.java", "testA")
+        assert split_test_id("foo.test.ts") == ("foo.test.ts", None)
+
+    def test_minimal_cover(self, coverage_map):
+        """测试贪心集合覆盖选择最小测试集."""
+        selection = coverage_map.select({FOO: [3, 4, 18, 25, 40]})
+
+        assert selection.tests == ["FooTest.java#testAll", "BarTest.java#testTail"]
+        assert selection.covered["FooTest.java#testAll"] == {FOO: [3, 4, 18]}
+        assert selection.uncovered == {FOO: [40]}
+        assert not selection.is_fully_covered(FOO)
+
+    def test_all_covering_tests(self, coverage_map):
+        """测试非最小模式返回覆盖任一变更行的全部测试."""
+        selection = coverage_map.select({FOO: [3]}, minimal=False)
+
+        assert selection.tests == ["FooTest.java#testAll", "FooTest.java#testHead"]
+        assert selection.is_fully_covered(FOO)
+
+    def test_unknown_file(self, coverage_map):
+        """测试没有覆盖数据的文件全部交给启发式规则."""
+        selection = coverage_map.select({"Other.java": [1, 2]})
+
+        assert selection.tests == []
+        assert selection.uncovered == {"Other.java": [1, 2]}
+
+    def test_absolute_paths(self, coverage_map, tmp_path):
+        """测试绝对路径按项目根目录归一化."""
+        absolute = os.path.join(str(tmp_path), FOO)
+
+        assert coverage_map.has_file(absolute)
+        assert coverage_map.tests_for_line(absolute, 30) == ["BarTest.java#testTail"]
+
+    def test_replace_and_remove_test(self, coverage_map):
+        """测试重新采集和移除测试的覆盖数据."""
+        coverage_map.set_test_coverage("FooTest.java#testHead", {FOO: [50]})
+        coverage_map.remove_test("BarTest.java#testTail")
+
+        assert coverage_map.tests_for_line(FOO, 3) == ["FooTest.java#testAll"]
+        assert coverage_map.tests_for_line(FOO, 50) == ["FooTest.java#testHead"]
+        assert coverage_map.tests_for_line(FOO, 25) == []
+        assert len(coverage_map) == 2
+
+    def test_save_and_load(self, coverage_map, tmp_path):
+        """测试持久化后重新加载."""
+        coverage_map.remove_test("FooTest.java#testHead")
+        coverage_map.save()
+
+        loaded = CoverageMap.load(str(tmp_path))
+
+        assert loaded.tests == ["BarTest.java#testTail", "FooTest.java#testAll"]
+        assert loaded.tests_for_line(FOO, 16) == ["BarTest.java#testTail", "FooTest.java#testAll"]
+
+    def test_load_incompatible_version(self, tmp_path):
+        """测试版本不一致时返回空映射."""
+        map_file = tmp_path / ".ut-agent" / "coverage_map.json"
+        map_file.parent.mkdir()
+        map_file.write_text(json.dumps({"version": 0, "tests": ["x"], "files": {}}))
+
+        assert len(CoverageMap.load(str(tmp_path))) == 0
+
+
+class TestReportParsing:
+    """覆盖率报告解析测试."""
+
+    def test_parse_jacoco(self, tmp_path):
+        """测试解析 JaCoCo XML 中被覆盖的行."""
+        report = tmp_path / "report.xml"
+        report.write_text(
+            '<report name="r"><package name="com/a">'
+            '<sourcefile name="Foo.java">'
+            '<line nr="3" mi="0" ci="2"/><line nr="4" mi="1" ci="0"/><line nr="5" mi="0" ci="1"/>'
+            '</sourcefile></package></report>'
+        )
+
+        assert parse_jacoco_lines(str(report)) == {FOO: [3, 5]}
+
+    def test_parse_istanbul(self, tmp_path):
+        """测试解析 Istanbul 中被执行语句所在的行."""
+        report = tmp_path / "coverage-final.json"
+        report.write_text(json.dumps({
+            "/p/src/foo.ts": {
+                "path": "/p/src/foo.ts",
+                "statementMap": {
+                    "0": {"start": {"line": 2}, "end": {"line": 3}},
+                    "1": {"start": {"line": 7}, "end": {"line": 7}},
+                },
+                "s": {"0": 1, "1": 0},
+            }
+        }))
+
+        assert parse_istanbul_lines(str(report)) == {"/p/src/foo.ts": [2, 3]}
+
+    def test_parse_lcov(self, tmp_path):
+        """测试解析 lcov 中被覆盖的行."""
+        report = tmp_path / "lcov.info"
+        report.write_text("SF:src/foo.ts\nDA:1,1\nDA:2,0\nDA:4,3\nend_of_record\nSF:src/bar.ts\nDA:1,0\nend_of_record\n")
+
+        assert parse_lcov_lines(str(report)) == {"src/foo.ts": [1, 4]}
+
+    def test_ingest_reports(self, tmp_path):
+        """测试按测试拆分的报告目录导入."""
+        reports = tmp_path / "reports"
+        reports.mkdir()
+        (reports / "src%2Ffoo.test.ts.info").write_text("SF:src/foo.ts\nDA:3,1\nend_of_record\n")
+        (reports / "FooTest.java%23testA.xml").write_text(
+            '<report name="r"><package name="com/a"><sourcefile name="Foo.java">'
+            '<line nr="9" mi="0" ci="1"/></sourcefile></package></report>'
+        )
+        (reports / "broken.xml").write_text("<report")
+        (reports / "notes.txt").write_text("ignored")
+        cmap = CoverageMap(str(tmp_path))
+
+        assert cmap.ingest_reports(str(reports)) == 2
+        assert cmap.tests_for_line("src/foo.ts", 3) == ["src/foo.test.ts"]
+        assert cmap.tests_for_line(FOO, 9) == ["FooTest.java#testA"]
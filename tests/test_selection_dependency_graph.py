@@ -0,0 +1,149 @@
+"""反向依赖图单元测试."""
+
+import os
+import tempfile
+
+import pytest
+
+from ut_agent.selection.dependency_graph import (
+    Dependent,
+    ReverseDependencyGraph,
+    relative_path,
+)
+from ut_agent.tools.cross_file_analyzer import DependencyInfo, ProjectIndex, SymbolInfo
+
+
+@pytest.fixture
+def chain_graph():
+    """Core <- Service <- Controller <- Api, Core <- Repo."""
+    graph = ReverseDependencyGraph()
+    graph.add_edge("Service.java", "Core.java")
+    graph.add_edge("Repo.java", "Core.java")
+    graph.add_edge("Controller.java", "Service.java")
+    graph.add_edge("Api.java", "Controller.java")
+    return graph
+
+
+class TestRelativePath:
+    """relative_path 测试."""
+
+    def test_absolute_path_inside_root(self):
+        """测试项目内绝对路径转为相对路径."""
+        root = os.path.abspath("project")
+        assert relative_path(os.path.join(root, "src", "A.java"), root) == "src/A.java"
+
+    def test_relative_path_unchanged(self):
+        """测试相对路径保持不变."""
+        assert relative_path("src/A.java", os.path.abspath("project")) == "src/A.java"
+
+    def test_absolute_path_outside_root(self):
+        """测试项目外的绝对路径原样返回."""
+        root = os.path.abspath("project")
+        outside = os.path.abspath("other/A.java")
+        assert relative_path(outside, root) == outside.replace(os.sep, "/")
+
+
+class TestReverseDependencyGraph:
+    """ReverseDependencyGraph 测试."""
+
+    def test_direct_edges(self, chain_graph):
+        """测试直接依赖与被依赖."""
+        assert chain_graph.dependents("Core.java") == ["Repo.java", "Service.java"]
+        assert chain_graph.dependencies("Controller.java") == ["Service.java"]
+        assert chain_graph.dependents("Api.java") == []
+
+    def test_transitive_dependents(self, chain_graph):
+        """测试传递闭包按层次返回并记录经由的第一层依赖方."""
+        result = chain_graph.transitive_dependents("Core.java", max_depth=0)
+
+        assert result == [
+            Dependent("Repo.java", 1, "Repo.java"),
+            Dependent("Service.java", 1, "Service.java"),
+            Dependent("Controller.java", 2, "Service.java"),
+            Dependent("Api.java", 3, "Service.java"),
+        ]
+
+    def test_transitive_dependents_depth_bound(self, chain_graph):
+        """测试深度上限."""
+        result = chain_graph.transitive_dependents("Core.java", max_depth=2)
+        assert [d.file_path for d in result] == ["Repo.java", "Service.java", "Controller.java"]
+
+    def test_cycle_terminates(self):
+        """测试循环依赖."""
+        graph = ReverseDependencyGraph()
+        graph.add_edge("A", "B")
+        graph.add_edge("B", "C")
+        graph.add_edge("C", "A")
+
+        result = graph.transitive_dependents("A", max_depth=0)
+
+        assert [(d.file_path, d.depth) for d in result] == [("C", 1), ("B", 2)]
+
+    def test_closure_is_memoized(self, chain_graph):
+        """测试闭包记忆化及图变化后失效."""
+        first = chain_graph.transitive_dependents("Core.java")
+        second = chain_graph.transitive_dependents("Core.java")
+
+        assert first == second
+        assert chain_graph.cache_hits == 1
+        assert chain_graph.cache_misses == 1
+
+        chain_graph.add_edge("Web.java", "Api.java")
+        result = chain_graph.transitive_dependents("Core.java", max_depth=0)
+        assert "Web.java" in [d.file_path for d in result]
+        assert chain_graph.cache_misses == 2
+
+    def test_closure_cache_is_bounded(self, chain_graph):
+        """测试闭包缓存容量上限."""
+        graph = ReverseDependencyGraph(closure_cache_size=2)
+        graph.add_edge("A", "B")
+        for name in ("A", "B", "C"):
+            graph.transitive_dependents(name)
+
+        assert len(graph._closure_cache) == 2
+        graph.transitive_dependents("A")
+        assert graph.cache_misses == 4
+
+    def test_set_dependencies_replaces_out_edges(self, chain_graph):
+        """测试替换文件的出边并保留入边."""
+        chain_graph.set_dependencies("Service.java", ["Repo.java"])
+
+        assert chain_graph.dependents("Core.java") == ["Repo.java"]
+        assert chain_graph.dependents("Repo.java") == ["Service.java"]
+        assert chain_graph.dependents("Service.java") == ["Controller.java"]
+
+    def test_remove_file(self, chain_graph):
+        """测试移除文件的全部边."""
+        chain_graph.remove_file("Service.java")
+
+        assert chain_graph.dependents("Core.java") == ["Repo.java"]
+        assert chain_graph.dependencies("Controller.java") == []
+
+
+class TestFromProjectIndex:
+    """从项目索引构建依赖图测试."""
+
+    def test_resolves_symbols_and_relative_imports(self):
+        """测试按符号名和相对导入解析依赖目标."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = ProjectIndex(tmpdir)
+
+            def path(name):
+                return os.path.join(tmpdir, "src", name)
+
+            for name in ("Core.java", "Service.java", "app.ts", "utils.ts"):
+                index._file_hashes[path(name)] = "hash"
+            index._add_symbol("com.example.Core", SymbolInfo("Core", "class", path("Core.java")))
+            index._add_symbol("com.example.Service", SymbolInfo("Service", "class", path("Service.java")))
+            index._add_dependency(DependencyInfo(path("Service.java"), "com.example.Core", "import"))
+            index._add_dependency(DependencyInfo(path("Service.java"), "java.util.List", "import"))
+            index._add_dependency(DependencyInfo(path("Service.java"), "Core", "extends"))
+            index._add_dependency(DependencyInfo(path("app.ts"), "./utils", "import"))
+            index._add_dependency(DependencyInfo(path("app.ts"), "lodash", "import"))
+
+            graph = ReverseDependencyGraph.from_project_index(index)
+
+            assert graph.dependents("src/Core.java") == ["src/Service.java"]
+            assert graph.dependencies("src/Service.java") == ["src/Core.java"]
+            assert graph.dependents("src/utils.ts") == ["src/app.ts"]
+            assert graph.dependencies("src/app.ts") == ["src/utils.ts"]
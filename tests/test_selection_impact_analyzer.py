@@ -19,6 +19,7 @@ from ut_agent.selection.change_detector import (
     MethodChange,
     ChangeType,
 )
+from ut_agent.tools.cross_file_analyzer import DependencyInfo, ProjectIndex, SymbolInfo
 
 
 class TestDataClasses:
@@ -230,6 +231,22 @@ class TestImpactAnalyzer:
             assert impact.file_path == "/src/Main.java"
             assert impact.change_type == ChangeType.MODIFIED
 
+    def test_analyze_direct_impact_changed_lines(self):
+        """测试直接影响记录基线版本中的变更行."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            analyzer = ImpactAnalyzer(tmpdir)
+
+            change = FileChange(
+                path="src/Main.java",
+                change_type=ChangeType.MODIFIED,
+                old_content="a\nb\nc\n",
+                new_content="a\nB\nc\n",
+            )
+
+            impact = analyzer._analyze_direct_impact(change)
+
+            assert impact.changed_lines == [2]
+
     def test_analyze_indirect_impact_no_index(self):
         """测试无项目索引时的间接影响分析."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -305,6 +322,36 @@ class TestImpactAnalyzer:
 
             assert test_file is None
 
+    def test_find_test_file_in_package(self):
+        """测试在测试目录的包路径下查找测试文件."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "pom.xml").write_text("<project/>")
+            test_file = Path(tmpdir) / "src" / "test" / "java" / "com" / "example" / "MainTests.java"
+            test_file.parent.mkdir(parents=True)
+            test_file.write_text("class MainTests {}")
+
+            analyzer = ImpactAnalyzer(tmpdir)
+
+            assert analyzer._find_test_file("src/main/java/com/example/Main.java") == (
+                "src/test/java/com/example/MainTests.java"
+            )
+
+    def test_find_test_file_sees_new_tests_on_next_analysis(self):
+        """测试新写入的测试文件在下一次影响分析时可见."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            analyzer = ImpactAnalyzer(tmpdir)
+            assert analyzer._find_test_file("src/Main.java") is None
+
+            test_file = Path(tmpdir) / "test" / "java" / "MainTest.java"
+            test_file.parent.mkdir(parents=True)
+            test_file.write_text("class MainTest {}")
+
+            report = analyzer.analyze_impact(ChangeSet(changes=[
+                FileChange(path="src/Main.java", change_type=ChangeType.MODIFIED),
+            ]))
+
+            assert report.direct_impacts[0].test_file == "test/java/MainTest.java"
+
     def test_find_test_method(self):
         """测试查找测试方法."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -327,6 +374,30 @@ class TestImpactAnalyzer:
             # 可能找到也可能找不到，取决于实现
             assert method is None or isinstance(method, str)
 
+    def test_find_test_method_reads_test_file_once(self):
+        """测试同一测试文件的多个变更方法只读取一次."""
+        from ut_agent.tools.test_analyzer import get_test_method_index
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            analyzer = ImpactAnalyzer(tmpdir)
+            test_file = Path(tmpdir) / "MainTest.java"
+            test_file.write_text(
+                "class MainTest {\n"
+                "    @Test\n"
+                "    void testStart() { target.start(); }\n"
+                "    @Test\n"
+                "    void stopTest() { }\n"
+                "}\n"
+            )
+            index = get_test_method_index()
+            parses = index.parse_count
+
+            assert analyzer._find_test_method(str(test_file), "start") == "testStart"
+            with patch("builtins.open", side_effect=AssertionError("reread")):
+                assert analyzer._find_test_method(str(test_file), "stop") == "stopTest"
+                assert analyzer._find_test_method(str(test_file), "other") is None
+            assert index.parse_count == parses + 1
+
     def test_find_dependents_no_index(self):
         """测试查找依赖项（无索引）."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -399,3 +470,85 @@ class TestImpactAnalyzer:
                 ChangeType.DELETED,
             )
             assert priority3 == 15  # 10 + 5
+
+
+class TestTransitiveImpact:
+    """基于反向依赖图的传递影响测试."""
+
+    @staticmethod
+    def _build_index(root: Path) -> ProjectIndex:
+        """Core <- Service(调用 compute) <- Controller; Core <- Audit(未调用)."""
+        sources = {
+            "Core.java": "public class Core { int compute() { return 1; } }",
+            "Service.java": "public class Service { int run() { return core.compute(); } }",
+            "Controller.java": "public class Controller { Service service; }",
+            "Audit.java": "public class Audit { Core core; }",
+            "AuditView.java": "public class AuditView { Audit audit; }",
+        }
+        index = ProjectIndex(str(root))
+        for name, content in sources.items():
+            (root / name).write_text(content)
+            index._file_hashes[str(root / name)] = "hash"
+            index._add_symbol(Path(name).stem, SymbolInfo(Path(name).stem, "class", str(root / name)))
+        for source, target in [
+            ("Service", "Core"), ("Controller", "Service"),
+            ("Audit", "Core"), ("AuditView", "Audit"),
+        ]:
+            index._add_dependency(DependencyInfo(str(root / f"{source}.java"), target, "import"))
+        return index
+
+    def test_indirect_impact_follows_transitive_dependents(self):
+        """测试间接影响沿调用了变更方法的依赖方传递."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            analyzer = ImpactAnalyzer(tmpdir, self._build_index(root))
+            change = FileChange(
+                path="Core.java",
+                change_type=ChangeType.MODIFIED,
+                method_changes=[MethodChange("compute", "int compute()", ChangeType.MODIFIED)],
+            )
+
+            impacts = analyzer._analyze_indirect_impact(change)
+
+            assert [i.file_path for i in impacts] == ["Service.java", "Controller.java"]
+            assert {i.source_file for i in impacts} == {"Core.java"}
+            assert impacts[0].call_sites == ["compute"]
+            assert "第 2 层" in impacts[1].reason
+
+    def test_max_depth_limits_impact(self):
+        """测试最大传递层数."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            analyzer = ImpactAnalyzer(tmpdir, self._build_index(root), max_depth=1)
+            change = FileChange(
+                path=str(root / "Core.java"),
+                change_type=ChangeType.MODIFIED,
+                method_changes=[MethodChange("compute", "int compute()", ChangeType.MODIFIED)],
+            )
+
+            impacts = analyzer._analyze_indirect_impact(change)
+
+            assert [i.file_path for i in impacts] == ["Service.java"]
+
+    def test_find_dependents_uses_graph(self):
+        """测试直接依赖方查询，且依赖变化后重建依赖图."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            index = self._build_index(root)
+            analyzer = ImpactAnalyzer(tmpdir, index)
+
+            assert analyzer._find_dependents(str(root / "Core.java")) == ["Audit.java", "Service.java"]
+
+            index._add_dependency(DependencyInfo(str(root / "Controller.java"), "Core", "import"))
+            assert analyzer._find_dependents("Core.java") == [
+                "Audit.java", "Controller.java", "Service.java",
+            ]
+
+            # 整体替换依赖同样使依赖图失效
+            controller = str(root / "Controller.java")
+            index.dependencies = [
+                d for d in index.dependencies if d.source_file != controller
+            ] + [DependencyInfo(str(root / "AuditView.java"), "Core", "import")]
+            assert analyzer._find_dependents("Core.java") == [
+                "Audit.java", "AuditView.java", "Service.java",
+            ]
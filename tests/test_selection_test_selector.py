@@ -11,6 +11,7 @@ from ut_agent.selection.test_selector import (
     SelectionStrategy,
 )
 from ut_agent.selection.change_detector import ChangeType, FileChange, MethodChange
+from ut_agent.selection.coverage_map import CoverageMap
 from ut_agent.selection.impact_analyzer import ImpactReport, DirectImpact, IndirectImpact, TestImpact
 
 
@@ -407,5 +408,95 @@ class TestTestSelector:
         assert summary["strategy"] == "smart"
 
 
+class TestCoverageBasedSelection:
+    """基于覆盖映射的测试选择测试"""
+    
+    @staticmethod
+    def _impact(changed_lines):
+        impact = ImpactReport()
+        impact.add_direct(DirectImpact(
+            file_path="src/Foo.java",
+            change_type=ChangeType.MODIFIED,
+            test_file="test/FooTest.java",
+            method_changes=[MethodChange("run", "void run()", ChangeType.MODIFIED, 10, 12)],
+            changed_lines=changed_lines,
+        ))
+        impact.add_indirect(IndirectImpact(
+            file_path="src/Bar.java",
+            reason="调用了变更的方法: run",
+            test_file="test/BarTest.java",
+            source_file="src/Foo.java",
+        ))
+        impact.add_test_impact(TestImpact(
+            test_file="test/OtherTest.java",
+            test_method="testRun",
+            reason="测试方法需要更新: run",
+            source_file="src/Foo.java",
+        ))
+        return impact
+    
+    @staticmethod
+    def _coverage_map(tmp_path):
+        coverage_map = CoverageMap(str(tmp_path))
+        coverage_map.set_test_coverage("test/FooTest.java#testRun", {"src/Foo.java": range(10, 13)})
+        coverage_map.set_test_coverage("test/FooTest.java#testStop", {"src/Foo.java": range(20, 23)})
+        coverage_map.set_test_coverage("test/BarTest.java#testAll", {"src/Foo.java": range(1, 30)})
+        return coverage_map
+    
+    def test_fully_covered_change_replaces_heuristics(self, tmp_path):
+        """测试变更行全部有覆盖时只选择最小覆盖测试集"""
+        selector = TestSelector(coverage_map=self._coverage_map(tmp_path))
+        
+        result = selector.select_tests(self._impact([11, 21]))
+        
+        assert [t.test_file for t in result.to_verify] == ["test/BarTest.java"]
+        task = result.to_verify[0]
+        assert task.methods == ["testAll"]
+        assert task.metadata["selection"] == "coverage"
+        assert task.metadata["covered_lines"] == {"src/Foo.java": [11, 21]}
+        assert [t.test_file for t in result.to_update] == ["test/FooTest.java"]
+    
+    def test_methods_of_same_test_file_are_merged(self, tmp_path):
+        """测试同一测试文件的多个测试方法合并为一个任务"""
+        coverage_map = self._coverage_map(tmp_path)
+        coverage_map.remove_test("test/BarTest.java#testAll")
+        selector = TestSelector(coverage_map=coverage_map)
+        
+        result = selector.select_tests(self._impact([11, 21]))
+        
+        assert len(result.to_verify) == 1
+        assert result.to_verify[0].methods == ["testRun", "testStop"]
+    
+    def test_uncovered_lines_fall_back_to_heuristics(self, tmp_path):
+        """测试存在无覆盖变更行时保留启发式选择"""
+        selector = TestSelector(coverage_map=self._coverage_map(tmp_path))
+        
+        result = selector.select_tests(self._impact([11, 45]))
+        
+        verify_files = [t.test_file for t in result.to_verify]
+        assert verify_files == ["test/BarTest.java", "test/BarTest.java"]
+        assert result.to_verify[0].metadata["selection"] == "coverage"
+        assert any(t.test_file == "test/OtherTest.java" for t in result.to_update)
+    
+    def test_method_ranges_used_without_changed_lines(self, tmp_path):
+        """测试没有变更行时使用变更方法的行范围"""
+        coverage_map = CoverageMap(str(tmp_path))
+        coverage_map.set_test_coverage("test/FooTest.java#testRun", {"src/Foo.java": range(10, 13)})
+        selector = TestSelector(coverage_map=coverage_map)
+        
+        result = selector.select_tests(self._impact([]))
+        
+        assert [(t.test_file, t.methods) for t in result.to_verify] == [
+            ("test/FooTest.java", ["testRun"]),
+        ]
+    
+    def test_without_coverage_map(self):
+        """测试没有覆盖映射时保持启发式选择"""
+        result = TestSelector().select_tests(self._impact([11]))
+        
+        assert [t.test_file for t in result.to_verify] == ["test/BarTest.java"]
+        assert result.to_verify[0].metadata == {}
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -148,6 +148,58 @@ class TestSimpleEmbeddingProvider:
         # 相似查询应该有更高的相似度
         assert sim_similar > sim_different
 
+    @pytest.mark.asyncio
+    async def test_batch_matches_single(self):
+        """测试批量生成与逐个生成结果一致."""
+        texts = ["Hello World", "how to write python tests", "中文 测试", "", "hello world"]
+
+        batch = await SimpleEmbeddingProvider(dimension=64).get_embeddings_batch(texts)
+        single_provider = SimpleEmbeddingProvider(dimension=64)
+        singles = [await single_provider.get_embedding(text) for text in texts]
+
+        for a, b in zip(batch, singles):
+            np.testing.assert_allclose(a, b, atol=1e-12)
+        # 大小写与首尾空白不影响特征
+        np.testing.assert_allclose(batch[0], batch[4])
+        assert not np.any(batch[3])
+
+    @pytest.mark.asyncio
+    async def test_batch_duplicate_texts(self):
+        """测试批量中重复文本只计算一次."""
+        provider = SimpleEmbeddingProvider(dimension=32)
+
+        embeddings = await provider.get_embeddings_batch(["same", "other", "same"])
+
+        assert embeddings[0] is embeddings[2]
+        assert len(provider._cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_cache_owns_rows(self):
+        """测试缓存的嵌入不是批量矩阵的视图."""
+        provider = SimpleEmbeddingProvider(dimension=32)
+
+        await provider.get_embeddings_batch(["a", "b", "c"])
+
+        for embedding in provider._cache.values():
+            assert embedding.base is None
+            assert embedding.flags.owndata
+
+    @pytest.mark.asyncio
+    async def test_cache_lru_bound(self):
+        """测试内部缓存按 LRU 淘汰."""
+        provider = SimpleEmbeddingProvider(dimension=32, cache_size=2)
+
+        first = await provider.get_embedding("a")
+        await provider.get_embedding("b")
+        assert await provider.get_embedding("a") is first
+        await provider.get_embedding("c")
+
+        assert len(provider._cache) == 2
+        assert await provider.get_embedding("a") is first
+        # "b" 已被淘汰，重新生成
+        assert await provider.get_embedding("b") is not None
+        assert len(provider._cache) == 2
+
 
 class TestSemanticCache:
     """语义缓存测试."""
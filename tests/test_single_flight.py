@@ -0,0 +1,197 @@
+"""请求合并测试."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from ut_agent.utils.async_llm import AsyncLLMCaller
+from ut_agent.utils.llm_cache import CachedLLM, LLMCache
+from ut_agent.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+    """SingleFlight 测试."""
+
+    def test_concurrent_calls_share_result(self):
+        """测试并发的相同请求只执行一次."""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "done"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            leader = pool.submit(flight.do, "key", work)
+            started.wait(5)
+            followers = [pool.submit(flight.do, "key", work) for _ in range(3)]
+            while flight.shared_count < 3:
+                time.sleep(0.001)
+            release.set()
+
+            assert leader.result() == ("done", False)
+            assert [f.result() for f in followers] == [("done", True)] * 3
+
+        assert len(calls) == 1
+        assert flight.in_flight() == 0
+
+    def test_exception_propagates_and_key_released(self):
+        """测试失败时所有等待者收到异常，之后的调用重新执行."""
+        flight = SingleFlight()
+
+        with pytest.raises(ValueError):
+            flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+        assert flight.do("key", lambda: 1) == (1, False)
+
+    def test_different_keys_not_shared(self):
+        """测试不同键互不合并."""
+        flight = SingleFlight()
+
+        assert flight.do("a", lambda: 1) == (1, False)
+        assert flight.do("b", lambda: 2) == (2, False)
+        assert flight.shared_count == 0
+
+
+class TestAsyncSingleFlight:
+    """AsyncSingleFlight 测试."""
+
+    async def test_concurrent_coroutines_share_result(self):
+        """测试并发协程只执行一次."""
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+
+        assert [r[0] for r in results] == ["done"] * 5
+        assert sorted(r[1] for r in results) == [False, True, True, True, True]
+        assert len(calls) == 1
+        assert flight.in_flight() == 0
+
+    async def test_cancelled_waiter_does_not_cancel_request(self):
+        """测试取消其中一个调用者不影响其他调用者."""
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == ("done", True)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+def _result(content: str) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))], llm_output={})
+
+
+class TestCachedLLMCoalescing:
+    """CachedLLM 请求合并测试."""
+
+    def test_concurrent_invoke_calls_provider_once(self):
+        """测试多个工作线程同时发出相同提示时只调用一次 LLM."""
+        release = threading.Event()
+        mock_llm = mock.MagicMock()
+        mock_llm.model_name = "gpt-4"
+        mock_llm._provider = "openai"
+
+        def slow_invoke(messages, **kwargs):
+            release.wait(5)
+            return _result("generated")
+
+        mock_llm.invoke.side_effect = slow_invoke
+        cache = LLMCache()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            # 每个工作线程持有独立的包装器，共享同一缓存
+            futures = [pool.submit(CachedLLM(mock_llm, cache).invoke, "same prompt") for _ in range(8)]
+            while cache.flight.shared_count < 7:
+                time.sleep(0.001)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert all(r is results[0] for r in results)
+        assert mock_llm.invoke.call_count == 1
+
+    async def test_concurrent_ainvoke_calls_provider_once(self):
+        """测试并发协程发出相同提示时只调用一次 LLM."""
+        mock_llm = mock.MagicMock()
+        mock_llm.model_name = "gpt-4"
+        mock_llm._provider = "openai"
+
+        async def slow_ainvoke(messages, **kwargs):
+            await asyncio.sleep(0.05)
+            return _result("generated")
+
+        mock_llm.ainvoke = mock.AsyncMock(side_effect=slow_ainvoke)
+        cached_llm = CachedLLM(mock_llm, LLMCache())
+
+        results = await asyncio.gather(*[cached_llm.ainvoke("same prompt") for _ in range(5)])
+
+        assert all(r is results[0] for r in results)
+        assert mock_llm.ainvoke.await_count == 1
+
+
+class TestAsyncLLMCallerCoalescing:
+    """AsyncLLMCaller 请求合并测试."""
+
+    def _llm(self, delay: float = 0.05):
+        llm = mock.MagicMock()
+        llm.model_name = "gpt-4"
+        llm._provider = "openai"
+
+        async def ainvoke(messages, **kwargs):
+            await asyncio.sleep(delay)
+            return AIMessage(
+                content=f"answer to {messages[-1].content}",
+                usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+            )
+
+        llm.ainvoke = mock.AsyncMock(side_effect=ainvoke)
+        return llm
+
+    async def test_identical_calls_across_callers_coalesced(self):
+        """测试不同调用器对同一模型的相同请求合并."""
+        llm = self._llm()
+        callers = [AsyncLLMCaller(llm) for _ in range(3)]
+
+        results = await asyncio.gather(*[caller.call("prompt") for caller in callers])
+
+        assert llm.ainvoke.await_count == 1
+        assert all(r.content == "answer to prompt" for r in results)
+        # 只有真正发出请求的调用计入 token
+        assert sum(r.total_tokens for r in results) == 15
+        assert all(len(caller.get_call_history()) == 1 for caller in callers)
+
+    async def test_different_prompts_not_coalesced(self):
+        """测试不同提示与不同温度分别调用."""
+        llm = self._llm()
+        caller = AsyncLLMCaller(llm)
+
+        await asyncio.gather(
+            caller.call("a"),
+            caller.call("b"),
+            caller.call("a", temperature=0.1),
+        )
+
+        assert llm.ainvoke.await_count == 3
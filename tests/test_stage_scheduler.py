@@ -0,0 +1,156 @@
+"""阶段调度器测试模块."""
+
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from ut_agent.utils.stage_scheduler import (
+    StageScheduler,
+    StageSchedulerMetrics,
+    get_cpu_stage_limit,
+    get_io_stage_limit,
+    get_process_stage_limit,
+)
+
+
+class TestStageSchedulerMetrics:
+    """StageSchedulerMetrics 测试."""
+
+    def test_averages_empty(self):
+        """测试无任务时的平均值."""
+        metrics = StageSchedulerMetrics(stage_name="s", max_workers=2, max_concurrency=2)
+        assert metrics.avg_queue_wait_ms == 0.0
+        assert metrics.avg_execution_ms == 0.0
+
+    def test_to_dict(self):
+        """测试转换为字典."""
+        metrics = StageSchedulerMetrics(
+            stage_name="s",
+            max_workers=2,
+            max_concurrency=2,
+            completed=2,
+            total_queue_wait_ms=10.0,
+            total_execution_ms=40.0,
+        )
+        data = metrics.to_dict()
+        assert data["avg_queue_wait_ms"] == 5.0
+        assert data["avg_execution_ms"] == 20.0
+        assert data["max_workers"] == 2
+
+
+class TestStageScheduler:
+    """StageScheduler 测试."""
+
+    def test_invalid_workers(self):
+        """测试非法线程数."""
+        with pytest.raises(ValueError):
+            StageScheduler("s", max_workers=0)
+        with pytest.raises(ValueError):
+            StageScheduler("s", max_workers=2, max_concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        """测试执行并返回结果."""
+        async with StageScheduler("s", max_workers=2) as scheduler:
+            result = await scheduler.run(lambda x, y: x + y, 1, 2)
+
+        assert result == 3
+        metrics = scheduler.get_metrics()
+        assert metrics.submitted == 1
+        assert metrics.completed == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """测试并发数不超过上限."""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def work(_: int) -> None:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+        async with StageScheduler("s", max_workers=4, max_concurrency=2) as scheduler:
+            await asyncio.gather(*[scheduler.run(work, i) for i in range(10)])
+
+        assert peak <= 2
+        assert scheduler.get_metrics().peak_in_flight <= 2
+        assert scheduler.get_metrics().completed == 10
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_separate_from_execution(self):
+        """测试排队时间与执行时间分开统计."""
+        async with StageScheduler("s", max_workers=1) as scheduler:
+            await asyncio.gather(*[scheduler.run(time.sleep, 0.02) for _ in range(3)])
+
+        metrics = scheduler.get_metrics()
+        assert metrics.total_execution_ms >= 55
+        # 第二、三个任务必须等待前面的任务完成
+        assert metrics.max_queue_wait_ms >= 15
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self):
+        """测试失败任务统计."""
+
+        def fail() -> None:
+            raise RuntimeError("boom")
+
+        async with StageScheduler("s", max_workers=1) as scheduler:
+            with pytest.raises(RuntimeError):
+                await scheduler.run(fail)
+
+        metrics = scheduler.get_metrics()
+        assert metrics.failed == 1
+        assert metrics.completed == 0
+
+    def test_invalid_backend(self):
+        """测试非法执行后端."""
+        with pytest.raises(ValueError):
+            StageScheduler("s", max_workers=1, backend="fiber")
+
+    @pytest.mark.asyncio
+    async def test_process_backend_runs_in_worker_process(self):
+        """测试进程池后端在独立进程中执行."""
+        async with StageScheduler("s", max_workers=2, backend="process") as scheduler:
+            pids = await asyncio.gather(*[scheduler.run(os.getpid) for _ in range(4)])
+
+        assert os.getpid() not in pids
+        assert scheduler.get_metrics().completed == 4
+
+
+class TestStageLimits:
+    """阶段并发上限测试."""
+
+    def test_cpu_limit_capped_by_cpu_count(self):
+        """测试 CPU 阶段上限不超过核心数."""
+        with patch("ut_agent.utils.stage_scheduler.multiprocessing.cpu_count", return_value=4):
+            assert get_cpu_stage_limit(16) == 4
+            assert get_cpu_stage_limit(2) == 2
+
+    def test_io_limit_uses_max_workers(self):
+        """测试 I/O 阶段上限使用 max_workers."""
+        assert get_io_stage_limit(16) == 16
+        assert get_io_stage_limit(0) == 1
+
+    def test_process_limit_uses_cpu_count(self):
+        """测试进程池后端默认使用全部核心."""
+        with patch("ut_agent.utils.stage_scheduler.multiprocessing.cpu_count", return_value=32):
+            assert get_process_stage_limit() == 32
+
+    def test_limits_honor_settings(self):
+        """测试配置覆盖."""
+        with patch("ut_agent.config.settings") as mock_settings:
+            mock_settings.max_analysis_workers = 3
+            mock_settings.max_llm_concurrency = 5
+            assert get_cpu_stage_limit(16) == 3
+            assert get_io_stage_limit(16) == 5
+            assert get_process_stage_limit() == 3
@@ -182,56 +182,71 @@ class TestJavaChangeDetector:
         assert "getValue" in classes[0].methods
     
     def test_parse_methods(self):
-        """测试解析方法定义"""
+        """测试解析方法的返回类型、参数与修饰符"""
         detector = JavaChangeDetector(str(self.project_path))
         
-        class_content = """
+        content = """
         public class TestClass {
             public void testMethod() {
                 System.out.println("test");
             }
             
-            private int getValue() {
+            @Override
+            private static int getValue(int a, String b) {
                 return 42;
             }
         }
         """
         
-        methods = detector._parse_methods(class_content, 1)
-        assert "testMethod" in methods
-        assert "getValue" in methods
+        methods = detector._parse_classes(content)[0].methods
         assert methods["testMethod"].return_type == "void"
         assert methods["getValue"].return_type == "int"
+        assert methods["getValue"].parameters == ["int a", "String b"]
+        assert methods["getValue"].modifiers == ["private", "static"]
     
-    def test_find_class_end(self):
-        """测试查找类结束位置"""
+    def test_method_ranges_ignore_braces_in_strings(self):
+        """测试字符串和注释中的花括号不影响方法范围"""
         detector = JavaChangeDetector(str(self.project_path))
         
-        lines = [
+        content = "\n".join([
             "public class TestClass {",
-            "    public void testMethod() {",
+            "    public String open() {",
+            "        return \"{{\"; // {",
+            "    }",
+            "    public void next() {",
             "    }",
             "}",
             "// End of file",
-        ]
+        ])
         
-        end_line = detector._find_class_end(lines, 0)
-        assert end_line == 4
-    
-    def test_find_method_end(self):
-        """测试查找方法结束位置"""
+        classes = detector._parse_classes(content)
+        assert (classes[0].line_start, classes[0].line_end) == (1, 7)
+        open_method = classes[0].methods["open"]
+        assert (open_method.line_start, open_method.line_end) == (2, 4)
+        assert open_method.signature == "public String open()"
+        assert (classes[0].methods["next"].line_start, classes[0].methods["next"].line_end) == (5, 6)
+    
+    def test_inner_classes(self):
+        """测试内部类与枚举的方法归属"""
         detector = JavaChangeDetector(str(self.project_path))
         
-        lines = [
-            "public void testMethod() {",
-            "    System.out.println(\"test\");",
-            "}",
-            "public void anotherMethod() {",
-            "}",
-        ]
+        content = """
+        public class Outer {
+            void a() {}
+            static class Inner {
+                void b() {}
+            }
+            enum Kind {
+                X;
+                void c() {}
+            }
+        }
+        """
         
-        end_line = detector._find_method_end(lines, 0, 1)
-        assert end_line == 3
+        classes = {c.name: c for c in detector._parse_classes(content)}
+        assert list(classes["Outer"].methods) == ["a"]
+        assert list(classes["Inner"].methods) == ["b"]
+        assert list(classes["Kind"].methods) == ["c"]
     
     @mock.patch("ut_agent.tools.change_detector.GitAnalyzer")
     def test_analyze_changes_added_file(self, mock_git_analyzer_class):
@@ -422,20 +437,43 @@ class TestTypeScriptChangeDetector:
         assert "testFunction" in functions
         assert "asyncFunction" in functions
     
-    def test_find_function_end(self):
-        """测试查找函数结束位置"""
+    def test_function_ranges(self):
+        """测试函数、类方法与箭头函数的范围"""
         detector = TypeScriptChangeDetector(str(self.project_path))
         
-        lines = [
+        content = "\n".join([
             "export function testFunction(): void {",
-            "    console.log(\"test\");",
+            "    console.log(\"}\");",
             "}",
-            "export function anotherFunction(): void {",
+            "const arrow = (x: number) => {",
+            "    return x;",
+            "};",
+            "class Service {",
+            "    load(): void {}",
+            "}",
+        ])
+        
+        functions = detector._parse_functions(content)
+        assert (functions["testFunction"].line_start, functions["testFunction"].line_end) == (1, 3)
+        assert (functions["arrow"].line_start, functions["arrow"].line_end) == (4, 6)
+        assert (functions["load"].line_start, functions["load"].line_end) == (8, 8)
+    
+    def test_parse_vue_script(self):
+        """测试 Vue 文件只解析 script 块并保留原文件行号"""
+        detector = TypeScriptChangeDetector(str(self.project_path))
+        
+        content = "\n".join([
+            "<template><div>{{ count }}</div></template>",
+            "<script lang=\"ts\">",
+            "export function increment(count: number): number {",
+            "    return count + 1;",
             "}",
-        ]
+            "</script>",
+        ])
         
-        end_line = detector._find_function_end(lines, 0)
-        assert end_line == 3
+        functions = detector._parse_functions(content, "src/Counter.vue")
+        assert list(functions) == ["increment"]
+        assert (functions["increment"].line_start, functions["increment"].line_end) == (3, 5)
     
     @mock.patch("ut_agent.tools.change_detector.GitAnalyzer")
     def test_analyze_changes_added_file(self, mock_git_analyzer_class):
@@ -8,6 +8,8 @@ import pytest
 
 from ut_agent.tools.test_analyzer import (
     TestAnalyzer,
+    TestFileMethods,
+    TestMethodIndex,
     TestMethodInfo,
     TestCoverageInfo,
     TestGap,
@@ -681,3 +683,115 @@ class TestReusableResources:
 
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+JAVA_TEST_SOURCE = """
+public class UserServiceTest {
+    @Test
+    @DisplayName("查询用户")
+    public void testGetUser() {
+        target.getUser(1);
+    }
+
+    @Test
+    public void deleteUserTest() {
+        target.removeAll();
+    }
+
+    @Test
+    public void givenId_whenFindUser_thenReturn() {
+    }
+
+    @Test
+    public void verifiesAudit() {
+        sut.writeAudit();
+    }
+}
+"""
+
+
+class TestTestMethodIndex:
+    """测试方法索引测试."""
+
+    def test_display_name_with_arguments(self):
+        """测试带参数的注解不影响测试方法识别."""
+        methods = TestAnalyzer("java")._extract_java_test_methods(JAVA_TEST_SOURCE)
+
+        assert [m.name for m in methods] == [
+            "testGetUser", "deleteUserTest", "givenId_whenFindUser_thenReturn", "verifiesAudit",
+        ]
+        assert methods[0].description == "查询用户"
+        assert methods[0].line_start == 3
+        assert methods[0].tested_methods == ["getUser"]
+
+    def test_same_content_is_parsed_once(self):
+        """测试相同内容只解析一次."""
+        index = TestMethodIndex()
+
+        first = index.get_methods(JAVA_TEST_SOURCE, "java")
+        second = index.get_methods(JAVA_TEST_SOURCE, "java")
+        index.get_methods(JAVA_TEST_SOURCE, "typescript")
+
+        assert first is second
+        assert index.parse_count == 2
+
+    def test_file_methods_read_once(self, tmp_path):
+        """测试同一文件多次查询只读取和解析一次."""
+        test_file = tmp_path / "UserServiceTest.java"
+        test_file.write_text(JAVA_TEST_SOURCE, encoding="utf-8")
+        index = TestMethodIndex()
+
+        first = index.get_file_methods(str(test_file), "java")
+        with mock.patch("builtins.open", side_effect=AssertionError("reread")):
+            for _ in range(5):
+                assert index.get_file_methods(str(test_file), "java") is first
+        assert index.parse_count == 1
+
+    def test_file_change_is_reparsed(self, tmp_path):
+        """测试文件内容变化后重新解析."""
+        test_file = tmp_path / "UserServiceTest.java"
+        test_file.write_text(JAVA_TEST_SOURCE, encoding="utf-8")
+        index = TestMethodIndex()
+        index.get_file_methods(str(test_file), "java")
+
+        test_file.write_text("class Empty {}", encoding="utf-8")
+
+        assert index.get_file_methods(str(test_file), "java").methods == []
+        assert index.get_file_methods(str(tmp_path / "Missing.java"), "java") is None
+
+    def test_lru_eviction(self):
+        """测试缓存容量上限."""
+        index = TestMethodIndex(max_entries=2)
+        for i in range(3):
+            index.get_methods(f"// {i}", "java")
+
+        index.get_methods("// 0", "java")
+
+        assert index.parse_count == 4
+
+    def test_find_test_method_rules(self):
+        """测试按调用关系和命名规则查找测试方法."""
+        methods = TestMethodIndex().get_methods(JAVA_TEST_SOURCE, "java")
+
+        assert methods.find_test_method("getUser") == "testGetUser"
+        assert methods.find_test_method("deleteUser") == "deleteUserTest"
+        assert methods.find_test_method("findUser") == "givenId_whenFindUser_thenReturn"
+        assert methods.find_test_method("writeAudit") == "verifiesAudit"
+        assert methods.find_test_method("Audit") == "verifiesAudit"
+        assert methods.find_test_method("missing") is None
+        assert methods.find_test_method("") is None
+
+    def test_find_test_method_typescript_describe(self):
+        """测试 TypeScript 测试描述与 describe 块回退."""
+        content = """
+describe('formatDate', () => {
+  it('returns iso string', () => {
+    expect(formatDate(d)).toBe('x');
+  });
+});
+"""
+        methods = TestMethodIndex().get_methods(content, "typescript")
+
+        assert isinstance(methods, TestFileMethods)
+        assert methods.find_test_method("iso") == "returns iso string"
+        assert methods.find_test_method("formatDate") == "formatDate"
@@ -0,0 +1,162 @@
+"""测试文件索引测试."""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from ut_agent.tools.test_file_index import TestFileIndex, is_test_file_name
+
+
+def _age(root: Path) -> None:
+    """把目录的修改时间调到可疑时间窗口之外."""
+    old = time.time() - 60
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (old, old))
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    files = [
+        "src/main/java/com/example/UserService.java",
+        "src/test/java/com/example/UserServiceTest.java",
+        "src/test/java/com/other/UserServiceTest.java",
+        "src/test/java/TestOrder.java",
+        "web/src/app.ts",
+        "web/src/app.spec.ts",
+        "web/node_modules/lib/lib.test.ts",
+        ".git/hooks/HookTest.java",
+    ]
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    return root
+
+
+class TestIsTestFileName:
+    """测试文件命名模式测试."""
+
+    @pytest.mark.parametrize("name", [
+        "UserServiceTest.java", "UserServiceTests.java", "TestUser.java",
+        "app.test.ts", "app.spec.tsx", "test_user.py", "user_test.py",
+    ])
+    def test_matches(self, name):
+        assert is_test_file_name(name)
+
+    @pytest.mark.parametrize("name", ["UserService.java", "app.ts", "user.py", "Contest.py"])
+    def test_does_not_match(self, name):
+        assert not is_test_file_name(name)
+
+
+class TestTestFileIndex:
+    """TestFileIndex 测试."""
+
+    def test_initial_scan_skips_pruned_dirs(self, project):
+        """测试首次扫描登记测试文件并跳过 node_modules 和隐藏目录."""
+        index = TestFileIndex(str(project))
+        index.refresh()
+
+        assert index.paths_named("UserServiceTest.java") == [
+            "src/test/java/com/example/UserServiceTest.java",
+            "src/test/java/com/other/UserServiceTest.java",
+        ]
+        assert index.contains("web/src/app.spec.ts")
+        assert index.contains(str(project / "src/test/java/TestOrder.java"))
+        assert index.paths_named("lib.test.ts") == []
+        assert index.paths_named("HookTest.java") == []
+
+    def test_find_prefers_matching_package(self, project):
+        """测试同名测试按包路径选择."""
+        index = TestFileIndex(str(project))
+        index.refresh()
+
+        found = index.find(
+            ["UserServiceTest.java"],
+            roots=["src/test/java"],
+            source_file=str(project / "src/main/java/com/other/UserService.java"),
+        )
+
+        assert found == "src/test/java/com/other/UserServiceTest.java"
+
+    def test_find_follows_root_and_name_priority(self, project):
+        """测试按根目录、文件名的优先级查找."""
+        index = TestFileIndex(str(project))
+        index.refresh()
+
+        assert index.find(["OrderTest.java", "TestOrder.java"], roots=["missing", "src"]) == (
+            "src/test/java/TestOrder.java"
+        )
+        assert index.find(["app.test.ts", "app.spec.ts"], roots=["src/test/java", "web"]) == (
+            "web/src/app.spec.ts"
+        )
+        assert index.find(["NoSuchTest.java"]) is None
+
+    def test_refresh_only_relists_changed_dirs(self, project):
+        """测试刷新只重新列出发生变化的目录."""
+        index = TestFileIndex(str(project))
+        index.refresh()
+        _age(project)
+        index.refresh()
+
+        assert index.refresh() == 0
+
+        (project / "src/test/java/com/example/NewTest.java").write_text("")
+        (project / "src/test/java/TestOrder.java").unlink()
+        new_dir = project / "src/test/java/com/added/deep"
+        new_dir.mkdir(parents=True)
+        (new_dir / "DeepTest.java").write_text("")
+
+        rescanned = index.refresh()
+
+        assert 0 < rescanned < 10
+        assert index.contains("src/test/java/com/example/NewTest.java")
+        assert not index.contains("src/test/java/TestOrder.java")
+        assert index.paths_named("DeepTest.java") == ["src/test/java/com/added/deep/DeepTest.java"]
+
+    def test_removed_directory_drops_tests(self, project):
+        """测试目录删除后其中的测试被移除."""
+        import shutil
+
+        index = TestFileIndex(str(project))
+        index.refresh()
+        shutil.rmtree(project / "src/test/java/com")
+
+        index.refresh()
+
+        assert index.paths_named("UserServiceTest.java") == []
+        assert index.contains("src/test/java/TestOrder.java")
+
+    def test_index_is_persisted(self, project):
+        """测试索引持久化后无需重新扫描."""
+        index = TestFileIndex(str(project))
+        index.refresh()
+        _age(project)
+        index.refresh()
+        index.refresh()  # 保存不在可疑窗口内的签名
+
+        reloaded = TestFileIndex(str(project))
+        assert reloaded.refresh() == 0
+        assert reloaded.contains("web/src/app.spec.ts")
+
+    def test_add_registers_new_test(self, project):
+        """测试手动登记新写入的测试文件."""
+        index = TestFileIndex(str(project))
+        index.refresh()
+
+        index.add(str(project / "src/test/java/com/example/LaterTest.java"))
+        index.add("src/main/java/Helper.java")
+
+        assert index.contains("src/test/java/com/example/LaterTest.java")
+        assert not index.contains("src/main/java/Helper.java")
+
+    def test_get_instance_is_shared(self, project):
+        """测试同一项目共享索引实例."""
+        try:
+            assert TestFileIndex.get_instance(str(project)) is TestFileIndex.get_instance(
+                str(project / "src" / "..")
+            )
+        finally:
+            TestFileIndex.reset_instances()
@@ -199,6 +199,30 @@ class TestTestFileMapper:
         test_file_path = mapper._infer_test_file_path("src/TestClass.ts")
         assert test_file_path == "src/TestClass.test.ts"
     
+    def test_infer_test_file_path_java_package(self):
+        """测试推断 Java 测试文件路径（按包路径匹配）"""
+        mapper = TestFileMapper(str(self.project_path), "java")
+        
+        for package in ["com/example", "com/other"]:
+            test_file = self.project_path / "src" / "test" / "java" / package / "OrderTest.java"
+            test_file.parent.mkdir(parents=True, exist_ok=True)
+            test_file.write_text("public class OrderTest {}")
+        
+        test_file_path = mapper._infer_test_file_path("src/main/java/com/other/Order.java")
+        assert test_file_path == "src/test/java/com/other/OrderTest.java"
+    
+    def test_infer_test_file_path_uses_index(self):
+        """测试推断测试文件路径时不再逐个探测文件系统"""
+        mapper = TestFileMapper(str(self.project_path), "typescript")
+        test_file = self.project_path / "src" / "TestClass.spec.ts"
+        test_file.parent.mkdir(parents=True, exist_ok=True)
+        test_file.write_text("")
+        mapper._get_test_index()
+        
+        with mock.patch.object(Path, "exists", side_effect=AssertionError("filesystem probe")):
+            assert mapper._infer_test_file_path("src/TestClass.ts") == "src/TestClass.spec.ts"
+            assert mapper._infer_test_file_path("src/Other.ts") == "src/Other.test.ts"
+    
     def test_extract_method_mappings_java(self):
         """测试提取 Java 方法映射"""
         mapper = TestFileMapper(str(self.project_path), "java")
@@ -0,0 +1,65 @@
+"""语法树增量编辑测试."""
+
+import pytest
+
+from ut_agent.tools.ast_cache import create_parser, serialize_tree
+from ut_agent.tools.tree_edits import apply_tree_edits, compute_tree_edits
+
+
+BASE_LINES = ["package com.example;\n", "\n", "public class Calc {\n"] + [
+    f"    public int m{i}(int x) {{ return x + {i}; }}\n" for i in range(50)
+] + ["}\n"]
+
+
+def _reparse(old: bytes, new: bytes):
+    parser = create_parser("java")
+    tree = parser.parse(old)
+    apply_tree_edits(tree, compute_tree_edits(old, new))
+    return parser.parse(new, tree), parser.parse(new)
+
+
+class TestComputeTreeEdits:
+    """compute_tree_edits 测试."""
+
+    def test_identical_sources(self):
+        """测试相同源码不产生编辑."""
+        assert compute_tree_edits(b"class A {}", b"class A {}") == []
+
+    def test_single_line_change(self):
+        """测试单行修改只产生一个小编辑."""
+        old = "".join(BASE_LINES).encode()
+        lines = list(BASE_LINES)
+        lines[10] = lines[10].replace("x +", "x -")
+        new = "".join(lines).encode()
+
+        edits = compute_tree_edits(old, new)
+
+        assert len(edits) == 1
+        assert edits[0].start_point == (10, 0)
+        assert edits[0].size == len(lines[10].encode())
+
+    def test_separate_hunks(self):
+        """测试不相邻的修改产生多个编辑."""
+        lines = list(BASE_LINES)
+        lines.insert(5, "    public int added() { return 0; }\n")
+        del lines[40]
+        edits = compute_tree_edits("".join(BASE_LINES).encode(), "".join(lines).encode())
+        assert len(edits) == 2
+
+    @pytest.mark.parametrize("mutate", [
+        lambda lines: lines.insert(20, "    private int field;\n"),
+        lambda lines: lines.__delitem__(30),
+        lambda lines: lines.__setitem__(-1, "}"),
+        lambda lines: lines.__setitem__(3, lines[3] + lines[4]),
+        lambda lines: lines.__setitem__(slice(10, 13), ["    // 中文注释\n"]),
+    ])
+    def test_incremental_reparse_matches_full_parse(self, mutate):
+        """测试增量重解析结果与全量解析一致."""
+        lines = list(BASE_LINES)
+        mutate(lines)
+        old = "".join(BASE_LINES).encode()
+        new = "".join(lines).encode()
+
+        incremental, full = _reparse(old, new)
+
+        assert serialize_tree(incremental, new).root.to_dict() == serialize_tree(full, new).root.to_dict()
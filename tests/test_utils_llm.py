@@ -1,7 +1,14 @@
 """LLM 模型管理模块单元测试."""
 
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch, MagicMock
 
+import httpx
 import pytest
 
 from ut_agent.utils.llm import (
@@ -10,12 +17,22 @@ from ut_agent.utils.llm import (
     DeepSeekProvider,
     OllamaProvider,
     LLMProviderRegistry,
+    LLMModelRegistry,
+    LLMRouter,
+    RouterBackend,
+    RouterProvider,
     register_provider,
     get_llm,
     list_available_providers,
+    clear_llm_instances,
+    get_llm_pool_stats,
+    _get_http_clients,
 )
 from ut_agent.config import settings
 from ut_agent.exceptions import ConfigurationError, LLMError
+from ut_agent.utils.llm_cache import clear_llm_cache
+from ut_agent.utils.rate_limiter import reset_rate_limiters
+from ut_agent.utils.recovery import CircuitBreaker
 
 
 class TestLLMProvider:
@@ -129,13 +146,15 @@ class TestOpenAIProvider:
             mock_chat_openai.return_value = mock_model
 
             model = provider.create_model(mock_config)
+            http_client, http_async_client = _get_http_clients(mock_config)
 
             mock_chat_openai.assert_called_once_with(
                 model="gpt-3.5-turbo",
                 api_key="test_key",
                 base_url="https://api.openai.com/v1",
                 temperature=0.7,
-                http_client=None,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
             assert model == mock_model
 
@@ -196,13 +215,15 @@ class TestDeepSeekProvider:
             mock_chat_openai.return_value = mock_model
 
             model = provider.create_model(mock_config)
+            http_client, http_async_client = _get_http_clients(mock_config)
 
             mock_chat_openai.assert_called_once_with(
                 model="deepseek-chat",
                 api_key="test_key",
                 base_url="https://api.deepseek.com/v1",
                 temperature=0.7,
-                http_client=None,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
 
     def test_deepseek_create_model_no_api_key(self):
@@ -461,3 +482,378 @@ class TestListAvailableProviders:
         assert isinstance(providers, list)
         # 至少应该包含 ollama
         assert "ollama" in providers
+
+
+class TestLLMModelRegistry:
+    """模型实例与 HTTP 客户端复用测试."""
+
+    @pytest.fixture(autouse=True)
+    def clean_instances(self):
+        """每个测试使用空的实例池."""
+        clear_llm_instances()
+        yield
+        clear_llm_instances()
+
+    def test_same_config_reuses_model(self):
+        """测试相同配置复用模型实例."""
+        provider = OllamaProvider()
+        before = get_llm_pool_stats()["llm_model"]
+
+        first = LLMModelRegistry.get_or_create(provider, settings)
+        second = LLMModelRegistry.get_or_create(provider, settings)
+
+        after = get_llm_pool_stats()["llm_model"]
+        assert first is second
+        assert LLMModelRegistry.size() == 1
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 1
+
+    def test_temperature_change_creates_new_model(self):
+        """测试温度不同时创建新实例."""
+        provider = OllamaProvider()
+        first = LLMModelRegistry.get_or_create(provider, settings)
+
+        original = settings.temperature
+        settings.temperature = 0.9
+        try:
+            second = LLMModelRegistry.get_or_create(provider, settings)
+        finally:
+            settings.temperature = original
+
+        assert first is not second
+        assert LLMModelRegistry.size() == 2
+
+    def test_router_backend_change_creates_new_router(self):
+        """测试路由后端列表变化后不返回过期的路由器."""
+        provider = RouterProvider()
+        original = settings.llm_router_backends
+        try:
+            settings.llm_router_backends = ["ollama"]
+            first = LLMModelRegistry.get_or_create(provider, settings)
+            assert LLMModelRegistry.get_or_create(provider, settings) is first
+
+            settings.llm_router_backends = ["ollama", "openai"]
+            with patch.object(OpenAIProvider, "is_available", return_value=True), \
+                    patch.object(OpenAIProvider, "create_model", return_value=Mock()):
+                second = LLMModelRegistry.get_or_create(provider, settings)
+        finally:
+            settings.llm_router_backends = original
+
+        assert second is not first
+        assert [b.name for b in second.backends] == ["ollama", "openai"]
+
+    def test_get_llm_shares_underlying_model(self):
+        """测试多次 get_llm 共享底层模型实例."""
+        assert get_llm("ollama")._llm is get_llm("ollama")._llm
+
+    def test_openai_compatible_models_share_http_clients(self):
+        """测试 OpenAI 兼容模型共享同一组 HTTP 客户端."""
+        config = Mock(
+            openai_api_key="k1", openai_model="gpt-4o", openai_base_url=None,
+            deepseek_api_key="k2", deepseek_model="deepseek-chat", deepseek_base_url=None,
+            temperature=0.2, ca_cert_path=None,
+        )
+
+        with patch("ut_agent.utils.llm.ChatOpenAI") as mock_chat_openai:
+            OpenAIProvider().create_model(config)
+            DeepSeekProvider().create_model(config)
+
+        first, second = (c.kwargs for c in mock_chat_openai.call_args_list)
+        assert first["http_client"] is second["http_client"]
+        assert first["http_async_client"] is second["http_async_client"]
+        assert get_llm_pool_stats()["http_client"]["hits"] >= 1
+
+    def test_ca_cert_uses_separate_clients(self):
+        """测试配置 CA 证书时使用单独的客户端."""
+        import certifi
+
+        default_clients = _get_http_clients(Mock(ca_cert_path=None))
+        custom_clients = _get_http_clients(Mock(ca_cert_path=certifi.where()))
+
+        assert default_clients[0] is not custom_clients[0]
+        assert _get_http_clients(Mock(ca_cert_path=certifi.where())) == custom_clients
+
+    def test_pool_limits_come_from_config(self):
+        """测试连接池参数取自传入的配置，不同参数使用不同的客户端."""
+        config = Mock(
+            ca_cert_path=None,
+            llm_http_max_connections=7,
+            llm_http_max_keepalive=3,
+            llm_http_keepalive_expiry=5.0,
+            llm_timeout=12,
+        )
+
+        with patch("ut_agent.utils.llm.httpx.Client") as mock_client, \
+                patch("ut_agent.utils.llm.httpx.AsyncClient"):
+            clients = _get_http_clients(config)
+            default_clients = _get_http_clients(Mock(ca_cert_path=None))
+
+        kwargs = mock_client.call_args_list[0].kwargs
+        assert kwargs["limits"] == httpx.Limits(
+            max_connections=7, max_keepalive_connections=3, keepalive_expiry=5.0
+        )
+        assert kwargs["timeout"] == httpx.Timeout(12, connect=10.0)
+        assert default_clients is not clients
+        assert mock_client.call_args_list[1].kwargs["limits"].max_connections == (
+            settings.llm_http_max_connections
+        )
+
+    def test_clear_closes_sync_and_async_clients(self):
+        """测试清理时同时关闭同步与异步客户端."""
+        client, async_client = _get_http_clients(Mock(ca_cert_path=None))
+
+        clear_llm_instances()
+
+        assert client.is_closed
+        assert async_client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_clear_closes_async_client_inside_event_loop(self):
+        """测试在事件循环中清理时调度关闭异步客户端."""
+        _, async_client = _get_http_clients(Mock(ca_cert_path=None))
+
+        clear_llm_instances()
+        await asyncio.sleep(0)
+
+        assert async_client.is_closed
+
+
+class _ChatCompletionHandler(BaseHTTPRequestHandler):
+    """返回固定回复的 OpenAI 兼容接口（HTTP/1.1 长连接）."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "pong"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAsyncClientAcrossEventLoops:
+    """异步 HTTP 客户端跨事件循环复用测试."""
+
+    @pytest.fixture
+    def server_url(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatCompletionHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        clear_llm_instances()
+        clear_llm_cache()
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+        clear_llm_instances()
+        clear_llm_cache()
+        server.shutdown()
+        server.server_close()
+
+    def test_same_llm_works_in_consecutive_event_loops(self, server_url):
+        """测试同一个 get_llm 结果可以在先后两次 asyncio.run 中使用."""
+        with patch.object(settings, "private_llm_base_url", server_url), \
+                patch.object(settings, "private_llm_api_key", None):
+            llm = get_llm("private_llm")
+
+            first = asyncio.run(llm.ainvoke("first"))
+            second = asyncio.run(llm.ainvoke("second"))
+
+        assert first.content == "pong"
+        assert second.content == "pong"
+
+    def test_sync_client_is_shared_and_async_client_is_per_loop(self):
+        """测试同步客户端进程内共享，异步连接池按事件循环分配."""
+        client, async_client = _get_http_clients(Mock(ca_cert_path=None))
+        assert _get_http_clients(Mock(ca_cert_path=None))[0] is client
+
+        async def current():
+            return async_client._client_for_running_loop()
+
+        first = asyncio.run(current())
+        second = asyncio.run(current())
+
+        assert first is not second
+        assert first.is_closed is False
+        # 已关闭事件循环的客户端在下次分配时被丢弃
+        assert list(async_client._loop_clients.values()) == [second]
+        clear_llm_instances()
+
+
+class FakeBackendModel:
+    """可控延迟与失败的后端模型."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return f"{self.name} answer"
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return f"{self.name} answer"
+
+
+def _router(*models, **kwargs):
+    kwargs.setdefault("hedge_min_delay", 0.05)
+    kwargs.setdefault("hedge_default_delay", 0.05)
+    backends = [RouterBackend(m.name, m, CircuitBreaker(failure_threshold=2)) for m in models]
+    return LLMRouter(backends, **kwargs)
+
+
+class TestLLMRouter:
+    """LLMRouter 路由、对冲与故障转移测试."""
+
+    @pytest.fixture(autouse=True)
+    def clean_limiters(self):
+        """后端限流器互不影响."""
+        reset_rate_limiters()
+        yield
+        reset_rate_limiters()
+
+    async def test_routes_to_fastest_backend(self):
+        """测试按实时延迟选择后端."""
+        slow = FakeBackendModel("slow", delay=0.03)
+        fast = FakeBackendModel("fast", delay=0.001)
+        router = _router(slow, fast, hedge=False)
+
+        # 先各试探一次
+        await router.ainvoke("p")
+        await router.ainvoke("p")
+        for _ in range(5):
+            assert await router.ainvoke("p") == "fast answer"
+
+        assert slow.calls == 1
+        assert router.get_stats()["backends"]["fast"]["wins"] == 6
+
+    async def test_concurrent_requests_spread_over_untried_backends(self):
+        """测试启动时的并发请求分散到尚未试探的后端，而不是都涌向第一个."""
+        models = [FakeBackendModel(name, delay=0.02) for name in ("a", "b", "c")]
+        router = _router(*models, hedge=False)
+
+        await asyncio.gather(*[router.ainvoke("p") for _ in range(3)])
+
+        assert [m.calls for m in models] == [1, 1, 1]
+        assert all(b["in_flight"] == 0 for b in router.get_stats()["backends"].values())
+
+    def test_sync_concurrent_requests_spread_over_untried_backends(self):
+        """测试同步并发请求同样按在途请求数分散."""
+        models = [FakeBackendModel(name, delay=0.05) for name in ("a", "b")]
+        router = _router(*models, hedge=False)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(router.invoke, ["p", "p"]))
+
+        assert [m.calls for m in models] == [1, 1]
+        assert all(b.in_flight == 0 for b in router.backends)
+
+    async def test_hedged_request_cancels_loser(self):
+        """测试主请求超过对冲延迟时向次优后端发出请求并取消落败者."""
+        primary = FakeBackendModel("primary", delay=2)
+        secondary = FakeBackendModel("secondary", delay=0.01)
+        router = _router(primary, secondary)
+
+        start = time.monotonic()
+        result = await router.ainvoke("p")
+
+        assert result == "secondary answer"
+        assert time.monotonic() - start < 1
+        assert router.hedge_count == 1
+        await asyncio.sleep(0)
+        assert primary.cancelled == 1
+        # 被取消的请求不计入失败
+        assert router.get_stats()["backends"]["primary"]["error_rate"] == 0
+
+    async def test_failover_on_error(self):
+        """测试后端失败时故障转移."""
+        broken = FakeBackendModel("broken", fail=True)
+        healthy = FakeBackendModel("healthy")
+        router = _router(broken, healthy, hedge=False)
+
+        assert await router.ainvoke("p") == "healthy answer"
+        assert router.failover_count == 1
+
+    async def test_open_circuit_skips_backend(self):
+        """测试熔断器打开的后端不再接收请求."""
+        broken = FakeBackendModel("broken", fail=True)
+        healthy = FakeBackendModel("healthy")
+        router = _router(broken, healthy, hedge=False)
+        for _ in range(2):
+            router.backends[0].breaker.record_failure()
+
+        assert await router.ainvoke("p") == "healthy answer"
+        assert broken.calls == 0
+        assert router.failover_count == 0
+        assert router.get_stats()["backends"]["broken"]["circuit"] == "open"
+
+    async def test_all_backends_fail(self):
+        """测试所有后端失败时抛出 LLMError."""
+        router = _router(FakeBackendModel("a", fail=True), FakeBackendModel("b", fail=True), hedge=False)
+
+        with pytest.raises(LLMError, match="所有 LLM 后端调用失败"):
+            await router.ainvoke("p")
+
+    def test_sync_invoke_does_not_hedge(self):
+        """测试同步调用不发出对冲请求（运行中的线程无法取消）."""
+        primary = FakeBackendModel("primary", delay=0.2)
+        secondary = FakeBackendModel("secondary")
+        router = _router(primary, secondary)
+
+        assert router.invoke("p") == "primary answer"
+        assert router.hedge_count == 0
+        assert secondary.calls == 0
+        assert all(b.in_flight == 0 for b in router.backends)
+
+    def test_sync_invoke_fails_over(self):
+        """测试同步调用在后端失败时故障转移."""
+        broken = FakeBackendModel("broken", fail=True)
+        healthy = FakeBackendModel("healthy")
+        router = _router(broken, healthy)
+
+        assert router.invoke("p") == "healthy answer"
+        assert router.failover_count == 1
+        assert all(b.in_flight == 0 for b in router.backends)
+
+    def test_router_provider_from_settings(self):
+        """测试 get_llm("router") 按配置的后端创建路由器."""
+        clear_llm_instances()
+        original = settings.llm_router_backends
+        settings.llm_router_backends = ["ollama"]
+        try:
+            llm = get_llm("router")
+        finally:
+            settings.llm_router_backends = original
+            clear_llm_instances()
+
+        assert isinstance(llm._llm, LLMRouter)
+        assert [b.name for b in llm._llm.backends] == ["ollama"]
+        # 路由器按后端限流，外层不再套用限流器
+        assert llm._rate_limiter is None
@@ -1,5 +1,8 @@
 """LLM 缓存测试"""
 
+import pickle
+import sqlite3
+import threading
 import time
 from unittest import mock
 
@@ -9,7 +12,9 @@ from langchain_core.outputs import ChatResult, ChatGeneration
 
 from ut_agent.utils.llm_cache import (
     LLMCache,
+    LLMCacheStore,
     LLMRetryHandler,
+    _dump_result,
     CachedLLM,
     get_cached_llm,
     clear_llm_cache,
@@ -137,6 +142,180 @@ class TestLLMCache:
         assert cache.size() == 2
 
 
+def _result(content: str) -> ChatResult:
+    return ChatResult(
+        generations=[ChatGeneration(message=AIMessage(content=content))],
+        llm_output={},
+    )
+
+
+class _Exploit:
+    """反序列化时创建标记文件的对象."""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def __reduce__(self):
+        return (open, (self.path, "w"))
+
+
+class TestLLMCacheStore:
+    """测试 LLM 缓存持久化存储"""
+    
+    def test_survives_restart(self, tmp_path):
+        """测试重新创建缓存后从磁盘命中"""
+        db_path = tmp_path / "llm_cache.db"
+        cache = LLMCache(store=LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60))
+        cache.set("prompt", "openai", "gpt-4", 0.2, _result("persisted"))
+        
+        restarted = LLMCache(store=LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60))
+        assert restarted.size() == 0
+        
+        cached = restarted.get("prompt", "openai", "gpt-4", 0.2)
+        assert cached.generations[0].message.content == "persisted"
+        # 命中后回填内存层
+        assert restarted.size() == 1
+    
+    def test_lazy_creation(self, tmp_path):
+        """测试数据库在首次使用时才创建"""
+        db_path = tmp_path / "sub" / "llm_cache.db"
+        store = LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60)
+        assert not db_path.exists()
+        
+        assert store.get("missing") is None
+        assert db_path.exists()
+    
+    def test_ttl(self, tmp_path):
+        """测试过期条目被删除"""
+        store = LLMCacheStore(tmp_path / "llm_cache.db", max_size_bytes=1 << 20, ttl_seconds=60)
+        store.set("key", _result("old"))
+        
+        with mock.patch("ut_agent.utils.llm_cache.time.time", return_value=time.time() + 120):
+            assert store.get("key") is None
+        assert store.size() == 0
+    
+    def test_size_cap_evicts_least_recently_used(self, tmp_path):
+        """测试超过字节上限时淘汰最久未用的条目"""
+        entry_size = len(_dump_result(_result("a")))
+        store = LLMCacheStore(tmp_path / "llm_cache.db", max_size_bytes=entry_size * 2, ttl_seconds=60)
+        store.set("a", _result("a"))
+        store.set("b", _result("b"))
+        time.sleep(0.01)
+        assert store.get("a") is not None
+        store.set("c", _result("c"))
+        
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert store.get("c") is not None
+        assert store.size() == 2
+        assert store.size_bytes() <= entry_size * 2
+    
+    def test_overwrite_keeps_stats(self, tmp_path):
+        """测试覆盖写入时条目数与字节数保持准确"""
+        store = LLMCacheStore(tmp_path / "llm_cache.db", max_size_bytes=1 << 20, ttl_seconds=60)
+        store.set("key", _result("short"))
+        store.set("key", _result("a much longer response"))
+        
+        assert store.size() == 1
+        assert store.size_bytes() == len(_dump_result(_result("a much longer response")))
+        
+        store.clear()
+        assert store.size() == 0
+        assert store.size_bytes() == 0
+    
+    def test_unserializable_result_skipped(self, tmp_path):
+        """测试无法序列化的结果只保存在内存层"""
+        store = LLMCacheStore(tmp_path / "llm_cache.db", max_size_bytes=1 << 20, ttl_seconds=60)
+        cache = LLMCache(store=store)
+        
+        cache.set("prompt", "openai", "gpt-4", 0.2, threading.Lock())
+        
+        assert cache.get("prompt", "openai", "gpt-4", 0.2) is not None
+        assert store.size() == 0
+    
+    def test_message_round_trip(self, tmp_path):
+        """测试 AIMessage 的内容与用量经 JSON 保存后完整重建"""
+        store = LLMCacheStore(tmp_path / "llm_cache.db", max_size_bytes=1 << 20, ttl_seconds=60)
+        message = AIMessage(
+            content="answer",
+            usage_metadata={"input_tokens": 3, "output_tokens": 5, "total_tokens": 8},
+            response_metadata={"model_name": "gpt-4"},
+        )
+        store.set("key", message)
+        
+        restored = store.get("key")
+        assert isinstance(restored, AIMessage)
+        assert restored.content == "answer"
+        assert restored.usage_metadata["total_tokens"] == 8
+        assert restored.response_metadata == {"model_name": "gpt-4"}
+    
+    def test_pickled_entry_is_never_unpickled(self, tmp_path):
+        """测试数据库中的 pickle 数据不会被反序列化执行"""
+        db_path = tmp_path / "llm_cache.db"
+        store = LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60)
+        store.set("key", _result("ok"))
+        
+        marker = tmp_path / "executed"
+        payload = pickle.dumps(_Exploit(str(marker)))
+        conn = sqlite3.connect(str(db_path))
+        with conn:
+            conn.execute("UPDATE entries SET result = ? WHERE cache_key = 'key'", (payload,))
+        conn.close()
+        
+        assert store.get("key") is None
+        assert not marker.exists()
+        assert store.size() == 0
+    
+    def test_legacy_store_is_dropped(self, tmp_path):
+        """测试旧版本（pickle 格式）的数据库内容被丢弃"""
+        db_path = tmp_path / "llm_cache.db"
+        store = LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60)
+        store.set("key", _result("old"))
+        conn = sqlite3.connect(str(db_path))
+        with conn:
+            conn.execute("UPDATE meta SET value = '1' WHERE key = 'version'")
+        conn.close()
+        
+        reopened = LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60)
+        assert reopened.get("key") is None
+        assert reopened.size() == 0
+    
+    def test_concurrent_writers(self, tmp_path):
+        """测试多个线程同时写入"""
+        db_path = tmp_path / "llm_cache.db"
+        stores = [LLMCacheStore(db_path, max_size_bytes=1 << 20, ttl_seconds=60) for _ in range(4)]
+        
+        def write(index):
+            for i in range(20):
+                stores[index].set(f"{index}-{i}", _result(str(i)))
+        
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert stores[0].size() == 80
+        assert stores[0].get("3-19").generations[0].message.content == "19"
+    
+    def test_rerun_makes_no_llm_calls(self, tmp_path):
+        """测试重新运行时相同提示不再调用 LLM"""
+        db_path = tmp_path / "llm_cache.db"
+        mock_llm = mock.MagicMock()
+        mock_llm.model_name = "gpt-4"
+        mock_llm._provider = "openai"
+        mock_llm.invoke.return_value = _result("generated")
+        
+        first = CachedLLM(mock_llm, LLMCache(store=LLMCacheStore(db_path, 1 << 20, 60)))
+        first.invoke("generate tests for Foo")
+        
+        second = CachedLLM(mock_llm, LLMCache(store=LLMCacheStore(db_path, 1 << 20, 60)))
+        result = second.invoke("generate tests for Foo")
+        
+        assert result.generations[0].message.content == "generated"
+        mock_llm.invoke.assert_called_once()
+
+
 class TestLLMRetryHandler:
     """测试 LLM 重试处理器"""
     
@@ -259,6 +438,35 @@ class TestCachedLLM:
         cached = cache.get("new prompt", "openai", "gpt-4", 0.7)
         assert cached is not None
     
+    def test_string_prompts_use_distinct_keys(self):
+        """测试字符串提示按内容区分缓存"""
+        mock_llm = mock.MagicMock()
+        mock_llm.model_name = "gpt-4"
+        mock_llm._provider = "openai"
+        mock_llm.invoke.side_effect = lambda prompt, **kwargs: _result(prompt.upper())
+        
+        cached_llm = CachedLLM(mock_llm, LLMCache())
+        
+        assert cached_llm.invoke("first").generations[0].message.content == "FIRST"
+        assert cached_llm.invoke("second").generations[0].message.content == "SECOND"
+        assert mock_llm.invoke.call_count == 2
+    
+    async def test_ainvoke_shares_cache(self):
+        """测试异步调用与同步调用共享缓存"""
+        mock_llm = mock.MagicMock()
+        mock_llm.model_name = "gpt-4"
+        mock_llm._provider = "openai"
+        mock_llm.ainvoke = mock.AsyncMock(return_value=_result("async response"))
+        
+        cached_llm = CachedLLM(mock_llm, LLMCache())
+        
+        first = await cached_llm.ainvoke("prompt")
+        second = cached_llm.invoke("prompt")
+        
+        assert first is second
+        mock_llm.ainvoke.assert_awaited_once()
+        mock_llm.invoke.assert_not_called()
+    
     def test_get_cache(self):
         """测试获取缓存实例"""
         mock_llm = mock.MagicMock()
@@ -279,6 +487,36 @@ class TestGlobalFunctions:
         assert isinstance(cached_llm, CachedLLM)
         assert cached_llm._llm == mock_llm
     
+    def test_configure_llm_cache_roots_store_at_project(self, tmp_path, monkeypatch):
+        """测试持久化存储位于项目目录下，且在首次读写前不创建数据库"""
+        from ut_agent.config import settings
+        from ut_agent.utils.llm_cache import _llm_cache, configure_llm_cache
+
+        monkeypatch.setattr(settings, "llm_cache_persistent", True)
+        try:
+            configure_llm_cache(str(tmp_path))
+            store = _llm_cache.store
+            assert store.db_path == tmp_path.resolve() / ".ut-agent" / "llm_cache.db"
+            assert not store.db_path.exists()
+
+            configure_llm_cache(str(tmp_path))
+            assert _llm_cache.store is store
+
+            monkeypatch.setattr(settings, "llm_cache_persistent", False)
+            configure_llm_cache(str(tmp_path))
+            assert _llm_cache.store is None
+        finally:
+            _llm_cache.set_store(None)
+
+    def test_store_in_unwritable_location_is_skipped(self, tmp_path):
+        """测试数据库目录无法创建时只记录警告"""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        store = LLMCacheStore(blocker / "llm_cache.db", max_size_bytes=1 << 20, ttl_seconds=60)
+
+        store.set("k", "v")
+        assert store.get("k") is None
+
     def test_clear_llm_cache(self):
         """测试清空全局缓存"""
         # 先添加一些缓存
@@ -0,0 +1,163 @@
+"""向量索引测试."""
+
+import time
+
+import numpy as np
+import pytest
+
+from ut_agent.cache.semantic_cache import SemanticCache, SimilarityConfig, SimpleEmbeddingProvider
+from ut_agent.cache.vector_index import VectorIndex, VectorIndexConfig
+
+
+def _random_vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def _brute_force(vectors: np.ndarray, query: np.ndarray, k: int):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+class TestVectorIndex:
+    """VectorIndex 测试."""
+
+    def test_exact_search_matches_brute_force(self):
+        """测试精确检索结果与暴力计算一致."""
+        vectors = _random_vectors(200)
+        index = VectorIndex()
+        for i, vector in enumerate(vectors):
+            index.add(i, vector)
+
+        query = _random_vectors(1, seed=1)[0]
+        results = index.search(query, k=5)
+
+        assert not index.is_approximate
+        assert [key for key, _ in results] == _brute_force(vectors, query, 5)
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_self_similarity(self):
+        """测试向量与自身的相似度为 1."""
+        index = VectorIndex()
+        index.add("a", np.array([3.0, 4.0]))
+
+        [(key, score)] = index.search(np.array([6.0, 8.0]))
+
+        assert key == "a"
+        assert score == pytest.approx(1.0, abs=1e-6)
+
+    def test_replace_existing_key(self):
+        """测试相同键覆盖旧向量."""
+        index = VectorIndex()
+        index.add("a", np.array([1.0, 0.0]))
+        index.add("a", np.array([0.0, 1.0]))
+
+        assert len(index) == 1
+        assert index.search(np.array([0.0, 1.0]))[0][1] == pytest.approx(1.0)
+
+    def test_remove_moves_last_row(self):
+        """测试删除后末行补位，其余键仍可检索."""
+        vectors = _random_vectors(50)
+        index = VectorIndex()
+        for i, vector in enumerate(vectors):
+            index.add(i, vector)
+
+        assert index.remove(3)
+        assert not index.remove(3)
+        assert len(index) == 49
+        assert 3 not in index
+        assert index.search(vectors[49], k=1)[0][0] == 49
+        assert index.search(vectors[3], k=1)[0][0] != 3
+
+    def test_dimension_mismatch(self):
+        """测试维度不一致时报错."""
+        index = VectorIndex()
+        index.add("a", np.ones(4))
+
+        with pytest.raises(ValueError):
+            index.add("b", np.ones(5))
+
+    def test_switches_to_ivf_above_threshold(self):
+        """测试超过阈值后切换为 IVF，删减到阈值一半以下后恢复精确检索."""
+        vectors = _random_vectors(400)
+        index = VectorIndex(VectorIndexConfig(ann_threshold=300))
+        for i, vector in enumerate(vectors):
+            index.add(i, vector)
+
+        assert index.is_approximate
+        for i in range(300):
+            index.remove(i)
+        assert not index.is_approximate
+        assert index.search(vectors[350], k=1)[0][0] == 350
+
+    def test_ivf_recall(self):
+        """测试 IVF 检索对聚簇数据的召回率."""
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((50, 64))
+        clustered = centers[rng.integers(0, 50, 5000)]
+        vectors = (clustered + 0.3 * rng.standard_normal((5000, 64))).astype(np.float32)
+        index = VectorIndex(VectorIndexConfig(ann_threshold=1000, nprobe=8))
+        for i, vector in enumerate(vectors):
+            index.add(i, vector)
+
+        queries = vectors[rng.choice(5000, 100, replace=False)]
+        queries = queries + 0.05 * rng.standard_normal((100, 64))
+        hits = sum(
+            index.search(query, k=1)[0][0] == _brute_force(vectors, query, 1)[0]
+            for query in queries
+        )
+
+        assert index.is_approximate
+        assert hits >= 95
+
+    def test_large_index_lookup_latency(self):
+        """测试 10 万条目时单次检索延迟."""
+        vectors = _random_vectors(100_000, dim=64)
+        index = VectorIndex()
+        for i, vector in enumerate(vectors):
+            index.add(i, vector)
+
+        query = vectors[12345]
+        index.search(query)
+        start = time.perf_counter()
+        for _ in range(100):
+            result = index.search(query)
+        elapsed = (time.perf_counter() - start) / 100
+
+        assert result[0][0] == 12345
+        # 宽松上限，避免在繁忙的 CI 机器上抖动
+        assert elapsed < 0.01
+
+
+class TestSemanticCacheIndex:
+    """SemanticCache 使用向量索引测试."""
+
+    async def test_eviction_and_delete_update_index(self):
+        """测试淘汰与删除同步更新索引."""
+        cache = SemanticCache(SimpleEmbeddingProvider(), max_size=2)
+        await cache.store("first query", "1")
+        await cache.store("second query", "2")
+        await cache.store("third query", "3")
+
+        assert len(cache._index) == 2
+        assert await cache.delete("third query")
+        assert len(cache._index) == 1
+        await cache.clear()
+        assert len(cache._index) == 0
+        assert await cache.retrieve("third query") is None
+
+    async def test_retrieve_with_ann_index(self):
+        """测试近似索引模式下检索."""
+        cache = SemanticCache(
+            SimpleEmbeddingProvider(),
+            max_size=1000,
+            config=SimilarityConfig(ann_threshold=50),
+        )
+        for i in range(100):
+            await cache.store(f"how to test method number {i}", f"answer {i}")
+
+        result = await cache.retrieve("how to test method number 42")
+
+        assert cache._index.is_approximate
+        assert result["response"] == "answer 42"